@@ -24,6 +24,7 @@ from debtcollector import removals
 from neutron_lib import exceptions
 from oslo_config import cfg
 from oslo_log import log as logging
+from ovsdbapp import exceptions as ovsdb_exc
 import six
 import tenacity
 
@@ -172,6 +173,10 @@ class BaseOVS(object):
         return self.ovsdb.db_get(table, record, column).execute(
             check_error=check_error, log_errors=log_errors)
 
+    def ovsdb_batch(self, check_error=False, log_errors=True):
+        return OVSDBBatch(self, check_error=check_error,
+                          log_errors=log_errors)
+
     @property
     def config(self):
         """A dict containing the only row from the root Open_vSwitch table
@@ -324,6 +329,37 @@ class OVSBridge(BaseOVS):
                           port_name)
         return ofport
 
+    def _get_pending_ports_ofport(self, ofports):
+        pending = [name for name, ofport in ofports.items() if ofport is None]
+        for port in self.get_ports_attributes(
+                'Interface', columns=['name', 'ofport'], ports=pending,
+                if_exists=True):
+            if not _ovsdb_result_pending(port['ofport']):
+                ofports[port['name']] = port['ofport']
+        return [name for name in pending if ofports[name] is None]
+
+    def get_ports_ofport(self, port_names):
+        """Get the ports' assigned ofports, retrying if not yet assigned.
+
+        The ofports of all the ports still waiting for one are read with a
+        single query, the ports not assigned an ofport in time are mapped to
+        INVALID_OFPORT.
+        """
+        ofports = dict.fromkeys(port_names)
+        try:
+            tenacity.retry(
+                reraise=True,
+                retry=tenacity.retry_if_result(bool),
+                wait=tenacity.wait_exponential(multiplier=0.01, max=1),
+                stop=tenacity.stop_after_delay(self.vsctl_timeout))(
+                    self._get_pending_ports_ofport)(ofports)
+        except tenacity.RetryError:
+            LOG.exception(_LE("Timed out retrieving ofport on ports %s."),
+                          sorted(name for name, ofport in ofports.items()
+                                 if ofport is None))
+        return dict((name, INVALID_OFPORT if ofport is None else ofport)
+                    for name, ofport in ofports.items())
+
     def get_port_external_ids(self, port_name):
         """Get the port's assigned ofport, retrying if not yet assigned."""
         port_external_ids = dict()
@@ -439,6 +475,34 @@ class OVSBridge(BaseOVS):
                         vxlan_udp_port=p_const.VXLAN_UDP_PORT,
                         dont_fragment=True,
                         tunnel_csum=False):
+        attrs = self._get_tunnel_port_attrs(remote_ip, local_ip, tunnel_type,
+                                            vxlan_udp_port, dont_fragment,
+                                            tunnel_csum)
+        return self.add_port(port_name, *attrs)
+
+    def add_tunnel_ports(self, tunnel_ports, local_ip,
+                         tunnel_type=p_const.TYPE_GRE,
+                         vxlan_udp_port=p_const.VXLAN_UDP_PORT,
+                         dont_fragment=True,
+                         tunnel_csum=False):
+        """Add tunnel ports with a single OVSDB transaction.
+
+        Unlike add_tunnel_port, this doesn't wait for the ofports to be
+        assigned, get_ports_ofport can then resolve them all at once.
+
+        :param tunnel_ports: a dict mapping the port names to the remote IPs
+        """
+        with self.ovsdb.transaction() as txn:
+            for port_name, remote_ip in tunnel_ports.items():
+                attrs = self._get_tunnel_port_attrs(
+                    remote_ip, local_ip, tunnel_type, vxlan_udp_port,
+                    dont_fragment, tunnel_csum)
+                txn.add(self.ovsdb.add_port(self.br_name, port_name))
+                txn.add(self.ovsdb.db_set('Interface', port_name, *attrs))
+
+    @staticmethod
+    def _get_tunnel_port_attrs(remote_ip, local_ip, tunnel_type,
+                               vxlan_udp_port, dont_fragment, tunnel_csum):
         attrs = [('type', tunnel_type)]
         # TODO(twilson) This is an OrderedDict solely to make a test happy
         options = collections.OrderedDict()
@@ -456,8 +520,7 @@ class OVSBridge(BaseOVS):
         if tunnel_csum:
             options['csum'] = str(tunnel_csum).lower()
         attrs.append(('options', options))
-
-        return self.add_port(port_name, *attrs)
+        return attrs
 
     def add_patch_port(self, local_name, remote_name):
         attrs = [('type', 'patch'),
@@ -841,6 +904,158 @@ class DeferredOVSBridge(object):
                           self.br.br_name)
 
 
+class OVSDBBatchResult(object):
+    """The result of an operation queued in an OVSDBBatch.
+
+    Like a future, the result is only available once the batch has been
+    executed. The result of an operation made of several commands is the
+    list of their results.
+    """
+
+    def __init__(self, commands, parser=None):
+        self.commands = commands
+        self._parser = parser
+        self._done = False
+        self._result = None
+        self._exception = None
+
+    def done(self):
+        return self._done
+
+    def result(self):
+        """Return the result, raising the error if the operation failed."""
+        if self.exception() is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self):
+        if not self._done:
+            raise RuntimeError(_("The OVSDB batch has not been executed"))
+        return self._exception
+
+    def set_done(self):
+        results = [cmd.result for cmd in self.commands]
+        if self._parser:
+            self._result = self._parser(results)
+        elif len(results) == 1:
+            self._result = results[0]
+        else:
+            self._result = results
+        self._done = True
+
+    def set_exception(self, exception):
+        self._exception = exception
+        self._done = True
+
+
+class OVSDBBatch(object):
+    '''Batch of OVSDB operations.
+
+    This class queues OVSDB reads and writes and executes all of them in a
+    single OVSDB transaction, that is a single ovs-vsctl call with the vsctl
+    interface or a single round trip to the OVSDB server with the native
+    one. Each queued operation returns an OVSDBBatchResult.
+    An OVSDB transaction is atomic, if it fails, e.g. because one of the
+    records was deleted meanwhile, the operations are executed again one by
+    one so that a single failure does not prevent the other operations from
+    being applied, like when they are executed separately. The errors are
+    then stored in the results, and the first one is raised if check_error
+    is True.
+    This class can be used as a context, in such case execute is called on
+    __exit__ except if an exception is raised. It must not be used inside
+    another OVSDB transaction.
+    '''
+
+    def __init__(self, ovs, check_error=False, log_errors=True):
+        self.ovs = ovs
+        self.check_error = check_error
+        self.log_errors = log_errors
+        self.operations = []
+
+    def add(self, *commands):
+        """Queue OVSDB commands to be executed in the same transaction."""
+        return self._add(commands)
+
+    def _add(self, commands, parser=None):
+        operation = OVSDBBatchResult(list(commands), parser=parser)
+        self.operations.append(operation)
+        return operation
+
+    def set_db_attribute(self, table_name, record, column, value):
+        return self.add(
+            self.ovs.ovsdb.db_set(table_name, record, (column, value)))
+
+    def clear_db_attribute(self, table_name, record, column):
+        return self.add(self.ovs.ovsdb.db_clear(table_name, record, column))
+
+    def db_get_val(self, table, record, column):
+        return self.add(self.ovs.ovsdb.db_get(table, record, column))
+
+    def get_ports_attributes(self, table, columns=None, ports=None,
+                             if_exists=False):
+        port_names = ports or self.ovs.get_port_name_list()
+        if not port_names:
+            return self._add([], parser=lambda results: [])
+        return self.add(self.ovs.ovsdb.db_list(
+            table, port_names, columns=columns, if_exists=if_exists))
+
+    def _execute_operation(self, operation, check_error, log_errors):
+        if operation.commands:
+            with self.ovs.ovsdb.transaction(
+                    check_error=check_error, log_errors=log_errors) as txn:
+                for cmd in operation.commands:
+                    txn.add(cmd)
+        operation.set_done()
+
+    def execute(self):
+        operations = self.operations
+        self.operations = []
+        if not operations:
+            return
+        if len(operations) > 1:
+            try:
+                with self.ovs.ovsdb.transaction(check_error=True,
+                                                log_errors=False) as txn:
+                    for operation in operations:
+                        for cmd in operation.commands:
+                            txn.add(cmd)
+            except ovsdb_exc.TimeoutException as e:
+                # NOTE: executing the operations one by one would wait for
+                # the timeout of each of them
+                for operation in operations:
+                    operation.set_exception(e)
+                if self.log_errors:
+                    LOG.error(_LE("Timed out executing a batch of %d OVSDB "
+                                  "operations"), len(operations))
+                if self.check_error:
+                    raise
+                return
+            except Exception as e:
+                LOG.debug("Batch of %(count)d OVSDB operations failed, "
+                          "executing them one by one: %(error)s",
+                          {'count': len(operations), 'error': e})
+            else:
+                for operation in operations:
+                    operation.set_done()
+                return
+        errors = []
+        for operation in operations:
+            try:
+                self._execute_operation(operation, True, self.log_errors)
+            except Exception as e:
+                operation.set_exception(e)
+                errors.append(e)
+        if errors and self.check_error:
+            raise errors[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+
+
 def _build_flow_expr_str(flow_dict, cmd, strict):
     flow_expr_arr = []
     actions = None
@@ -77,7 +77,10 @@ class DhcpAgent(manager.Manager):
     client side to execute the methods here.  For more information about
     changing rpc interfaces, see doc/source/devref/rpc_api.rst.
     """
-    target = oslo_messaging.Target(version='1.0')
+    # API version history:
+    #     1.0 - Initial version.
+    #     1.1 - Added ports_update_end and ports_delete_end.
+    target = oslo_messaging.Target(version='1.1')
 
     def __init__(self, host=None, conf=None):
         super(DhcpAgent, self).__init__(host=host)
@@ -411,33 +414,78 @@ class DhcpAgent(manager.Manager):
             network = self.cache.get_network_by_id(updated_port.network_id)
             if not network:
                 return
-            LOG.info(_LI("Trigger reload_allocations for port %s"),
-                     updated_port)
-            driver_action = 'reload_allocations'
-            if self._is_port_on_this_agent(updated_port):
-                orig = self.cache.get_port_by_id(updated_port['id'])
-                # assume IP change if not in cache
-                orig = orig or {'fixed_ips': []}
-                old_ips = {i['ip_address'] for i in orig['fixed_ips'] or []}
-                new_ips = {i['ip_address'] for i in updated_port['fixed_ips']}
-                old_subs = {i['subnet_id'] for i in orig['fixed_ips'] or []}
-                new_subs = {i['subnet_id'] for i in updated_port['fixed_ips']}
-                if new_subs != old_subs:
-                    # subnets being serviced by port have changed, this could
-                    # indicate a subnet_delete is in progress. schedule a
-                    # resync rather than an immediate restart so we don't
-                    # attempt to re-allocate IPs at the same time the server
-                    # is deleting them.
-                    self.schedule_resync("Agent port was modified",
-                                         updated_port.network_id)
-                    return
-                elif old_ips != new_ips:
-                    LOG.debug("Agent IPs on network %s changed from %s to %s",
-                              network.id, old_ips, new_ips)
-                    driver_action = 'restart'
-            self.cache.put_port(updated_port)
-            self.call_driver(driver_action, network)
-            self.dhcp_ready_ports.add(updated_port.id)
+            driver_action = self._update_port(network, updated_port)
+            if driver_action:
+                self.call_driver(driver_action, network)
+                self.dhcp_ready_ports.add(updated_port.id)
+
+    def _update_port(self, network, updated_port):
+        """Put the updated port in the cache.
+
+        Return the driver action required by the update, None if a resync of
+        the network was scheduled instead.
+        """
+        LOG.info(_LI("Trigger reload_allocations for port %s"),
+                 updated_port)
+        driver_action = 'reload_allocations'
+        if self._is_port_on_this_agent(updated_port):
+            orig = self.cache.get_port_by_id(updated_port['id'])
+            # assume IP change if not in cache
+            orig = orig or {'fixed_ips': []}
+            old_ips = {i['ip_address'] for i in orig['fixed_ips'] or []}
+            new_ips = {i['ip_address'] for i in updated_port['fixed_ips']}
+            old_subs = {i['subnet_id'] for i in orig['fixed_ips'] or []}
+            new_subs = {i['subnet_id'] for i in updated_port['fixed_ips']}
+            if new_subs != old_subs:
+                # subnets being serviced by port have changed, this could
+                # indicate a subnet_delete is in progress. schedule a
+                # resync rather than an immediate restart so we don't
+                # attempt to re-allocate IPs at the same time the server
+                # is deleting them.
+                self.schedule_resync("Agent port was modified",
+                                     updated_port.network_id)
+                return
+            elif old_ips != new_ips:
+                LOG.debug("Agent IPs on network %s changed from %s to %s",
+                          network.id, old_ips, new_ips)
+                driver_action = 'restart'
+        self.cache.put_port(updated_port)
+        return driver_action
+
+    @_wait_if_syncing
+    def ports_update_end(self, context, payload):
+        """Handle a batch of port.create.end and port.update.end events.
+
+        The driver is called once per network, with the strongest of the
+        actions required by the updates of its ports.
+        """
+        ports_by_network = collections.OrderedDict()
+        for port in payload['ports']:
+            ports_by_network.setdefault(port['network_id'], []).append(port)
+        for network_id, ports in ports_by_network.items():
+            with _net_lock(network_id):
+                network = self.cache.get_network_by_id(network_id)
+                if not network:
+                    continue
+                driver_actions = set()
+                updated_port_ids = []
+                for port in ports:
+                    updated_port = dhcp.DictModel(port)
+                    if self.cache.is_port_message_stale(port):
+                        LOG.debug("Discarding stale port update: %s",
+                                  updated_port)
+                        continue
+                    driver_action = self._update_port(network, updated_port)
+                    if driver_action:
+                        driver_actions.add(driver_action)
+                        updated_port_ids.append(updated_port.id)
+                if not driver_actions:
+                    continue
+                if 'restart' in driver_actions:
+                    self.call_driver('restart', network)
+                else:
+                    self.call_driver('reload_allocations', network)
+                self.dhcp_ready_ports.update(updated_port_ids)
 
     def _is_port_on_this_agent(self, port):
         thishost = utils.get_dhcp_agent_device_id(
@@ -469,6 +517,42 @@ class DhcpAgent(manager.Manager):
             else:
                 self.call_driver('reload_allocations', network)
 
+    @_wait_if_syncing
+    def ports_delete_end(self, context, payload):
+        """Handle a batch of port.delete.end events.
+
+        The driver is called once per network.
+        """
+        port_ids_by_network = collections.OrderedDict()
+        for port_id in payload['port_ids']:
+            port = self.cache.get_port_by_id(port_id)
+            self.cache.deleted_ports.add(port_id)
+            if port:
+                port_ids_by_network.setdefault(port.network_id, []).append(
+                    port_id)
+        for network_id, port_ids in port_ids_by_network.items():
+            with _net_lock(network_id):
+                network = self.cache.get_network_by_id(network_id)
+                agent_port_deleted = False
+                reload_required = False
+                for port_id in port_ids:
+                    port = self.cache.get_port_by_id(port_id)
+                    if not port:
+                        continue
+                    self.cache.remove_port(port)
+                    if self._is_port_on_this_agent(port):
+                        agent_port_deleted = True
+                    else:
+                        reload_required = True
+                if agent_port_deleted:
+                    # the agent's port has been deleted. disable the service
+                    # and add the network to the resync list to create
+                    # (or acquire a reserved) port.
+                    self.call_driver('disable', network)
+                    self.schedule_resync("Agent port was deleted", network_id)
+                elif reload_required:
+                    self.call_driver('reload_allocations', network)
+
     def update_isolated_metadata_proxy(self, network):
         """Spawn or kill metadata proxy.
 
@@ -716,7 +800,8 @@ class DhcpAgentWithStateReport(DhcpAgent):
             'configurations': {
                 'dhcp_driver': self.conf.dhcp_driver,
                 'dhcp_lease_duration': self.conf.dhcp_lease_duration,
-                'log_agent_heartbeats': self.conf.AGENT.log_agent_heartbeats},
+                'log_agent_heartbeats': self.conf.AGENT.log_agent_heartbeats,
+                n_const.BATCHED_PORT_NOTIFICATIONS: True},
             'start_flag': True,
             'agent_type': constants.AGENT_TYPE_DHCP}
         report_interval = self.conf.AGENT.report_interval
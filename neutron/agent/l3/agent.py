@@ -536,7 +536,7 @@ class L3NATAgent(ha.AgentMixin,
 
     def _process_routers_loop(self):
         LOG.debug("Starting _process_routers_loop")
-        pool = eventlet.GreenPool(size=8)
+        pool = eventlet.GreenPool(size=self.conf.router_processing_workers)
         while True:
             pool.spawn_n(self._process_router_update)
 
@@ -701,6 +701,8 @@ class L3NATAgentWithStateReport(L3NATAgent):
         num_ex_gw_ports = 0
         num_interfaces = 0
         num_floating_ips = 0
+        num_keepalived_reloads = 0
+        num_keepalived_suppressed_reloads = 0
         router_infos = self.router_info.values()
         num_routers = len(router_infos)
         for ri in router_infos:
@@ -711,11 +713,20 @@ class L3NATAgentWithStateReport(L3NATAgent):
                                                 []))
             num_floating_ips += len(ri.router.get(lib_const.FLOATINGIP_KEY,
                                                   []))
+            if (isinstance(ri, ha_router.HaRouter) and
+                    ri.keepalived_manager):
+                num_keepalived_reloads += ri.keepalived_manager.reload_count
+                num_keepalived_suppressed_reloads += (
+                    ri.keepalived_manager.suppressed_reload_count)
         configurations = self.agent_state['configurations']
         configurations['routers'] = num_routers
         configurations['ex_gw_ports'] = num_ex_gw_ports
         configurations['interfaces'] = num_interfaces
         configurations['floating_ips'] = num_floating_ips
+        configurations['router_queue_depth'] = self._queue.get_queue_depth()
+        configurations['keepalived_reloads'] = num_keepalived_reloads
+        configurations['keepalived_suppressed_reloads'] = (
+            num_keepalived_suppressed_reloads)
         try:
             agent_status = self.state_rpc.report_state(self.context,
                                                        self.agent_state,
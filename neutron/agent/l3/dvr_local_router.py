@@ -177,8 +177,21 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
     def _process_arp_cache_for_internal_port(self, subnet_id):
         """Function to process the cached arp entries."""
         arp_remove = set()
+        arp_add = [arp_entry for arp_entry in self._pending_arp_set
+                   if (subnet_id == arp_entry.subnet_id and
+                       arp_entry.operation == 'add')]
+        if arp_add:
+            try:
+                state = self._update_arp_entries(
+                    [(arp_entry.ip, arp_entry.mac) for arp_entry in arp_add],
+                    subnet_id)
+            except Exception:
+                state = False
+            if state:
+                arp_remove.update(arp_add)
         for arp_entry in self._pending_arp_set:
-            if subnet_id == arp_entry.subnet_id:
+            if (subnet_id == arp_entry.subnet_id and
+                    arp_entry.operation != 'add'):
                 try:
                     state = self._update_arp_entry(
                         arp_entry.ip, arp_entry.mac,
@@ -208,7 +221,6 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
             return False
 
         try:
-            # TODO(mrsmith): optimize the calls below for bulk calls
             interface_name = self.get_internal_device_name(port['id'])
             device = ip_lib.IPDevice(interface_name, namespace=self.ns_name)
             if device.exists():
@@ -230,19 +242,54 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
             with excutils.save_and_reraise_exception():
                 LOG.exception(_LE("DVR: Failed updating arp entry"))
 
+    def _update_arp_entries(self, entries, subnet_id):
+        """Add a set of arp entries into router namespace for the subnet.
+
+        The entries are programmed with a single privileged call which only
+        writes the ones not already present in the neighbour table.
+
+        :param entries: list of (ip_address, mac_address) tuples
+        """
+        port = self._get_internal_port(subnet_id)
+        # update arp entries only if the subnet is attached to the router
+        if not port:
+            return False
+
+        try:
+            interface_name = self.get_internal_device_name(port['id'])
+            device = ip_lib.IPDevice(interface_name, namespace=self.ns_name)
+            if device.exists():
+                written = device.neigh.add_entries(entries)
+                LOG.debug("DVR: %(written)s of %(total)s arp entries written "
+                          "for subnet %(subnet)s",
+                          {'written': written, 'total': len(entries),
+                           'subnet': subnet_id})
+                return True
+            LOG.warning(_LW("Device %s does not exist so ARP entries "
+                            "cannot be updated, will cache information "
+                            "to be applied later when the device exists"),
+                        device)
+            for ip, mac in entries:
+                self._cache_arp_entry(ip, mac, subnet_id, 'add')
+            return False
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                LOG.exception(_LE("DVR: Failed updating arp entries"))
+
     def _set_subnet_arp_info(self, subnet_id):
         """Set ARP info retrieved from Plugin for existing ports."""
         # TODO(Carl) Can we eliminate the need to make this RPC while
         # processing a router.
         subnet_ports = self.agent.get_ports_by_subnet(subnet_id)
 
+        entries = []
         for p in subnet_ports:
             if p['device_owner'] not in lib_constants.ROUTER_INTERFACE_OWNERS:
                 for fixed_ip in p['fixed_ips']:
-                    self._update_arp_entry(fixed_ip['ip_address'],
-                                           p['mac_address'],
-                                           subnet_id,
-                                           'add')
+                    entries.append((fixed_ip['ip_address'],
+                                    p['mac_address']))
+        if entries:
+            self._update_arp_entries(entries, subnet_id)
         self._process_arp_cache_for_internal_port(subnet_id)
 
     @staticmethod
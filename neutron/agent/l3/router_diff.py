@@ -0,0 +1,106 @@
+# Copyright (c) 2017 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from neutron_lib import constants as lib_constants
+
+# Router keys with a dedicated handler in RouterInfo.process; a change to any
+# other key of the router dict makes the router go through the full path.
+GW_PORT_KEY = 'gw_port'
+ROUTES_KEY = 'routes'
+ENABLE_SNAT_KEY = 'enable_snat'
+TRACKED_KEYS = frozenset([lib_constants.INTERFACE_KEY,
+                          lib_constants.FLOATINGIP_KEY,
+                          GW_PORT_KEY,
+                          ROUTES_KEY,
+                          ENABLE_SNAT_KEY])
+
+
+def _diff_resources_by_id(old_resources, new_resources):
+    """Return the (added, removed, updated) ids between two resource lists."""
+    old_by_id = {r['id']: r for r in old_resources or []}
+    new_by_id = {r['id']: r for r in new_resources or []}
+    added = set(new_by_id) - set(old_by_id)
+    removed = set(old_by_id) - set(new_by_id)
+    updated = set(r_id for r_id in set(old_by_id) & set(new_by_id)
+                  if old_by_id[r_id] != new_by_id[r_id])
+    return added, removed, updated
+
+
+class RouterDiff(object):
+    """Structured difference between two versions of a router dict.
+
+    The router dicts are the ones received from the server through
+    get_routers/sync_routers.  Internal ports and floating IPs are compared
+    by id, the gateway port, the SNAT flag and the static routes as a whole,
+    and every other key of the router is only checked for equality.
+    """
+
+    def __init__(self, old_router, new_router):
+        (self.ports_added,
+         self.ports_removed,
+         self.ports_updated) = _diff_resources_by_id(
+            old_router.get(lib_constants.INTERFACE_KEY),
+            new_router.get(lib_constants.INTERFACE_KEY))
+        (self.floating_ips_added,
+         self.floating_ips_removed,
+         self.floating_ips_updated) = _diff_resources_by_id(
+            old_router.get(lib_constants.FLOATINGIP_KEY),
+            new_router.get(lib_constants.FLOATINGIP_KEY))
+        self.gateway_changed = (
+            old_router.get(GW_PORT_KEY) != new_router.get(GW_PORT_KEY) or
+            old_router.get(ENABLE_SNAT_KEY, True) !=
+            new_router.get(ENABLE_SNAT_KEY, True))
+        self.routes_changed = (old_router.get(ROUTES_KEY, []) !=
+                               new_router.get(ROUTES_KEY, []))
+        self.other_keys_changed = set(
+            key for key in (set(old_router) | set(new_router)) - TRACKED_KEYS
+            if old_router.get(key) != new_router.get(key))
+
+    @property
+    def internal_ports_changed(self):
+        return bool(self.ports_added or self.ports_removed or
+                    self.ports_updated)
+
+    @property
+    def floating_ips_changed(self):
+        return bool(self.floating_ips_added or self.floating_ips_removed or
+                    self.floating_ips_updated)
+
+    @property
+    def requires_full_processing(self):
+        """Whether the change can't be limited to the FIP or route handlers.
+
+        Internal ports and the gateway feed the NAT, address scope and
+        prefix delegation processing, and the remaining keys are consumed
+        by the router subclasses, so any change to them runs every handler.
+        """
+        return bool(self.other_keys_changed or self.gateway_changed or
+                    self.internal_ports_changed)
+
+    @property
+    def is_empty(self):
+        return not (self.requires_full_processing or
+                    self.floating_ips_changed or self.routes_changed)
+
+    def __str__(self):
+        return ('ports added=%s removed=%s updated=%s, '
+                'floating IPs added=%s removed=%s updated=%s, '
+                'gateway changed=%s, routes changed=%s, other keys=%s' % (
+                    sorted(self.ports_added), sorted(self.ports_removed),
+                    sorted(self.ports_updated),
+                    sorted(self.floating_ips_added),
+                    sorted(self.floating_ips_removed),
+                    sorted(self.floating_ips_updated),
+                    self.gateway_changed, self.routes_changed,
+                    sorted(self.other_keys_changed)))
@@ -13,14 +13,17 @@
 #    under the License.
 
 import collections
+import copy
 
 import netaddr
 from neutron_lib import constants as lib_constants
 from neutron_lib.utils import helpers
 from oslo_log import log as logging
+from oslo_utils import excutils
 
 from neutron._i18n import _, _LE, _LW
 from neutron.agent.l3 import namespaces
+from neutron.agent.l3 import router_diff
 from neutron.agent.linux import ip_lib
 from neutron.agent.linux import iptables_manager
 from neutron.agent.linux import ra
@@ -58,6 +61,9 @@ class RouterInfo(object):
         self.internal_ports = []
         self.pd_subnets = {}
         self.floating_ips = set()
+        # Copy of the router dict as of the last successful process() call,
+        # used to only run the handlers of the sub-resources that changed.
+        self._processed_router = None
         # Invoke the setter for establishing initial SNAT action
         self.router = router
         self.use_ipv6 = use_ipv6
@@ -1099,16 +1105,12 @@ class RouterInfo(object):
             LOG.warning(_LW("Can't gracefully delete the router %s: "
                             "no router namespace found."), self.router['id'])
 
-    @common_utils.exception_logger()
-    def process(self):
-        """Process updates to this router
+    def _get_router_diff(self):
+        if self._processed_router is None:
+            return None
+        return router_diff.RouterDiff(self._processed_router, self.router)
 
-        This method is the point where the agent requests that updates be
-        applied to this router.
-
-        :param agent: Passes the agent in order to send RPC messages.
-        """
-        LOG.debug("process router updates")
+    def _process_all(self):
         self._process_internal_ports()
         self.agent.pd.sync_router(self.router['id'])
         self.process_external()
@@ -1119,6 +1121,47 @@ class RouterInfo(object):
 
         # Update ex_gw_port on the router info cache
         self.ex_gw_port = self.get_ex_gw_port()
+
+    def _process_diff(self, diff):
+        if diff.floating_ips_changed:
+            # Only the floating IP address scope rules depend on the floating
+            # IPs, stage them in memory so that they are applied along with
+            # the NAT rules in the single iptables apply of process_external.
+            self.process_floating_ip_address_scope_rules()
+            self.process_external()
+        if diff.routes_changed:
+            self.routes_updated(self.routes, self.router['routes'])
+            self.routes = self.router['routes']
+
+    @common_utils.exception_logger()
+    def process(self):
+        """Process updates to this router
+
+        This method is the point where the agent requests that updates be
+        applied to this router.  Once the router has been processed, only the
+        handlers of the sub-resources which changed since the last successful
+        call are run.
+
+        :param agent: Passes the agent in order to send RPC messages.
+        """
+        LOG.debug("process router updates")
+        diff = self._get_router_diff()
+        try:
+            if diff is None or diff.requires_full_processing:
+                self._process_all()
+            elif diff.is_empty:
+                LOG.debug("No changes to process for router %s",
+                          self.router_id)
+            else:
+                LOG.debug("Processing changes for router %(id)s: %(diff)s",
+                          {'id': self.router_id, 'diff': diff})
+                self._process_diff(diff)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                # Part of the update may have been applied, walk all the
+                # sub-resources again on the next call.
+                self._processed_router = None
         self.fip_map = dict([(fip['floating_ip_address'],
                               fip['fixed_ip_address'])
                              for fip in self.get_floating_ips()])
+        self._processed_router = copy.deepcopy(self.router)
@@ -145,6 +145,10 @@ class RouterProcessingQueue(object):
     def add(self, update):
         self._queue.put(update)
 
+    def get_queue_depth(self):
+        """Returns the number of updates waiting for a worker"""
+        return self._queue.qsize()
+
     def each_update_to_next_router(self):
         """Grabs the next router from the queue and processes
 
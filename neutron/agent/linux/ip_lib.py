@@ -836,6 +836,12 @@ class IpNeighCommand(IpDeviceCommandBase):
                         self._parent.namespace,
                         **kwargs)
 
+    def add_entries(self, entries, **kwargs):
+        return add_neigh_entries(entries,
+                                 self.name,
+                                 self._parent.namespace,
+                                 **kwargs)
+
     def delete(self, ip_address, mac_address, **kwargs):
         delete_neigh_entry(ip_address,
                            mac_address,
@@ -994,6 +1000,29 @@ def add_neigh_entry(ip_address, mac_address, device, namespace=None, **kwargs):
                                **kwargs)
 
 
+def add_neigh_entries(entries, device, namespace=None, **kwargs):
+    """Add several permanent neighbour entries in one privileged call.
+
+    Entries already present in the neighbour table of the device are not
+    rewritten.
+
+    :param entries: iterable of (ip_address, mac_address) tuples
+    :param device: Device name to use in adding entries
+    :param namespace: The name of the namespace in which to add the entries
+    :return: the number of entries written
+    """
+    entries = [(common_utils.get_ip_version(ip_address),
+                ip_address,
+                mac_address)
+               for ip_address, mac_address in entries]
+    if not entries:
+        return 0
+    return privileged.add_neigh_entries(entries,
+                                        device,
+                                        namespace,
+                                        **kwargs)
+
+
 def delete_neigh_entry(ip_address, mac_address, device, namespace=None,
                        **kwargs):
     """Delete a neighbour entry.
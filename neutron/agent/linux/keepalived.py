@@ -373,6 +373,11 @@ class KeepalivedManager(object):
         self.namespace = namespace
         self.process_monitor = process_monitor
         self.conf_path = conf_path
+        # Configuration last handed to the running keepalived, used to skip
+        # reloads which wouldn't change anything.
+        self._applied_config = None
+        self.reload_count = 0
+        self.suppressed_reload_count = 0
         # configure throttler for spawn to introduce delay between SIGHUPs,
         # otherwise keepalived master may unnecessarily flip to slave
         if throttle_restart_value is not None:
@@ -380,7 +385,7 @@ class KeepalivedManager(object):
 
     #pylint: disable=method-hidden
     def _throttle_spawn(self, threshold):
-        self.spawn = utils.throttler(threshold)(self.spawn)
+        self._apply_config = utils.throttler(threshold)(self._apply_config)
 
     def get_conf_dir(self):
         confs_dir = os.path.abspath(os.path.normpath(self.conf_path))
@@ -393,8 +398,9 @@ class KeepalivedManager(object):
             fileutils.ensure_tree(conf_dir, mode=0o755)
         return os.path.join(conf_dir, filename)
 
-    def _output_config_file(self):
-        config_str = self.config.get_config_str()
+    def _output_config_file(self, config_str=None):
+        if config_str is None:
+            config_str = self.config.get_config_str()
         config_path = self.get_full_config_file_path('keepalived.conf')
         file_utils.replace_file(config_path, config_str)
 
@@ -421,21 +427,70 @@ class KeepalivedManager(object):
             if e.errno != errno.ENOENT:
                 raise
 
-    def spawn(self):
-        config_path = self._output_config_file()
+    def _is_config_applied(self, config_str, keepalived_pm):
+        if not keepalived_pm.active:
+            return False
+        if self._applied_config is None:
+            # The agent restarted while keepalived kept running, the
+            # configuration on disk is the one keepalived is using.
+            self._applied_config = self.get_conf_on_disk()
+        return config_str == self._applied_config
 
-        for key, instance in self.config.instances.items():
-            if instance.track_script:
-                instance.track_script.write_check_script()
+    def spawn(self):
+        """Spawn keepalived or reload its configuration.
 
+        Nothing is done if keepalived is running with the same configuration,
+        so that callers can trigger it on every change of the router without
+        sending a SIGHUP each time.
+        """
         keepalived_pm = self.get_process()
+        if self._is_config_applied(self.config.get_config_str(),
+                                   keepalived_pm):
+            self.suppressed_reload_count += 1
+            LOG.debug('Keepalived configuration of %s is unchanged, not '
+                      'reloading it', self.resource_id)
+            # keepalived may have been spawned before the agent restarted,
+            # it still has to be respawned if it dies.
+            self._monitor_process(
+                keepalived_pm,
+                self.get_full_config_file_path('keepalived.conf'))
+            return
+        self._apply_config()
+
+    def _set_process_callback(self, keepalived_pm, config_path):
         vrrp_pm = self._get_vrrp_process(
             self.get_vrrp_pid_file_name(keepalived_pm.get_pid_file_name()))
-
         keepalived_pm.default_cmd_callback = (
             self._get_keepalived_process_callback(vrrp_pm, config_path))
 
+    def _monitor_process(self, keepalived_pm, config_path):
+        self._set_process_callback(keepalived_pm, config_path)
+        self.process_monitor.register(uuid=self.resource_id,
+                                      service_name=KEEPALIVED_SERVICE_NAME,
+                                      monitored_process=keepalived_pm)
+
+    def _apply_config(self):
+        # NOTE: this may run after a throttling delay during which other
+        # changes were made, render the configuration again so that all of
+        # them are applied with a single reload.
+        config_str = self.config.get_config_str()
+        keepalived_pm = self.get_process()
+        if self._is_config_applied(config_str, keepalived_pm):
+            self.suppressed_reload_count += 1
+            return
+
+        config_path = self._output_config_file(config_str)
+
+        for key, instance in self.config.instances.items():
+            if instance.track_script:
+                instance.track_script.write_check_script()
+
+        self._set_process_callback(keepalived_pm, config_path)
+
+        if keepalived_pm.active:
+            self.reload_count += 1
         keepalived_pm.enable(reload_cfg=True)
+        self._applied_config = config_str
 
         self.process_monitor.register(uuid=self.resource_id,
                                       service_name=KEEPALIVED_SERVICE_NAME,
@@ -449,6 +504,7 @@ class KeepalivedManager(object):
 
         pm = self.get_process()
         pm.disable(sig='15')
+        self._applied_config = None
 
     def get_process(self):
         return external_process.ProcessManager(
@@ -15,6 +15,7 @@
 import hashlib
 import hmac
 
+from eventlet import pools
 import httplib2
 from neutron_lib import constants
 from neutron_lib import context
@@ -29,6 +30,7 @@ import webob
 
 from neutron._i18n import _, _LE, _LW
 from neutron.agent.linux import utils as agent_utils
+from neutron.agent.metadata import port_index
 from neutron.agent import rpc as agent_rpc
 from neutron.common import cache_utils as cache
 from neutron.common import constants as n_const
@@ -79,6 +81,13 @@ class MetadataProxyHandler(object):
 
         self.plugin_rpc = MetadataPluginAPI(topics.PLUGIN)
         self.context = context.get_admin_context_without_session()
+        # NOTE: the handler is built before the workers are forked, the
+        # index and the HTTP clients are only created in the workers, on
+        # the first request they serve.
+        self._port_index = None
+        self._http_pool = pools.Pool(
+            max_size=self.conf.nova_metadata_pool_size,
+            create=self._create_http_client)
 
     @webob.dec.wsgify(RequestClass=webob.Request)
     def __call__(self, req):
@@ -135,6 +144,12 @@ class MetadataProxyHandler(object):
         return self._get_ports_from_server(networks=networks,
                                            ip_address=remote_address)
 
+    def _get_port_index(self):
+        if self._port_index is None:
+            self._port_index = port_index.MetadataPortIndex()
+            self._port_index.start()
+        return self._port_index
+
     def _get_ports(self, remote_address, network_id=None, router_id=None):
         """Search for all ports that contain passed ip address and belongs to
         given network.
@@ -143,14 +158,20 @@ class MetadataProxyHandler(object):
         given router. Either one of network_id or router_id must be passed.
 
         """
+        index = self._get_port_index() if self.conf.enable_port_index else None
         if network_id:
             networks = (network_id,)
         elif router_id:
-            networks = self._get_router_networks(router_id)
+            if index:
+                networks = index.get_router_networks(router_id)
+            else:
+                networks = self._get_router_networks(router_id)
         else:
             raise TypeError(_("Either one of parameter network_id or router_id"
                               " must be passed to _get_ports method."))
 
+        if index:
+            return index.get_ports(remote_address, networks)
         return self._get_ports_for_remote_address(remote_address, networks)
 
     def _get_instance_and_tenant_id(self, req):
@@ -181,16 +202,9 @@ class MetadataProxyHandler(object):
             req.query_string,
             ''))
 
-        h = httplib2.Http(
-            ca_certs=self.conf.auth_ca_cert,
-            disable_ssl_certificate_validation=self.conf.nova_metadata_insecure
-        )
-        if self.conf.nova_client_cert and self.conf.nova_client_priv_key:
-            h.add_certificate(self.conf.nova_client_priv_key,
-                              self.conf.nova_client_cert,
-                              nova_host_port)
-        resp, content = h.request(url, method=req.method, headers=headers,
-                                  body=req.body)
+        with self._http_pool.item() as h:
+            resp, content = h.request(url, method=req.method,
+                                      headers=headers, body=req.body)
 
         if resp.status == 200:
             req.response.content_type = resp['content-type']
@@ -219,6 +233,23 @@ class MetadataProxyHandler(object):
         else:
             raise Exception(_('Unexpected response code: %s') % resp.status)
 
+    def _create_http_client(self):
+        """Return a client to the Nova metadata server for the HTTP pool.
+
+        httplib2 keeps the connection to the server open between requests,
+        so reusing the clients saves a TCP (and SSL) handshake per request.
+        """
+        h = httplib2.Http(
+            ca_certs=self.conf.auth_ca_cert,
+            disable_ssl_certificate_validation=self.conf.nova_metadata_insecure
+        )
+        if self.conf.nova_client_cert and self.conf.nova_client_priv_key:
+            h.add_certificate(self.conf.nova_client_priv_key,
+                              self.conf.nova_client_cert,
+                              '%s:%s' % (self.conf.nova_metadata_host,
+                                         self.conf.nova_metadata_port))
+        return h
+
     def _sign_instance_id(self, instance_id):
         secret = self.conf.metadata_proxy_shared_secret
         secret = encodeutils.to_utf8(secret)
@@ -290,7 +321,9 @@ class UnixDomainMetadataProxy(object):
         return MODE_MAP[mode]
 
     def run(self):
-        server = agent_utils.UnixDomainWSGIServer('neutron-metadata-agent')
+        server = agent_utils.UnixDomainWSGIServer(
+            'neutron-metadata-agent',
+            num_threads=self.conf.metadata_wsgi_pool_size)
         server.start(MetadataProxyHandler(self.conf),
                      self.conf.metadata_proxy_socket,
                      workers=self.conf.metadata_workers,
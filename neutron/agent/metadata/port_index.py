@@ -0,0 +1,143 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+
+import netaddr
+from neutron_lib import constants
+from oslo_log import log as logging
+
+from neutron.agent import resource_cache
+from neutron.api.rpc.callbacks import resources
+from neutron.callbacks import events
+from neutron.callbacks import registry
+
+LOG = logging.getLogger(__name__)
+
+
+def _normalize_address(ip_address):
+    try:
+        return str(netaddr.IPAddress(ip_address))
+    except (netaddr.AddrFormatError, TypeError, ValueError):
+        return ip_address
+
+
+def _port_to_dict(port):
+    return {'id': port.id,
+            'network_id': port.network_id,
+            'device_id': port.device_id,
+            'device_owner': port.device_owner,
+            'tenant_id': port.project_id}
+
+
+class MetadataPortIndex(object):
+    """Local index of the ports looked up by the metadata proxy handler.
+
+    Ports are stored in a RemoteResourceCache kept up to date by the Port
+    push notifications of the server. On top of it, ports are indexed by
+    (network_id, ip_address) and router interfaces by router id, so a
+    metadata request only needs a server round trip the first time its
+    network or router is seen by the worker.
+    """
+
+    def __init__(self, rcache=None):
+        self._rcache = rcache or resource_cache.RemoteResourceCache(
+            [resources.PORT])
+        # (network_id, ip_address) -> {port_id: port}
+        self._ports_by_address = collections.defaultdict(dict)
+        # router_id -> {port_id: network_id}
+        self._router_interfaces = collections.defaultdict(dict)
+        # port_id -> (addresses, router_id) the port is indexed under
+        self._port_keys = {}
+        self._loaded_networks = set()
+        self._loaded_routers = set()
+        registry.subscribe(self._handle_port_update,
+                           resources.PORT, events.AFTER_UPDATE)
+        registry.subscribe(self._handle_port_delete,
+                           resources.PORT, events.AFTER_DELETE)
+
+    def start(self):
+        """Start receiving the Port push notifications of the server."""
+        self._rcache.start_watcher()
+
+    def _handle_port_update(self, resource, event, trigger, **kwargs):
+        if trigger is self._rcache:
+            self._index_port(kwargs['updated'])
+
+    def _handle_port_delete(self, resource, event, trigger, **kwargs):
+        if trigger is self._rcache:
+            self._unindex_port(kwargs['resource_id'])
+
+    def _index_port(self, port):
+        self._unindex_port(port.id)
+        addresses = set((port.network_id, str(fixed_ip.ip_address))
+                        for fixed_ip in port.fixed_ips)
+        for key in addresses:
+            self._ports_by_address[key][port.id] = port
+        router_id = None
+        if (port.device_id and
+                port.device_owner in constants.ROUTER_INTERFACE_OWNERS):
+            router_id = port.device_id
+            self._router_interfaces[router_id][port.id] = port.network_id
+        self._port_keys[port.id] = (addresses, router_id)
+
+    def _unindex_port(self, port_id):
+        addresses, router_id = self._port_keys.pop(port_id, ((), None))
+        for key in addresses:
+            ports = self._ports_by_address.get(key)
+            if ports is not None:
+                ports.pop(port_id, None)
+                if not ports:
+                    del self._ports_by_address[key]
+        if router_id:
+            interfaces = self._router_interfaces.get(router_id)
+            if interfaces is not None:
+                interfaces.pop(port_id, None)
+                if not interfaces:
+                    del self._router_interfaces[router_id]
+
+    def _load(self, filters):
+        # the cache only asks the server the first time a query is issued,
+        # later changes are received through the push notifications
+        for port in self._rcache.get_resources(resources.PORT, filters):
+            self._index_port(port)
+
+    def get_router_networks(self, router_id):
+        """Return the networks the router has an internal interface on."""
+        if router_id not in self._loaded_routers:
+            self._load({'device_id': (router_id, ),
+                        'device_owner': tuple(
+                            constants.ROUTER_INTERFACE_OWNERS)})
+            self._loaded_routers.add(router_id)
+        return tuple(set(self._router_interfaces.get(router_id, {}).values()))
+
+    def get_ports(self, ip_address, networks):
+        """Return the ports with ip_address on any of the given networks.
+
+        The ports are returned as dicts with the id, network_id, device_id,
+        device_owner and tenant_id keys.
+        """
+        ip_address = _normalize_address(ip_address)
+        ports = []
+        for network_id in networks:
+            if network_id not in self._loaded_networks:
+                self._load({'network_id': (network_id, )})
+                self._loaded_networks.add(network_id)
+            ports.extend(
+                _port_to_dict(port) for port in
+                self._ports_by_address.get((network_id, ip_address),
+                                           {}).values())
+        LOG.debug("Found %(count)s ports with address %(ip)s on networks "
+                  "%(networks)s in the port index",
+                  {'count': len(ports), 'ip': ip_address,
+                   'networks': networks})
+        return ports
@@ -12,11 +12,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
 from neutron_lib import context as n_ctx
 from oslo_log import log as logging
 
 from neutron.api.rpc.callbacks.consumer import registry as registry_rpc
 from neutron.api.rpc.callbacks import events as events_rpc
+from neutron.api.rpc.callbacks import resources
 from neutron.api.rpc.handlers import resources_rpc
 from neutron.callbacks import events
 from neutron.callbacks import registry
@@ -26,16 +29,45 @@ from neutron import objects
 LOG = logging.getLogger(__name__)
 objects.register_objects()
 
+# Fields of each resource type that get_resources lookups are indexed on.
+INDEXED_FIELDS = {
+    resources.PORT: ('network_id', 'security_group_ids', 'device_owner',
+                     'device_id'),
+    resources.SECURITYGROUPRULE: ('security_group_id', ),
+    resources.SUBNET: ('network_id', ),
+}
+
+
+def _get_index_values(resource, field):
+    value = getattr(resource, field, None)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return set(value)
+    return {value}
+
 
 class RemoteResourceCache(object):
     """Retrieves and stashes logical resources in their OVO format.
 
     This is currently only compatible with OVO objects that have an ID.
+
+    :param resource_types: the resource types to cache
+    :param indexed_fields: dict of the fields to index for each resource
+                           type, INDEXED_FIELDS by default. get_resources
+                           calls filtering on one of them only match the
+                           resources found in the index instead of
+                           scanning the whole type cache.
     """
-    def __init__(self, resource_types):
+    def __init__(self, resource_types, indexed_fields=None):
         self.resource_types = resource_types
         self._cache_by_type_and_id = {rt: {} for rt in self.resource_types}
         self._deleted_ids_by_type = {rt: set() for rt in self.resource_types}
+        if indexed_fields is None:
+            indexed_fields = INDEXED_FIELDS
+        # rtype -> field -> value -> set of resource IDs
+        self._indexes = {
+            rt: {field: collections.defaultdict(set)
+                 for field in indexed_fields.get(rt, ())}
+            for rt in self.resource_types}
         # track everything we've asked the server so we don't ask again
         self._satisfied_server_queries = set()
         self._puller = resources_rpc.ResourcesPullRpcApi()
@@ -45,6 +77,37 @@ class RemoteResourceCache(object):
             raise RuntimeError("Resource cache not tracking %s" % rtype)
         return self._cache_by_type_and_id[rtype]
 
+    def _set_resource(self, rtype, resource):
+        """Store a resource in the type cache and update its indexes."""
+        existing = self._type_cache(rtype).get(resource.id)
+        self._type_cache(rtype)[resource.id] = resource
+        for field, index in self._indexes[rtype].items():
+            old_values = (_get_index_values(existing, field)
+                          if existing else set())
+            new_values = _get_index_values(resource, field)
+            for value in old_values - new_values:
+                self._discard_from_index(index, value, resource.id)
+            for value in new_values - old_values:
+                index[value].add(resource.id)
+        return existing
+
+    def _pop_resource(self, rtype, resource_id):
+        """Remove a resource from the type cache and from its indexes."""
+        existing = self._type_cache(rtype).pop(resource_id, None)
+        if existing:
+            for field, index in self._indexes[rtype].items():
+                for value in _get_index_values(existing, field):
+                    self._discard_from_index(index, value, resource_id)
+        return existing
+
+    @staticmethod
+    def _discard_from_index(index, value, resource_id):
+        ids = index.get(value)
+        if ids is not None:
+            ids.discard(resource_id)
+            if not ids:
+                del index[value]
+
     def start_watcher(self):
         self._watcher = RemoteResourceWatcher(self)
 
@@ -75,7 +138,7 @@ class RemoteResourceCache(object):
         resources = self._puller.bulk_pull(context, rtype,
                                            filter_kwargs=filter_kwargs)
         for resource in resources:
-            self._type_cache(rtype)[resource.id] = resource
+            self._set_resource(rtype, resource)
         LOG.debug("%s resources returned for queries %s", len(resources),
                   query_ids)
         self._satisfied_server_queries.update(query_ids)
@@ -111,6 +174,9 @@ class RemoteResourceCache(object):
 
         The values in the dicionary for a single key are matched in an OR
         fashion.
+
+        If some keys of filters are indexed for rtype, only the resources
+        found in the index of the most selective one are checked.
         """
         self._flood_cache_for_query(rtype, **filters)
 
@@ -129,11 +195,36 @@ class RemoteResourceCache(object):
                     # no match found for this key
                     return False
             return True
-        return self.match_resources_with_func(rtype, match)
+
+        candidate_ids = self._get_indexed_candidates(rtype, filters)
+        if candidate_ids is None:
+            return self.match_resources_with_func(rtype, match)
+        type_cache = self._type_cache(rtype)
+        return [type_cache[r_id] for r_id in candidate_ids
+                if match(type_cache[r_id])]
+
+    def _get_indexed_candidates(self, rtype, filters):
+        """Return the IDs of the resources that may match filters.
+
+        The smallest set of IDs found in the indexes of the filter keys is
+        returned, or None if none of the filter keys is indexed.
+        """
+        candidates = None
+        for key, values in filters.items():
+            index = self._indexes[rtype].get(key)
+            if index is None:
+                continue
+            ids = set()
+            for value in values:
+                ids |= index.get(value, set())
+            if candidates is None or len(ids) < len(candidates):
+                candidates = ids
+        return candidates
 
     def match_resources_with_func(self, rtype, matcher):
         """Returns a list of all resources satisfying func matcher."""
-        # TODO(kevinbenton): this is O(N), offer better lookup functions
+        # NOTE: this is O(N), get_resources should be preferred for lookups
+        # on indexed fields
         return [r for r in self._type_cache(rtype).values()
                 if matcher(r)]
 
@@ -164,8 +255,7 @@ class RemoteResourceCache(object):
         if self._is_stale(rtype, resource):
             LOG.debug("Ignoring stale update for %s: %s", rtype, resource)
             return
-        existing = self._type_cache(rtype).get(resource.id)
-        self._type_cache(rtype)[resource.id] = resource
+        existing = self._set_resource(rtype, resource)
         changed_fields = self._get_changed_fields(existing, resource)
         if not changed_fields:
             LOG.debug("Received resource %s update without any changes: %s",
@@ -191,7 +281,7 @@ class RemoteResourceCache(object):
         # TODO(kevinbenton): we need a way to expire items from the set at
         # some TTL so it doesn't grow indefinitely with churn
         self._deleted_ids_by_type[rtype].add(resource_id)
-        existing = self._type_cache(rtype).pop(resource_id, None)
+        existing = self._pop_resource(rtype, resource_id)
         # local notification for agent internals to subscribe to
         registry.notify(rtype, events.AFTER_DELETE, self, context=context,
                         existing=existing, resource_id=resource_id)
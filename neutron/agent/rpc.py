@@ -18,6 +18,7 @@ import itertools
 
 import netaddr
 from neutron_lib import constants
+from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging
 from oslo_utils import uuidutils
@@ -64,6 +65,13 @@ def create_consumers(endpoints, prefix, topic_details, start_listening=True):
     return connection
 
 
+def _report_rpc_stats():
+    try:
+        return cfg.CONF.AGENT.report_rpc_stats
+    except cfg.NoSuchOptError:
+        return False
+
+
 class PluginReportStateAPI(object):
     """RPC client used to report state back to plugin.
 
@@ -84,6 +92,9 @@ class PluginReportStateAPI(object):
         # This create visible correspondence between events on
         # the agent and on the server
         agent_state['uuid'] = uuidutils.generate_uuid()
+        if _report_rpc_stats() and 'configurations' in agent_state:
+            agent_state['configurations']['rpc_stats'] = (
+                n_rpc.get_method_stats())
         kwargs = {
             'agent_state': {'agent_state': agent_state},
             'time': datetime.utcnow().strftime(constants.ISO8601_TIME_FORMAT),
@@ -103,6 +114,7 @@ class PluginApi(object):
         1.4 - tunnel_sync rpc signature upgrade to obtain 'host'
         1.5 - Support update_device_list and
               get_devices_details_list_and_failed_devices
+        1.6 - tunnel_sync rpc signature upgrade to obtain 'sync_token'
     '''
 
     def __init__(self, topic):
@@ -150,10 +162,17 @@ class PluginApi(object):
                           devices_up=devices_up, devices_down=devices_down,
                           agent_id=agent_id, host=host)
 
-    def tunnel_sync(self, context, tunnel_ip, tunnel_type=None, host=None):
-        cctxt = self.client.prepare(version='1.4')
+    def tunnel_sync(self, context, tunnel_ip, tunnel_type=None, host=None,
+                    sync_token=None):
+        if sync_token is None:
+            # The token is only known when returned by a server supporting it
+            cctxt = self.client.prepare(version='1.4')
+            return cctxt.call(context, 'tunnel_sync', tunnel_ip=tunnel_ip,
+                              tunnel_type=tunnel_type, host=host)
+        cctxt = self.client.prepare(version='1.6')
         return cctxt.call(context, 'tunnel_sync', tunnel_ip=tunnel_ip,
-                          tunnel_type=tunnel_type, host=host)
+                          tunnel_type=tunnel_type, host=host,
+                          sync_token=sync_token)
 
 
 def create_cache_for_l2_agent():
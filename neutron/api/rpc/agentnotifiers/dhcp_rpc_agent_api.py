@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+
 from neutron_lib.callbacks import events
 from neutron_lib.callbacks import registry
 from neutron_lib.callbacks import resources
@@ -23,6 +25,7 @@ from oslo_log import log as logging
 import oslo_messaging
 
 from neutron._i18n import _LE, _LW
+from neutron.api.rpc.agentnotifiers import utils as ag_utils
 from neutron.common import constants as n_const
 from neutron.common import rpc as n_rpc
 from neutron.common import topics
@@ -31,6 +34,71 @@ from neutron.common import utils
 
 LOG = logging.getLogger(__name__)
 
+# port notifications merged in a single message to the agents accepting the
+# batched notifications, and the key of their payloads
+BATCHED_PORT_METHODS = {
+    'port_create_end': ('ports_update_end', 'ports', 'port'),
+    'port_update_end': ('ports_update_end', 'ports', 'port'),
+    'port_delete_end': ('ports_delete_end', 'port_ids', 'port_id'),
+}
+
+
+class _NotificationBatch(object):
+    """DHCP notifications collected while an API request is processed."""
+
+    def __init__(self, notifier):
+        self.notifier = notifier
+        # (network_id, segment_id) -> (network, agents, scheduled)
+        self.hosting_agents = {}
+        # (topic, host) -> (batched, [(method, payload)])
+        self.casts = collections.OrderedDict()
+
+    def add(self, agent, method, payload, batched):
+        key = (agent.topic, agent.host)
+        if key not in self.casts:
+            self.casts[key] = (batched, [])
+        self.casts[key][1].append((method, payload))
+
+    def flush(self, context):
+        for (topic, host), (batched, casts) in self.casts.items():
+            if not batched:
+                for method, payload in casts:
+                    self.notifier._cast_message(
+                        context, method, payload, host, topic)
+                continue
+            for method, payload, count in _merge_port_casts(casts):
+                if count > 1:
+                    self.notifier._cast_batch(
+                        context, method, payload, host, topic)
+                else:
+                    self.notifier._cast_message(
+                        context, method, payload, host, topic)
+
+
+def _merge_port_casts(casts):
+    """Merge the consecutive port notifications of the same kind.
+
+    Return a list of (method, payload, count) tuples, where count is the
+    number of notifications merged in the payload. Single notifications are
+    returned unchanged.
+    """
+    merged = []
+    for method, payload in casts:
+        batched = BATCHED_PORT_METHODS.get(method)
+        if not batched:
+            merged.append([method, payload, 1, None])
+            continue
+        batch_method, key, item_key = batched
+        if merged and merged[-1][0] == batch_method:
+            merged[-1][1][key].append(payload[item_key])
+            merged[-1][2] += 1
+        else:
+            merged.append([batch_method, {key: [payload[item_key]]}, 1,
+                           (method, payload)])
+    return [(method, payload, count) if count > 1 or original is None else
+            original + (count, )
+            for method, payload, count, original in merged]
+
 
 class DhcpAgentNotifyAPI(object):
     """API for plugin to notify DHCP agent.
@@ -162,24 +230,27 @@ class DhcpAgentNotifyAPI(object):
             self._fanout_message(context, method, payload)
         elif cast_required:
             admin_ctx = (context if context.is_admin else context.elevated())
-            network = self.plugin.get_network(admin_ctx, network_id)
-            if 'subnet' in payload and payload['subnet'].get('segment_id'):
-                # if segment_id exists then the segment service plugin
-                # must be loaded
-                segment_plugin = directory.get_plugin('segments')
-                segment = segment_plugin.get_segment(
-                    context, payload['subnet']['segment_id'])
-                network['candidate_hosts'] = segment['hosts']
-
-            agents = self.plugin.get_dhcp_agents_hosting_networks(
-                context, [network_id], hosts=network.get('candidate_hosts'))
+            batch = self._get_batch(context)
+            segment_id = (payload.get('subnet') or {}).get('segment_id')
+            if batch and (network_id, segment_id) in batch.hosting_agents:
+                # the hosting agents were already looked up by a previous
+                # notification of the request
+                network, agents, scheduled = batch.hosting_agents[
+                    (network_id, segment_id)]
+            else:
+                network, agents = self._get_hosting_agents(
+                    context, admin_ctx, network_id, segment_id)
+                scheduled = False
             # schedule the network first, if needed
-            schedule_required = (
+            schedule_required = not scheduled and (
                 method == 'subnet_create_end' or
                 method == 'port_create_end' and
                 not self._is_reserved_dhcp_port(payload['port']))
             if schedule_required:
                 agents = self._schedule_network(admin_ctx, network, agents)
+            if batch:
+                batch.hosting_agents[(network_id, segment_id)] = (
+                    network, agents, scheduled or schedule_required)
             if not agents:
                 LOG.debug("Network %s is not hosted by any dhcp agent",
                           network_id)
@@ -187,8 +258,36 @@ class DhcpAgentNotifyAPI(object):
             enabled_agents = self._get_enabled_agents(
                 context, network, agents, method, payload)
             for agent in enabled_agents:
-                self._cast_message(
-                    context, method, payload, agent.host, agent.topic)
+                if batch:
+                    batch.add(agent, method, payload,
+                              self._accepts_batched_notifications(agent))
+                else:
+                    self._cast_message(
+                        context, method, payload, agent.host, agent.topic)
+
+    def _get_hosting_agents(self, context, admin_ctx, network_id,
+                            segment_id):
+        network = self.plugin.get_network(admin_ctx, network_id)
+        if segment_id:
+            # if segment_id exists then the segment service plugin
+            # must be loaded
+            segment_plugin = directory.get_plugin('segments')
+            segment = segment_plugin.get_segment(context, segment_id)
+            network['candidate_hosts'] = segment['hosts']
+
+        agents = self.plugin.get_dhcp_agents_hosting_networks(
+            context, [network_id], hosts=network.get('candidate_hosts'))
+        return network, agents
+
+    def _get_batch(self, context):
+        batch = ag_utils.get_batch(context)
+        if batch is None:
+            return None
+        return batch.get_state(self, lambda: _NotificationBatch(self))
+
+    def _accepts_batched_notifications(self, agent):
+        configurations = self.plugin.get_configuration_dict(agent)
+        return bool(configurations.get(n_const.BATCHED_PORT_NOTIFICATIONS))
 
     def _cast_message(self, context, method, payload, host,
                       topic=topics.DHCP_AGENT):
@@ -196,6 +295,12 @@ class DhcpAgentNotifyAPI(object):
         cctxt = self.client.prepare(topic=topic, server=host)
         cctxt.cast(context, method, payload=payload)
 
+    def _cast_batch(self, context, method, payload, host,
+                    topic=topics.DHCP_AGENT):
+        """Cast batched port notifications to the dhcp agent on the host."""
+        cctxt = self.client.prepare(topic=topic, server=host, version='1.1')
+        cctxt.cast(context, method, payload=payload)
+
     def _fanout_message(self, context, method, payload):
         """Fanout the payload to all dhcp agents."""
         cctxt = self.client.prepare(fanout=True)
@@ -271,9 +376,10 @@ class DhcpAgentNotifyAPI(object):
                 self.uses_native_notifications[resource][action]):
             return
         if collection and collection in data:
-            for body in data[collection]:
-                item = {resource: body}
-                self.notify(context, item, method_name)
+            with ag_utils.batch_notifications(context):
+                for body in data[collection]:
+                    item = {resource: body}
+                    self.notify(context, item, method_name)
         else:
             self.notify(context, data, method_name)
 
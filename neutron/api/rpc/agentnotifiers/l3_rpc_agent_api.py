@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import random
 
 from neutron_lib import constants
@@ -35,6 +36,66 @@ LOG = logging.getLogger(__name__)
 AGENT_NOTIFY_MAX_ATTEMPTS = 2
 
 
+class _NotificationBatch(object):
+    """L3 notifications collected while an API request is processed.
+
+    The routers to notify are merged, so each of them is scheduled and has
+    its hosting agents looked up once, and each agent receives a single
+    message per method with all its routers.
+    """
+
+    def __init__(self, notifier):
+        self.notifier = notifier
+        self.to_schedule = set()
+        # method -> {router_id: shuffle_agents}
+        self.routers = collections.OrderedDict()
+        # (method, host) -> [router_id]
+        self.host_routers = collections.OrderedDict()
+
+    def add_routers(self, method, router_ids, shuffle_agents,
+                    schedule_routers):
+        routers = self.routers.setdefault(method, collections.OrderedDict())
+        for router_id in router_ids:
+            routers[router_id] = routers.get(router_id) or shuffle_agents
+        if schedule_routers:
+            self.to_schedule.update(router_ids)
+
+    def add_host_routers(self, method, host, router_ids):
+        self._add_host_routers(self.host_routers, method, host, router_ids)
+
+    @staticmethod
+    def _add_host_routers(host_routers, method, host, router_ids):
+        routers = host_routers.setdefault((method, host), [])
+        routers.extend(r for r in router_ids if r not in routers)
+
+    def flush(self, context):
+        host_routers = self.host_routers
+        if self.routers:
+            admin_ctx = context if context.is_admin else context.elevated()
+            plugin = directory.get_plugin(plugin_constants.L3)
+            if self.to_schedule:
+                plugin.schedule_routers(admin_ctx, list(self.to_schedule))
+            for method, routers in self.routers.items():
+                for router_id, shuffle_agents in routers.items():
+                    hosts = plugin.get_hosts_to_notify(admin_ctx, router_id)
+                    if shuffle_agents:
+                        random.shuffle(hosts)
+                    for host in hosts:
+                        self._add_host_routers(host_routers, method, host,
+                                               [router_id])
+        for (method, host), router_ids in host_routers.items():
+            LOG.debug('Notify agent at %(topic)s.%(host)s the message '
+                      '%(method)s for routers %(router_ids)s',
+                      {'topic': topics.L3_AGENT,
+                       'host': host,
+                       'method': method,
+                       'router_ids': router_ids})
+            cctxt = self.notifier.client.prepare(topic=topics.L3_AGENT,
+                                                 server=host,
+                                                 version='1.1')
+            cctxt.cast(context, method, routers=router_ids)
+
+
 class L3AgentNotifyAPI(object):
     """API for plugin to notify L3 agent."""
 
@@ -93,6 +154,11 @@ class L3AgentNotifyAPI(object):
             return
         if utils.is_extension_supported(
                 plugin, constants.L3_AGENT_SCHEDULER_EXT_ALIAS):
+            batch = self._get_batch(context)
+            if batch:
+                batch.add_routers(method, router_ids, shuffle_agents,
+                                  schedule_routers)
+                return
             adminContext = (context.is_admin and
                             context or context.elevated())
             if schedule_routers:
@@ -103,6 +169,12 @@ class L3AgentNotifyAPI(object):
             cctxt = self.client.prepare(fanout=True)
             cctxt.cast(context, method, routers=router_ids)
 
+    def _get_batch(self, context):
+        batch = ag_utils.get_batch(context)
+        if batch is None:
+            return None
+        return batch.get_state(self, lambda: _NotificationBatch(self))
+
     def _notification_fanout(self, context, method, router_id=None, **kwargs):
         """Fanout the information to all L3 agents.
 
@@ -165,5 +237,9 @@ class L3AgentNotifyAPI(object):
                                 use_call=True, payload=router_ids)
 
     def routers_updated_on_host(self, context, router_ids, host):
+        batch = self._get_batch(context)
+        if batch:
+            batch.add_host_routers('routers_updated', host, router_ids)
+            return
         self._notification_host(context, 'routers_updated', host,
                                 routers=router_ids)
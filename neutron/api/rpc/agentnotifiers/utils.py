@@ -13,14 +13,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import contextlib
+
 from oslo_log import log as logging
 import oslo_messaging
 from oslo_utils import excutils
 
-from neutron._i18n import _LW
+from neutron._i18n import _LE, _LW
 
 LOG = logging.getLogger(__name__)
 
+_BATCH_ATTR = '_agent_notification_batch'
+
 
 def _call_with_retry(max_attempts):
     """A wrapper to retry a function using rpc call in case of
@@ -60,3 +65,66 @@ def retry(func, max_attempts):
     function.
     """
     return _call_with_retry(max_attempts)(func)
+
+
+class NotificationBatch(object):
+    """Agent notifications collected while an API request is processed.
+
+    Each notifier keeps its own state in the batch, typically the messages
+    to cast to each agent and the results of the lookups of the hosting
+    agents, and is asked to send its messages when the batch is flushed.
+    """
+
+    def __init__(self):
+        self.closed = False
+        self._states = collections.OrderedDict()
+
+    def get_state(self, notifier, factory):
+        """Return the state of the notifier, created by factory if needed.
+
+        The state must have a flush(context) method sending the collected
+        notifications.
+        """
+        key = id(notifier)
+        if key not in self._states:
+            self._states[key] = factory()
+        return self._states[key]
+
+    def flush(self, context):
+        self.closed = True
+        for state in self._states.values():
+            try:
+                state.flush(context)
+            except Exception:
+                LOG.exception(_LE("Failed to send batched agent "
+                                  "notifications"))
+
+
+def get_batch(context):
+    """Return the notification batch of the request, None if there is none."""
+    batch = getattr(context, _BATCH_ATTR, None)
+    if not isinstance(batch, NotificationBatch) or batch.closed:
+        return None
+    return batch
+
+
+@contextlib.contextmanager
+def batch_notifications(context):
+    """Collect the agent notifications and send them at the end.
+
+    The notifications sent to an agent while the context manager is active
+    are merged and sent to the agent when it exits. The batch is attached to
+    the context, the copies of the context made by elevated() share it.
+    Nested uses are merged into the outermost batch.
+    """
+    batch = get_batch(context)
+    if batch is not None:
+        yield batch
+        return
+    batch = NotificationBatch()
+    setattr(context, _BATCH_ATTR, batch)
+    try:
+        yield batch
+    finally:
+        delattr(context, _BATCH_ATTR)
+        batch.flush(context)
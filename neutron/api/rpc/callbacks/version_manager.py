@@ -39,6 +39,10 @@ def _import_agents_db():
     return importutils.import_module('neutron.db.agents_db')
 
 
+def _import_wire_format():
+    return importutils.import_module('neutron.api.rpc.callbacks.wire_format')
+
+
 AgentConsumer = collections.namedtuple('AgentConsumer', ['agent_type',
                                                          'host'])
 AgentConsumer.__repr__ = lambda self: '%s@%s' % self
@@ -161,6 +165,20 @@ class ResourceConsumerTracker(object):
 
         return copy.copy(self._versions[resource_type])
 
+    def supports_wire_format(self, resource_type, version, wire_format):
+        """Whether all the consumers of a resource version use wire_format.
+
+        Consumers advertise the wire formats they support next to their
+        resource versions. False is returned when no consumer is known to
+        use the resource version.
+        """
+        consumers = [versions for versions in
+                     self._versions_by_consumer.values()
+                     if versions.get(resource_type) == version]
+        return bool(consumers) and all(
+            versions.get(_import_wire_format().WIRE_FORMAT_KEY) ==
+            wire_format for versions in consumers)
+
     def report(self):
         """Output debug information about the consumer versions."""
         format = lambda versions: pprint.pformat(dict(versions), indent=4)
@@ -222,6 +240,11 @@ class CachedResourceConsumerTracker(object):
         self._check_expiration()
         return self._versions.get_resource_versions(resource_type)
 
+    def supports_wire_format(self, resource_type, version, wire_format):
+        self._check_expiration()
+        return self._versions.supports_wire_format(resource_type, version,
+                                                   wire_format)
+
     def update_versions(self, consumer, resource_versions):
         self._versions.set_versions(consumer, resource_versions)
 
@@ -245,6 +268,12 @@ def get_resource_versions(resource_type):
     return _get_cached_tracker().get_resource_versions(resource_type)
 
 
+def supports_wire_format(resource_type, version, wire_format):
+    """Whether all the consumers of a resource version use wire_format."""
+    return _get_cached_tracker().supports_wire_format(resource_type, version,
+                                                      wire_format)
+
+
 def update_versions(consumer, resource_versions):
     """Update the resources' versions for a consumer id."""
     _get_cached_tracker().update_versions(consumer, resource_versions)
@@ -0,0 +1,166 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Compact wire format for the resources RPC payloads.
+
+The resources are normally sent as a list of versioned object primitives,
+each of them carrying its own name, namespace, version and list of changed
+fields, for itself and for every nested object. The compact format keeps a
+single table of the object classes of the payload, drops the changed fields
+(receivers reset them anyway), stores identical nested objects only once and
+compresses the payload when it is large.
+
+Consumers supporting the format advertise it next to their resource versions,
+under the WIRE_FORMAT_KEY pseudo resource type, so the server only uses it on
+the topics where all the consumers understand it.
+"""
+
+import base64
+import zlib
+
+from oslo_config import cfg
+from oslo_serialization import jsonutils
+
+from neutron._i18n import _
+from neutron.objects import base as obj_base
+
+WIRE_FORMAT_KEY = 'wire_format'
+COMPACT = 'compact-1.0'
+
+# payloads larger than this number of bytes once serialized are compressed
+COMPRESSION_THRESHOLD = 4096
+
+_NAME = obj_base.NeutronObject._obj_primitive_key('name')
+_NAMESPACE = obj_base.NeutronObject._obj_primitive_key('namespace')
+_VERSION = obj_base.NeutronObject._obj_primitive_key('version')
+_DATA = obj_base.NeutronObject._obj_primitive_key('data')
+
+# markers of a reference to an object of the table and of a plain dict which
+# would otherwise be mistaken for a marker
+_REF = '$ref'
+_ESCAPED = '$dict'
+
+
+class InvalidWireFormat(ValueError):
+    pass
+
+
+def compact_format_enabled(conf=cfg.CONF):
+    """Return whether this agent asked for the compact wire format."""
+    try:
+        return conf.AGENT.rpc_compact_wire_format
+    except cfg.NoSuchOptError:
+        return False
+
+
+def get_advertised_versions(resource_versions, conf=cfg.CONF):
+    """Return the resource versions an agent reports to the server.
+
+    The supported wire format is added to the versions when the compact
+    format is enabled.
+    """
+    if not compact_format_enabled(conf):
+        return resource_versions
+    versions = dict(resource_versions)
+    versions[WIRE_FORMAT_KEY] = COMPACT
+    return versions
+
+
+def _is_object_primitive(value):
+    return isinstance(value, dict) and _NAME in value and _DATA in value
+
+
+class _Encoder(object):
+
+    def __init__(self):
+        self.classes = []
+        self._class_index = {}
+        self.objects = []
+        self._object_index = {}
+
+    def _add_class(self, primitive):
+        key = (primitive[_NAME], primitive.get(_NAMESPACE),
+               primitive[_VERSION])
+        if key not in self._class_index:
+            self._class_index[key] = len(self.classes)
+            self.classes.append(list(key))
+        return self._class_index[key]
+
+    def add_object(self, primitive):
+        # nested objects are added first, so objects only reference objects
+        # with a lower index in the table
+        entry = [self._add_class(primitive),
+                 self._encode_value(primitive[_DATA])]
+        key = jsonutils.dumps(entry, sort_keys=True)
+        if key not in self._object_index:
+            self._object_index[key] = len(self.objects)
+            self.objects.append(entry)
+        return self._object_index[key]
+
+    def _encode_value(self, value):
+        if _is_object_primitive(value):
+            return {_REF: self.add_object(value)}
+        if isinstance(value, dict):
+            encoded = {k: self._encode_value(v) for k, v in value.items()}
+            if _REF in value or _ESCAPED in value:
+                return {_ESCAPED: encoded}
+            return encoded
+        if isinstance(value, (list, tuple)):
+            return [self._encode_value(v) for v in value]
+        return value
+
+
+def encode(primitives):
+    """Encode a list of object primitives in the compact format."""
+    encoder = _Encoder()
+    resources = [encoder.add_object(primitive) for primitive in primitives]
+    payload = {'format': COMPACT,
+               'classes': encoder.classes,
+               'objects': encoder.objects,
+               'resources': resources}
+    serialized = jsonutils.dumps(payload)
+    if len(serialized) <= COMPRESSION_THRESHOLD:
+        return payload
+    compressed = zlib.compress(serialized.encode('utf-8'))
+    return {'format': COMPACT,
+            'zlib': base64.b64encode(compressed).decode('ascii')}
+
+
+def _decode_value(value, objects):
+    if isinstance(value, dict):
+        if _REF in value:
+            return objects[value[_REF]]
+        if _ESCAPED in value:
+            value = value[_ESCAPED]
+        return {k: _decode_value(v, objects) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode_value(v, objects) for v in value]
+    return value
+
+
+def decode(payload):
+    """Return the list of object primitives of a compact payload."""
+    if payload.get('format') != COMPACT:
+        raise InvalidWireFormat(
+            _("Unsupported wire format %s") % payload.get('format'))
+    if 'zlib' in payload:
+        payload = jsonutils.loads(
+            zlib.decompress(base64.b64decode(payload['zlib'])))
+    objects = []
+    for class_index, data in payload['objects']:
+        name, namespace, version = payload['classes'][class_index]
+        primitive = {_NAME: name, _VERSION: version,
+                     _DATA: _decode_value(data, objects)}
+        if namespace is not None:
+            primitive[_NAMESPACE] = namespace
+        objects.append(primitive)
+    return [objects[index] for index in payload['resources']]
@@ -299,7 +299,6 @@ class DhcpRpcCallback(object):
 
     @db_api.retry_db_errors
     def dhcp_ready_on_ports(self, context, port_ids):
-        for port_id in port_ids:
-            provisioning_blocks.provisioning_complete(
-                context, port_id, resources.PORT,
-                provisioning_blocks.DHCP_ENTITY)
+        provisioning_blocks.provisioning_complete_many(
+            context, port_ids, resources.PORT,
+            provisioning_blocks.DHCP_ENTITY)
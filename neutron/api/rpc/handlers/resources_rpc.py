@@ -25,6 +25,7 @@ from neutron.api.rpc.callbacks import exceptions as rpc_exc
 from neutron.api.rpc.callbacks.producer import registry as prod_registry
 from neutron.api.rpc.callbacks import resources
 from neutron.api.rpc.callbacks import version_manager
+from neutron.api.rpc.callbacks import wire_format
 from neutron.common import constants
 from neutron.common import rpc as n_rpc
 from neutron.common import topics
@@ -57,6 +58,13 @@ def _resource_to_class(resource_type):
     return resources.get_resource_cls(resource_type)
 
 
+def _encode(primitives, format_name):
+    if format_name != wire_format.COMPACT:
+        raise wire_format.InvalidWireFormat(
+            _("Unsupported wire format %s") % format_name)
+    return wire_format.encode(primitives)
+
+
 def resource_type_versioned_topic(resource_type, version=None):
     """Return the topic for a resource type.
 
@@ -82,7 +90,7 @@ class ResourcesPullRpcApi(object):
         if not hasattr(cls, '_instance'):
             cls._instance = super(ResourcesPullRpcApi, cls).__new__(cls)
             target = oslo_messaging.Target(
-                topic=topics.PLUGIN, version='1.1',
+                topic=topics.PLUGIN, version='1.2',
                 namespace=constants.RPC_NAMESPACE_RESOURCES)
             cls._instance.client = n_rpc.get_client(target)
         return cls._instance
@@ -103,10 +111,19 @@ class ResourcesPullRpcApi(object):
     @log_helpers.log_method_call
     def bulk_pull(self, context, resource_type, filter_kwargs=None):
         resource_type_cls = _resource_to_class(resource_type)
-        cctxt = self.client.prepare()
-        primitives = cctxt.call(context, 'bulk_pull',
-            resource_type=resource_type,
-            version=resource_type_cls.VERSION, filter_kwargs=filter_kwargs)
+        if wire_format.compact_format_enabled():
+            cctxt = self.client.prepare(version='1.2')
+            primitives = wire_format.decode(cctxt.call(context, 'bulk_pull',
+                resource_type=resource_type,
+                version=resource_type_cls.VERSION,
+                filter_kwargs=filter_kwargs,
+                wire_format=wire_format.COMPACT))
+        else:
+            cctxt = self.client.prepare()
+            primitives = cctxt.call(context, 'bulk_pull',
+                resource_type=resource_type,
+                version=resource_type_cls.VERSION,
+                filter_kwargs=filter_kwargs)
         return [resource_type_cls.clean_obj_from_primitive(primitive)
                 for primitive in primitives]
 
@@ -122,9 +139,10 @@ class ResourcesPullRpcCallback(object):
     # History
     #   1.0 Initial version
     #   1.1 Added bulk_pull
+    #   1.2 Added wire_format to bulk_pull
 
     target = oslo_messaging.Target(
-        version='1.1', namespace=constants.RPC_NAMESPACE_RESOURCES)
+        version='1.2', namespace=constants.RPC_NAMESPACE_RESOURCES)
 
     @oslo_messaging.expected_exceptions(rpc_exc.CallbackNotFound)
     def pull(self, context, resource_type, version, resource_id):
@@ -133,14 +151,19 @@ class ResourcesPullRpcCallback(object):
             return obj.obj_to_primitive(target_version=version)
 
     @oslo_messaging.expected_exceptions(rpc_exc.CallbackNotFound)
-    def bulk_pull(self, context, resource_type, version, filter_kwargs=None):
+    def bulk_pull(self, context, resource_type, version, filter_kwargs=None,
+                  wire_format=None):
         filter_kwargs = filter_kwargs or {}
         resource_type_cls = _resource_to_class(resource_type)
         # TODO(kevinbenton): add in producer registry so producers can add
         # hooks to mangle these things like they can with 'pull'.
-        return [obj.obj_to_primitive(target_version=version)
-                for obj in resource_type_cls.get_objects(context, _pager=None,
-                                                         **filter_kwargs)]
+        primitives = [
+            obj.obj_to_primitive(target_version=version)
+            for obj in resource_type_cls.get_objects(context, _pager=None,
+                                                     **filter_kwargs)]
+        if wire_format is not None:
+            return _encode(primitives, wire_format)
+        return primitives
 
 
 class ResourcesPushToServersRpcApi(object):
@@ -238,13 +261,24 @@ class ResourcesPushRpcApi(object):
         _validate_resource_type(resource_type)
 
         for version in version_manager.get_resource_versions(resource_type):
-            cctxt = self._prepare_object_fanout_context(
-                resource_list[0], version, rpc_version='1.1')
-
             dehydrated_resources = [
                 resource.obj_to_primitive(target_version=version)
                 for resource in resource_list]
 
+            # only use the compact format when all the consumers of the
+            # version topic support it
+            if version_manager.supports_wire_format(
+                    resource_type, version, wire_format.COMPACT):
+                cctxt = self._prepare_object_fanout_context(
+                    resource_list[0], version, rpc_version='1.2')
+                cctxt.cast(context, 'push',
+                           compact_resources=wire_format.encode(
+                               dehydrated_resources),
+                           event_type=event_type)
+                continue
+
+            cctxt = self._prepare_object_fanout_context(
+                resource_list[0], version, rpc_version='1.1')
             cctxt.cast(context, 'push',
                        resource_list=dehydrated_resources,
                        event_type=event_type)
@@ -260,14 +294,18 @@ class ResourcesPushRpcCallback(object):
     # History
     #   1.0 Initial version
     #   1.1 push method introduces resource_list support
+    #   1.2 push method introduces compact_resources support
 
-    target = oslo_messaging.Target(version='1.1',
+    target = oslo_messaging.Target(version='1.2',
                                    namespace=constants.RPC_NAMESPACE_RESOURCES)
 
     @oslo_messaging.expected_exceptions(rpc_exc.CallbackNotFound)
     def push(self, context, **kwargs):
         """Push receiver, will always receive resources of the same type."""
-        resource_list = kwargs['resource_list']
+        if 'compact_resources' in kwargs:
+            resource_list = wire_format.decode(kwargs['compact_resources'])
+        else:
+            resource_list = kwargs['resource_list']
         event_type = kwargs['event_type']
 
         resource_objs = [
@@ -122,6 +122,10 @@ AGENT_ALIVE = 'alive'
 # agent has just returned to alive after being dead
 AGENT_REVIVED = 'revived'
 
+# Key of the agent configurations telling the agent accepts the batched
+# port notifications of the server
+BATCHED_PORT_NOTIFICATIONS = 'batched_port_notifications'
+
 INGRESS_DIRECTION = 'ingress'
 EGRESS_DIRECTION = 'egress'
 
@@ -29,7 +29,7 @@ from oslo_service import service
 from oslo_utils import excutils
 from osprofiler import profiler
 
-from neutron._i18n import _LE, _LW
+from neutron._i18n import _LE, _LI, _LW
 from neutron.common import exceptions
 
 
@@ -89,6 +89,85 @@ def get_allowed_exmods():
     return ALLOWED_EXMODS + EXTRA_EXMODS
 
 
+# upper bounds in seconds of the buckets of the call latency histograms
+LATENCY_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60)
+# number of latest call durations kept per method to compute percentiles
+LATENCY_SAMPLES = 200
+# number of samples needed before the timeout of a method is adapted
+MIN_LATENCY_SAMPLES = 20
+# the timeout of a method is adapted to this factor of its p99 latency
+P99_TIMEOUT_FACTOR = 3
+# seconds without timeouts needed before each decrease of a method timeout
+TIMEOUT_QUIET_PERIOD = 300
+
+
+class CircuitOpen(oslo_messaging.MessagingTimeout):
+    """Raised instead of sending a call while its circuit is open.
+
+    It is a MessagingTimeout, so callers handling the timeouts of a call
+    handle it the same way.
+    """
+
+
+class _MethodStats(object):
+    """Latency and error statistics of the calls of an RPC method."""
+
+    def __init__(self):
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.consecutive_timeouts = 0
+        self.circuit_open_until = 0
+        # time of the latest timeout or decrease of the method timeout
+        self.quiet_since = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.samples = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    def _add_sample(self, duration):
+        self.calls += 1
+        self.samples.append(duration)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                break
+        else:
+            index = len(LATENCY_BUCKETS)
+        self.histogram[index] += 1
+
+    def record_success(self, duration):
+        self._add_sample(duration)
+        self.consecutive_timeouts = 0
+
+    def record_timeout(self, timeout, now):
+        # the call lasted at least its timeout, using it as sample keeps the
+        # percentiles from ignoring the slowest calls
+        self._add_sample(timeout)
+        self.quiet_since = now
+        self.timeouts += 1
+        self.consecutive_timeouts += 1
+
+    def record_error(self, duration):
+        self._add_sample(duration)
+        self.errors += 1
+        self.consecutive_timeouts = 0
+
+    def percentile(self, percent):
+        if not self.samples:
+            return None
+        samples = sorted(self.samples)
+        index = int(round(percent / 100.0 * (len(samples) - 1)))
+        return samples[index]
+
+    def to_dict(self):
+        buckets = ['le_%s' % bound for bound in LATENCY_BUCKETS]
+        buckets.append('gt_%s' % LATENCY_BUCKETS[-1])
+        p99 = self.percentile(99)
+        return {'calls': self.calls,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'p99': round(p99, 3) if p99 is not None else None,
+                'histogram': dict(zip(buckets, self.histogram))}
+
+
 def _get_default_method_timeout():
     return TRANSPORT.conf.rpc_response_timeout
 
@@ -103,19 +182,36 @@ class _ContextWrapper(object):
     This intercepts RPC calls and sets the timeout value to the globally
     adapting value for each method. An oslo messaging timeout results in
     a doubling of the timeout value for the method on which it timed out.
-    There currently is no logic to reduce the timeout since busy Neutron
-    servers are more frequently the cause of timeouts rather than lost
-    messages.
+    Once enough calls of a method completed, its timeout follows the p99
+    latency of its latest calls: it is increased as soon as they get
+    slower, but only halved toward it after TIMEOUT_QUIET_PERIOD seconds
+    without timeouts, so that a method timing out now and then keeps the
+    timeout it was backed off to. It never goes below the configured
+    timeout, since busy Neutron servers are more frequently the cause of
+    timeouts rather than lost messages.
+
+    The latency and errors of the calls are tracked per method. When the
+    rpc_circuit_breaker_threshold option is set, a method timing out that
+    number of times in a row has its calls failing immediately with a
+    CircuitOpen exception for the duration of its timeout, after which a
+    call is tried again.
     """
     _METHOD_TIMEOUTS = _get_default_method_timeouts()
+    _METHOD_STATS = collections.defaultdict(_MethodStats)
     _max_timeout = None
 
     @classmethod
     def reset_timeouts(cls):
         # restore the original default timeout factory
         cls._METHOD_TIMEOUTS = _get_default_method_timeouts()
+        cls._METHOD_STATS = collections.defaultdict(_MethodStats)
         cls._max_timeout = None
 
+    @classmethod
+    def get_method_stats(cls):
+        return {method: stats.to_dict()
+                for method, stats in cls._METHOD_STATS.items()}
+
     @classmethod
     def get_max_timeout(cls):
         return cls._max_timeout or _get_default_method_timeout() * 10
@@ -144,13 +240,19 @@ class _ContextWrapper(object):
                                        method)
         else:
             scoped_method = method
+        stats = self._METHOD_STATS[scoped_method]
+        self._check_circuit(scoped_method, stats)
         # set the timeout from the global method timeout tracker for this
         # method
         self._original_context.timeout = self._METHOD_TIMEOUTS[scoped_method]
+        start = time.time()
         try:
-            return self._original_context.call(ctxt, method, **kwargs)
+            result = self._original_context.call(ctxt, method, **kwargs)
         except oslo_messaging.MessagingTimeout:
             with excutils.save_and_reraise_exception():
+                stats.record_timeout(self._original_context.timeout,
+                                     time.time())
+                self._open_circuit_if_needed(scoped_method, stats)
                 wait = random.uniform(
                     0,
                     min(self._METHOD_TIMEOUTS[scoped_method],
@@ -167,11 +269,67 @@ class _ContextWrapper(object):
                     self._original_context.timeout * 2, self.get_max_timeout())
                 if new_timeout > self._METHOD_TIMEOUTS[scoped_method]:
                     LOG.warning(_LW("Increasing timeout for %(method)s calls "
-                                    "to %(new)s seconds. Restart the agent to "
-                                    "restore it to the default value."),
+                                    "to %(new)s seconds. It is reduced again "
+                                    "once the calls are faster."),
                                 {'method': scoped_method, 'new': new_timeout})
                     self._METHOD_TIMEOUTS[scoped_method] = new_timeout
                 time.sleep(wait)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                stats.record_error(time.time() - start)
+        end = time.time()
+        stats.record_success(end - start)
+        self._adapt_timeout(scoped_method, stats, end)
+        return result
+
+    def _check_circuit(self, scoped_method, stats):
+        if not stats.circuit_open_until:
+            return
+        if time.time() < stats.circuit_open_until:
+            raise CircuitOpen(
+                "Calls of %s are suspended after %d timeouts in a row" %
+                (scoped_method, stats.consecutive_timeouts))
+        # half-open, the next call tells if the server answers again
+        stats.circuit_open_until = 0
+
+    def _open_circuit_if_needed(self, scoped_method, stats):
+        try:
+            threshold = cfg.CONF.rpc_circuit_breaker_threshold
+        except cfg.NoSuchOptError:
+            threshold = 0
+        if not threshold or stats.consecutive_timeouts < threshold:
+            return
+        cooldown = self._METHOD_TIMEOUTS[scoped_method]
+        stats.circuit_open_until = time.time() + cooldown
+        LOG.error(_LE("RPC method %(method)s timed out %(count)d times in "
+                      "a row, its calls fail immediately for the next "
+                      "%(cooldown)s seconds."),
+                  {'method': scoped_method,
+                   'count': stats.consecutive_timeouts,
+                   'cooldown': cooldown})
+
+    def _adapt_timeout(self, scoped_method, stats, now):
+        if len(stats.samples) < MIN_LATENCY_SAMPLES:
+            return
+        p99_timeout = min(
+            max(int(stats.percentile(99) * P99_TIMEOUT_FACTOR) + 1,
+                _get_default_method_timeout()),
+            self.get_max_timeout())
+        old_timeout = self._METHOD_TIMEOUTS[scoped_method]
+        if p99_timeout > old_timeout:
+            new_timeout = p99_timeout
+        elif (p99_timeout < old_timeout and
+              now - stats.quiet_since >= TIMEOUT_QUIET_PERIOD):
+            new_timeout = max(p99_timeout, old_timeout // 2)
+            stats.quiet_since = now
+        else:
+            return
+        LOG.info(_LI("Adapting timeout for %(method)s calls from %(old)s to "
+                     "%(new)s seconds, based on the latency of the latest "
+                     "calls."),
+                 {'method': scoped_method, 'old': old_timeout,
+                  'new': new_timeout})
+        self._METHOD_TIMEOUTS[scoped_method] = new_timeout
 
 
 class BackingOffClient(oslo_messaging.RPCClient):
@@ -193,6 +351,17 @@ class BackingOffClient(oslo_messaging.RPCClient):
         _ContextWrapper.set_max_timeout(max_timeout)
 
 
+def get_method_stats():
+    """Return the latency and error statistics of the RPC calls.
+
+    The statistics of the calls made by the backing-off clients of the
+    process are returned per method, as dicts with the number of calls,
+    timeouts and other errors, the p99 latency in seconds of the latest
+    calls and a histogram of the latencies of the calls.
+    """
+    return _ContextWrapper.get_method_stats()
+
+
 def get_client(target, version_cap=None, serializer=None):
     assert TRANSPORT is not None
     serializer = RequestContextSerializer(serializer)
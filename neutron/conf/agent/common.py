@@ -56,6 +56,17 @@ AGENT_STATE_OPTS = [
                         'is half or less than agent_down_time.')),
     cfg.BoolOpt('log_agent_heartbeats', default=False,
                 help=_('Log agent heartbeats')),
+    cfg.BoolOpt('rpc_compact_wire_format', default=False,
+                help=_('Receive the resources pushed and pulled from the '
+                       'server in a compact and compressed wire format. The '
+                       'server only pushes resources in this format once '
+                       'all the agents consuming them have it enabled, and '
+                       'must support it before it is enabled on an '
+                       'agent.')),
+    cfg.BoolOpt('report_rpc_stats', default=False,
+                help=_('Include the latency and error statistics of the RPC '
+                       'calls made by the agent in the configurations it '
+                       'reports to the server.')),
 ]
 
 INTERFACE_DRIVER_OPTS = [
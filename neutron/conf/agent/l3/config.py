@@ -93,6 +93,10 @@ OPTS = [
                help=_('Iptables mangle mark used to mark ingress from '
                       'external network. This mark will be masked with '
                       '0xffff so that only the lower 16 bits will be used.')),
+    cfg.IntOpt('router_processing_workers', default=8, min=1,
+               help=_('Number of workers processing router updates. The '
+                      'workers take the updates from a shared queue and a '
+                      'router is only processed by one worker at a time.')),
 ]
 
 OPTS += config.EXT_NET_BRIDGE_OPTS
@@ -73,7 +73,24 @@ METADATA_PROXY_HANDLER_OPTS = [
                help=_("Client certificate for nova metadata api server.")),
     cfg.StrOpt('nova_client_priv_key',
                default='',
-               help=_("Private key of client certificate."))
+               help=_("Private key of client certificate.")),
+    cfg.IntOpt('nova_metadata_pool_size',
+               default=100,
+               min=1,
+               help=_("Maximum number of HTTP clients to the Nova metadata "
+                      "server kept by each metadata worker. The clients "
+                      "keep their connections alive between requests, "
+                      "requests above this limit wait for a client to be "
+                      "released.")),
+    cfg.BoolOpt('enable_port_index',
+                default=False,
+                help=_("Look up the ports of the metadata requests in a "
+                       "local index fed by the port notifications of the "
+                       "Neutron server instead of calling the server for "
+                       "each request. The server is only queried the first "
+                       "time a network or a router is seen by a metadata "
+                       "worker. Requires the Neutron server to push port "
+                       "notifications, as done by the ML2 plugin."))
 ]
 
 
@@ -100,7 +117,15 @@ UNIX_DOMAIN_METADATA_PROXY_OPTS = [
     cfg.IntOpt('metadata_backlog',
                default=4096,
                help=_('Number of backlog requests to configure the '
-                      'metadata server socket with'))
+                      'metadata server socket with')),
+    cfg.IntOpt('metadata_wsgi_pool_size',
+               min=1,
+               help=_('Maximum number of requests served concurrently by '
+                      'each metadata worker, defaults to '
+                      'wsgi_default_pool_size. Requests are handled by '
+                      'green threads, so this can be raised to thousands '
+                      'when enable_port_index is set and the requests '
+                      'mostly wait on the Nova metadata server.'))
 ]
 
 
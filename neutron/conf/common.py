@@ -115,6 +115,26 @@ core_opts = [
     cfg.IntOpt('send_events_interval', default=2,
                help=_('Number of seconds between sending events to nova if '
                       'there are any events to send.')),
+    cfg.IntOpt('send_events_max_batch_size', default=1000, min=1,
+               help=_('Maximum number of events sent to nova at once. The '
+                      'size of the batches is reduced while nova takes '
+                      'longer than send_events_interval to answer.')),
+    cfg.IntOpt('send_events_max_pending', default=100000, min=1,
+               help=_('Maximum number of events waiting to be sent to nova. '
+                      'The oldest events are dropped when the limit is '
+                      'reached.')),
+    cfg.StrOpt('send_events_spool_file',
+               help=_('File used to persist the events waiting to be sent '
+                      'to nova, so they are not lost when the server is '
+                      'restarted. The process id of the worker is appended '
+                      'to the name of the file. Events are only kept in '
+                      'memory if not set.')),
+    cfg.IntOpt('rpc_circuit_breaker_threshold', default=0, min=0,
+               help=_('Number of consecutive timeouts of the calls of an RPC '
+                      'method after which its calls fail immediately, for '
+                      'the duration of its timeout, instead of being sent. '
+                      'This avoids piling up calls on an overloaded server. '
+                      'Disabled when set to 0.')),
     cfg.StrOpt('ipam_driver', default='internal',
                help=_("Neutron IPAM (IP address management) driver to use. "
                       "By default, the reference implementation of the "
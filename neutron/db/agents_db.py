@@ -13,7 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import datetime
+import hashlib
 
 import debtcollector
 from eventlet import greenthread
@@ -43,6 +45,7 @@ from neutron.db import api as db_api
 from neutron.db.models import agent as agent_model
 from neutron.extensions import agent as ext_agent
 from neutron.extensions import availability_zone as az_ext
+from neutron.notifiers import batch_notifier
 
 LOG = logging.getLogger(__name__)
 
@@ -69,6 +72,21 @@ AGENT_OPTS = [
                        "enable_new_agents=False. In the case, user's "
                        "resources will not be scheduled automatically to the "
                        "agent until admin changes admin_state_up to True.")),
+    cfg.IntOpt('agent_heartbeat_batch_interval', default=0, min=0,
+               help=_("Seconds between two writes of the heartbeats of the "
+                      "agents whose reported state did not change. Such "
+                      "heartbeats are written by each server worker with a "
+                      "single statement for all the agents. 0 writes them "
+                      "as soon as they are received. Must be much lower "
+                      "than agent_down_time.")),
+    cfg.IntOpt('agent_cache_ttl', default=0, min=0,
+               help=_("Seconds during which each server worker serves the "
+                      "agents used by the schedulers and the availability "
+                      "zones from a copy of the agents table, instead of "
+                      "querying it. The copy is updated with the heartbeats "
+                      "and the agent changes received by the worker, and "
+                      "read again when it is older. 0 disables the copy. "
+                      "Must be much lower than agent_down_time.")),
 ]
 cfg.CONF.register_opts(AGENT_OPTS)
 
@@ -78,17 +96,128 @@ cfg.CONF.register_opts(AGENT_OPTS)
 DOWNTIME_VERSIONS_RATIO = 2
 
 
+class AgentsCache(object):
+    """A copy of the agents table shared by the users of a server process.
+
+    The agents are detached copies of the rows indexed by type, host and
+    availability zone, and their configurations are parsed once. The agents
+    created, updated and deleted by the process and the heartbeats it
+    receives update the copy, which is read again from the database when it
+    is older than agent_cache_ttl, to see the changes made by the other
+    processes.
+    """
+
+    INDEXES = ('agent_type', 'host', 'availability_zone')
+    FILTERS = frozenset(INDEXES + ('id', 'admin_state_up'))
+
+    def __init__(self):
+        self.invalidate()
+
+    @property
+    def enabled(self):
+        return bool(cfg.CONF.agent_cache_ttl)
+
+    def invalidate(self):
+        self._agents = {}
+        self._indexes = dict((key, collections.defaultdict(set))
+                             for key in self.INDEXES)
+        self._configurations = {}
+        self._loaded_at = None
+
+    def _load(self, context):
+        # the rows are fetched before emptying the copy, so other green
+        # threads never see it partially loaded
+        agent_dbs = context.session.query(agent_model.Agent).all()
+        self.invalidate()
+        self._loaded_at = timeutils.utcnow()
+        for agent_db in agent_dbs:
+            self.update(agent_db)
+
+    def get_agents(self, context, filters=None):
+        """Return the copies of the agents matching filters.
+
+        :param filters: dict of FILTERS columns to lists of values.
+        """
+        if (self._loaded_at is None or timeutils.is_older_than(
+                self._loaded_at, cfg.CONF.agent_cache_ttl)):
+            self._load(context)
+        filters = dict(filters or {})
+        agent_ids = None
+        for key in self.INDEXES:
+            if key not in filters:
+                continue
+            index = self._indexes[key]
+            ids = set()
+            for value in filters.pop(key):
+                ids |= index.get(value, set())
+            agent_ids = ids if agent_ids is None else agent_ids & ids
+        if agent_ids is None:
+            agents = list(self._agents.values())
+        else:
+            agents = [self._agents[agent_id] for agent_id in agent_ids]
+        return [agent for agent in agents
+                if all(agent[key] in values
+                       for key, values in filters.items())]
+
+    def update(self, agent_db):
+        """Replace the copy of an agent by a copy of its row."""
+        if self._loaded_at is None or not agent_db.id:
+            # the next read loads all the agents
+            return
+        self.remove(agent_db.id)
+        agent = agent_model.Agent(**dict(
+            (column.name, agent_db[column.name])
+            for column in agent_model.Agent.__table__.columns))
+        self._agents[agent.id] = agent
+        for key, index in self._indexes.items():
+            index[agent[key]].add(agent.id)
+
+    def update_heartbeat(self, agent_id, timestamp):
+        agent = self._agents.get(agent_id)
+        if agent is not None:
+            agent.heartbeat_timestamp = timestamp
+
+    def remove(self, agent_id):
+        agent = self._agents.pop(agent_id, None)
+        if agent is None:
+            return
+        for key, index in self._indexes.items():
+            index[agent[key]].discard(agent_id)
+            if not index[agent[key]]:
+                del index[agent[key]]
+
+    def get_configurations(self, agent):
+        """Return the parsed configurations of an agent, if known.
+
+        The returned dict is shared and must not be modified.
+        """
+        configurations = self._configurations.get(agent['id'])
+        if configurations and configurations[0] == agent['configurations']:
+            return configurations[1]
+
+    def set_configurations(self, agent, configurations):
+        self._configurations[agent['id']] = (agent['configurations'],
+                                             configurations)
+
+
+AGENTS_CACHE = AgentsCache()
+
+
 class AgentAvailabilityZoneMixin(az_ext.AvailabilityZonePluginBase):
     """Mixin class to add availability_zone extension to AgentDbMixin."""
 
     def _list_availability_zones(self, context, filters=None):
         result = {}
-        query = model_query.get_collection_query(context, agent_model.Agent,
-                                                 filters=filters)
-        columns = (agent_model.Agent.admin_state_up,
-                   agent_model.Agent.availability_zone,
-                   agent_model.Agent.agent_type)
-        for agent in query.with_entities(*columns).group_by(*columns):
+        if AGENTS_CACHE.enabled and not filters:
+            agents = AGENTS_CACHE.get_agents(context)
+        else:
+            query = model_query.get_collection_query(
+                context, agent_model.Agent, filters=filters)
+            columns = (agent_model.Agent.admin_state_up,
+                       agent_model.Agent.availability_zone,
+                       agent_model.Agent.agent_type)
+            agents = query.with_entities(*columns).group_by(*columns)
+        for agent in agents:
             if not agent.availability_zone:
                 continue
             if agent.agent_type == constants.AGENT_TYPE_DHCP:
@@ -126,13 +255,18 @@ class AgentAvailabilityZoneMixin(az_ext.AvailabilityZonePluginBase):
             agent_type = constants.AGENT_TYPE_L3
         else:
             return
-        query = context.session.query(
-            agent_model.Agent.availability_zone).filter_by(
-            agent_type=agent_type).group_by(
-            agent_model.Agent.availability_zone)
-        query = query.filter(
-            agent_model.Agent.availability_zone.in_(availability_zones))
-        azs = [item[0] for item in query]
+        if AGENTS_CACHE.enabled:
+            azs = [agent.availability_zone for agent in
+                   AGENTS_CACHE.get_agents(
+                       context, filters={'agent_type': [agent_type]})]
+        else:
+            query = context.session.query(
+                agent_model.Agent.availability_zone).filter_by(
+                agent_type=agent_type).group_by(
+                agent_model.Agent.availability_zone)
+            query = query.filter(
+                agent_model.Agent.availability_zone.in_(availability_zones))
+            azs = [item[0] for item in query]
         diff = set(availability_zones) - set(azs)
         if diff:
             raise az_ext.AvailabilityZoneNotFound(availability_zone=diff.pop())
@@ -162,7 +296,7 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
                       '%(host)s', {'agent_type': agent_type, 'host': host})
             return
 
-        if utils.is_agent_down(agent.heartbeat_timestamp):
+        if utils.is_agent_down(self._get_agent_heartbeat_timestamp(agent)):
             LOG.warning(_LW('%(agent_type)s agent %(agent_id)s is not active'),
                         {'agent_type': agent_type, 'agent_id': agent.id})
         return agent
@@ -184,7 +318,13 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
                                            DOWNTIME_VERSIONS_RATIO)
 
     def get_configuration_dict(self, agent_db):
-        return self._get_dict(agent_db, 'configurations')
+        if not AGENTS_CACHE.enabled:
+            return self._get_dict(agent_db, 'configurations')
+        configurations = AGENTS_CACHE.get_configurations(agent_db)
+        if configurations is None:
+            configurations = self._get_dict(agent_db, 'configurations')
+            AGENTS_CACHE.set_configurations(agent_db, configurations)
+        return configurations
 
     def _get_dict(self, agent_db, dict_name, ignore_missing=False):
         json_value = None
@@ -216,6 +356,8 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
             ext_agent.RESOURCE_NAME + 's')
         res = dict((k, agent[k]) for k in attr
                    if k not in ['alive', 'configurations'])
+        res['heartbeat_timestamp'] = self._get_agent_heartbeat_timestamp(
+            agent)
         res['alive'] = not utils.is_agent_down(
             res['heartbeat_timestamp']
         )
@@ -232,6 +374,8 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
                         context=context, agent=agent)
         with context.session.begin(subtransactions=True):
             context.session.delete(agent)
+        self._get_agent_heartbeats().pop((agent.agent_type, agent.host), None)
+        AGENTS_CACHE.remove(id)
 
     @db_api.retry_if_session_inactive()
     def update_agent(self, context, id, agent):
@@ -239,10 +383,13 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
         with context.session.begin(subtransactions=True):
             agent = self._get_agent(context, id)
             agent.update(agent_data)
+        AGENTS_CACHE.update(agent)
         return self._make_agent_dict(agent)
 
     @db_api.retry_if_session_inactive()
     def get_agents_db(self, context, filters=None):
+        if AGENTS_CACHE.enabled and set(filters or ()) <= AGENTS_CACHE.FILTERS:
+            return AGENTS_CACHE.get_agents(context, filters)
         query = model_query.get_collection_query(context,
                                                  agent_model.Agent,
                                                  filters=filters)
@@ -250,9 +397,18 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
 
     @db_api.retry_if_session_inactive()
     def get_agents(self, context, filters=None, fields=None):
-        agents = model_query.get_collection(context, agent_model.Agent,
-                                            self._make_agent_dict,
-                                            filters=filters, fields=fields)
+        column_filters = dict((key, value)
+                              for key, value in (filters or {}).items()
+                              if key != 'alive')
+        if (AGENTS_CACHE.enabled and
+                set(column_filters) <= AGENTS_CACHE.FILTERS):
+            agents = [self._make_agent_dict(agent, fields) for agent in
+                      AGENTS_CACHE.get_agents(context, column_filters)]
+        else:
+            agents = model_query.get_collection(context, agent_model.Agent,
+                                                self._make_agent_dict,
+                                                filters=filters,
+                                                fields=fields)
         alive = filters and filters.get('alive', None)
         if alive:
             alive = converters.convert_to_boolean(alive[0])
@@ -311,16 +467,134 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
         """
         return candidate_hosts
 
-    def _log_heartbeat(self, state, agent_db, agent_conf):
+    def _log_heartbeat(self, state, last_heartbeat, agent_conf):
         if agent_conf.get('log_agent_heartbeats'):
-            delta = timeutils.utcnow() - agent_db.heartbeat_timestamp
+            delta = timeutils.utcnow() - last_heartbeat
             LOG.info(_LI("Heartbeat received from %(type)s agent on "
                          "host %(host)s, uuid %(uuid)s after %(delta)s"),
-                     {'type': agent_db.agent_type,
-                      'host': agent_db.host,
+                     {'type': state['agent_type'],
+                      'host': state['host'],
                       'uuid': state.get('uuid'),
                       'delta': delta})
 
+    def _get_agent_state_values(self, agent_state):
+        """Return the values of the agents table columns reported by agents.
+
+        The timestamps and the resource versions are not included.
+        """
+        res_keys = ['agent_type', 'binary', 'host', 'topic']
+        res = dict((k, agent_state[k]) for k in res_keys)
+        if 'availability_zone' in agent_state:
+            res['availability_zone'] = agent_state['availability_zone']
+        res['configurations'] = jsonutils.dumps(
+            agent_state.get('configurations', {}))
+        res['load'] = self._get_agent_load(agent_state)
+        return res
+
+    @staticmethod
+    def _get_agent_state_hash(values):
+        return hashlib.sha1(jsonutils.dumps(
+            values, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _get_agent_heartbeats(self):
+        """Return the heartbeats of the agents seen by this process.
+
+        They are indexed by agent type and host, and have the id of the agent,
+        the hash of its state, the time of the last heartbeat and the time of
+        the last write of the whole state.
+        """
+        if getattr(self, '_agent_heartbeats', None) is None:
+            self._agent_heartbeats = {}
+            self._heartbeat_writer = batch_notifier.BatchNotifier(
+                cfg.CONF.agent_heartbeat_batch_interval,
+                self._write_heartbeats,
+                key_func=lambda heartbeat: heartbeat['id'])
+        return self._agent_heartbeats
+
+    def _get_agent_heartbeat_timestamp(self, agent):
+        """Return the latest heartbeat of an agent, written or not yet."""
+        timestamp = agent['heartbeat_timestamp']
+        if not cfg.CONF.agent_heartbeat_batch_interval:
+            return timestamp
+        heartbeat = self._get_agent_heartbeats().get(
+            (agent['agent_type'], agent['host']))
+        if heartbeat and heartbeat['id'] == agent['id']:
+            return max(timestamp, heartbeat['seen'])
+        return timestamp
+
+    @db_api.retry_if_session_inactive()
+    def update_agent_heartbeat(self, context, agent_state):
+        """Only update the heartbeat of an agent if its state is unchanged.
+
+        The whole state of an agent has to be written when it starts, when
+        it reports its resource versions, when its state changes and when it
+        is revived or was deleted, which create_or_update_agent does.
+
+        :returns: the status of the agent, or None if its state has to be
+            written with create_or_update_agent.
+        """
+        if agent_state.get('start_flag') or 'resource_versions' in agent_state:
+            return
+        heartbeat = self._get_agent_heartbeats().get(
+            (agent_state['agent_type'], agent_state['host']))
+        if not heartbeat:
+            return
+        values = self._get_agent_state_values(agent_state)
+        if heartbeat['hash'] != self._get_agent_state_hash(values):
+            return
+        current_time = timeutils.utcnow()
+        if cfg.CONF.agent_heartbeat_batch_interval:
+            # the heartbeats seen by this process tell whether the agent is
+            # alive, the state is written again at least every
+            # agent_down_time in case another process changed it
+            if (utils.is_agent_down(heartbeat['seen']) or
+                    utils.is_agent_down(heartbeat['written'])):
+                return
+            self._heartbeat_writer.queue_event(
+                {'id': heartbeat['id'], 'timestamp': current_time})
+            AGENTS_CACHE.update_heartbeat(heartbeat['id'], current_time)
+        else:
+            # the row is only updated if the agent is alive and its state in
+            # the database is the reported one
+            cutoff = current_time - datetime.timedelta(
+                seconds=cfg.CONF.agent_down_time)
+            with context.session.begin(subtransactions=True):
+                count = context.session.query(agent_model.Agent).filter(
+                    agent_model.Agent.id == heartbeat['id'],
+                    agent_model.Agent.heartbeat_timestamp >= cutoff).filter_by(
+                    **values).update(
+                    {agent_model.Agent.heartbeat_timestamp: current_time},
+                    synchronize_session=False)
+            if not count:
+                return
+            AGENTS_CACHE.update_heartbeat(heartbeat['id'], current_time)
+        self._log_heartbeat(agent_state, heartbeat['seen'],
+                            agent_state.get('configurations', {}))
+        heartbeat['seen'] = current_time
+        registry.notify(resources.AGENT, events.AFTER_UPDATE, self,
+                        context=context, host=agent_state['host'],
+                        plugin=self, agent=agent_state)
+        return n_const.AGENT_ALIVE
+
+    def _write_heartbeats(self, heartbeats):
+        """Write the timestamps of heartbeats with a single statement."""
+        timestamps = dict((heartbeat['id'], heartbeat['timestamp'])
+                          for heartbeat in heartbeats)
+        admin_context = context.get_admin_context()
+        with admin_context.session.begin(subtransactions=True):
+            count = admin_context.session.query(agent_model.Agent).filter(
+                agent_model.Agent.id.in_(timestamps)).update(
+                {agent_model.Agent.heartbeat_timestamp: sql.case(
+                    timestamps, value=agent_model.Agent.id)},
+                synchronize_session=False)
+        if count < len(timestamps):
+            # agents were deleted, write the whole state of the agents on
+            # their next heartbeat to create them again
+            agent_heartbeats = self._get_agent_heartbeats()
+            for key, heartbeat in list(agent_heartbeats.items()):
+                if heartbeat['id'] in timestamps:
+                    del agent_heartbeats[key]
+
     @db_api.retry_if_session_inactive()
     def create_or_update_agent(self, context, agent_state):
         """Registers new agent in the database or updates existing.
@@ -331,17 +605,13 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
         """
         status = n_const.AGENT_ALIVE
         with context.session.begin(subtransactions=True):
-            res_keys = ['agent_type', 'binary', 'host', 'topic']
-            res = dict((k, agent_state[k]) for k in res_keys)
-            if 'availability_zone' in agent_state:
-                res['availability_zone'] = agent_state['availability_zone']
+            res = self._get_agent_state_values(agent_state)
+            state_hash = self._get_agent_state_hash(res)
             configurations_dict = agent_state.get('configurations', {})
-            res['configurations'] = jsonutils.dumps(configurations_dict)
             resource_versions_dict = agent_state.get('resource_versions')
             if resource_versions_dict:
                 res['resource_versions'] = jsonutils.dumps(
                     resource_versions_dict)
-            res['load'] = self._get_agent_load(agent_state)
             current_time = timeutils.utcnow()
             try:
                 agent_db = self._get_agent_by_type_and_host(
@@ -359,7 +629,8 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
                 if agent_state.get('start_flag'):
                     res['started_at'] = current_time
                 greenthread.sleep(0)
-                self._log_heartbeat(agent_state, agent_db, configurations_dict)
+                self._log_heartbeat(agent_state, agent_db.heartbeat_timestamp,
+                                    configurations_dict)
                 agent_db.update(res)
                 event_type = events.AFTER_UPDATE
             except ext_agent.AgentNotFoundByTypeHost:
@@ -372,10 +643,17 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
                 greenthread.sleep(0)
                 context.session.add(agent_db)
                 event_type = events.AFTER_CREATE
-                self._log_heartbeat(agent_state, agent_db, configurations_dict)
+                self._log_heartbeat(agent_state, agent_db.heartbeat_timestamp,
+                                    configurations_dict)
                 status = n_const.AGENT_NEW
             greenthread.sleep(0)
 
+        AGENTS_CACHE.update(agent_db)
+        if agent_db.id:
+            self._get_agent_heartbeats()[
+                (agent_state['agent_type'], agent_state['host'])] = {
+                'id': agent_db.id, 'hash': state_hash, 'seen': current_time,
+                'written': current_time}
         registry.notify(resources.AGENT, event_type, self, context=context,
                         host=agent_state['host'], plugin=self,
                         agent=agent_state)
@@ -452,6 +730,10 @@ class AgentExtRpcCallback(object):
             return
         if not self.plugin:
             self.plugin = directory.get_plugin()
+        agent_status = self.plugin.update_agent_heartbeat(context,
+                                                          agent_state)
+        if agent_status:
+            return agent_status
         agent_status, agent_state = self.plugin.create_or_update_agent(
             context, agent_state)
         self._update_local_agent_resource_versions(context, agent_state)
@@ -13,10 +13,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import datetime
 import random
 import time
 
+import eventlet
 from neutron_lib import constants
 from neutron_lib import context as ncontext
 from oslo_config import cfg
@@ -66,6 +68,14 @@ AGENTS_SCHEDULER_OPTS = [
                        'selected for automatic scheduling regardless of this '
                        'option. But manual scheduling to such agents is '
                        'available if this option is True.')),
+    cfg.IntOpt('agent_reschedule_batch_size', default=50, min=1,
+               help=_('Number of resources of down agents, such as routers '
+                      'or networks, rescheduled together in a batch.')),
+    cfg.IntOpt('agent_reschedule_workers', default=4, min=1,
+               help=_('Maximum number of batches of resources of down '
+                      'agents rescheduled concurrently. This limits the '
+                      'load put on the database and on the message bus '
+                      'when many agents go down at once.')),
 ]
 
 cfg.CONF.register_opts(AGENTS_SCHEDULER_OPTS)
@@ -149,9 +159,22 @@ class AgentSchedulerDbMixin(agents_db.AgentDbMixin):
                                               resource_id_attr,
                                               resource_name,
                                               reschedule_resource,
-                                              rescheduling_failed):
+                                              rescheduling_failed,
+                                              reschedule_resources=None,
+                                              prioritize_resources=None):
         """Reschedule resources from down neutron agents
         if admin state is up.
+
+        The resources are rescheduled in concurrent batches, see
+        reschedule_resources_in_batches.
+
+        :param reschedule_resources: optional function rescheduling a list of
+            resources at once, used instead of reschedule_resource. If it
+            raises an unexpected exception, the resources are rescheduled one
+            by one with reschedule_resource.
+        :param prioritize_resources: optional function called with a context
+            and the ids of the resources to reschedule, returning them in the
+            order they should be rescheduled.
         """
         agent_dead_limit = self.agent_dead_limit_seconds()
         self.wait_down_agents(agent_type, agent_dead_limit)
@@ -161,6 +184,7 @@ class AgentSchedulerDbMixin(agents_db.AgentDbMixin):
             down_bindings = get_down_bindings(context, agent_dead_limit)
 
             agents_back_online = set()
+            resource_ids = []
             for binding in down_bindings:
                 binding_agent_id = getattr(binding, agent_id_attr)
                 binding_resource_id = getattr(binding, resource_id_attr)
@@ -184,15 +208,49 @@ class AgentSchedulerDbMixin(agents_db.AgentDbMixin):
                      'resource': binding_resource_id,
                      'agent': binding_agent_id,
                      'dead_time': agent_dead_limit})
-                try:
-                    reschedule_resource(context, binding_resource_id)
-                except (rescheduling_failed, oslo_messaging.RemoteError):
-                    # Catch individual rescheduling errors here
-                    # so one broken one doesn't stop the iteration.
-                    LOG.exception(_LE("Failed to reschedule %(resource_name)s "
-                                      "%(resource)s"),
-                                  {'resource_name': resource_name,
-                                   'resource': binding_resource_id})
+                if binding_resource_id not in resource_ids:
+                    resource_ids.append(binding_resource_id)
+            if not resource_ids:
+                return
+            if prioritize_resources:
+                resource_ids = prioritize_resources(context, resource_ids)
+
+            def reschedule_batch(context, batch):
+                if reschedule_resources:
+                    try:
+                        reschedule_resources(context, batch)
+                        return
+                    except (rescheduling_failed, oslo_messaging.RemoteError):
+                        # The resources which could be rescheduled were.
+                        LOG.exception(_LE("Failed to reschedule "
+                                          "%(resource_name)s %(resource)s"),
+                                      {'resource_name': resource_name,
+                                       'resource': ', '.join(batch)})
+                        return
+                    except Exception:
+                        # The whole batch was rolled back, fall back to
+                        # rescheduling the resources one by one so that a
+                        # broken one doesn't stop the others.
+                        LOG.exception(_LE("Failed to reschedule "
+                                          "%(resource_name)ss %(resources)s "
+                                          "at once, rescheduling them one by "
+                                          "one"),
+                                      {'resource_name': resource_name,
+                                       'resources': ', '.join(batch)})
+                        context = ncontext.get_admin_context()
+                for resource_id in batch:
+                    try:
+                        reschedule_resource(context, resource_id)
+                    except (rescheduling_failed, oslo_messaging.RemoteError):
+                        # Catch individual rescheduling errors here
+                        # so one broken one doesn't stop the iteration.
+                        LOG.exception(_LE("Failed to reschedule "
+                                          "%(resource_name)s %(resource)s"),
+                                      {'resource_name': resource_name,
+                                       'resource': resource_id})
+
+            self.reschedule_resources_in_batches(resource_name, resource_ids,
+                                                 reschedule_batch)
         except Exception:
             # we want to be thorough and catch whatever is raised
             # to avoid loop abortion
@@ -200,6 +258,51 @@ class AgentSchedulerDbMixin(agents_db.AgentDbMixin):
                               "rescheduling."),
                           {'resource_name': resource_name})
 
+    def reschedule_resources_in_batches(self, resource_name, resource_ids,
+                                        reschedule_batch):
+        """Reschedule resources of down agents in concurrent batches.
+
+        The resources are split in batches of agent_reschedule_batch_size,
+        which are processed in the order of resource_ids by at most
+        agent_reschedule_workers green threads. The progress, the throughput
+        and the backlog are logged after each batch.
+
+        :param reschedule_batch: function called with a new admin context and
+            a list of resource ids. A batch raising an exception does not stop
+            the other ones.
+        """
+        batch_size = cfg.CONF.agent_reschedule_batch_size
+        batches = [resource_ids[i:i + batch_size]
+                   for i in range(0, len(resource_ids), batch_size)]
+
+        def _reschedule_batch(batch):
+            try:
+                # each batch uses its own DB session
+                reschedule_batch(ncontext.get_admin_context(), batch)
+            except Exception:
+                LOG.exception(_LE("Exception encountered during "
+                                  "%(resource_name)s rescheduling of "
+                                  "%(resources)s"),
+                              {'resource_name': resource_name,
+                               'resources': ', '.join(batch)})
+            return len(batch)
+
+        pool = eventlet.GreenPool(cfg.CONF.agent_reschedule_workers)
+        total = len(resource_ids)
+        done = 0
+        start = time.time()
+        for num in pool.imap(_reschedule_batch, batches):
+            done += num
+            elapsed = time.time() - start
+            LOG.info(_LI("Rescheduled %(done)d of %(total)d "
+                         "%(resource_name)ss of down agents in %(elapsed).1f "
+                         "seconds (%(rate).1f per second), %(backlog)d "
+                         "remaining"),
+                     {'done': done, 'total': total,
+                      'resource_name': resource_name, 'elapsed': elapsed,
+                      'rate': done / max(elapsed, 0.001),
+                      'backlog': total - done})
+
 
 class DhcpAgentSchedulerDbMixin(dhcpagentscheduler
                                 .DhcpAgentSchedulerPluginBase,
@@ -335,6 +438,9 @@ class DhcpAgentSchedulerDbMixin(dhcpagentscheduler
                 LOG.warning(_LW("No DHCP agents available, "
                                 "skipping rescheduling"))
                 return
+            # save the bindings to avoid ObjectDeletedError in case they
+            # are concurrently deleted from the DB
+            dead_agents = collections.OrderedDict()
             for binding in dead_bindings:
                 LOG.warning(_LW("Removing network %(network)s from agent "
                                 "%(agent)s because the agent did not report "
@@ -343,39 +449,68 @@ class DhcpAgentSchedulerDbMixin(dhcpagentscheduler
                             {'network': binding.network_id,
                              'agent': binding.dhcp_agent_id,
                              'dead_time': agent_dead_limit})
-                # save binding object to avoid ObjectDeletedError
-                # in case binding is concurrently deleted from the DB
-                saved_binding = {'net': binding.network_id,
-                                 'agent': binding.dhcp_agent_id}
-                try:
-                    # do not notify agent if it considered dead
-                    # so when it is restarted it won't see network delete
-                    # notifications on its queue
-                    self.remove_network_from_dhcp_agent(context,
-                                                        binding.dhcp_agent_id,
-                                                        binding.network_id,
-                                                        notify=False)
-                except dhcpagentscheduler.NetworkNotHostedByDhcpAgent:
-                    # measures against concurrent operation
-                    LOG.debug("Network %(net)s already removed from DHCP "
-                              "agent %(agent)s",
-                              saved_binding)
-                    # still continue and allow concurrent scheduling attempt
-                except Exception:
-                    LOG.exception(_LE("Unexpected exception occurred while "
-                                      "removing network %(net)s from agent "
-                                      "%(agent)s"),
-                                  saved_binding)
-
-                if cfg.CONF.network_auto_schedule:
-                    self._schedule_network(
-                        context, saved_binding['net'], dhcp_notifier)
+                dead_agents.setdefault(binding.network_id, []).append(
+                    binding.dhcp_agent_id)
+            if not dead_agents:
+                return
+            network_ids = self._prioritize_networks_to_reschedule(
+                context, list(dead_agents), active_agents)
+
+            def reschedule_batch(context, batch):
+                for network_id in batch:
+                    self._reschedule_network_from_down_agents(
+                        context, network_id, dead_agents[network_id],
+                        dhcp_notifier)
+
+            self.reschedule_resources_in_batches('network', network_ids,
+                                                 reschedule_batch)
         except Exception:
             # we want to be thorough and catch whatever is raised
             # to avoid loop abortion
             LOG.exception(_LE("Exception encountered during network "
                               "rescheduling"))
 
+    def _prioritize_networks_to_reschedule(self, context, network_ids,
+                                           active_agents):
+        """Order the networks which are no longer served by any agent first.
+
+        The networks still hosted by an eligible agent keep their DHCP
+        service while they are rescheduled, they are rescheduled last.
+        """
+        query = context.session.query(
+            ndab_model.NetworkDhcpAgentBinding.network_id).filter(
+            ndab_model.NetworkDhcpAgentBinding.network_id.in_(network_ids),
+            ndab_model.NetworkDhcpAgentBinding.dhcp_agent_id.in_(
+                [agent.id for agent in active_agents]))
+        served = {binding.network_id for binding in query}
+        return sorted(network_ids,
+                      key=lambda network_id: network_id in served)
+
+    def _reschedule_network_from_down_agents(self, context, network_id,
+                                             agent_ids, dhcp_notifier):
+        for agent_id in agent_ids:
+            saved_binding = {'net': network_id, 'agent': agent_id}
+            try:
+                # do not notify agent if it considered dead
+                # so when it is restarted it won't see network delete
+                # notifications on its queue
+                self.remove_network_from_dhcp_agent(context, agent_id,
+                                                    network_id, notify=False)
+            except dhcpagentscheduler.NetworkNotHostedByDhcpAgent:
+                # measures against concurrent operation
+                LOG.debug("Network %(net)s already removed from DHCP "
+                          "agent %(agent)s",
+                          saved_binding)
+                # still continue and allow concurrent scheduling attempt
+            except Exception:
+                LOG.exception(_LE("Unexpected exception occurred while "
+                                  "removing network %(net)s from agent "
+                                  "%(agent)s"),
+                              saved_binding)
+
+        if cfg.CONF.network_auto_schedule:
+            self._schedule_network(context, network_id, dhcp_notifier)
+
     def get_dhcp_agents_hosting_networks(
             self, context, network_ids, active=None, admin_state_up=None,
             hosts=None):
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
 from neutron_lib import constants
 from neutron_lib.plugins import constants as plugin_constants
 from neutron_lib.plugins import directory
@@ -22,11 +24,13 @@ from oslo_log import log as logging
 import oslo_messaging
 from sqlalchemy import or_
 
-from neutron._i18n import _, _LI
+from neutron._i18n import _, _LE, _LI
 from neutron.agent.common import utils as agent_utils
 from neutron.common import utils as n_utils
+from neutron.db import agents_db
 from neutron.db import agentschedulers_db
 from neutron.db.models import agent as agent_model
+from neutron.db.models import l3 as l3_models
 from neutron.db.models import l3agent as rb_model
 from neutron.extensions import l3agentscheduler
 from neutron.extensions import router_availability_zone as router_az
@@ -81,7 +85,21 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
                 resource_id_attr='router_id',
                 resource_name='router',
                 reschedule_resource=self.reschedule_router,
-                rescheduling_failed=l3agentscheduler.RouterReschedulingFailed)
+                rescheduling_failed=l3agentscheduler.RouterReschedulingFailed,
+                reschedule_resources=self.reschedule_routers,
+                prioritize_resources=self._prioritize_routers_to_reschedule)
+
+    def _prioritize_routers_to_reschedule(self, context, router_ids):
+        """Order the routers with an external gateway first.
+
+        They carry the north-south traffic, including the floating IPs.
+        """
+        query = context.session.query(l3_models.Router.id).filter(
+            l3_models.Router.id.in_(router_ids),
+            l3_models.Router.gw_port_id.isnot(None))
+        gw_router_ids = {router.id for router in query}
+        return sorted(router_ids,
+                      key=lambda router_id: router_id not in gw_router_ids)
 
     def get_down_router_bindings(self, context, agent_dead_limit):
         cutoff = self.get_cutoff_time(agent_dead_limit)
@@ -252,6 +270,76 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
         self._notify_agents_router_rescheduled(context, router_id,
                                                cur_agents, new_agents)
 
+    def reschedule_routers(self, context, router_ids):
+        """Reschedule routers to new l3 agents in a single pass
+
+        The routers are removed from the agents currently hosting them and
+        scheduled again together, each new agent is notified once with all
+        its routers.
+        """
+        old_bindings = rb_obj.RouterL3AgentBinding.get_objects(
+            context, router_id=router_ids)
+        old_agents = ag_obj.Agent.get_objects(
+            context, id=list({b.l3_agent_id for b in old_bindings}))
+        old_hosts = dict((agent.id, agent.host) for agent in old_agents)
+        with context.session.begin(subtransactions=True):
+            rb_obj.RouterL3AgentBinding.delete_objects(
+                context, router_id=router_ids)
+            scheduled = self.schedule_routers(context, router_ids) or {}
+            failed = set(router_ids)
+            for routers in scheduled.values():
+                failed -= set(routers)
+            if failed:
+                # the routers which can't be scheduled stay on their agents,
+                # as if each router was rescheduled in its own transaction
+                rb_obj.RouterL3AgentBinding.create_objects(context, [
+                    {'router_id': b.router_id,
+                     'l3_agent_id': b.l3_agent_id,
+                     'binding_index': b.binding_index}
+                    for b in old_bindings if b.router_id in failed])
+                old_bindings = [b for b in old_bindings
+                                if b.router_id not in failed]
+
+        failed |= self._notify_agents_routers_rescheduled(
+            context, old_bindings, old_hosts, scheduled)
+        if failed:
+            raise l3agentscheduler.RouterReschedulingFailed(
+                router_id=', '.join(sorted(failed)))
+
+    def _notify_agents_routers_rescheduled(self, context, old_bindings,
+                                           old_hosts, scheduled):
+        """Notify the agents of rescheduled routers.
+
+        :returns: the routers the new agents couldn't be notified of.
+        """
+        l3_notifier = self.agent_notifiers.get(constants.AGENT_TYPE_L3)
+        if not l3_notifier:
+            return set()
+
+        new_hosts = collections.defaultdict(set)
+        for agent, router_ids in scheduled.items():
+            for router_id in router_ids:
+                new_hosts[router_id].add(agent.host)
+        for binding in old_bindings:
+            host = old_hosts.get(binding.l3_agent_id)
+            if host and host not in new_hosts[binding.router_id]:
+                l3_notifier.router_removed_from_agent(
+                    context, binding.router_id, host)
+
+        failed = set()
+        for agent, router_ids in scheduled.items():
+            try:
+                l3_notifier.router_added_to_agent(
+                    context, router_ids, agent.host)
+            except oslo_messaging.MessagingException:
+                LOG.exception(_LE("Failed to notify agent %(agent)s of "
+                                  "routers %(routers)s"),
+                              {'agent': agent.id, 'routers': router_ids})
+                for router_id in router_ids:
+                    self._unbind_router(context, router_id, agent.id)
+                failed.update(router_ids)
+        return failed
+
     def _notify_agents_router_rescheduled(self, context, router_id,
                                           old_agents, new_agents):
         l3_notifier = self.agent_notifiers.get(constants.AGENT_TYPE_L3)
@@ -344,15 +432,18 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
             return []
         record_objs = rb_obj.RouterL3AgentBinding.get_objects(
                 context, router_id=router_ids)
+        if not record_objs:
+            return []
+        agent_ids = list({obj.l3_agent_id for obj in record_objs})
         if admin_state_up is not None:
-            l3_agents = ag_obj.Agent.get_objects(context,
-                     id=[obj.l3_agent_id for obj in record_objs],
-                     admin_state_up=admin_state_up)
+            l3_agents = ag_obj.Agent.get_objects(context, id=agent_ids,
+                                                 admin_state_up=admin_state_up)
         else:
-            l3_agents = [
-                ag_obj.Agent.get_object(context, id=obj.l3_agent_id)
-                for obj in record_objs
-            ]
+            # one agent per binding, fetched with a single query
+            agents = {agent.id: agent for agent in
+                      ag_obj.Agent.get_objects(context, id=agent_ids)}
+            l3_agents = [agents[obj.l3_agent_id] for obj in record_objs
+                         if obj.l3_agent_id in agents]
         if active is not None:
             l3_agents = [l3_agent for l3_agent in
                          l3_agents if not
@@ -385,6 +476,9 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
                 for router_model, agent_count in l3_model_list]
 
     def get_l3_agents(self, context, active=None, filters=None):
+        if (agents_db.AGENTS_CACHE.enabled and set(filters or ()) <=
+                agents_db.AGENTS_CACHE.FILTERS | {'agent_modes'}):
+            return self._get_l3_agents_from_cache(context, active, filters)
         query = context.session.query(agent_model.Agent)
         query = query.filter(
             agent_model.Agent.agent_type == constants.AGENT_TYPE_L3)
@@ -412,6 +506,25 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
                 if agentschedulers_db.AgentSchedulerDbMixin.is_eligible_agent(
                     active, l3_agent)]
 
+    def _get_l3_agents_from_cache(self, context, active, filters):
+        filters = dict(filters or {})
+        agent_modes = filters.pop('agent_modes', None)
+        if not all(filters.values()):
+            return []
+        filters['agent_type'] = [constants.AGENT_TYPE_L3]
+        if active is not None:
+            filters['admin_state_up'] = [active]
+        l3_agents = agents_db.AGENTS_CACHE.get_agents(context, filters)
+        if agent_modes:
+            # like the query, only match the agents reporting their mode
+            l3_agents = [l3_agent for l3_agent in l3_agents
+                         if self.get_configuration_dict(l3_agent).get(
+                             constants.L3_AGENT_MODE) in agent_modes]
+        return [l3_agent
+                for l3_agent in l3_agents
+                if agentschedulers_db.AgentSchedulerDbMixin.is_eligible_agent(
+                    active, l3_agent)]
+
     def get_l3_agent_candidates(self, context, sync_router, l3_agents,
                                 ignore_admin_state=False):
         """Get the valid l3 agents for the router from a list of l3_agents.
@@ -465,9 +578,13 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
                 self, context, router, candidates=candidates)
 
     def schedule_routers(self, context, routers):
-        """Schedule the routers to l3 agents."""
-        for router in routers:
-            self.schedule_router(context, router, candidates=None)
+        """Schedule the routers to l3 agents.
+
+        :returns: a dict of the routers newly hosted by each agent.
+        """
+        if self.router_scheduler:
+            return self.router_scheduler.schedule_routers(
+                self, context, routers)
 
     def get_l3_agent_with_min_routers(self, context, agent_ids):
         if not agent_ids:
@@ -476,6 +593,11 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
                 context, agent_ids)
         return agents
 
+    def get_l3_agents_num_routers(self, context, agent_ids):
+        if not agent_ids:
+            return {}
+        return ag_obj.Agent.get_l3_agents_num_routers(context, agent_ids)
+
     def get_hosts_to_notify(self, context, router_id):
         """Returns all hosts to send notification about router update"""
         state = agentschedulers_db.get_admin_state_up_filter()
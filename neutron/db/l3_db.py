@@ -1626,25 +1626,35 @@ class L3_NAT_dbonly_mixin(l3.RouterPluginBase,
         if not network_ids:
             return {}
 
-        query = context.session.query(models_v2.Subnet,
+        # only the columns the agents need are loaded, building the subnets
+        # from their models would load all their relationships
+        Subnet = models_v2.Subnet
+        query = context.session.query(Subnet.id, Subnet.cidr,
+                                      Subnet.gateway_ip, Subnet.network_id,
+                                      Subnet.ipv6_ra_mode,
+                                      Subnet.subnetpool_id,
                                       models_v2.SubnetPool.address_scope_id)
         query = query.outerjoin(
             models_v2.SubnetPool,
-            models_v2.Subnet.subnetpool_id == models_v2.SubnetPool.id)
-        query = query.filter(models_v2.Subnet.network_id.in_(network_ids))
-
-        fields = ['id', 'cidr', 'gateway_ip', 'dns_nameservers',
-                  'network_id', 'ipv6_ra_mode', 'subnetpool_id']
-
-        def make_subnet_dict_with_scope(row):
-            subnet_db, address_scope_id = row
-            subnet = self._core_plugin._make_subnet_dict(
-                subnet_db, fields, context=context)
-            subnet['address_scope_id'] = address_scope_id
-            return subnet
+            Subnet.subnetpool_id == models_v2.SubnetPool.id)
+        query = query.filter(Subnet.network_id.in_(network_ids))
+        subnets = [row._asdict() for row in query]
+        if not subnets:
+            return dict((id, []) for id in network_ids)
+
+        dns_query = context.session.query(
+            models_v2.DNSNameServer.subnet_id,
+            models_v2.DNSNameServer.address)
+        dns_query = dns_query.filter(models_v2.DNSNameServer.subnet_id.in_(
+            [subnet['id'] for subnet in subnets]))
+        dns_query = dns_query.order_by(models_v2.DNSNameServer.order)
+        dns_by_subnet = {}
+        for subnet_id, address in dns_query:
+            dns_by_subnet.setdefault(subnet_id, []).append(address)
 
         subnets_by_network = dict((id, []) for id in network_ids)
-        for subnet in (make_subnet_dict_with_scope(row) for row in query):
+        for subnet in subnets:
+            subnet['dns_nameservers'] = dns_by_subnet.get(subnet['id'], [])
             subnets_by_network[subnet['network_id']].append(subnet)
         return subnets_by_network
 
@@ -588,6 +588,11 @@ class _DVRAgentInterfaceMixin(object):
         binding_objs = rb_obj.RouterL3AgentBinding.get_objects(
             context, router_id=router_ids)
         bindings = dict((b.router_id, b) for b in binding_objs)
+        hosts = {}
+        if binding_objs:
+            agents = ag_obj.Agent.get_objects(
+                context, id=list(set(b.l3_agent_id for b in binding_objs)))
+            hosts = dict((agent.id, agent.host) for agent in agents)
         for rtr in routers:
             gw_port_id = rtr['gw_port_id']
             # Collect gw ports only if available
@@ -598,9 +603,7 @@ class _DVRAgentInterfaceMixin(object):
                     LOG.debug('No snat is bound to router %s', rtr['id'])
                     continue
 
-                l3_agent = ag_obj.Agent.get_object(context,
-                        id=binding.l3_agent_id)
-                rtr['gw_port_host'] = l3_agent.host
+                rtr['gw_port_host'] = hosts.get(binding.l3_agent_id)
 
         return routers
 
@@ -294,17 +294,40 @@ class L3_DVRsch_db_mixin(l3agent_sch_db.L3AgentSchedulerDbMixin):
                 result_set |= set(self._get_dvr_router_ids_for_host(
                     context, agent_db['host']))
             else:
-                for router_id in (router_ids - result_set):
-                    subnet_ids = self.get_subnet_ids_on_router(
-                        context, router_id)
-                    if (subnet_ids and
-                            self._check_dvr_serviceable_ports_on_host(
-                                    context, agent_db['host'],
-                                    list(subnet_ids))):
-                        result_set.add(router_id)
+                result_set |= self._get_dvr_router_ids_with_ports_on_host(
+                    context, agent_db['host'], router_ids - result_set)
 
         return list(result_set)
 
+    def _get_dvr_router_ids_with_ports_on_host(self, context, host,
+                                               router_ids):
+        """Return the routers having dvr serviceable ports on host
+
+        This is the set-based equivalent of calling get_subnet_ids_on_router
+        and _check_dvr_serviceable_ports_on_host for each router: it runs two
+        queries whatever the number of routers.
+        """
+        if not router_ids:
+            return set()
+        query = context.session.query(models_v2.Port.device_id,
+                                      models_v2.IPAllocation.subnet_id)
+        query = query.join(models_v2.Port.fixed_ips)
+        query = query.filter(models_v2.Port.device_id.in_(list(router_ids)))
+        subnets_by_router = {}
+        for router_id, subnet_id in query:
+            subnets_by_router.setdefault(router_id, set()).add(subnet_id)
+        if not subnets_by_router:
+            return set()
+
+        subnet_ids = set.union(*subnets_by_router.values())
+        query = self._get_dvr_serviceable_ports_on_host_query(
+            context, host, list(subnet_ids))
+        query = query.with_entities(models_v2.IPAllocation.subnet_id)
+        subnet_ids_on_host = {item[0] for item in query.distinct()}
+        return {router_id
+                for router_id, subnet_ids in subnets_by_router.items()
+                if subnet_ids & subnet_ids_on_host}
+
     def _check_dvr_serviceable_ports_on_host(self, context, host, subnet_ids):
         """Check for existence of dvr serviceable ports on host
 
@@ -319,6 +342,12 @@ class L3_DVRsch_db_mixin(l3agent_sch_db.L3AgentSchedulerDbMixin):
         if not subnet_ids:
             return False
 
+        query = self._get_dvr_serviceable_ports_on_host_query(
+            context, host, subnet_ids)
+        return query.first() is not None
+
+    def _get_dvr_serviceable_ports_on_host_query(self, context, host,
+                                                 subnet_ids):
         Binding = ml2_models.PortBinding
         IPAllocation = models_v2.IPAllocation
         Port = models_v2.Port
@@ -338,7 +367,7 @@ class L3_DVRsch_db_mixin(l3agent_sch_db.L3AgentSchedulerDbMixin):
             ml2_models.PortBinding.host == host,
             ml2_models.PortBinding.profile.contains(host))
         query = query.filter(host_filter)
-        return query.first() is not None
+        return query
 
 
 def _dvr_handle_unbound_allowed_addr_pair_add(
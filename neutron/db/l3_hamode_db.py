@@ -542,10 +542,14 @@ class L3_HA_NAT_db_mixin(l3_dvr_db.L3_NAT_with_dvr_db_mixin,
         for agent in self.get_l3_agents_hosting_routers(context, [router_id]):
             self.remove_router_from_l3_agent(context, agent['id'], router_id)
 
-    def get_ha_router_port_bindings(self, context, router_ids, host=None):
+    def get_ha_router_port_bindings(self, context, router_ids, host=None,
+                                    load_ports=False):
         if not router_ids:
             return []
         query = context.session.query(l3ha_model.L3HARouterAgentPortBinding)
+        if load_ports:
+            # load the ports with the bindings rather than one at a time
+            query = query.options(orm.joinedload('port'))
 
         if host:
             query = query.join(agent_model.Agent).filter(
@@ -617,7 +621,7 @@ class L3_HA_NAT_db_mixin(l3_dvr_db.L3_NAT_with_dvr_db_mixin,
 
         bindings = self.get_ha_router_port_bindings(context,
                                                     routers_dict.keys(),
-                                                    host)
+                                                    host, load_ports=True)
         for binding in bindings:
             port = binding.port
             if not port:
@@ -41,7 +41,8 @@ class DefaultSecurityGroup(model_base.BASEV2, model_base.HasProjectPrimaryKey):
                                   nullable=False)
     security_group = orm.relationship(
         SecurityGroup, lazy='joined',
-        backref=orm.backref('default_security_group', cascade='all,delete'),
+        backref=orm.backref('default_security_group', lazy='joined',
+                            cascade='all,delete'),
         primaryjoin="SecurityGroup.id==DefaultSecurityGroup.security_group_id",
     )
 
@@ -18,7 +18,9 @@ from neutron_lib.callbacks import resources
 from oslo_log import log as logging
 
 from neutron._i18n import _LE
+from neutron.api.rpc.agentnotifiers import utils as ag_utils
 from neutron.db import api as db_api
+from neutron.db.models import provisioning_block as pb_model
 from neutron.db import models_v2
 from neutron.objects import provisioning_blocks as pb_obj
 
@@ -142,6 +144,59 @@ def provisioning_complete(context, object_id, object_type, entity):
                         context=context, object_id=object_id)
 
 
+@db_api.retry_if_session_inactive()
+def provisioning_complete_many(context, object_ids, object_type, entity):
+    """Mark that the provisioning of several objects was completed by entity.
+
+    Bulk version of provisioning_complete. The blocks of entity on the objects
+    are removed with a single statement and the objects without any remaining
+    provisioning component are found with a single query. A callback is then
+    triggered for each of them, the agent notifications sent by the
+    subscribers are merged and sent once all the callbacks have run.
+
+    :param context: neutron api request context
+    :param object_ids: IDs of the objects that have been provisioned
+    :param object_type: callback resource type of the objects
+    :param entity: The entity that has provisioned the objects
+    :return: the IDs of the objects with no remaining provisioning component
+    """
+    # this can't be called in a transaction for the same reason as
+    # provisioning_complete
+    if context.session.is_active:
+        raise RuntimeError(_LE("Must not be called in a transaction"))
+    standard_attr_ids = _get_standard_attr_ids(context, object_ids,
+                                               object_type)
+    if not standard_attr_ids:
+        return []
+    with db_api.context_manager.writer.using(context):
+        removed = context.session.query(pb_model.ProvisioningBlock).filter(
+            pb_model.ProvisioningBlock.standard_attr_id.in_(
+                standard_attr_ids.values()),
+            pb_model.ProvisioningBlock.entity == entity).delete(
+                synchronize_session=False)
+    LOG.debug("Provisioning for %(count)d %(otype)s objects completed by "
+              "entity %(entity)s.",
+              {'count': removed, 'otype': object_type, 'entity': entity})
+    # now with that committed, check which objects have records left
+    blocked = set(
+        row.standard_attr_id for row in
+        context.session.query(
+            pb_model.ProvisioningBlock.standard_attr_id).filter(
+            pb_model.ProvisioningBlock.standard_attr_id.in_(
+                standard_attr_ids.values())).distinct())
+    completed = [object_id for object_id, standard_attr_id in
+                 standard_attr_ids.items() if standard_attr_id not in blocked]
+    LOG.debug("Provisioning complete for %(otype)s objects %(oids)s "
+              "triggered by entity %(entity)s.",
+              {'otype': object_type, 'oids': completed, 'entity': entity})
+    with ag_utils.batch_notifications(context):
+        for object_id in completed:
+            registry.notify(object_type, PROVISIONING_COMPLETE,
+                            'neutron.db.provisioning_blocks',
+                            context=context, object_id=object_id)
+    return completed
+
+
 @db_api.retry_if_session_inactive()
 def is_object_blocked(context, object_id, object_type):
     """Return boolean indicating if object has a provisioning block.
@@ -159,13 +214,18 @@ def is_object_blocked(context, object_id, object_type):
         context, standard_attr_id=standard_attr_id)
 
 
-def _get_standard_attr_id(context, object_id, object_type):
+def _get_model(object_type):
     model = _RESOURCE_TO_MODEL_MAP.get(object_type)
     if not model:
         raise RuntimeError(_LE("Could not find model for %s. If you are "
                                "adding provisioning blocks for a new resource "
                                "you must call add_model_for_resource during "
                                "initialization for your type.") % object_type)
+    return model
+
+
+def _get_standard_attr_id(context, object_id, object_type):
+    model = _get_model(object_type)
     obj = (context.session.query(model).enable_eagerloads(False).
            filter_by(id=object_id).first())
     if not obj:
@@ -173,3 +233,20 @@ def _get_standard_attr_id(context, object_id, object_type):
         LOG.debug("Could not find standard attr ID for object %s.", object_id)
         return
     return obj.standard_attr_id
+
+
+def _get_standard_attr_ids(context, object_ids, object_type):
+    """Return a dict mapping the IDs of existing objects to their attr IDs."""
+    model = _get_model(object_type)
+    object_ids = set(object_ids)
+    if not object_ids:
+        return {}
+    rows = (context.session.query(model.id, model.standard_attr_id).
+            filter(model.id.in_(object_ids)))
+    standard_attr_ids = {row.id: row.standard_attr_id for row in rows}
+    missing = object_ids - set(standard_attr_ids)
+    if missing:
+        # concurrent deletes
+        LOG.debug("Could not find standard attr IDs for objects %s.",
+                  missing)
+    return standard_attr_ids
@@ -10,19 +10,84 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import errno
+import glob
+import itertools
+import os
+import time
+
 import eventlet
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
 from oslo_utils import uuidutils
 
+from neutron._i18n import _LE, _LI, _LW
 from neutron.common import utils
 
+LOG = logging.getLogger(__name__)
+
+# upper bound of the delay between two sends while the callback fails
+MAX_BACKOFF_FACTOR = 32
+# default number of times an event is sent before being dropped, when the
+# callback raises one of the retry_exceptions
+MAX_ATTEMPTS = 10
+
 
 class BatchNotifier(object):
-    def __init__(self, batch_interval, callback):
-        self.pending_events = []
+    """Queue events and send them in batches to a callback.
+
+    :param batch_interval: minimum number of seconds between two batches.
+    :param callback: called with the list of events of a batch. If it
+        raises, the error is logged and the events are dropped.
+    :param key_func: optional function returning a key for an event. Queued
+        events with the same key are coalesced, only the latest one is sent.
+    :param max_batch_size: optional upper bound of the size of a batch. The
+        size of the batches is halved when the callback takes longer than
+        batch_interval to return and grows back when it is fast again.
+    :param max_pending: optional number of events kept in memory, the
+        oldest events are dropped when the limit is reached.
+    :param spool_file: optional file used to persist the pending events,
+        so they are sent again by a later process if this one stops before
+        sending them. The process id is appended to the name of the file.
+    :param retry_exceptions: optional tuple of the exceptions raised by the
+        callback after which the events of the batch are queued again and
+        sent after a backoff, instead of being dropped. The callback must
+        then be safe to call again with the same events.
+    :param max_attempts: number of times an event is sent before being
+        dropped when the callback keeps raising one of the retry_exceptions.
+    """
+
+    def __init__(self, batch_interval, callback, key_func=None,
+                 max_batch_size=None, max_pending=None, spool_file=None,
+                 retry_exceptions=(), max_attempts=MAX_ATTEMPTS):
+        self._pending = collections.OrderedDict()
         self.callback = callback
         self.batch_interval = batch_interval
+        self.key_func = key_func
+        self.max_batch_size = max_batch_size
+        self.batch_size = max_batch_size
+        self.max_pending = max_pending
+        self.spool_file = spool_file
+        self.retry_exceptions = retry_exceptions
+        self.max_attempts = max_attempts
+        # number of failed sends of the pending events, by key
+        self._attempts = {}
+        self._counter = itertools.count()
+        self._failures = 0
+        self._send_scheduled = False
+        self._spool_pid = None
         self._lock_identifier = 'notifier-%s' % uuidutils.generate_uuid()
 
+    @property
+    def pending_events(self):
+        return list(self._pending.values())
+
+    def _get_key(self, event):
+        if self.key_func is None:
+            return next(self._counter)
+        return self.key_func(event)
+
     def queue_event(self, event):
         """Called to queue sending an event with the next batch of events.
 
@@ -45,21 +110,209 @@ class BatchNotifier(object):
         if not event:
             return
 
-        self.pending_events.append(event)
+        self._recover_spool()
+        self._add_event(event)
+        self._append_to_spool([event])
+        self._spawn_send()
+
+    def _add_event(self, event):
+        key = self._get_key(event)
+        # a coalesced event takes the place of the latest one, so the events
+        # of different keys are still sent in the order they occurred
+        self._pending.pop(key, None)
+        self._attempts.pop(key, None)
+        self._pending[key] = event
+        if self.max_pending and len(self._pending) > self.max_pending:
+            dropped = 0
+            while len(self._pending) > self.max_pending:
+                key, event = self._pending.popitem(last=False)
+                self._attempts.pop(key, None)
+                dropped += 1
+            LOG.warning(_LW("Too many pending events, dropped the %d "
+                            "oldest ones"), dropped)
+
+    def _spawn_send(self):
+        if self._send_scheduled:
+            # the thread waiting for the lock will send the event
+            return
+        self._send_scheduled = True
 
         @utils.synchronized(self._lock_identifier)
         def synced_send():
+            self._send_scheduled = False
             self._notify()
             # sleeping after send while holding the lock allows subsequent
             # events to batch up
-            eventlet.sleep(self.batch_interval)
+            eventlet.sleep(self.batch_interval *
+                           min(2 ** self._failures, MAX_BACKOFF_FACTOR))
+            if self._pending:
+                # what a limited batch size or a failure left behind
+                self._spawn_send()
 
         eventlet.spawn_n(synced_send)
 
     def _notify(self):
-        if not self.pending_events:
+        if not self._pending:
+            return
+
+        if self.batch_size and len(self._pending) > self.batch_size:
+            batch = collections.OrderedDict(
+                self._pending.popitem(last=False)
+                for i in range(self.batch_size))
+        else:
+            batch = self._pending
+            self._pending = collections.OrderedDict()
+
+        start = time.time()
+        try:
+            self.callback(list(batch.values()))
+        except self.retry_exceptions:
+            if self._requeue(batch):
+                self._failures += 1
+            else:
+                self._failures = 0
+            return
+        except Exception:
+            LOG.exception(_LE("Failed to send a batch of %d events, they "
+                              "are dropped"), len(batch))
+            self._failures = 0
+        else:
+            self._failures = 0
+            self._adapt_batch_size(time.time() - start)
+        for key in batch:
+            self._attempts.pop(key, None)
+        self._rewrite_spool()
+
+    def _requeue(self, batch):
+        """Queue again the events of a failed batch.
+
+        :returns: True if some events of the batch are to be sent again.
+        """
+        # the events of the batch are older than the pending ones, unless
+        # they were superseded in the meantime
+        dropped = []
+        for key in list(batch):
+            if key in self._pending:
+                del batch[key]
+                continue
+            attempts = self._attempts.get(key, 0) + 1
+            if attempts >= self.max_attempts:
+                dropped.append(batch.pop(key))
+                self._attempts.pop(key, None)
+            else:
+                self._attempts[key] = attempts
+        if dropped:
+            LOG.exception(_LE("Failed to send %(count)d events %(attempts)d "
+                              "times, they are dropped: %(events)s"),
+                          {'count': len(dropped),
+                           'attempts': self.max_attempts,
+                           'events': dropped})
+        requeued = bool(batch)
+        if requeued:
+            LOG.exception(_LE("Failed to send a batch of %d events, they "
+                              "will be sent again"), len(batch))
+        batch.update(self._pending)
+        self._pending = batch
+        if dropped:
+            self._rewrite_spool()
+        return requeued
+
+    def _adapt_batch_size(self, duration):
+        if not self.max_batch_size:
+            return
+        if duration > self.batch_interval:
+            batch_size = max(1, self.batch_size // 2)
+        else:
+            batch_size = min(self.max_batch_size, self.batch_size * 2)
+        if batch_size != self.batch_size:
+            LOG.debug("Sending a batch took %(duration).2f seconds, batch "
+                      "size changed from %(old)d to %(new)d",
+                      {'duration': duration, 'old': self.batch_size,
+                       'new': batch_size})
+            self.batch_size = batch_size
+
+    def _get_spool_path(self, pid=None):
+        return '%s.%d' % (self.spool_file, pid or os.getpid())
+
+    def _append_to_spool(self, events):
+        if not self.spool_file:
+            return
+        try:
+            with open(self._get_spool_path(), 'a') as spool:
+                for event in events:
+                    spool.write(jsonutils.dumps(event) + '\n')
+        except (IOError, OSError, TypeError, ValueError):
+            LOG.exception(_LE("Failed to write events to the spool file "
+                              "%s"), self._get_spool_path())
+
+    def _rewrite_spool(self):
+        """Replace the spool file content by the pending events."""
+        if not self.spool_file:
             return
+        path = self._get_spool_path()
+        try:
+            if not self._pending:
+                if os.path.exists(path):
+                    os.unlink(path)
+                return
+            tmp_path = '%s.tmp' % path
+            with open(tmp_path, 'w') as spool:
+                for event in self._pending.values():
+                    spool.write(jsonutils.dumps(event) + '\n')
+            os.rename(tmp_path, path)
+        except (IOError, OSError, TypeError, ValueError):
+            LOG.exception(_LE("Failed to rewrite the spool file %s"), path)
+
+    def _recover_spool(self):
+        """Queue the events spooled by processes which are gone.
+
+        The spool files are recovered by the first process which has an event
+        to send. API workers are forked from a parent process, so this runs
+        once per process id.
+        """
+        if not self.spool_file or self._spool_pid == os.getpid():
+            return
+        self._spool_pid = os.getpid()
+        recovered = []
+        for path in glob.glob('%s.*' % self.spool_file):
+            pid = path.rsplit('.', 1)[-1]
+            if not pid.isdigit() or int(pid) == self._spool_pid:
+                continue
+            if _process_exists(int(pid)):
+                continue
+            # renaming the file claims it, another process recovering at the
+            # same time gets an error and skips it
+            claimed = '%s.recovering' % self._get_spool_path()
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            recovered.extend(_read_spool(claimed))
+            os.unlink(claimed)
+        if recovered:
+            LOG.info(_LI("Recovered %d spooled events"), len(recovered))
+            for event in recovered:
+                self._add_event(event)
+            self._rewrite_spool()
+
+
+def _process_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno != errno.ESRCH
+    return True
+
 
-        batched_events = self.pending_events
-        self.pending_events = []
-        self.callback(batched_events)
+def _read_spool(path):
+    events = []
+    with open(path) as spool:
+        for line in spool:
+            try:
+                events.append(jsonutils.loads(line))
+            except ValueError:
+                # a partial line left by a process stopped while writing
+                LOG.warning(_LW("Ignoring invalid line in the spool file "
+                                "%(path)s: %(line)s"),
+                            {'path': path, 'line': line})
+    return events
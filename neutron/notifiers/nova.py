@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from keystoneauth1 import exceptions as ks_exceptions
 from keystoneauth1 import loading as ks_loading
 from neutron_lib.callbacks import events
 from neutron_lib.callbacks import registry
@@ -44,6 +45,11 @@ NEUTRON_NOVA_EVENT_STATUS_MAP = {constants.PORT_STATUS_ACTIVE: 'completed',
 NOVA_API_VERSION = "2.1"
 
 
+def _get_event_key(event):
+    # only the latest event of a kind is relevant for a port of a server
+    return (event.get('server_uuid'), event.get('tag'), event.get('name'))
+
+
 @registry.has_registry_receivers
 class Notifier(object):
 
@@ -73,7 +79,12 @@ class Notifier(object):
             endpoint_type=cfg.CONF.nova.endpoint_type,
             extensions=extensions)
         self.batch_notifier = batch_notifier.BatchNotifier(
-            cfg.CONF.send_events_interval, self.send_events)
+            cfg.CONF.send_events_interval, self.send_events,
+            key_func=_get_event_key,
+            max_batch_size=cfg.CONF.send_events_max_batch_size,
+            max_pending=cfg.CONF.send_events_max_pending,
+            spool_file=cfg.CONF.send_events_spool_file,
+            retry_exceptions=(ks_exceptions.ConnectionError,))
 
     def _is_compute_port(self, port):
         try:
@@ -247,6 +258,10 @@ class Notifier(object):
         except nova_exceptions.NotFound:
             LOG.debug("Nova returned NotFound for event: %s",
                       batched_events)
+        except ks_exceptions.ConnectionError:
+            # nova could not be reached, the batch notifier keeps the events
+            # and sends them again later
+            raise
         except Exception:
             LOG.exception(_LE("Failed to notify nova on events: %s"),
                           batched_events)
@@ -114,3 +114,16 @@ class Agent(base.NeutronDbObject):
         agents = [cls._load_object(context, record[0]) for record in query]
 
         return agents
+
+    @classmethod
+    def get_l3_agents_num_routers(cls, context, agent_ids):
+        """Return a mapping of the agent ids to their number of routers."""
+        query = context.session.query(
+            rb_model.RouterL3AgentBinding.l3_agent_id,
+            func.count(rb_model.RouterL3AgentBinding.router_id))
+        query = query.filter(
+            rb_model.RouterL3AgentBinding.l3_agent_id.in_(agent_ids))
+        query = query.group_by(rb_model.RouterL3AgentBinding.l3_agent_id)
+        num_routers = dict.fromkeys(agent_ids, 0)
+        num_routers.update(query)
+        return num_routers
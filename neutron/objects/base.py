@@ -12,9 +12,11 @@
 
 import abc
 import collections
+import contextlib
 import copy
 import functools
 import itertools
+import threading
 
 from neutron_lib import exceptions as n_exc
 from oslo_db import exception as obj_exc
@@ -23,6 +25,8 @@ from oslo_serialization import jsonutils
 from oslo_versionedobjects import base as obj_base
 from oslo_versionedobjects import fields as obj_fields
 import six
+from sqlalchemy import event
+from sqlalchemy import orm
 
 from neutron._i18n import _
 from neutron.db import api as db_api
@@ -33,6 +37,9 @@ from neutron.objects.extensions import standardattributes
 
 _NO_DB_MODEL = object()
 
+# name of the context attribute holding the object cache of a request
+_OBJECT_CACHE_ATTR = '_neutron_object_cache'
+
 
 def get_updatable_fields(cls, fields):
     fields = fields.copy()
@@ -55,6 +62,105 @@ def register_filter_hook_on_model(model, filter_name):
     obj_class.add_extra_filter_name(filter_name)
 
 
+def _freeze(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class ObjectCache(object):
+    """Identity map of the objects read from the DB within a request.
+
+    Objects are cached per class and lookup filters, and per admin flag and
+    project of the context since they scope the DB queries: elevated copies
+    of a context share its cache, so that their writes invalidate it too.
+    Objects listed by get_objects are also cached under their primary keys,
+    so a later get_object of one of them is served from the cache. Any write
+    done through the objects, or on the DB models by the (green) thread using
+    the cache, empties the cache, since objects embed other objects in their
+    synthetic fields.
+    """
+
+    def __init__(self):
+        self._objects = collections.defaultdict(dict)
+
+    @staticmethod
+    def get_key(context, kind, filters):
+        key = (context.is_admin, context.project_id, kind,
+               tuple(sorted((k, _freeze(v)) for k, v in filters.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self, cls, key):
+        return self._objects[cls.__name__].get(key)
+
+    def set(self, cls, key, value):
+        self._objects[cls.__name__][key] = value
+
+    def invalidate(self):
+        self._objects.clear()
+
+
+# the object caches active in the current (green) thread
+_active_object_caches = threading.local()
+
+
+def _get_active_object_caches():
+    if not hasattr(_active_object_caches, 'caches'):
+        _active_object_caches.caches = set()
+    return _active_object_caches.caches
+
+
+@event.listens_for(orm.session.Session, 'after_flush')
+def _invalidate_active_object_caches(session, flush_context):
+    # a request runs in a single (green) thread, so the writes it flushes on
+    # any session, including the ones done on the DB models directly, empty
+    # its caches
+    for cache in _get_active_object_caches():
+        cache.invalidate()
+
+
+def get_object_cache(context):
+    """Return the object cache of the context, if one is active."""
+    cache = getattr(context, _OBJECT_CACHE_ATTR, None)
+    if isinstance(cache, ObjectCache):
+        return cache
+
+
+@contextlib.contextmanager
+def object_cache(context):
+    """Cache the objects read from the DB while the context manager is active.
+
+    Repeated get_object and get_objects calls with the same filters return
+    copies of the objects read the first time. Any write flushed to the DB by
+    the current (green) thread invalidates the cache, so the cache should only
+    be active around code whose objects are not modified by other requests
+    behind its back. Nested uses share the outermost cache.
+    """
+    cache = get_object_cache(context)
+    if cache is not None:
+        yield cache
+        return
+    cache = ObjectCache()
+    setattr(context, _OBJECT_CACHE_ATTR, cache)
+    active_caches = _get_active_object_caches()
+    active_caches.add(cache)
+    try:
+        yield cache
+    finally:
+        active_caches.discard(cache)
+        delattr(context, _OBJECT_CACHE_ATTR)
+
+
+def _invalidate_object_cache(context):
+    cache = get_object_cache(context)
+    if cache is not None:
+        cache.invalidate()
+
+
 class Pager(object):
     '''
     This class represents a pager object. It is consumed by get_objects to
@@ -273,6 +379,12 @@ class DeclarativeObject(abc.ABCMeta):
                                       for key in model_unique_key]
                     if obj_field_names.issuperset(obj_unique_key):
                         cls.unique_keys.append(obj_unique_key)
+            # generic database operations overridden by the class, the bulk
+            # operations fall back to them
+            cls._custom_db_methods = frozenset(
+                {'create', 'update'} & set(dct)).union(
+                    *(getattr(base, '_custom_db_methods', ())
+                      for base in bases))
             # detach db_obj right after object is loaded from the model
             cls.create = _detach_db_obj(cls.create)
             cls.update = _detach_db_obj(cls.update)
@@ -297,6 +409,10 @@ class NeutronDbObject(NeutronObject):
     # should be overridden for all persistent objects
     db_model = None
 
+    # generic database operations overridden by the class, set by the
+    # metaclass
+    _custom_db_methods = frozenset()
+
     primary_keys = ['id']
 
     # 'unique_keys' is a list of unique keys that can be used with get_object
@@ -333,6 +449,8 @@ class NeutronDbObject(NeutronObject):
     def __init__(self, *args, **kwargs):
         super(NeutronDbObject, self).__init__(*args, **kwargs)
         self._captured_db_model = None
+        # synthetic fields loaded in bulk by _load_objects, by field name
+        self._prefetched_synthetic_fields = None
 
     @property
     def db_obj(self):
@@ -399,12 +517,88 @@ class NeutronDbObject(NeutronObject):
 
     @classmethod
     def _load_object(cls, context, db_obj):
-        obj = cls(context)
-        obj.from_db_object(db_obj)
-        # detach the model so that consequent fetches don't reuse it
-        context.session.expunge(obj.db_obj)
+        return cls._load_objects(context, [db_obj])[0]
+
+    @classmethod
+    def _load_objects(cls, context, db_objs, objs=None):
+        """Convert DB models to objects, loading synthetic fields in bulk.
+
+        The synthetic fields of all the objects are loaded together: objects
+        found in the relationships of the models are converted with a single
+        call, and the fields without a relationship are fetched with one
+        query per field for all the objects.
+
+        :param objs: optional objects to load the models into, in the order
+                     of db_objs, new objects are created otherwise
+        """
+        prefetched = cls._prefetch_synthetic_fields(context, db_objs)
+        objs = objs or [cls(context) for _db_obj in db_objs]
+        for obj, db_obj in zip(objs, db_objs):
+            obj._prefetched_synthetic_fields = prefetched.get(id(db_obj))
+            try:
+                obj.from_db_object(db_obj)
+            finally:
+                obj._prefetched_synthetic_fields = None
+            # detach the model so that consequent fetches don't reuse it
+            context.session.expunge(obj.db_obj)
+        return objs
+
+    @classmethod
+    def _prefetch_synthetic_fields(cls, context, db_objs):
+        prefetched = collections.defaultdict(dict)
+        for field, objclass, foreign_keys in cls._get_synthetic_db_fields():
+            synthetic_field_db_name = cls.fields_need_translation.get(field,
+                                                                      field)
+            loaded = []
+            missing = []
+            for db_obj in db_objs:
+                synth_db_objs = db_obj.get(synthetic_field_db_name, None)
+                if synth_db_objs is None:
+                    missing.append(db_obj)
+                    continue
+                if not isinstance(synth_db_objs, list):
+                    synth_db_objs = [synth_db_objs]
+                loaded.append((db_obj, synth_db_objs))
+
+            if loaded:
+                synth_objs = iter(objclass._load_objects(
+                    context, [synth_db_obj for _db_obj, synth_db_objs in loaded
+                              for synth_db_obj in synth_db_objs]))
+                for db_obj, synth_db_objs in loaded:
+                    prefetched[id(db_obj)][field] = [
+                        next(synth_objs) for _synth_db_obj in synth_db_objs]
+
+            if not missing:
+                continue
+            (child_key, parent_key), = foreign_keys.items()
+            parent_key = cls.fields_need_translation.get(parent_key,
+                                                         parent_key)
+            values = set(db_obj.get(parent_key) for db_obj in missing)
+            values.discard(None)
+            children = collections.defaultdict(list)
+            if values:
+                for synth_obj in objclass.get_objects(
+                        context, **{child_key: list(values)}):
+                    children[synth_obj[child_key]].append(synth_obj)
+            for db_obj in missing:
+                prefetched[id(db_obj)][field] = children.get(
+                    db_obj.get(parent_key), [])
+        return prefetched
+
+    def _copy_cached(self):
+        # callers may modify the objects they get, so the cache hands out
+        # copies sharing the detached DB model of the cached object
+        obj = copy.deepcopy(self)
+        obj._captured_db_model = self._captured_db_model
         return obj
 
+    @classmethod
+    def _cache_objects(cls, context, cache, objs):
+        for obj in objs:
+            key = cache.get_key(context, 'one', obj._get_composite_keys())
+            if key is not None:
+                cache.set(cls, key, obj)
+
     def obj_load_attr(self, attrname):
         """Set None for nullable fields that has unknown value.
 
@@ -436,13 +630,26 @@ class NeutronDbObject(NeutronObject):
             raise o_exc.NeutronPrimaryKeyMissing(object_class=cls.__name__,
                                                  missing_keys=missing_keys)
 
+        cache = get_object_cache(context)
+        key = None
+        if cache is not None:
+            key = cache.get_key(context, 'one', kwargs)
+        if key is not None:
+            obj = cache.get(cls, key)
+            if obj is not None:
+                return obj._copy_cached()
+
         with context.session.begin(subtransactions=True):
             db_obj = obj_db_api.get_object(
                 context, cls.db_model,
                 **cls.modify_fields_to_db(kwargs)
             )
             if db_obj:
-                return cls._load_object(context, db_obj)
+                obj = cls._load_object(context, db_obj)
+                if key is not None:
+                    cache.set(cls, key, obj)
+                    return obj._copy_cached()
+                return obj
 
     @classmethod
     def get_objects(cls, context, _pager=None, validate_filters=True,
@@ -460,12 +667,30 @@ class NeutronDbObject(NeutronObject):
         """
         if validate_filters:
             cls.validate_filters(**kwargs)
+        cache = get_object_cache(context)
+        key = None
+        if cache is not None and not (_pager and (_pager.limit or
+                                                  _pager.marker)):
+            # pagers without limit only set the order of the objects
+            kind = ('all', _pager and _freeze(_pager.sorts),
+                    _pager and _pager.page_reverse)
+            key = cache.get_key(context, kind, kwargs)
+        if key is not None:
+            objs = cache.get(cls, key)
+            if objs is not None:
+                return [obj._copy_cached() for obj in objs]
+
         with context.session.begin(subtransactions=True):
             db_objs = obj_db_api.get_objects(
                 context, cls.db_model, _pager=_pager,
                 **cls.modify_fields_to_db(kwargs)
             )
-            return [cls._load_object(context, db_obj) for db_obj in db_objs]
+            objs = cls._load_objects(context, db_objs)
+        if key is None:
+            return objs
+        cache.set(cls, key, objs)
+        cls._cache_objects(context, cache, objs)
+        return [obj._copy_cached() for obj in objs]
 
     @classmethod
     def update_objects(cls, context, values, validate_filters=True, **kwargs):
@@ -481,19 +706,26 @@ class NeutronDbObject(NeutronObject):
         """
         if validate_filters:
             cls.validate_filters(**kwargs)
+        _invalidate_object_cache(context)
 
         # if we have standard attributes, we will need to fetch records to
         # update revision numbers
-        if cls.has_standard_attributes():
+        db_values = cls.modify_fields_to_db(values)
+        if (cls.has_standard_attributes() and
+                not cls._can_update_in_bulk(db_values)):
             return super(NeutronDbObject, cls).update_objects(
                 context, values, validate_filters=False, **kwargs)
 
         with db_api.autonested_transaction(context.session):
             return obj_db_api.update_objects(
-                context, cls.db_model,
-                cls.modify_fields_to_db(values),
+                context, cls.db_model, db_values,
                 **cls.modify_fields_to_db(kwargs))
 
+    @classmethod
+    def _can_update_in_bulk(cls, db_values):
+        return ('update' not in cls._custom_db_methods and
+                obj_db_api.can_update_in_bulk(cls.db_model, db_values))
+
     @classmethod
     def delete_objects(cls, context, validate_filters=True, **kwargs):
         """
@@ -507,6 +739,7 @@ class NeutronDbObject(NeutronObject):
         """
         if validate_filters:
             cls.validate_filters(**kwargs)
+        _invalidate_object_cache(context)
         with context.session.begin(subtransactions=True):
             return obj_db_api.delete_objects(
                 context, cls.db_model, **cls.modify_fields_to_db(kwargs))
@@ -567,22 +800,21 @@ class NeutronDbObject(NeutronObject):
 
         return fields
 
-    def load_synthetic_db_fields(self, db_obj=None):
-        """
-        Load the synthetic fields that are stored in a different table from the
-        main object.
+    @classmethod
+    def _get_synthetic_db_fields(cls):
+        """Yield the synthetic fields stored in a different table.
 
-        This method doesn't take care of loading synthetic fields that aren't
-        stored in the DB, e.g. 'shared' in RBAC policy.
+        :return: tuples of field name, object class of the field and foreign
+                 keys of the object class pointing to this class
         """
-        clsname = self.__class__.__name__
+        clsname = cls.__name__
 
         # TODO(rossella_s) Find a way to handle ObjectFields with
         # subclasses=True
-        for field in self.synthetic_fields:
+        for field in cls.synthetic_fields:
             try:
                 objclasses = obj_base.VersionedObjectRegistry.obj_classes(
-                ).get(self.fields[field].objname)
+                ).get(cls.fields[field].objname)
             except AttributeError:
                 # NOTE(rossella_s) this is probably because this field is not
                 # an ObjectField
@@ -600,7 +832,18 @@ class NeutronDbObject(NeutronObject):
             if len(foreign_keys.keys()) > 1:
                 raise o_exc.NeutronSyntheticFieldMultipleForeignKeys(
                         field=field)
+            yield field, objclass, foreign_keys
+
+    def load_synthetic_db_fields(self, db_obj=None):
+        """
+        Load the synthetic fields that are stored in a different table from the
+        main object.
 
+        This method doesn't take care of loading synthetic fields that aren't
+        stored in the DB, e.g. 'shared' in RBAC policy.
+        """
+        prefetched = self._prefetched_synthetic_fields or {}
+        for field, objclass, foreign_keys in self._get_synthetic_db_fields():
             synthetic_field_db_name = (
                 self.fields_need_translation.get(field, field))
             synth_db_objs = (db_obj.get(synthetic_field_db_name, None)
@@ -608,7 +851,9 @@ class NeutronDbObject(NeutronObject):
 
             # synth_db_objs can be list, empty list or None, that is why
             # we need 'is not None', because [] is valid case for 'True'
-            if synth_db_objs is not None:
+            if field in prefetched:
+                synth_objs = prefetched[field]
+            elif synth_db_objs is not None:
                 if not isinstance(synth_db_objs, list):
                     synth_db_objs = [synth_db_objs]
                 synth_objs = [objclass._load_object(self.obj_context, obj)
@@ -624,8 +869,50 @@ class NeutronDbObject(NeutronObject):
                 setattr(self, field, synth_objs)
             self.obj_reset_changes([field])
 
+    @classmethod
+    def create_objects(cls, context, objs_data):
+        """
+        Create multiple objects in DB.
+
+        The objects are inserted with a single flush, unless the class
+        overrides create(), in which case they are created one by one.
+
+        :param context:
+        :param objs_data: list of dicts of the fields of the objects
+        :return: list of the created objects
+        """
+        return cls._create_objects(
+            context, [cls(context, **obj_data) for obj_data in objs_data])
+
+    @classmethod
+    def _create_objects(cls, context, objs):
+        if not objs:
+            return objs
+        if 'create' in cls._custom_db_methods:
+            with db_api.autonested_transaction(context.session):
+                for obj in objs:
+                    obj.create()
+            return objs
+        return cls._insert_objects(context, objs)
+
+    @classmethod
+    def _insert_objects(cls, context, objs):
+        _invalidate_object_cache(context)
+        with db_api.autonested_transaction(context.session):
+            try:
+                db_objs = obj_db_api.create_objects(
+                    context, cls.db_model,
+                    [cls.modify_fields_to_db(
+                        obj._get_changed_persistent_fields())
+                     for obj in objs])
+            except obj_exc.DBDuplicateEntry as db_exc:
+                raise o_exc.NeutronDbObjectDuplicateEntry(
+                    object_class=cls, db_exception=db_exc)
+            return cls._load_objects(context, db_objs, objs=objs)
+
     def create(self):
         fields = self._get_changed_persistent_fields()
+        _invalidate_object_cache(self.obj_context)
         with db_api.autonested_transaction(self.obj_context.session):
             try:
                 db_obj = obj_db_api.create_object(
@@ -663,6 +950,7 @@ class NeutronDbObject(NeutronObject):
     def update(self):
         updates = self._get_changed_persistent_fields()
         updates = self._validate_changed_fields(updates)
+        _invalidate_object_cache(self.obj_context)
 
         with db_api.autonested_transaction(self.obj_context.session):
             db_obj = obj_db_api.update_object(
@@ -673,6 +961,7 @@ class NeutronDbObject(NeutronObject):
             self.from_db_object(db_obj)
 
     def delete(self):
+        _invalidate_object_cache(self.obj_context)
         obj_db_api.delete_object(self.obj_context, self.db_model,
                                  **self.modify_fields_to_db(
                                      self._get_composite_keys()))
@@ -14,9 +14,13 @@
 # backends
 
 from neutron_lib import exceptions as n_exc
+from oslo_utils import timeutils
 from oslo_utils import uuidutils
+import sqlalchemy as sa
+from sqlalchemy.orm import interfaces
 
 from neutron.db import _model_query as model_query
+from neutron.db import standard_attr
 from neutron.objects import utils as obj_utils
 
 
@@ -62,6 +66,33 @@ def create_object(context, model, values, populate_id=True):
     return db_obj
 
 
+def create_objects(context, model, values_list, populate_id=True):
+    '''Create multiple objects with a single flush. Return the DB objects.
+
+    The rows of the model table are inserted with a single statement. The
+    standard attributes rows get their IDs from the database so they are
+    inserted one at a time, but they are created with their initial revision
+    number so that it doesn't have to be read back for each of them.
+
+    :param model: SQL model
+    :param values_list: list of dicts of values of the objects to create
+    :return: list of DB objects, in the order of values_list
+    '''
+    has_standard_attributes = issubclass(
+        model, standard_attr.HasStandardAttributes)
+    with context.session.begin(subtransactions=True):
+        db_objs = []
+        for values in values_list:
+            if populate_id and 'id' not in values and hasattr(model, 'id'):
+                values['id'] = uuidutils.generate_uuid()
+            if has_standard_attributes:
+                values.setdefault('revision_number', 0)
+            db_objs.append(model(**values))
+        context.session.add_all(db_objs)
+        context.session.flush()
+    return db_objs
+
+
 def _safe_get_object(context, model, **kwargs):
     db_obj = get_object(context, model, **kwargs)
 
@@ -100,9 +131,75 @@ def update_objects(context, model, values, **kwargs):
         if not values:
             return count(context, model, **kwargs)
         q = _get_filter_query(context, model, **kwargs)
+        if issubclass(model, standard_attr.HasStandardAttributes):
+            # bump the revisions before the update may change the rows
+            # matching the filters
+            _bump_revisions(context, _get_standard_attr_ids(q, model))
         return q.update(values, synchronize_session=False)
 
 
+def _get_standard_attr_ids(query, model):
+    # the IDs are fetched rather than used in a subquery because MySQL does
+    # not support subqueries on the table being modified
+    return [row[0] for row in query.with_entities(model.standard_attr_id)]
+
+
+def _bump_revisions(context, standard_attr_ids):
+    if not standard_attr_ids:
+        return
+    model = standard_attr.StandardAttribute
+    # the objects loaded in the session are refreshed so that the revision
+    # number used as their version stays in sync
+    context.session.query(model).filter(
+        model.id.in_(standard_attr_ids)).update(
+            {'revision_number': model.revision_number + 1,
+             'updated_at': timeutils.utcnow()},
+            synchronize_session='fetch')
+
+
+def _cascades_in_db(relationship):
+    # the rows referencing the model are deleted by the database itself
+    if relationship.direction is not interfaces.ONETOMANY:
+        return False
+    local_table = relationship.parent.local_table
+    foreign_keys = [fk for column in relationship.remote_side
+                    for fk in column.foreign_keys
+                    if fk.column.table is local_table]
+    return bool(foreign_keys) and all(
+        (fk.ondelete or '').upper() == 'CASCADE' for fk in foreign_keys)
+
+
+def can_update_in_bulk(model, values):
+    '''Return whether rows of the model can be updated without the ORM.
+
+    Revisions bumped on other objects and event listeners on the model need
+    the objects to be updated through the session, and the values must all
+    belong to the table of the model.
+    '''
+    if (getattr(model, 'revises_on_change', ()) or
+            sa.inspect(model).dispatch.after_update):
+        return False
+    return set(values) <= set(model.__table__.columns.keys())
+
+
+def can_delete_in_bulk(model):
+    '''Return whether rows of the model can be deleted without the ORM.
+
+    Revisions bumped on other objects, event listeners on the model and
+    relationships cascading the delete which are not enforced by the
+    database need the objects to be deleted through the session.
+    '''
+    mapper = sa.inspect(model)
+    if (getattr(model, 'revises_on_change', ()) or
+            mapper.dispatch.after_delete):
+        return False
+    return all(
+        _cascades_in_db(relationship)
+        for relationship in mapper.relationships
+        if relationship.key != 'standard_attr' and
+        (relationship.cascade.delete or relationship.cascade.delete_orphan))
+
+
 def delete_objects(context, model, **kwargs):
     '''Delete matching objects, if any. Return number of deleted objects.
 
@@ -113,7 +210,21 @@ def delete_objects(context, model, **kwargs):
     :return: Number of entries deleted
     '''
     with context.session.begin(subtransactions=True):
-        db_objs = get_objects(context, model, **kwargs)
-        for db_obj in db_objs:
-            context.session.delete(db_obj)
-        return len(db_objs)
+        if not can_delete_in_bulk(model):
+            db_objs = get_objects(context, model, **kwargs)
+            for db_obj in db_objs:
+                context.session.delete(db_obj)
+            return len(db_objs)
+        q = _get_filter_query(context, model, **kwargs)
+        if not issubclass(model, standard_attr.HasStandardAttributes):
+            return q.delete(synchronize_session='fetch')
+        standard_attr_ids = _get_standard_attr_ids(q, model)
+        if not standard_attr_ids:
+            return 0
+        deleted = context.session.query(model).filter(
+            model.standard_attr_id.in_(standard_attr_ids)).delete(
+                synchronize_session='fetch')
+        context.session.query(standard_attr.StandardAttribute).filter(
+            standard_attr.StandardAttribute.id.in_(standard_attr_ids)).delete(
+                synchronize_session='fetch')
+        return deleted
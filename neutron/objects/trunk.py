@@ -81,6 +81,21 @@ class SubPort(base.NeutronDbObject):
                     segmentation_id=self.segmentation_id,
                     trunk_id=self.trunk_id)
 
+    @classmethod
+    def _create_objects(cls, context, objs):
+        try:
+            with db_api.autonested_transaction(context.session):
+                return cls._insert_objects(context, objs)
+        except (o_db_exc.DBReferenceError,
+                o_exc.NeutronDbObjectDuplicateEntry):
+            # the subports are created again one by one to report the one
+            # that failed
+            pass
+        with db_api.autonested_transaction(context.session):
+            for obj in objs:
+                obj.create()
+        return objs
+
 
 @obj_base.VersionedObjectRegistry.register
 class Trunk(base.NeutronDbObject):
@@ -118,8 +133,8 @@ class Trunk(base.NeutronDbObject):
             if sub_ports:
                 for sub_port in sub_ports:
                     sub_port.trunk_id = self.id
-                    sub_port.create()
-                    self.sub_ports.append(sub_port)
+                SubPort._create_objects(self.obj_context, sub_ports)
+                self.sub_ports.extend(sub_ports)
                 self.obj_reset_changes(['sub_ports'])
 
     def update(self, **kwargs):
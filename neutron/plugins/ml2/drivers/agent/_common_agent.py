@@ -36,6 +36,7 @@ from neutron.agent.l2 import l2_agent_extensions_manager as ext_manager
 from neutron.agent import rpc as agent_rpc
 from neutron.agent import securitygroups_rpc as agent_sg_rpc
 from neutron.api.rpc.callbacks import resources
+from neutron.api.rpc.callbacks import wire_format
 from neutron.api.rpc.handlers import securitygroups_rpc as sg_rpc
 from neutron.common import config as common_config
 from neutron.common import constants as n_const
@@ -96,7 +97,8 @@ class CommonAgentLoop(service.Service):
             'topic': constants.L2_AGENT_TOPIC,
             'configurations': configurations,
             'agent_type': self.agent_type,
-            'resource_versions': resources.LOCAL_RESOURCE_VERSIONS,
+            'resource_versions': wire_format.get_advertised_versions(
+                resources.LOCAL_RESOURCE_VERSIONS),
             'start_flag': True}
 
         report_interval = cfg.CONF.AGENT.report_interval
@@ -92,6 +92,21 @@ def _get_ha_router_interface_ids(session, network_id):
     return query.from_self(models_v2.Port.id).distinct()
 
 
+def _filter_tunneling_agents(network_ports):
+    """Keep the (binding, agent) pairs of agents having a tunneling IP.
+
+    The configurations of an agent are parsed once, not once per port.
+    """
+    agent_ips = {}
+    result = []
+    for bind, agent in network_ports:
+        if agent.id not in agent_ips:
+            agent_ips[agent.id] = get_agent_ip(agent)
+        if agent_ips[agent.id]:
+            result.append((bind, agent))
+    return result
+
+
 def get_nondistributed_active_network_ports(session, network_id):
     query = _get_active_network_ports(session, network_id)
     # Exclude DVR and HA router interfaces
@@ -99,8 +114,7 @@ def get_nondistributed_active_network_ports(session, network_id):
                          const.DEVICE_OWNER_DVR_INTERFACE)
     ha_iface_ids_query = _get_ha_router_interface_ids(session, network_id)
     query = query.filter(models_v2.Port.id.notin_(ha_iface_ids_query))
-    return [(bind, agent) for bind, agent in query.all()
-            if get_agent_ip(agent)]
+    return _filter_tunneling_agents(query.all())
 
 
 def get_dvr_active_network_ports(session, network_id):
@@ -117,8 +131,7 @@ def get_dvr_active_network_ports(session, network_id):
                              models_v2.Port.status == const.PORT_STATUS_ACTIVE,
                              models_v2.Port.device_owner ==
                              const.DEVICE_OWNER_DVR_INTERFACE)
-    return [(bind, agent) for bind, agent in query.all()
-            if get_agent_ip(agent)]
+    return _filter_tunneling_agents(query.all())
 
 
 def get_distributed_active_network_ports(session, network_id):
@@ -39,6 +39,9 @@ class L2populationMechanismDriver(api.MechanismDriver):
     def __init__(self):
         super(L2populationMechanismDriver, self).__init__()
         self.L2populationAgentNotify = l2pop_rpc.L2populationAgentNotifyAPI()
+        # host -> (start time of its agent, networks it was sent all the FDB
+        # entries of since it started)
+        self._booting_agents = {}
 
     def initialize(self):
         LOG.debug("Experimental L2 population driver")
@@ -202,43 +205,77 @@ class L2populationMechanismDriver(api.MechanismDriver):
 
         return True
 
+    def _get_network_fdb_index(self, session, network_id):
+        """Return the active ports of a network indexed by tunneling IP.
+
+        Each tunneling IP of the L2 agents having active ports on the network
+        maps to the hosts of these agents and to their non distributed
+        ports. The index is built from one pass on the ports, the
+        configurations of an agent are parsed once.
+        """
+        index = {}
+        agent_ips = {}
+
+        def _add_agent(agent):
+            if agent.id not in agent_ips:
+                agent_ips[agent.id] = l2pop_db.get_agent_ip(agent)
+                if not agent_ips[agent.id]:
+                    LOG.debug("Unable to retrieve the agent ip, check "
+                              "the agent %s configuration.", agent.host)
+            ip = agent_ips[agent.id]
+            if not ip:
+                return
+            entry = index.setdefault(ip, {'hosts': set(), 'ports': []})
+            entry['hosts'].add(agent.host)
+            return entry
+
+        for binding, agent in l2pop_db.get_nondistributed_active_network_ports(
+                session, network_id):
+            entry = _add_agent(agent)
+            if entry:
+                entry['ports'].append(binding.port)
+        for __, agent in l2pop_db.get_distributed_active_network_ports(
+                session, network_id):
+            _add_agent(agent)
+        return index
+
     def _create_agent_fdb(self, session, agent, segment, network_id):
         agent_fdb_entries = {network_id:
                              {'segment_id': segment['segmentation_id'],
                               'network_type': segment['network_type'],
                               'ports': {}}}
-        tunnel_network_ports = (
-            l2pop_db.get_distributed_active_network_ports(session, network_id))
-        fdb_network_ports = (
-            l2pop_db.get_nondistributed_active_network_ports(session,
-                                                             network_id))
+        fdb_index = self._get_network_fdb_index(session, network_id)
         ports = agent_fdb_entries[network_id]['ports']
-        ports.update(self._get_tunnels(
-            fdb_network_ports + tunnel_network_ports,
-            agent.host))
+        ports.update(self._get_tunnels(fdb_index, agent.host))
         for agent_ip, fdbs in ports.items():
-            for binding, agent in fdb_network_ports:
-                if l2pop_db.get_agent_ip(agent) == agent_ip:
-                    fdbs.extend(self._get_port_fdb_entries(binding.port))
+            for port in fdb_index[agent_ip]['ports']:
+                fdbs.extend(self._get_port_fdb_entries(port))
 
         return agent_fdb_entries
 
-    def _get_tunnels(self, tunnel_network_ports, exclude_host):
-        agents = {}
-        for __, agent in tunnel_network_ports:
-            if agent.host == exclude_host:
-                continue
-
-            ip = l2pop_db.get_agent_ip(agent)
-            if not ip:
-                LOG.debug("Unable to retrieve the agent ip, check "
-                          "the agent %s configuration.", agent.host)
-                continue
-
-            if ip not in agents:
-                agents[ip] = [const.FLOODING_ENTRY]
-
-        return agents
+    def _get_tunnels(self, fdb_index, exclude_host):
+        return dict((ip, [const.FLOODING_ENTRY])
+                    for ip, entry in fdb_index.items()
+                    if entry['hosts'] - {exclude_host})
+
+    def _is_full_fdb_needed(self, agent, network_id, agent_active_ports):
+        """Whether an agent has to be sent all the FDB entries of a network.
+
+        The first active port of an agent on a network needs them. A booting
+        agent lost the entries it had, it needs them once per network.
+        """
+        if l2pop_db.get_agent_uptime(agent) >= cfg.CONF.l2pop.agent_boot_time:
+            self._booting_agents.pop(agent.host, None)
+            return agent_active_ports == 1
+        started_at, network_ids = self._booting_agents.get(agent.host,
+                                                           (None, None))
+        if started_at != agent.started_at:
+            network_ids = set()
+            self._booting_agents[agent.host] = (agent.started_at, network_ids)
+        if agent_active_ports == 1 or network_id not in network_ids:
+            network_ids.add(network_id)
+            return True
+        return False
 
     def update_port_down(self, context):
         port = context.current
@@ -281,10 +318,10 @@ class L2populationMechanismDriver(api.MechanismDriver):
             segment, agent_ip, network_id)
         other_fdb_ports = other_fdb_entries[network_id]['ports']
 
-        if agent_active_ports == 1 or (l2pop_db.get_agent_uptime(agent) <
-                                       cfg.CONF.l2pop.agent_boot_time):
-            # First port activated on current agent in this network,
-            # we have to provide it with the whole list of fdb entries
+        if self._is_full_fdb_needed(agent, network_id, agent_active_ports):
+            # First port activated on current agent in this network, or
+            # first one since the agent started, we have to provide it with
+            # the whole list of fdb entries
             agent_fdb_entries = self._create_agent_fdb(session,
                                                        agent,
                                                        segment,
@@ -36,6 +36,7 @@ from neutron.agent.l2 import l2_agent_extensions_manager as ext_manager
 from neutron.agent import rpc as agent_rpc
 from neutron.agent import securitygroups_rpc as agent_sg_rpc
 from neutron.api.rpc.callbacks import resources
+from neutron.api.rpc.callbacks import wire_format
 from neutron.api.rpc.handlers import securitygroups_rpc as sg_rpc
 from neutron.common import config as common_config
 from neutron.common import profiler as setup_profiler
@@ -141,7 +142,8 @@ class SriovNicSwitchAgent(object):
             'topic': n_constants.L2_AGENT_TOPIC,
             'configurations': configurations,
             'agent_type': n_constants.AGENT_TYPE_NIC_SWITCH,
-            'resource_versions': resources.LOCAL_RESOURCE_VERSIONS,
+            'resource_versions': wire_format.get_advertised_versions(
+                resources.LOCAL_RESOURCE_VERSIONS),
             'start_flag': True}
 
         # The initialization is complete; we can start receiving messages
@@ -110,6 +110,10 @@ DEFAULT_OVSDBMON_RESPAWN = 30
 # Represent invalid OF Port
 OFPORT_INVALID = -1
 
+# The number of tunnel ports created with a single OVSDB transaction when
+# syncing the tunnels
+TUNNEL_PORTS_BATCH_SIZE = 100
+
 ARP_RESPONDER_ACTIONS = ('move:NXM_OF_ETH_SRC[]->NXM_OF_ETH_DST[],'
                          'mod_dl_src:%(mac)s,'
                          'load:0x2->NXM_OF_ARP_OP[],'
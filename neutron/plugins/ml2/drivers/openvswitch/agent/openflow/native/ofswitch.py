@@ -14,6 +14,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
+import copy
+import itertools
+
 import eventlet
 import netaddr
 from oslo_config import cfg
@@ -23,13 +27,30 @@ from oslo_utils import timeutils
 import ryu.app.ofctl.api as ofctl_api
 import ryu.exception as ryu_exc
 
-from neutron._i18n import _, _LW
+from neutron._i18n import _, _LE, _LW
 from neutron.agent.common import ovs_lib
 
 LOG = logging.getLogger(__name__)
 
 COOKIE_DEFAULT = object()
 
+_BUNDLE_IDS = itertools.count()
+
+# The FlowMods sent by send_flow_mods which are waiting for the barrier,
+# with the list of errors of their batch, by datapath id and xid.
+_PENDING_FLOW_MODS = {}
+
+
+def handle_error_msg(msg):
+    """Record an error replied to a FlowMod sent by send_flow_mods.
+
+    The Ryu application calls it for each OFPErrorMsg received.
+    """
+    pending = _PENDING_FLOW_MODS.get((msg.datapath.id, msg.xid))
+    if pending is not None:
+        flow_mod, errors = pending
+        errors.append((flow_mod, msg))
+
 
 class OpenFlowSwitchMixin(object):
     """Mixin to provide common convenient routines for an openflow switch.
@@ -38,6 +59,10 @@ class OpenFlowSwitchMixin(object):
     See ovs_bridge.py how this class is actually used.
     """
 
+    # The FlowMods queued by a bridge returned by FlowModBatch, None when
+    # they are sent as they come.
+    _flow_mods = None
+
     @staticmethod
     def _cidr_to_ryu(ip):
         n = netaddr.IPNetwork(ip)
@@ -96,6 +121,128 @@ class OpenFlowSwitchMixin(object):
                   {"request": msg, "result": result})
         return result
 
+    @staticmethod
+    def _send_msgs(dp, msgs):
+        """Send messages without waiting for their replies.
+
+        The switch processes them in order, a barrier sent afterwards with
+        _send_msg returns once all of them are processed.  Their errors
+        are only reported within _collect_errors.
+        """
+        for msg in msgs:
+            try:
+                sent = dp.send_msg(msg)
+            except Exception as e:
+                sent = False
+                error = e
+            else:
+                error = _("switch disconnected")
+            if not sent:
+                m = _("ofctl request %(request)s error %(error)s") % {
+                    "request": msg,
+                    "error": error,
+                }
+                LOG.error(m)
+                # NOTE(yamamoto): use RuntimeError for compat with ovs_lib
+                raise RuntimeError(m)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _collect_errors(dp, msgs):
+        """Collect the errors replied to messages sent with _send_msgs.
+
+        The (message, error) tuples are appended to the returned list.
+        NOTE: The switch replies to the messages before replying to a
+        barrier sent after them, and Ryu dispatches these replies in order
+        to the agent application and to the ofctl service.  So the errors
+        are collected once the barrier sent with _send_msg returns.
+        """
+        errors = []
+        keys = []
+        try:
+            for msg in msgs:
+                key = (dp.id, dp.set_xid(msg))
+                _PENDING_FLOW_MODS[key] = (msg, errors)
+                keys.append(key)
+            yield errors
+        finally:
+            for key in keys:
+                del _PENDING_FLOW_MODS[key]
+
+    def _send_flow_mod(self, msg):
+        if self._flow_mods is None:
+            self._send_msg(msg)
+        else:
+            self._flow_mods.append(msg)
+
+    def _bundle_ctrl(self, dp, ofp, ofpp, bundle_id, type_, reply_type):
+        flags = ofp.ONF_BF_ATOMIC | ofp.ONF_BF_ORDERED
+        msg = ofpp.ONFBundleCtrlMsg(dp, bundle_id, type_, flags, [])
+        reply = self._send_msg(msg, reply_cls=ofpp.ONFBundleCtrlMsg)
+        if reply is None or reply.type != reply_type:
+            m = _("ofctl request %(request)s unexpected reply "
+                  "%(reply)s") % {
+                "request": msg,
+                "reply": reply,
+            }
+            LOG.error(m)
+            raise RuntimeError(m)
+
+    def _send_bundle(self, dp, ofp, ofpp, msgs):
+        # NOTE: Only OpenFlow 1.3 is negotiated with the switch, the bundles
+        # are those of the ONF extension, backported from OpenFlow 1.4.
+        bundle_id = next(_BUNDLE_IDS) & 0xffffffff
+        flags = ofp.ONF_BF_ATOMIC | ofp.ONF_BF_ORDERED
+        self._bundle_ctrl(dp, ofp, ofpp, bundle_id,
+                          ofp.ONF_BCT_OPEN_REQUEST, ofp.ONF_BCT_OPEN_REPLY)
+        try:
+            self._send_msgs(dp, [
+                ofpp.ONFBundleAddMsg(dp, bundle_id, flags, msg, [])
+                for msg in msgs])
+        except RuntimeError:
+            with excutils.save_and_reraise_exception():
+                try:
+                    self._bundle_ctrl(dp, ofp, ofpp, bundle_id,
+                                      ofp.ONF_BCT_DISCARD_REQUEST,
+                                      ofp.ONF_BCT_DISCARD_REPLY)
+                except RuntimeError:
+                    pass
+        # The switch refuses to commit a bundle when one of its messages is
+        # invalid, none of them is applied then.
+        self._bundle_ctrl(dp, ofp, ofpp, bundle_id,
+                          ofp.ONF_BCT_COMMIT_REQUEST,
+                          ofp.ONF_BCT_COMMIT_REPLY)
+
+    def send_flow_mods(self, msgs, bundle=False):
+        """Send FlowMods to the switch and wait for a single barrier.
+
+        :param msgs: the FlowMods, applied in order
+        :param bundle: Optional, send the FlowMods in a bundle committed
+                       atomically, none of them is applied if one fails.
+        :raises RuntimeError: if a FlowMod failed
+        """
+        if not msgs:
+            return
+        (dp, ofp, ofpp) = self._get_dp()
+        if bundle:
+            self._send_bundle(dp, ofp, ofpp, msgs)
+            return
+        with self._collect_errors(dp, msgs) as errors:
+            self._send_msgs(dp, msgs)
+            self._send_msg(ofpp.OFPBarrierRequest(dp))
+        if errors:
+            for msg, error in errors:
+                m = _("ofctl request %(request)s error %(error)s") % {
+                    "request": msg,
+                    "error": error,
+                }
+                LOG.error(m)
+            # NOTE(yamamoto): use RuntimeError for compat with ovs_lib
+            raise RuntimeError(m)
+
+    def flow_mod_batch(self, bundle=False):
+        return FlowModBatch(self, bundle=bundle)
+
     @staticmethod
     def _match(_ofp, ofpp, match, **match_kwargs):
         if match is not None:
@@ -132,7 +279,7 @@ class OpenFlowSwitchMixin(object):
                               priority=priority,
                               out_group=ofp.OFPG_ANY,
                               out_port=ofp.OFPP_ANY)
-        self._send_msg(msg)
+        self._send_flow_mod(msg)
 
     def dump_flows(self, table_id=None):
         (dp, ofp, ofpp) = self._get_dp()
@@ -152,10 +299,12 @@ class OpenFlowSwitchMixin(object):
                   self.reserved_cookies
         LOG.debug("Reserved cookies for %s: %s", self.br_name,
                   self.reserved_cookies)
-        for c in cookies:
-            LOG.warning(_LW("Deleting flow with cookie 0x%(cookie)x"),
-                        {'cookie': c})
-            self.uninstall_flows(cookie=c, cookie_mask=ovs_lib.UINT64_BITMASK)
+        with self.flow_mod_batch() as br:
+            for c in cookies:
+                LOG.warning(_LW("Deleting flow with cookie 0x%(cookie)x"),
+                            {'cookie': c})
+                br.uninstall_flows(cookie=c,
+                                   cookie_mask=ovs_lib.UINT64_BITMASK)
 
     def install_goto_next(self, table_id):
         self.install_goto(table_id=table_id, dest_table_id=table_id + 1)
@@ -200,7 +349,7 @@ class OpenFlowSwitchMixin(object):
                               match=match,
                               priority=priority,
                               instructions=instructions)
-        self._send_msg(msg)
+        self._send_flow_mod(msg)
 
     def install_apply_actions(self, actions,
                               table_id=0, priority=0,
@@ -214,3 +363,39 @@ class OpenFlowSwitchMixin(object):
                                   match=match,
                                   instructions=instructions,
                                   **match_kwargs)
+
+
+class FlowModBatch(object):
+    """Queue the FlowMods of a bridge and send them at once.
+
+    This is the native counterpart of ovs_lib.DeferredOVSBridge.  The
+    FlowMods issued through the bridge returned by __enter__, a copy of the
+    wrapped one, are queued and sent in order on __exit__ with a single
+    barrier, or in a single bundle if bundle is True, except if an
+    exception is raised.  The wrapped bridge keeps sending its FlowMods as
+    they come.  A batch entered on a bridge returned by another one joins
+    it.
+    """
+
+    def __init__(self, br, bundle=False):
+        self.br = br
+        self.bundle = bundle
+        self.deferred_br = None
+
+    def __enter__(self):
+        if self.br._flow_mods is not None:
+            return self.br
+        self.deferred_br = copy.copy(self.br)
+        self.deferred_br._flow_mods = []
+        return self.deferred_br
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.deferred_br is None:
+            return
+        flow_mods = self.deferred_br._flow_mods
+        self.deferred_br = None
+        if exc_type is None:
+            self.br.send_flow_mods(flow_mods, bundle=self.bundle)
+        else:
+            LOG.exception(_LE("OpenFlow flows could not be applied on "
+                              "bridge %s"), self.br.br_name)
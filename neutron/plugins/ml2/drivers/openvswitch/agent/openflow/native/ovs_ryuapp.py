@@ -20,6 +20,8 @@ from oslo_log import log as logging
 from oslo_utils import excutils
 import ryu.app.ofctl.api  # noqa
 from ryu.base import app_manager
+from ryu.controller import handler
+from ryu.controller import ofp_event
 from ryu.lib import hub
 from ryu.ofproto import ofproto_v1_3
 
@@ -30,6 +32,8 @@ from neutron.plugins.ml2.drivers.openvswitch.agent.openflow.native \
     import br_phys
 from neutron.plugins.ml2.drivers.openvswitch.agent.openflow.native \
     import br_tun
+from neutron.plugins.ml2.drivers.openvswitch.agent.openflow.native \
+    import ofswitch
 from neutron.plugins.ml2.drivers.openvswitch.agent \
     import ovs_neutron_agent as ovs_agent
 
@@ -67,3 +71,9 @@ class OVSNeutronAgentRyuApp(app_manager.RyuApp):
             'br_tun': _make_br_cls(br_tun.OVSTunnelBridge),
         }
         return hub.spawn(agent_main_wrapper, bridge_classes, raise_error=True)
+
+    @handler.set_ev_cls(ofp_event.EventOFPErrorMsg, handler.MAIN_DISPATCHER)
+    def _error_msg_handler(self, ev):
+        # The errors of the messages sent by the ofctl service are handled
+        # by it, those of the FlowMods batched by the bridges are not.
+        ofswitch.handle_error_msg(ev.msg)
@@ -15,6 +15,7 @@
 
 import base64
 import collections
+import contextlib
 import functools
 import hashlib
 import signal
@@ -48,6 +49,7 @@ from neutron.agent.linux import xenapi_root_helper
 from neutron.agent import rpc as agent_rpc
 from neutron.agent import securitygroups_rpc as agent_sg_rpc
 from neutron.api.rpc.callbacks import resources
+from neutron.api.rpc.callbacks import wire_format
 from neutron.api.rpc.handlers import dvr_rpc
 from neutron.api.rpc.handlers import securitygroups_rpc as sg_rpc
 from neutron.common import config
@@ -88,6 +90,33 @@ def has_zero_prefixlen_address(ip_addresses):
     return any(netaddr.IPNetwork(ip).prefixlen == 0 for ip in ip_addresses)
 
 
+class _FdbBridge(object):
+    """Tunnel bridge used to process a l2pop message.
+
+    The flooding flow of a local vlan only depends on its tunnel ports once
+    the whole message is processed, so instead of being rewritten for each
+    flooding entry the local vlans are recorded and their flooding flows
+    are written once by update_flood_flows.
+    """
+
+    def __init__(self, br):
+        self.br = br
+        self.flood_lvms = {}
+
+    def __getattr__(self, name):
+        return getattr(self.br, name)
+
+    def update_flood_flows(self):
+        for lvm in self.flood_lvms.values():
+            if lvm.tun_ofports:
+                self.br.install_flood_to_tun(lvm.vlan, lvm.segmentation_id,
+                                             lvm.tun_ofports)
+            else:
+                # This local vlan doesn't require any more tunneling
+                self.br.delete_flood_to_tun(lvm.vlan)
+        self.flood_lvms.clear()
+
+
 @profiler.trace_cls("rpc")
 class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
                       l2population_rpc.L2populationRpcCallBackTunnelMixin,
@@ -269,7 +298,8 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
                                'vhostuser_socket_dir':
                                ovs_conf.vhostuser_socket_dir,
                                portbindings.OVS_HYBRID_PLUG: hybrid_plug},
-            'resource_versions': resources.LOCAL_RESOURCE_VERSIONS,
+            'resource_versions': wire_format.get_advertised_versions(
+                resources.LOCAL_RESOURCE_VERSIONS),
             'agent_type': agent_conf.agent_type,
             'start_flag': True}
 
@@ -356,6 +386,8 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
         self.tun_br_ofports = {p_const.TYPE_GENEVE: {},
                                p_const.TYPE_GRE: {},
                                p_const.TYPE_VXLAN: {}}
+        # The tunnels have to be fully synced again
+        self.tunnel_sync_tokens = {}
 
     def setup_rpc(self):
         self.plugin_rpc = OVSPluginApi(topics.PLUGIN)
@@ -427,20 +459,25 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
         # they are already gone
         if 'removed' in port_info:
             self.deleted_ports -= port_info['removed']
-        deleted_ports = list(self.deleted_ports)
+        # get_vif_port_by_id yields, port_delete can add ports meanwhile
+        deleted_ports = []
+        dead_ports = []
         while self.deleted_ports:
             port_id = self.deleted_ports.pop()
+            deleted_ports.append(port_id)
             port = self.int_br.get_vif_port_by_id(port_id)
             self._clean_network_ports(port_id)
             self.ext_manager.delete_port(self.context,
                                          {"vif_port": port,
                                           "port_id": port_id})
-            # move to dead VLAN so deleted ports no
-            # longer have access to the network
             if port:
-                # don't log errors since there is a chance someone will be
-                # removing the port from the bridge at the same time
-                self.port_dead(port, log_errors=False)
+                dead_ports.append(port)
+        # move to dead VLAN so deleted ports no
+        # longer have access to the network
+        # don't log errors since there is a chance someone will be
+        # removing the ports from the bridge at the same time
+        self.ports_dead(dead_ports, log_errors=False)
+        for port_id in deleted_ports:
             self.port_unbound(port_id)
         # Flush firewall rules after ports are put on dead VLAN to be
         # more secure
@@ -491,38 +528,67 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
     def _tunnel_port_lookup(self, network_type, remote_ip):
         return self.tun_br_ofports[network_type].get(remote_ip)
 
-    def fdb_add(self, context, fdb_entries):
-        LOG.debug("fdb_add received")
+    @contextlib.contextmanager
+    def _l2pop_bridge(self):
+        if self.enable_distributed_routing:
+            # The flows are applied as they come, the flooding flows have to
+            # match the tunnel ports even if the message isn't fully processed
+            fdb_br = _FdbBridge(self.tun_br)
+            try:
+                yield fdb_br
+            finally:
+                fdb_br.update_flood_flows()
+        else:
+            with self.tun_br.deferred() as deferred_br:
+                fdb_br = _FdbBridge(deferred_br)
+                yield fdb_br
+                fdb_br.update_flood_flows()
+
+    def _get_remote_agent_ports(self, fdb_entries):
+        remote_agent_ports = []
         for lvm, agent_ports in self.get_agent_ports(fdb_entries):
             agent_ports.pop(self.local_ip, None)
             if len(agent_ports):
-                if not self.enable_distributed_routing:
-                    with self.tun_br.deferred() as deferred_br:
-                        self.fdb_add_tun(context, deferred_br, lvm,
-                                         agent_ports, self._tunnel_port_lookup)
-                else:
-                    self.fdb_add_tun(context, self.tun_br, lvm,
-                                     agent_ports, self._tunnel_port_lookup)
+                remote_agent_ports.append((lvm, agent_ports))
+        return remote_agent_ports
+
+    def fdb_add(self, context, fdb_entries):
+        LOG.debug("fdb_add received")
+        remote_agent_ports = self._get_remote_agent_ports(fdb_entries)
+        if not remote_agent_ports:
+            return
+        # All the networks of the message are processed in a single bridge
+        # transaction
+        with self._l2pop_bridge() as br:
+            for lvm, agent_ports in remote_agent_ports:
+                self.fdb_add_tun(context, br, lvm, agent_ports,
+                                 self._tunnel_port_lookup)
 
     def fdb_remove(self, context, fdb_entries):
         LOG.debug("fdb_remove received")
-        for lvm, agent_ports in self.get_agent_ports(fdb_entries):
-            agent_ports.pop(self.local_ip, None)
-            if len(agent_ports):
-                if not self.enable_distributed_routing:
-                    with self.tun_br.deferred() as deferred_br:
-                        self.fdb_remove_tun(context, deferred_br, lvm,
-                                            agent_ports,
-                                            self._tunnel_port_lookup)
-                else:
-                    self.fdb_remove_tun(context, self.tun_br, lvm,
-                                        agent_ports, self._tunnel_port_lookup)
+        remote_agent_ports = self._get_remote_agent_ports(fdb_entries)
+        if not remote_agent_ports:
+            return
+        with self._l2pop_bridge() as br:
+            for lvm, agent_ports in remote_agent_ports:
+                self.fdb_remove_tun(context, br, lvm, agent_ports,
+                                    self._tunnel_port_lookup)
+
+    def _update_flood_to_tun(self, br, lvm):
+        if isinstance(br, _FdbBridge):
+            # Written once the whole l2pop message is processed
+            br.flood_lvms[lvm.vlan] = lvm
+        elif lvm.tun_ofports:
+            br.install_flood_to_tun(lvm.vlan, lvm.segmentation_id,
+                                    lvm.tun_ofports)
+        else:
+            # This local vlan doesn't require any more tunneling
+            br.delete_flood_to_tun(lvm.vlan)
 
     def add_fdb_flow(self, br, port_info, remote_ip, lvm, ofport):
         if port_info == n_const.FLOODING_ENTRY:
             lvm.tun_ofports.add(ofport)
-            br.install_flood_to_tun(lvm.vlan, lvm.segmentation_id,
-                                    lvm.tun_ofports)
+            self._update_flood_to_tun(br, lvm)
         else:
             self.setup_entry_for_arp_reply(br, 'add', lvm.vlan,
                                            port_info.mac_address,
@@ -538,12 +604,7 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
                 LOG.debug("attempt to remove a non-existent port %s", ofport)
                 return
             lvm.tun_ofports.remove(ofport)
-            if len(lvm.tun_ofports) > 0:
-                br.install_flood_to_tun(lvm.vlan, lvm.segmentation_id,
-                                        lvm.tun_ofports)
-            else:
-                # This local vlan doesn't require any more tunneling
-                br.delete_flood_to_tun(lvm.vlan)
+            self._update_flood_to_tun(br, lvm)
         else:
             self.setup_entry_for_arp_reply(br, 'remove', lvm.vlan,
                                            port_info.mac_address,
@@ -836,6 +897,7 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
         port_info = self.int_br.get_ports_attributes(
             "Port", columns=["name", "tag"], ports=port_names, if_exists=True)
         tags_by_name = {x['name']: x['tag'] for x in port_info}
+        tags = {}
         for port_detail in need_binding_ports:
             try:
                 lvm = self.vlan_manager.get(port_detail['network_id'])
@@ -855,8 +917,7 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
                 self.setup_arp_spoofing_protection(self.int_br,
                                                    port, port_detail)
             if cur_tag != lvm.vlan:
-                self.int_br.set_db_attribute(
-                    "Port", port.port_name, "tag", lvm.vlan)
+                tags[port.port_name] = lvm.vlan
 
             # update plugin about port status
             # FIXME(salv-orlando): Failures while updating device status
@@ -869,6 +930,11 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
             else:
                 LOG.debug("Setting status for %s to DOWN", device)
                 devices_down.append(device)
+        if tags:
+            # the ports are tagged before being reported as up
+            with self.int_br.ovsdb_batch() as batch:
+                for port_name, tag in tags.items():
+                    batch.set_db_attribute("Port", port_name, "tag", tag)
         if devices_up or devices_down:
             devices_set = self.plugin_rpc.update_device_list(
                 self.context, devices_up, devices_down, self.agent_id,
@@ -967,13 +1033,34 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
 
         :param port: an ovs_lib.VifPort object.
         '''
+        self.ports_dead([port], log_errors=log_errors)
+
+    def ports_dead(self, ports, log_errors=True):
+        '''Put ports having no binding on the "dead vlan".
+
+        The tags of the ports are read with a single query and the dead ones
+        are tagged in a single OVSDB transaction.
+
+        :param ports: a list of ovs_lib.VifPort objects.
+        '''
+        if not ports:
+            return
+        port_info = self.int_br.get_ports_attributes(
+            "Port", columns=["name", "tag"],
+            ports=[port.port_name for port in ports], if_exists=True,
+            check_error=False, log_errors=log_errors)
+        tags_by_name = {x['name']: x['tag'] for x in port_info or []}
         # Don't kill a port if it's already dead
-        cur_tag = self.int_br.db_get_val("Port", port.port_name, "tag",
-                                         log_errors=log_errors)
-        if cur_tag and cur_tag != constants.DEAD_VLAN_TAG:
-            self.int_br.set_db_attribute("Port", port.port_name, "tag",
-                                         constants.DEAD_VLAN_TAG,
-                                         log_errors=log_errors)
+        dead_ports = [port for port in ports
+                      if tags_by_name.get(port.port_name) and
+                      tags_by_name[port.port_name] != constants.DEAD_VLAN_TAG]
+        if not dead_ports:
+            return
+        with self.int_br.ovsdb_batch(log_errors=log_errors) as batch:
+            for port in dead_ports:
+                batch.set_db_attribute("Port", port.port_name, "tag",
+                                       constants.DEAD_VLAN_TAG)
+        for port in dead_ports:
             self.int_br.drop_port(in_port=port.ofport)
 
     def setup_integration_br(self):
@@ -1422,18 +1509,23 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
             LOG.debug("No VIF port for port %s defined on agent.", port_id)
         return port_needs_binding
 
-    def _setup_tunnel_port(self, br, port_name, remote_ip, tunnel_type):
+    def _validate_tunnel_remote_ip(self, remote_ip):
         try:
             if (netaddr.IPAddress(self.local_ip).version !=
                 netaddr.IPAddress(remote_ip).version):
                 LOG.error(_LE("IP version mismatch, cannot create tunnel: "
                               "local_ip=%(lip)s remote_ip=%(rip)s"),
                           {'lip': self.local_ip, 'rip': remote_ip})
-                return 0
+                return False
         except Exception:
             LOG.error(_LE("Invalid local or remote IP, cannot create tunnel: "
                           "local_ip=%(lip)s remote_ip=%(rip)s"),
                       {'lip': self.local_ip, 'rip': remote_ip})
+            return False
+        return True
+
+    def _setup_tunnel_port(self, br, port_name, remote_ip, tunnel_type):
+        if not self._validate_tunnel_remote_ip(remote_ip):
             return 0
         ofport = br.add_tunnel_port(port_name,
                                     remote_ip,
@@ -1453,6 +1545,47 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
         br.setup_tunnel_port(tunnel_type, ofport)
         return ofport
 
+    def _setup_tunnel_ports(self, br, remote_ips, tunnel_type):
+        """Set up the tunnel ports to many remote IPs at once.
+
+        The ports are created with an OVSDB transaction per batch of remote
+        IPs, without waiting for their ofports, which are then all resolved
+        together.
+        """
+        tunnel_ports = {}
+        for remote_ip in remote_ips:
+            if not self._validate_tunnel_remote_ip(remote_ip):
+                continue
+            port_name = self.get_tunnel_name(
+                tunnel_type, self.local_ip, remote_ip)
+            if port_name is None:
+                continue
+            tunnel_ports[port_name] = remote_ip
+        if not tunnel_ports:
+            return
+        port_names = sorted(tunnel_ports)
+        batch_size = constants.TUNNEL_PORTS_BATCH_SIZE
+        for i in moves.range(0, len(port_names), batch_size):
+            br.add_tunnel_ports(
+                dict((port_name, tunnel_ports[port_name])
+                     for port_name in port_names[i:i + batch_size]),
+                self.local_ip, tunnel_type, self.vxlan_udp_port,
+                self.dont_fragment, self.tunnel_csum)
+        ofports = br.get_ports_ofport(port_names)
+        with br.deferred() as deferred_br:
+            for port_name in port_names:
+                remote_ip = tunnel_ports[port_name]
+                ofport = ofports[port_name]
+                if ofport == ovs_lib.INVALID_OFPORT:
+                    LOG.error(_LE("Failed to set-up %(type)s tunnel port to "
+                                  "%(ip)s"),
+                              {'type': tunnel_type, 'ip': remote_ip})
+                    continue
+                self.tun_br_ofports[tunnel_type][remote_ip] = ofport
+                # Add flow in default table to resubmit to the right
+                # tunneling table (lvid will be set in the latter)
+                deferred_br.setup_tunnel_port(tunnel_type, ofport)
+
     def _setup_tunnel_flood_flow(self, br, tunnel_type):
         ofports = self.tun_br_ofports[tunnel_type].values()
         if ofports and not self.l2_pop:
@@ -1494,6 +1627,7 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
     def treat_devices_added_or_updated(self, devices, ovs_restarted):
         skipped_devices = []
         need_binding_devices = []
+        dead_ports = []
         devices_details_list = (
             self.plugin_rpc.get_devices_details_list_and_failed_devices(
                 self.context,
@@ -1539,7 +1673,9 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
                     _LW("Device %s not defined on plugin or binding failed"),
                     device)
                 if (port and port.ofport != -1):
-                    self.port_dead(port)
+                    dead_ports.append(port)
+        if dead_ports:
+            self.ports_dead(dead_ports)
         return (skipped_devices, need_binding_devices,
                 failed_devices)
 
@@ -1708,24 +1844,22 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
 
         try:
             for tunnel_type in self.tunnel_types:
-                details = self.plugin_rpc.tunnel_sync(self.context,
-                                                      self.local_ip,
-                                                      tunnel_type,
-                                                      self.conf.host)
+                details = self.plugin_rpc.tunnel_sync(
+                    self.context, self.local_ip, tunnel_type, self.conf.host,
+                    sync_token=self.tunnel_sync_tokens.get(tunnel_type))
                 if not self.l2_pop:
-                    tunnels = details['tunnels']
-                    for tunnel in tunnels:
-                        if self.local_ip != tunnel['ip_address']:
-                            remote_ip = tunnel['ip_address']
-                            tun_name = self.get_tunnel_name(
-                                tunnel_type, self.local_ip, remote_ip)
-                            if tun_name is None:
-                                continue
-                            self._setup_tunnel_port(self.tun_br,
-                                                    tun_name,
-                                                    tunnel['ip_address'],
-                                                    tunnel_type)
+                    # Only the tunnels to the endpoints the agent doesn't
+                    # know yet are set up
+                    known_ips = self.tun_br_ofports[tunnel_type]
+                    remote_ips = [
+                        tunnel['ip_address'] for tunnel in details['tunnels']
+                        if tunnel['ip_address'] != self.local_ip and
+                        tunnel['ip_address'] not in known_ips]
+                    self._setup_tunnel_ports(self.tun_br, remote_ips,
+                                             tunnel_type)
                     self._setup_tunnel_flood_flow(self.tun_br, tunnel_type)
+                self.tunnel_sync_tokens[tunnel_type] = details.get(
+                    'sync_token')
         except Exception as e:
             LOG.debug("Unable to sync tunnel IP %(local_ip)s: %(e)s",
                       {'local_ip': self.local_ip, 'e': e})
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 import abc
+import hashlib
 import itertools
 import operator
 
@@ -23,6 +24,7 @@ from neutron_lib.plugins.ml2 import api
 from oslo_config import cfg
 from oslo_db import exception as db_exc
 from oslo_log import log
+from oslo_serialization import jsonutils
 import six
 from six import moves
 from sqlalchemy import or_
@@ -395,11 +397,21 @@ class TunnelRpcCallbackMixin(object):
         self._notifier = notifier
         self._type_manager = type_manager
 
+    @staticmethod
+    def _get_tunnels_sync_token(tunnels):
+        tunnels = sorted(tunnels, key=lambda tunnel: tunnel['ip_address'])
+        return hashlib.sha1(
+            jsonutils.dumps(tunnels, sort_keys=True).encode()).hexdigest()
+
     def tunnel_sync(self, rpc_context, **kwargs):
         """Update new tunnel.
 
         Updates the database with the tunnel IP. All listening agents will also
         be notified about the new tunnel IP.
+
+        The returned sync_token identifies the returned endpoints, when the
+        agent passes it back and the endpoints didn't change since, no
+        endpoints are returned.
         """
         tunnel_ip = kwargs.get('tunnel_ip')
         if not tunnel_ip:
@@ -465,7 +477,11 @@ class TunnelRpcCallbackMixin(object):
 
             tunnel = driver.obj.add_endpoint(tunnel_ip, host)
             tunnels = driver.obj.get_endpoints()
-            entry = {'tunnels': tunnels}
+            sync_token = self._get_tunnels_sync_token(tunnels)
+            if kwargs.get('sync_token') == sync_token:
+                # The agent already knows all the endpoints
+                tunnels = []
+            entry = {'tunnels': tunnels, 'sync_token': sync_token}
             # Notify all other listening agents
             self._notifier.tunnel_update(rpc_context, tunnel.ip_address,
                                          tunnel_type)
@@ -11,6 +11,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import time
 import traceback
 
 import eventlet
@@ -32,13 +33,22 @@ from neutron.objects import subnet
 
 LOG = logging.getLogger(__name__)
 
+# time during which the resource IDs of the events are coalesced before
+# being loaded and pushed together
+BATCH_WINDOW = 0.05
+# maximum number of resources loaded and pushed in a single message
+MAX_BATCH_SIZE = 1000
+
 
 class _ObjectChangeHandler(object):
     def __init__(self, resource, object_class, resource_push_api):
         self._resource = resource
         self._obj_class = object_class
         self._resource_push_api = resource_push_api
+        # resource ID -> (context dict of the last event, time of the
+        # first event not pushed yet)
         self._resources_to_push = {}
+        self._dispatch_scheduled = False
         self._worker_pool = eventlet.GreenPool()
         for event in (events.AFTER_CREATE, events.AFTER_UPDATE,
                       events.AFTER_DELETE):
@@ -79,33 +89,66 @@ class _ObjectChangeHandler(object):
         resource_id = self._extract_resource_id(kwargs)
         # we preserve the context so we can trace a receive on the agent back
         # to the server-side event that triggered it
-        self._resources_to_push[resource_id] = context.to_dict()
-        # spawn worker so we don't block main AFTER_UPDATE thread
-        self._worker_pool.spawn(self.dispatch_events)
+        queued = self._resources_to_push.get(resource_id)
+        self._resources_to_push[resource_id] = (
+            context.to_dict(), queued[1] if queued else time.time())
+        if not self._dispatch_scheduled:
+            self._dispatch_scheduled = True
+            # spawn worker so we don't block main AFTER_UPDATE thread
+            self._worker_pool.spawn(self._dispatch_after_window)
+
+    def _dispatch_after_window(self):
+        # let the events of the same burst accumulate so they are loaded and
+        # pushed together
+        eventlet.sleep(BATCH_WINDOW)
+        self._dispatch_scheduled = False
+        self.dispatch_events()
 
     @lockutils.synchronized('event-dispatch')
     def dispatch_events(self):
         # this is guarded by a lock to ensure we don't get too many concurrent
         # dispatchers hitting the database simultaneously.
         to_dispatch, self._resources_to_push = self._resources_to_push, {}
-        # TODO(kevinbenton): now that we are batching these, convert to a
-        # single get_objects call for all of them
-        for resource_id, context_dict in to_dispatch.items():
-            context = n_ctx.Context.from_dict(context_dict)
-            # attempt to get regardless of event type so concurrent delete
-            # after create/update is the same code-path as a delete event
-            with db_api.context_manager.independent.reader.using(context):
-                obj = self._obj_class.get_object(context, id=resource_id)
-            # CREATE events are always treated as UPDATE events to ensure
-            # listeners are written to handle out-of-order messages
-            if obj is None:
-                rpc_event = rpc_events.DELETED
-                # construct a fake object with the right ID so we can
-                # have a payload for the delete message.
-                obj = self._obj_class(id=resource_id)
-            else:
-                rpc_event = rpc_events.UPDATED
-            self._resource_push_api.push(context, [obj], rpc_event)
+        resource_ids = list(to_dispatch)
+        for i in range(0, len(resource_ids), MAX_BATCH_SIZE):
+            self._dispatch_batch(
+                {resource_id: to_dispatch[resource_id]
+                 for resource_id in resource_ids[i:i + MAX_BATCH_SIZE]})
+
+    def _dispatch_batch(self, to_dispatch):
+        # the objects are loaded and pushed with the context of the most
+        # recent event of the batch, the request IDs of the others are logged
+        # so a receive on the agent can still be traced back to them
+        context_dicts = [c for c, _queued_at in to_dispatch.values()]
+        context = n_ctx.Context.from_dict(context_dicts[-1])
+        # the events may come from different projects
+        admin_context = context.elevated()
+        # attempt to get regardless of event type so concurrent delete
+        # after create/update is the same code-path as a delete event
+        with db_api.context_manager.independent.reader.using(admin_context):
+            objs = self._obj_class.get_objects(admin_context, _pager=None,
+                                               id=list(to_dispatch))
+        # CREATE events are always treated as UPDATE events to ensure
+        # listeners are written to handle out-of-order messages
+        if objs:
+            self._resource_push_api.push(context, objs, rpc_events.UPDATED)
+        # construct fake objects with the right ID so we can have a payload
+        # for the delete message.
+        deleted_ids = set(to_dispatch) - set(obj.id for obj in objs)
+        if deleted_ids:
+            self._resource_push_api.push(
+                context, [self._obj_class(id=resource_id)
+                          for resource_id in deleted_ids],
+                rpc_events.DELETED)
+        oldest = min(queued_at for _c, queued_at in to_dispatch.values())
+        LOG.debug("Pushed %(updated)s updated and %(deleted)s deleted "
+                  "%(resource)s resources in one batch, %(latency).3fs "
+                  "after the oldest event. Requests: %(requests)s",
+                  {'updated': len(objs), 'deleted': len(deleted_ids),
+                   'resource': self._resource,
+                   'latency': time.time() - oldest,
+                   'requests': list(set(c.get('request_id')
+                                        for c in context_dicts))})
 
     def _extract_resource_id(self, callback_kwargs):
         id_kwarg = '%s_id' % self._resource
@@ -46,6 +46,7 @@ from sqlalchemy.orm import exc as sa_exc
 from neutron._i18n import _, _LE, _LI, _LW
 from neutron.agent import securitygroups_rpc as sg_rpc
 from neutron.api.rpc.agentnotifiers import dhcp_rpc_agent_api
+from neutron.api.rpc.agentnotifiers import utils as ag_utils
 from neutron.api.rpc.handlers import dhcp_rpc
 from neutron.api.rpc.handlers import dvr_rpc
 from neutron.api.rpc.handlers import metadata_rpc
@@ -80,6 +81,7 @@ from neutron.extensions import availability_zone as az_ext
 from neutron.extensions import multiprovidernet as mpnet
 from neutron.extensions import providernet as provider
 from neutron.extensions import vlantransparent
+from neutron.objects import base as obj_base
 from neutron.plugins.ml2.common import exceptions as ml2_exc
 from neutron.plugins.ml2 import config  # noqa
 from neutron.plugins.ml2 import db
@@ -681,7 +683,10 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
         obj_before_create = getattr(self, '_before_create_%s' % resource)
         for item in items:
             obj_before_create(context, item)
-        with db_api.context_manager.writer.using(context):
+        # the precommit callbacks of the items look up the same objects
+        # (e.g. network and QoS policy) for each of them
+        with db_api.context_manager.writer.using(context), \
+                obj_base.object_cache(context):
             obj_creator = getattr(self, '_create_%s_db' % resource)
             for item in items:
                 try:
@@ -699,22 +704,27 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                             {'resource': resource, 'item': item})
 
         postcommit_op = getattr(self, '_after_create_%s' % resource)
-        for obj in objects:
-            try:
-                postcommit_op(context, obj['result'], obj['mech_context'])
-            except Exception:
-                with excutils.save_and_reraise_exception():
-                    resource_ids = [res['result']['id'] for res in objects]
-                    LOG.exception(_LE("ML2 _after_create_%(res)s "
-                                      "failed for %(res)s: "
-                                      "'%(failed_id)s'. Deleting "
-                                      "%(res)ss %(resource_ids)s"),
-                                  {'res': resource,
-                                   'failed_id': obj['result']['id'],
-                                   'resource_ids': ', '.join(resource_ids)})
-                    # _after_handler will have deleted the object that threw
-                    to_delete = [o for o in objects if o != obj]
-                    self._delete_objects(context, resource, to_delete)
+        # the agents are notified once about all the created objects
+        with ag_utils.batch_notifications(context):
+            for obj in objects:
+                try:
+                    postcommit_op(context, obj['result'], obj['mech_context'])
+                except Exception:
+                    with excutils.save_and_reraise_exception():
+                        resource_ids = [res['result']['id']
+                                        for res in objects]
+                        LOG.exception(_LE("ML2 _after_create_%(res)s "
+                                          "failed for %(res)s: "
+                                          "'%(failed_id)s'. Deleting "
+                                          "%(res)ss %(resource_ids)s"),
+                                      {'res': resource,
+                                       'failed_id': obj['result']['id'],
+                                       'resource_ids': ', '.join(
+                                           resource_ids)})
+                        # _after_handler will have deleted the object that
+                        # threw
+                        to_delete = [o for o in objects if o != obj]
+                        self._delete_objects(context, resource, to_delete)
         return objects
 
     def _get_network_mtu(self, network):
@@ -32,6 +32,7 @@ from neutron.common import rpc as n_rpc
 from neutron.common import topics
 from neutron.db import l3_hamode_db
 from neutron.db import provisioning_blocks
+from neutron.objects import base as obj_base
 from neutron.plugins.ml2 import db as ml2_db
 from neutron.plugins.ml2.drivers import type_tunnel
 from neutron.services.qos import qos_consts
@@ -53,7 +54,8 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
     #   1.4 tunnel_sync rpc signature upgrade to obtain 'host'
     #   1.5 Support update_device_list and
     #       get_devices_details_list_and_failed_devices
-    target = oslo_messaging.Target(version='1.5')
+    #   1.6 tunnel_sync rpc signature upgrade to obtain 'sync_token'
+    target = oslo_messaging.Target(version='1.6')
 
     def __init__(self, notifier, type_manager):
         self.setup_tunnel_callback_mixin(notifier, type_manager)
@@ -150,15 +152,17 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
     def get_devices_details_list(self, rpc_context, **kwargs):
         # cached networks used for reducing number of network db calls
         cached_networks = {}
-        return [
-            self.get_device_details(
-                rpc_context,
-                device=device,
-                cached_networks=cached_networks,
-                **kwargs
-            )
-            for device in kwargs.pop('devices', [])
-        ]
+        # the ports of a network look up the same segments
+        with obj_base.object_cache(rpc_context):
+            return [
+                self.get_device_details(
+                    rpc_context,
+                    device=device,
+                    cached_networks=cached_networks,
+                    **kwargs
+                )
+                for device in kwargs.pop('devices', [])
+            ]
 
     def get_devices_details_list_and_failed_devices(self,
                                                     rpc_context,
@@ -168,9 +172,10 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
         devices_to_fetch = kwargs.pop('devices', [])
         plugin = directory.get_plugin()
         host = kwargs.get('host')
-        bound_contexts = plugin.get_bound_ports_contexts(rpc_context,
-                                                         devices_to_fetch,
-                                                         host)
+        # binding the ports of a network looks up the same segments
+        with obj_base.object_cache(rpc_context):
+            bound_contexts = plugin.get_bound_ports_contexts(
+                rpc_context, devices_to_fetch, host)
         for device in devices_to_fetch:
             if not bound_contexts.get(device):
                 # unbound bound
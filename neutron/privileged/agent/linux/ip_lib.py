@@ -122,6 +122,60 @@ def add_neigh_entry(ip_version, ip_address, mac_address, device, namespace,
                  **kwargs)
 
 
+@privileged.default.entrypoint
+def add_neigh_entries(entries, device, namespace, **kwargs):
+    """Add several permanent neighbour entries to a device.
+
+    All the entries are programmed over a single netlink socket. The current
+    neighbour table of the device is dumped first and only the entries that
+    are missing, not permanent or pointing to another MAC address are
+    written.
+
+    :param entries: iterable of (ip_version, ip_address, mac_address) tuples
+    :param device: Device name to use in adding entries
+    :param namespace: The name of the namespace in which to add the entries
+    :return: the number of entries written
+    """
+    entries = list(entries)
+    if not entries:
+        return 0
+    permanent = ndmsg.states['permanent']
+    try:
+        with _get_iproute(namespace) as ip:
+            idx = ip.link_lookup(ifname=device)[0]
+            current = {}
+            for ip_version in set(entry[0] for entry in entries):
+                family = _IP_VERSION_FAMILY_MAP[ip_version]
+                for neigh in ip.neigh('dump', ifindex=idx, family=family):
+                    attrs = dict(neigh['attrs'])
+                    if neigh['state'] == permanent and attrs.get('NDA_LLADDR'):
+                        current[attrs['NDA_DST']] = (
+                            attrs['NDA_LLADDR'].lower())
+            written = 0
+            for ip_version, ip_address, mac_address in entries:
+                if current.get(ip_address) == mac_address.lower():
+                    continue
+                ip.neigh('replace',
+                         ifindex=idx,
+                         dst=ip_address,
+                         lladdr=mac_address,
+                         family=_IP_VERSION_FAMILY_MAP[ip_version],
+                         state=permanent,
+                         **kwargs)
+                current[ip_address] = mac_address.lower()
+                written += 1
+            return written
+    except IndexError:
+        msg = _("Network interface %(device)s not found in namespace "
+                "%(namespace)s.") % {'device': device,
+                                     'namespace': namespace}
+        raise NetworkInterfaceNotFound(msg)
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            raise NetworkNamespaceNotFound(netns_name=namespace)
+        raise
+
+
 @privileged.default.entrypoint
 def delete_neigh_entry(ip_version, ip_address, mac_address, device, namespace,
                        **kwargs):
@@ -278,9 +278,10 @@ class DhcpFilter(base_resource_filter.BaseResourceFilter):
         if not active_dhcp_agents:
             return {'n_agents': 0, 'hostable_agents': [],
                     'hosted_agents': hosted_agents}
+        hosted_agent_ids = set(agent.id for agent in hosted_agents)
         hostable_dhcp_agents = [
             agent for agent in set(active_dhcp_agents)
-            if agent not in hosted_agents and plugin.is_eligible_agent(
+            if agent.id not in hosted_agent_ids and plugin.is_eligible_agent(
                 context, True, agent)
         ]
 
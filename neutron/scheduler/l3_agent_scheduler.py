@@ -33,6 +33,7 @@ from neutron.db import l3_hamode_db
 from neutron.db.models import l3agent as rb_model
 from neutron.extensions import availability_zone as az_ext
 from neutron.extensions import l3
+from neutron.objects import exceptions as obj_exc
 from neutron.objects import l3agent as rb_obj
 
 
@@ -108,8 +109,9 @@ class L3Scheduler(object):
         target_routers = self._get_routers_can_schedule(
             plugin, context, underscheduled_routers, l3_agent)
 
-        for router in target_routers:
-            self.schedule(plugin, context, router['id'], candidates=[l3_agent])
+        self.schedule_routers(plugin, context,
+                              [router['id'] for router in target_routers],
+                              candidates=[l3_agent])
 
     def _get_underscheduled_routers(self, plugin, context):
         underscheduled_routers = []
@@ -252,6 +254,124 @@ class L3Scheduler(object):
             self.bind_router(plugin, context, router_id, chosen_agent.id)
         return chosen_agent
 
+    def schedule_routers(self, plugin, context, router_ids, candidates=None):
+        """Schedule a set of routers to L3 agents in a single pass.
+
+        The number of routers of the agents is read once and updated in
+        memory as the routers are placed, so the routers are spread as if
+        they were scheduled one by one. The non HA routers are bound with a
+        single insert, the HA routers need an HA port per agent and are
+        still bound one agent at a time.
+
+        :param candidates: the agents to schedule the routers to, the active
+                           L3 agents compatible with each router if not
+                           specified.
+        :returns: a dict of the routers newly hosted by each agent.
+        """
+        router_ids = [router_id for router_id in router_ids
+                      if plugin.router_supports_scheduling(context, router_id)]
+        if not router_ids:
+            return {}
+        agents = candidates or plugin.get_l3_agents(context, active=True)
+        if not agents:
+            LOG.warning(_LW('No active L3 agents'))
+            return {}
+        routers = plugin.get_routers(context, filters={'id': router_ids})
+        hosting_agent_ids = collections.defaultdict(set)
+        for binding in rb_obj.RouterL3AgentBinding.get_objects(
+                context, router_id=router_ids):
+            hosting_agent_ids[binding.router_id].add(binding.l3_agent_id)
+        loads = plugin.get_l3_agents_num_routers(
+            context, [agent.id for agent in agents])
+        max_ha_bindings = None
+
+        scheduled = collections.defaultdict(list)
+        to_bind = []
+        for router in routers:
+            hosting = hosting_agent_ids[router['id']]
+            if hosting and not router.get('ha'):
+                LOG.debug('Router %s has already been scheduled',
+                          router['id'])
+                continue
+            router_candidates = [
+                agent for agent in (
+                    agents if candidates else
+                    self._get_router_candidates(plugin, context, router,
+                                                agents))
+                if agent.id not in hosting]
+            if not router_candidates:
+                if not hosting:
+                    LOG.warning(_LW('No L3 agents can host the router %s'),
+                                router['id'])
+                continue
+            if not router.get('ha'):
+                agent = self._choose_router_agent_by_load(router_candidates,
+                                                          loads)
+                to_bind.append((router, agent))
+                loads[agent.id] += 1
+                continue
+
+            if max_ha_bindings is None:
+                max_ha_bindings = plugin.get_number_of_agents_for_scheduling(
+                    context)
+            num_agents = min(self._get_num_of_agents_for_ha(
+                len(router_candidates)), max_ha_bindings - len(hosting))
+            if num_agents < 1:
+                continue
+            chosen_agents = self._choose_router_agents_for_ha_by_load(
+                router_candidates, loads, num_agents)
+            for agent in chosen_agents:
+                if self.create_ha_port_and_bind(plugin, context, router['id'],
+                                                router['tenant_id'], agent):
+                    scheduled[agent].append(router['id'])
+                    loads[agent.id] += 1
+
+        for router, agent in self._bind_routers_in_bulk(plugin, context,
+                                                        to_bind):
+            scheduled[agent].append(router['id'])
+        return scheduled
+
+    def _get_router_candidates(self, plugin, context, router, agents):
+        return plugin.get_l3_agent_candidates(context, router, agents)
+
+    def _bind_routers_in_bulk(self, plugin, context, routers_agents):
+        """Bind non HA routers to agents with a single insert.
+
+        :param routers_agents: a list of (router, agent) tuples.
+        :returns: the (router, agent) tuples which were bound.
+        """
+        if not routers_agents:
+            return []
+        try:
+            rb_obj.RouterL3AgentBinding.create_objects(context, [
+                {'router_id': router['id'], 'l3_agent_id': agent.id,
+                 'binding_index': rb_model.LOWEST_BINDING_INDEX}
+                for router, agent in routers_agents])
+        except (db_exc.DBReferenceError,
+                obj_exc.NeutronDbObjectDuplicateEntry):
+            # a router was removed or scheduled by a concurrent operation,
+            # bind them one by one to find out which
+            LOG.debug('Failed to bind the routers in bulk, binding them '
+                      'one by one')
+            return [(router, agent) for router, agent in routers_agents
+                    if self.bind_router(plugin, context, router['id'],
+                                        agent.id)]
+        for router, agent in routers_agents:
+            LOG.debug('Router %(router_id)s is scheduled to L3 agent '
+                      '%(agent_id)s', {'router_id': router['id'],
+                                       'agent_id': agent.id})
+        return routers_agents
+
+    def _choose_router_agent_by_load(self, candidates, loads):
+        """Choose an agent from candidates given their number of routers."""
+        return min(candidates, key=lambda agent: loads[agent.id])
+
+    def _choose_router_agents_for_ha_by_load(self, candidates, loads,
+                                             num_agents):
+        """Choose agents from candidates given their number of routers."""
+        return sorted(candidates,
+                      key=lambda agent: loads[agent.id])[:num_agents]
+
     @abc.abstractmethod
     def _choose_router_agent(self, plugin, context, candidates):
         """Choose an agent from candidates based on a specific policy."""
@@ -299,6 +419,7 @@ class L3Scheduler(object):
                 dep_id_attr, dep_deleter)[0]
             with db_api.autonested_transaction(context.session):
                 port_binding.l3_agent_id = agent['id']
+            return binding
         except db_exc.DBDuplicateEntry:
             LOG.debug("Router %(router)s already scheduled for agent "
                       "%(agent)s", {'router': router_id,
@@ -350,6 +471,13 @@ class ChanceScheduler(L3Scheduler):
         num_agents = self._get_num_of_agents_for_ha(len(candidates))
         return random.sample(candidates, num_agents)
 
+    def _choose_router_agent_by_load(self, candidates, loads):
+        return random.choice(candidates)
+
+    def _choose_router_agents_for_ha_by_load(self, candidates, loads,
+                                             num_agents):
+        return random.sample(candidates, num_agents)
+
 
 class LeastRoutersScheduler(L3Scheduler):
     """Allocate to an L3 agent with the least number of routers bound."""
@@ -391,19 +519,24 @@ class AZLeastRoutersScheduler(LeastRoutersScheduler):
         return super(AZLeastRoutersScheduler, self)._get_routers_can_schedule(
             plugin, context, target_routers, l3_agent)
 
+    def _filter_agents_by_az_hints(self, router, agents):
+        az_hints = self._get_az_hints(router)
+        return [agent for agent in agents
+                if not az_hints or agent['availability_zone'] in az_hints]
+
     def _get_candidates(self, plugin, context, sync_router):
         """Overwrite L3Scheduler's method to filter by availability zone."""
         all_candidates = (
             super(AZLeastRoutersScheduler, self)._get_candidates(
                 plugin, context, sync_router))
+        return self._filter_agents_by_az_hints(sync_router, all_candidates)
 
-        candidates = []
-        az_hints = self._get_az_hints(sync_router)
-        for agent in all_candidates:
-            if not az_hints or agent['availability_zone'] in az_hints:
-                candidates.append(agent)
-
-        return candidates
+    def _get_router_candidates(self, plugin, context, router, agents):
+        """Overwrite L3Scheduler's method to filter by availability zone."""
+        candidates = super(AZLeastRoutersScheduler,
+                           self)._get_router_candidates(plugin, context,
+                                                        router, agents)
+        return self._filter_agents_by_az_hints(router, candidates)
 
     def get_ha_routers_l3_agents_counts(self, plugin, context, filters=None):
         """Overwrite L3Scheduler's method to filter by availability zone."""
@@ -426,7 +559,17 @@ class AZLeastRoutersScheduler(LeastRoutersScheduler):
         ordered_agents = plugin.get_l3_agents_ordered_by_num_routers(
             context, [candidate['id'] for candidate in candidates])
         num_agents = self._get_num_of_agents_for_ha(len(ordered_agents))
+        return self._select_agents_across_azs(ordered_agents, num_agents)
+
+    def _choose_router_agents_for_ha_by_load(self, candidates, loads,
+                                             num_agents):
+        ordered_agents = sorted(candidates, key=lambda agent: loads[agent.id])
+        return self._select_agents_across_azs(ordered_agents, num_agents)
 
+    @staticmethod
+    def _select_agents_across_azs(ordered_agents, num_agents):
+        if num_agents < 1:
+            return []
         # Order is kept in each az
         group_by_az = collections.defaultdict(list)
         for agent in ordered_agents:
@@ -255,19 +255,23 @@ class OVSDBHandler(object):
         # Bindings were successful: create the OVS subports.
         subport_bindings = subport_bindings.get(trunk_id, [])
         subports_mac = {p['id']: p['mac_address'] for p in subport_bindings}
+        try:
+            errors = self.trunk_manager.add_sub_ports(
+                trunk_id,
+                [(subport.port_id, subports_mac[subport.port_id],
+                  subport.segmentation_id) for subport in subports])
+        except tman.TrunkManagerError as te:
+            errors = dict.fromkeys(
+                (subport.port_id for subport in subports), te)
         subport_ids = []
         for subport in subports:
-            try:
-                self.trunk_manager.add_sub_port(trunk_id, subport.port_id,
-                                                subports_mac[subport.port_id],
-                                                subport.segmentation_id)
-            except tman.TrunkManagerError as te:
+            if subport.port_id in errors:
                 LOG.error(_LE("Failed to add subport with port ID "
                               "%(subport_port_id)s to trunk with ID "
                               "%(trunk_id)s: %(err)s"),
                           {'subport_port_id': subport.port_id,
                            'trunk_id': trunk_id,
-                           'err': te})
+                           'err': errors[subport.port_id]})
             else:
                 subport_ids.append(subport.port_id)
 
@@ -91,13 +91,8 @@ class TrunkParentPort(object):
             self.DEV_PREFIX, port_id)
         self._transaction = None
 
-    def plug(self, br_int):
-        """Plug patch ports between trunk bridge and given bridge.
-
-        The method plugs one patch port on the given bridge side using
-        port MAC and ID as external IDs.  The other endpoint of patch port is
-        attached to the trunk bridge.  Everything is done in a single
-        OVSDB transaction so either all operations succeed or fail.
+    def get_plug_commands(self, br_int):
+        """Return the OVSDB commands plugging the patch ports.
 
         :param br_int: an integration bridge where peer endpoint of patch port
                        will be created.
@@ -114,16 +109,30 @@ class TrunkParentPort(object):
             self.patch_port_trunk_name, self.port_mac, self.port_id)
         patch_trunk_attrs = get_patch_peer_attrs(self.patch_port_int_name,
                                                  self.port_mac, self.port_id)
+        return [
+            ovsdb.add_port(br_int.br_name, self.patch_port_int_name),
+            ovsdb.db_set('Interface', self.patch_port_int_name,
+                         *patch_int_attrs),
+            ovsdb.add_port(self.bridge.br_name, self.patch_port_trunk_name),
+            ovsdb.db_set('Interface', self.patch_port_trunk_name,
+                         *patch_trunk_attrs),
+        ]
+
+    def plug(self, br_int):
+        """Plug patch ports between trunk bridge and given bridge.
+
+        The method plugs one patch port on the given bridge side using
+        port MAC and ID as external IDs.  The other endpoint of patch port is
+        attached to the trunk bridge.  Everything is done in a single
+        OVSDB transaction so either all operations succeed or fail.
 
+        :param br_int: an integration bridge where peer endpoint of patch port
+                       will be created.
+        """
+        ovsdb = self.bridge.ovsdb
         with ovsdb.transaction() as txn:
-            txn.add(ovsdb.add_port(br_int.br_name,
-                                   self.patch_port_int_name))
-            txn.add(ovsdb.db_set('Interface', self.patch_port_int_name,
-                                 *patch_int_attrs))
-            txn.add(ovsdb.add_port(self.bridge.br_name,
-                                   self.patch_port_trunk_name))
-            txn.add(ovsdb.db_set('Interface', self.patch_port_trunk_name,
-                                 *patch_trunk_attrs))
+            for cmd in self.get_plug_commands(br_int):
+                txn.add(cmd)
 
     def unplug(self, bridge):
         """Unplug the trunk from bridge.
@@ -156,24 +165,20 @@ class SubPort(TrunkParentPort):
         super(SubPort, self).__init__(trunk_id, port_id, port_mac)
         self.segmentation_id = segmentation_id
 
-    def plug(self, br_int):
-        """Unplug patch ports between trunk bridge and given bridge.
+    def get_plug_commands(self, br_int):
+        """Return the OVSDB commands plugging the patch ports.
 
-        The method unplugs one patch port on the given bridge side using
-        port MAC and ID as external IDs.  The other endpoint of patch port is
-        attached to the trunk bridge.  Then it sets vlan tag represented by
-        segmentation_id.  Everything is done in a single OVSDB transaction so
-        either all operations succeed or fail.
+        On top of the patch ports, the commands set the vlan tag represented
+        by segmentation_id.
 
         :param br_int: an integration bridge where peer endpoint of patch port
                        will be created.
         """
-        ovsdb = self.bridge.ovsdb
-        with ovsdb.transaction() as txn:
-            super(SubPort, self).plug(br_int)
-            txn.add(ovsdb.db_set(
-                "Port", self.patch_port_trunk_name,
-                ("tag", self.segmentation_id)))
+        commands = super(SubPort, self).get_plug_commands(br_int)
+        commands.append(self.bridge.ovsdb.db_set(
+            "Port", self.patch_port_trunk_name,
+            ("tag", self.segmentation_id)))
+        return commands
 
     def unplug(self, bridge):
         """Unplug the sub port from the bridge.
@@ -272,6 +277,34 @@ class TrunkManager(object):
         except RuntimeError as e:
             raise TrunkManagerError(error=e)
 
+    def add_sub_ports(self, trunk_id, sub_ports):
+        """Create several sub_ports in a single OVSDB transaction.
+
+        :param trunk_id: ID of the trunk.
+        :param sub_ports: list of (port_id, port_mac, segmentation_id) tuples.
+        :returns: a dict mapping the IDs of the subports that could not be
+                  created to the TrunkManagerError explaining why.
+        :raises:
+             TrunkBridgeNotFound: in case trunk bridge does not exist.
+        """
+        sub_ports = [SubPort(trunk_id, port_id, port_mac, segmentation_id)
+                     for port_id, port_mac, segmentation_id in sub_ports]
+        if not sub_ports:
+            return {}
+        bridge = sub_ports[0].bridge
+        try:
+            if not bridge.exists():
+                raise exc.TrunkBridgeNotFound(bridge=bridge.br_name)
+            with bridge.ovsdb_batch() as batch:
+                results = [
+                    (sub_port.port_id,
+                     batch.add(*sub_port.get_plug_commands(self.br_int)))
+                    for sub_port in sub_ports]
+        except RuntimeError as e:
+            raise TrunkManagerError(error=e)
+        return {port_id: TrunkManagerError(error=result.exception())
+                for port_id, result in results if result.exception()}
+
     def remove_sub_port(self, trunk_id, port_id):
         """Remove a sub_port.
 
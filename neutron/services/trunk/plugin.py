@@ -288,7 +288,6 @@ class TrunkPlugin(service_base.ServicePluginBase,
                 self._segmentation_types, subports, trunk['port_id'])
             subports = subports_validator.validate(
                 context, basic_validation=True)
-            added_subports = []
 
             rules.trunk_can_be_managed(context, trunk)
             original_trunk = copy.deepcopy(trunk)
@@ -306,16 +305,14 @@ class TrunkPlugin(service_base.ServicePluginBase,
             else:
                 trunk.update(status=constants.DOWN_STATUS)
 
-            for subport in subports:
-                obj = trunk_objects.SubPort(
-                               context=context,
-                               trunk_id=trunk_id,
-                               port_id=subport['port_id'],
-                               segmentation_type=subport['segmentation_type'],
-                               segmentation_id=subport['segmentation_id'])
-                obj.create()
-                trunk['sub_ports'].append(obj)
-                added_subports.append(obj)
+            added_subports = trunk_objects.SubPort.create_objects(
+                context,
+                [{'trunk_id': trunk_id,
+                  'port_id': subport['port_id'],
+                  'segmentation_type': subport['segmentation_type'],
+                  'segmentation_id': subport['segmentation_id']}
+                 for subport in subports])
+            trunk['sub_ports'].extend(added_subports)
             payload = callbacks.TrunkPayload(context, trunk_id,
                                              current_trunk=trunk,
                                              original_trunk=original_trunk,
@@ -355,8 +352,11 @@ class TrunkPlugin(service_base.ServicePluginBase,
                 if not subport_obj:
                     raise trunk_exc.SubPortNotFound(trunk_id=trunk_id,
                                                     port_id=subport['port_id'])
-                subport_obj.delete()
                 removed_subports.append(subport_obj)
+            if removed_subports:
+                trunk_objects.SubPort.delete_objects(
+                    context, trunk_id=trunk_id,
+                    port_id=[p.port_id for p in removed_subports])
 
             del trunk.sub_ports[:]
             trunk.sub_ports.extend(current_subports.values())
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import time
+
 import eventlet
 import fixtures
 import mock
@@ -20,6 +22,7 @@ import testscenarios
 
 from neutron_lib import constants as n_const
 from oslo_config import cfg
+from oslo_log import log as logging
 from oslo_serialization import jsonutils
 from oslo_utils import importutils
 from testtools.content import text_content
@@ -40,6 +43,8 @@ from neutron.tests.functional import base
 from neutron.tests import tools
 
 
+LOG = logging.getLogger(__name__)
+
 OVS_TRACE_FINAL_FLOW = 'Final flow'
 OVS_TRACE_DATAPATH_ACTIONS = 'Datapath actions'
 
@@ -450,3 +455,58 @@ class OVSFlowTestCase(OVSAgentTestBase):
         trace = self._run_trace(self.tun_br.br_name, test_packet)
         self.assertEqual(" unchanged", trace["Final flow"])
         self.assertIn("drop", trace["Datapath actions"])
+
+
+class DeferredFlowsBenchmarkTestCase(OVSAgentTestBase):
+    """Compare the time taken to install many flows on the tunnel bridge,
+    one by one and through deferred(), that is a single ovs-ofctl call with
+    the "ovs-ofctl" interface and a single barrier with the "native" one.
+    """
+
+    FLOWS = 1000
+
+    def setUp(self):
+        super(DeferredFlowsBenchmarkTestCase, self).setUp()
+        self.tun_br = self.useFixture(net_helpers.OVSBridgeFixture()).bridge
+        self.br_tun = self.br_tun_cls(self.tun_br.br_name)
+        self.br_tun.set_secure_mode()
+        self.br_tun.setup_controllers(cfg.CONF)
+        self.flows = 0
+
+    def _install_unicast_flows(self, br, vlan):
+        for i in range(self.FLOWS):
+            br.install_unicast_to_tun(vlan, 1000 + vlan, 1,
+                                      'fa:16:3e:%02x:%02x:%02x' % (
+                                          vlan, i // 256, i % 256))
+
+    def _assert_flows_installed(self):
+        self.flows += self.FLOWS
+        flows = self.br_tun.dump_flows_for_table(constants.UCAST_TO_TUN)
+        self.assertEqual(self.flows, len(flows.splitlines()))
+
+    def _benchmark(self, description, func, *args, **kwargs):
+        start = time.time()
+        func(*args, **kwargs)
+        duration = time.time() - start
+        LOG.info("Installed %(flows)d flows %(description)s with the "
+                 "%(main_module)s interface in %(duration).3f seconds",
+                 {'flows': self.FLOWS, 'description': description,
+                  'main_module': self.main_module, 'duration': duration})
+        self._assert_flows_installed()
+
+    def _install_deferred(self, vlan, **kwargs):
+        with self.br_tun.deferred(**kwargs) as deferred_br:
+            self._install_unicast_flows(deferred_br, vlan)
+
+    def test_install_flows(self):
+        self._benchmark("one by one", self._install_unicast_flows,
+                        self.br_tun, 1)
+        self._benchmark("deferred", self._install_deferred, 2)
+
+    @helpers.skip_if_ovs_older_than("2.6.0")
+    def test_install_flows_bundle(self):
+        if 'native' not in self.main_module:
+            self.skipTest("Bundles are only supported by the native "
+                          "interface")
+        self._benchmark("in a bundle", self._install_deferred, 1,
+                        bundle=True)
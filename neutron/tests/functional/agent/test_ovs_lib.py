@@ -14,10 +14,13 @@
 #    under the License.
 
 import collections
+import time
 import uuid
 
 import mock
 from neutron_lib import constants as const
+from oslo_log import log as logging
+import testtools
 
 from neutron.agent.common import ovs_lib
 from neutron.agent.linux import ip_lib
@@ -27,6 +30,8 @@ from neutron.tests.common.exclusive_resources import port
 from neutron.tests.common import net_helpers
 from neutron.tests.functional.agent.linux import base
 
+LOG = logging.getLogger(__name__)
+
 
 class OVSBridgeTestBase(base.BaseOVSLinuxTestCase):
     # TODO(twilson) So far, only ovsdb-related tests are written. It would be
@@ -99,6 +104,58 @@ class OVSBridgeTestCase(OVSBridgeTestBase):
         self.assertEqual([], self.ovs.db_get_val('Port', port_name, 'tag'))
         self.assertEqual([], self.br.get_port_tag_dict()[port_name])
 
+    def test_ovsdb_batch(self):
+        port_names = [self.create_ovs_port()[0] for i in range(3)]
+        self.ovs.set_db_attribute('Port', port_names[2], 'tag', 3)
+        with self.br.ovsdb_batch() as batch:
+            set_tags = [batch.set_db_attribute('Port', port_name, 'tag', 42)
+                        for port_name in port_names[:2]]
+            clear_tag = batch.clear_db_attribute('Port', port_names[2], 'tag')
+            get_tag = batch.db_get_val('Port', port_names[2], 'tag')
+            ports = batch.get_ports_attributes(
+                'Port', columns=['name', 'tag'], ports=port_names)
+        for result in set_tags + [clear_tag]:
+            self.assertIsNone(result.exception())
+        self.assertEqual([], get_tag.result())
+        self.assertEqual(
+            {port_names[0]: 42, port_names[1]: 42, port_names[2]: []},
+            {p['name']: p['tag'] for p in ports.result()})
+
+    def test_ovsdb_batch_failure(self):
+        port_name = self.create_ovs_port()[0]
+        with self.br.ovsdb_batch(log_errors=False) as batch:
+            missing = batch.db_get_val('Port', 'missing-port', 'tag')
+            set_tag = batch.set_db_attribute('Port', port_name, 'tag', 42)
+        # the failure of one operation does not prevent the others
+        self.assertIsNotNone(missing.exception())
+        self.assertIsNone(set_tag.exception())
+        self.assertEqual(42, self.br.db_get_val('Port', port_name, 'tag'))
+        with testtools.ExpectedException(RuntimeError):
+            with self.br.ovsdb_batch(check_error=True,
+                                     log_errors=False) as batch:
+                batch.db_get_val('Port', 'missing-port', 'tag')
+                batch.set_db_attribute('Port', port_name, 'tag', 43)
+
+    def test_ovsdb_batch_benchmark(self):
+        port_names = [self.create_ovs_port()[0] for i in range(50)]
+        start = time.time()
+        for port_name in port_names:
+            self.br.set_db_attribute('Port', port_name, 'tag', 1)
+        duration = time.time() - start
+        start = time.time()
+        with self.br.ovsdb_batch() as batch:
+            for port_name in port_names:
+                batch.set_db_attribute('Port', port_name, 'tag', 2)
+        batch_duration = time.time() - start
+        LOG.info("Tagged %(ports)d ports with the %(interface)s OVSDB "
+                 "interface in %(duration).3f seconds one by one and in "
+                 "%(batch_duration).3f seconds in a batch",
+                 {'ports': len(port_names),
+                  'interface': self.ovsdb_interface, 'duration': duration,
+                  'batch_duration': batch_duration})
+        self.assertEqual(dict.fromkeys(port_names, 2),
+                         self.br.get_port_tag_dict())
+
     def test_attribute_map_handling(self):
         (pname, ofport) = self.create_ovs_port()
         expected = {'a': 'b'}
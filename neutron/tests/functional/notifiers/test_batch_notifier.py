@@ -0,0 +1,108 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+import eventlet
+from keystoneauth1 import exceptions as ks_exceptions
+from neutron_lib import constants as n_const
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import uuidutils
+
+from neutron.common import utils
+from neutron.notifiers import nova
+from neutron.tests import base
+
+LOG = logging.getLogger(__name__)
+
+PORTS = 200
+STATUS_CHANGES = 5
+
+
+class FakeNovaEndpoint(object):
+    """server_external_events API answering after a fixed latency."""
+
+    def __init__(self, latency, unreachable_calls=0):
+        self.latency = latency
+        self.unreachable_calls = unreachable_calls
+        self.calls = 0
+        self.received = []
+
+    def create(self, events):
+        self.calls += 1
+        eventlet.sleep(self.latency)
+        if self.calls <= self.unreachable_calls:
+            raise ks_exceptions.ConnectFailure()
+        self.received.extend(events)
+        return [dict(event, code=200) for event in events]
+
+
+class NovaNotifierBenchmarkTestCase(base.BaseTestCase):
+    """Deliver a burst of port status changes to a fake nova endpoint."""
+
+    def setUp(self):
+        super(NovaNotifierBenchmarkTestCase, self).setUp()
+        cfg.CONF.set_override('send_events_interval', 0)
+        self.notifier = nova.Notifier()
+        self.notifier.batch_notifier.batch_interval = 0.01
+        self.ports = [(uuidutils.generate_uuid(), uuidutils.generate_uuid())
+                      for i in range(PORTS)]
+
+    def _flood(self, endpoint):
+        self.notifier.nclient.server_external_events = endpoint
+        start = time.time()
+        for i in range(STATUS_CHANGES):
+            status = (n_const.PORT_STATUS_ACTIVE if i % 2 == 0 else
+                      n_const.PORT_STATUS_ERROR)
+            for server_uuid, port_id in self.ports:
+                self.notifier.batch_notifier.queue_event(
+                    {'server_uuid': server_uuid, 'tag': port_id,
+                     'name': nova.VIF_PLUGGED,
+                     'status': nova.NEUTRON_NOVA_EVENT_STATUS_MAP[status]})
+            eventlet.sleep(0)
+        utils.wait_until_true(
+            lambda: not self.notifier.batch_notifier.pending_events,
+            timeout=30)
+        duration = time.time() - start
+        LOG.info("Delivered %(events)d events queued for %(ports)d ports in "
+                 "%(calls)d calls and %(duration).2f seconds",
+                 {'events': len(endpoint.received), 'ports': PORTS,
+                  'calls': endpoint.calls, 'duration': duration})
+        return duration
+
+    def _assert_latest_events_delivered(self, endpoint):
+        latest = {}
+        for event in endpoint.received:
+            latest[event['tag']] = event['status']
+        self.assertEqual(PORTS, len(latest))
+        self.assertEqual({'completed'}, set(latest.values()))
+        # status changes of a port queued while a batch is being sent are
+        # coalesced, so far less events than queued reach nova
+        self.assertLess(len(endpoint.received), PORTS * STATUS_CHANGES)
+
+    def test_burst_with_fast_nova(self):
+        endpoint = FakeNovaEndpoint(latency=0.001)
+        self._flood(endpoint)
+        self._assert_latest_events_delivered(endpoint)
+
+    def test_burst_with_slow_nova(self):
+        endpoint = FakeNovaEndpoint(latency=0.05)
+        self._flood(endpoint)
+        self._assert_latest_events_delivered(endpoint)
+        self.assertLess(self.notifier.batch_notifier.batch_size,
+                        cfg.CONF.send_events_max_batch_size)
+
+    def test_burst_with_nova_unreachable(self):
+        endpoint = FakeNovaEndpoint(latency=0.001, unreachable_calls=2)
+        self._flood(endpoint)
+        self._assert_latest_events_delivered(endpoint)
@@ -0,0 +1,104 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+import mock
+from neutron_lib.api.definitions import portbindings
+from neutron_lib import constants
+from neutron_lib import context
+from neutron_lib.utils import net
+from oslo_log import log as logging
+from oslo_utils import uuidutils
+
+from neutron.db import api as db_api
+from neutron.db import models_v2
+from neutron.objects import network as network_obj
+from neutron.plugins.ml2.drivers.l2pop import db as l2pop_db
+from neutron.plugins.ml2.drivers.l2pop import mech_driver
+from neutron.plugins.ml2 import models
+from neutron.tests.common import helpers
+from neutron.tests.unit import testlib_api
+
+LOG = logging.getLogger(__name__)
+
+HOSTS = 200
+PORTS_PER_HOST = 5
+
+
+class FirstPortOnHostBenchmarkTestCase(testlib_api.SqlTestCase):
+    """Build the FDB entries sent to the first port of a network on a host.
+
+    The network has active ports on many hosts, the new host has to be sent
+    a flooding entry and the ports of each of them.
+    """
+
+    def setUp(self):
+        super(FirstPortOnHostBenchmarkTestCase, self).setUp()
+        self.setup_coreplugin('ml2')
+        self.ctx = context.get_admin_context()
+        self.network_id = uuidutils.generate_uuid()
+        self.subnet_id = uuidutils.generate_uuid()
+        network_obj.Network(self.ctx, id=self.network_id).create()
+        with self.ctx.session.begin(subtransactions=True):
+            self.ctx.session.add(models_v2.Subnet(
+                id=self.subnet_id, network_id=self.network_id,
+                ip_version=4, cidr='10.0.0.0/16'))
+        for i in range(HOSTS):
+            host = 'host-%d' % i
+            helpers.register_ovs_agent(
+                host, tunneling_ip='20.0.%d.%d' % (i // 250, i % 250 + 1))
+            for j in range(PORTS_PER_HOST):
+                self._create_port(host, '10.0.%d.%d' % (i, j + 1))
+        self.agent = helpers.register_ovs_agent('new-host',
+                                                tunneling_ip='20.1.0.1')
+        self.driver = mech_driver.L2populationMechanismDriver()
+
+    def _create_port(self, host, ip_address):
+        port_id = uuidutils.generate_uuid()
+        with self.ctx.session.begin(subtransactions=True):
+            self.ctx.session.add(models_v2.Port(
+                id=port_id, network_id=self.network_id,
+                mac_address=net.get_random_mac(
+                    'fa:16:3e:00:00:00'.split(':')),
+                admin_state_up=True, status=constants.PORT_STATUS_ACTIVE,
+                device_id='',
+                device_owner=constants.DEVICE_OWNER_COMPUTE_PREFIX))
+            self.ctx.session.add(models_v2.IPAllocation(
+                port_id=port_id, ip_address=ip_address,
+                subnet_id=self.subnet_id, network_id=self.network_id))
+            self.ctx.session.add(models.PortBinding(
+                port_id=port_id, host=host,
+                vif_type=portbindings.VIF_TYPE_OVS,
+                vnic_type=portbindings.VNIC_NORMAL))
+
+    def test_create_agent_fdb(self):
+        segment = {'segmentation_id': 1, 'network_type': 'vxlan'}
+        session = db_api.get_reader_session()
+        with mock.patch.object(l2pop_db, 'get_agent_ip',
+                               wraps=l2pop_db.get_agent_ip) as get_agent_ip:
+            start = time.time()
+            fdb_entries = self.driver._create_agent_fdb(
+                session, self.agent, segment, self.network_id)
+            duration = time.time() - start
+        ports = fdb_entries[self.network_id]['ports']
+        LOG.info("Built the FDB entries of %(hosts)d hosts having "
+                 "%(ports)d ports each in %(duration).3f seconds, parsing "
+                 "the agent configurations %(parses)d times",
+                 {'hosts': HOSTS, 'ports': PORTS_PER_HOST,
+                  'duration': duration, 'parses': get_agent_ip.call_count})
+        self.assertEqual(HOSTS, len(ports))
+        self.assertEqual(
+            {PORTS_PER_HOST + 1},
+            set(len(entries) for entries in ports.values()))
+        # the configurations of the agents are not parsed for each port
+        self.assertLessEqual(get_agent_ip.call_count, 2 * HOSTS)
@@ -13,11 +13,13 @@
 #    under the License.
 
 import collections
+import contextlib
 
 import mock
 from neutron_lib import exceptions
 from oslo_serialization import jsonutils
 from oslo_utils import uuidutils
+from ovsdbapp import exceptions as ovsdb_exc
 import tenacity
 import testtools
 
@@ -887,6 +889,54 @@ class OVS_Lib_Test(base.BaseTestCase):
             self.assertRaises(tenacity.RetryError,
                               self.br._get_port_val, '1', 'ofport')
 
+    def test_get_ports_ofport_retry(self):
+        with mock.patch.object(
+                self.br, 'get_ports_attributes',
+                side_effect=[[{'name': 'tap1', 'ofport': 1},
+                              {'name': 'tap2', 'ofport': []}],
+                             [{'name': 'tap2', 'ofport': []}],
+                             [{'name': 'tap2', 'ofport': 2}]]) as get_attrs:
+            self.assertEqual({'tap1': 1, 'tap2': 2},
+                             self.br.get_ports_ofport(['tap1', 'tap2']))
+            # only the ports still waiting for an ofport are queried again
+            get_attrs.assert_called_with(
+                'Interface', columns=['name', 'ofport'], ports=['tap2'],
+                if_exists=True)
+            self.assertEqual(3, get_attrs.call_count)
+
+    def test_get_ports_ofport_retry_fails(self):
+        # reduce timeout for faster execution
+        self.br.vsctl_timeout = 1
+        with mock.patch.object(
+                self.br, 'get_ports_attributes',
+                return_value=[{'name': 'tap2', 'ofport': []}]),\
+                mock.patch.object(ovs_lib.LOG, 'exception') as log_exc:
+            self.assertEqual({'tap1': ovs_lib.INVALID_OFPORT,
+                              'tap2': ovs_lib.INVALID_OFPORT},
+                             self.br.get_ports_ofport(['tap1', 'tap2']))
+            self.assertTrue(log_exc.called)
+
+    def test_add_tunnel_ports(self):
+        tunnel_ports = collections.OrderedDict([('vxlan-1', '9.9.9.9'),
+                                                ('vxlan-2', '9.9.9.8')])
+        with mock.patch.object(self.br, 'ovsdb') as ovsdb:
+            self.br.add_tunnel_ports(tunnel_ports, '1.1.1.1',
+                                     constants.TYPE_VXLAN)
+        # a single transaction for all the ports
+        ovsdb.transaction.assert_called_once_with()
+        ovsdb.add_port.assert_has_calls([
+            mock.call(self.BR_NAME, 'vxlan-1'),
+            mock.call(self.BR_NAME, 'vxlan-2')])
+        for port_name, remote_ip in tunnel_ports.items():
+            ovsdb.db_set.assert_any_call(
+                'Interface', port_name, ('type', constants.TYPE_VXLAN),
+                ('options', collections.OrderedDict([
+                    ('df_default', 'true'), ('remote_ip', remote_ip),
+                    ('local_ip', '1.1.1.1'), ('in_key', 'flow'),
+                    ('out_key', 'flow')])))
+        txn = ovsdb.transaction().__enter__()
+        self.assertEqual(4, txn.add.call_count)
+
     def test_get_port_external_ids_retry(self):
         external_ids = [["iface-id", "tap99id"],
                         ["iface-status", "active"],
@@ -1042,3 +1092,121 @@ class TestDeferredOVSBridge(base.BaseTestCase):
                 deferred_br.add_flow(actions='drop')
                 deferred_br.mod_flow(actions='drop')
             f.assert_has_calls(expected_calls)
+
+
+class TestOVSDBBatch(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestOVSDBBatch, self).setUp()
+        self.ovs = mock.Mock()
+        self.ovs.ovsdb.transaction.side_effect = self._transaction
+        self.transactions = []
+        self.failing_commands = []
+        self.results = {}
+
+        def command(*args, **kwargs):
+            return mock.Mock(result=self.results.get(args))
+
+        for method in ('db_set', 'db_clear', 'db_get', 'db_list'):
+            getattr(self.ovs.ovsdb, method).side_effect = command
+
+    @contextlib.contextmanager
+    def _transaction(self, check_error=False, log_errors=True):
+        commands = []
+        yield mock.Mock(add=commands.append)
+        self.transactions.append(commands)
+        for cmd in commands:
+            if cmd in self.failing_commands:
+                if check_error:
+                    raise RuntimeError('failing command')
+                return
+
+    def test_execute_on_exit(self):
+        self.results[('Port', 'tap1', 'tag')] = 1
+        self.results[('Port', ('tap1', 'tap2'))] = [{'name': 'tap1'},
+                                                    {'name': 'tap2'}]
+        with ovs_lib.OVSDBBatch(self.ovs) as batch:
+            set_tag = batch.set_db_attribute('Port', 'tap2', 'tag', 2)
+            get_tag = batch.db_get_val('Port', 'tap1', 'tag')
+            clear = batch.clear_db_attribute('Port', 'tap3', 'tag')
+            ports = batch.get_ports_attributes(
+                'Port', columns=['name'], ports=('tap1', 'tap2'))
+            self.assertFalse(self.ovs.ovsdb.transaction.called)
+            self.assertFalse(get_tag.done())
+            self.assertRaises(RuntimeError, get_tag.result)
+
+        # a single transaction
+        self.assertEqual(1, len(self.transactions))
+        self.assertEqual(4, len(self.transactions[0]))
+        self.ovs.ovsdb.db_set.assert_called_once_with(
+            'Port', 'tap2', ('tag', 2))
+        self.ovs.ovsdb.db_clear.assert_called_once_with('Port', 'tap3', 'tag')
+        self.ovs.ovsdb.db_list.assert_called_once_with(
+            'Port', ('tap1', 'tap2'), columns=['name'], if_exists=False)
+        self.assertTrue(set_tag.done())
+        self.assertIsNone(set_tag.exception())
+        self.assertIsNone(clear.result())
+        self.assertEqual(1, get_tag.result())
+        self.assertEqual([{'name': 'tap1'}, {'name': 'tap2'}],
+                         ports.result())
+
+    def test_not_executed_on_error(self):
+        with testtools.ExpectedException(ValueError):
+            with ovs_lib.OVSDBBatch(self.ovs) as batch:
+                batch.set_db_attribute('Port', 'tap1', 'tag', 1)
+                raise ValueError()
+        self.assertFalse(self.ovs.ovsdb.transaction.called)
+
+    def test_add_several_commands(self):
+        cmd1, cmd2 = mock.Mock(result=1), mock.Mock(result=2)
+        with ovs_lib.OVSDBBatch(self.ovs) as batch:
+            result = batch.add(cmd1, cmd2)
+        self.assertEqual([[cmd1, cmd2]], self.transactions)
+        self.assertEqual([1, 2], result.result())
+
+    def test_get_ports_attributes_without_ports(self):
+        self.ovs.get_port_name_list.return_value = []
+        with ovs_lib.OVSDBBatch(self.ovs) as batch:
+            ports = batch.get_ports_attributes('Interface')
+        self.assertFalse(self.ovs.ovsdb.transaction.called)
+        self.assertEqual([], ports.result())
+
+    def _test_transaction_failure(self, check_error):
+        batch = ovs_lib.OVSDBBatch(self.ovs, check_error=check_error)
+        set_tag1 = batch.set_db_attribute('Port', 'tap1', 'tag', 1)
+        set_tag2 = batch.set_db_attribute('Port', 'tap2', 'tag', 2)
+        set_tag3 = batch.set_db_attribute('Port', 'tap3', 'tag', 3)
+        self.failing_commands.append(set_tag2.commands[0])
+        if check_error:
+            self.assertRaises(RuntimeError, batch.execute)
+        else:
+            batch.execute()
+        # the operations are executed again one by one
+        self.assertEqual(
+            [[set_tag1.commands[0], set_tag2.commands[0],
+              set_tag3.commands[0]],
+             set_tag1.commands, set_tag2.commands, set_tag3.commands],
+            self.transactions)
+        self.assertIsNone(set_tag1.exception())
+        self.assertIsInstance(set_tag2.exception(), RuntimeError)
+        self.assertRaises(RuntimeError, set_tag2.result)
+        self.assertIsNone(set_tag3.exception())
+
+    def test_transaction_failure(self):
+        self._test_transaction_failure(check_error=False)
+
+    def test_transaction_failure_check_error(self):
+        self._test_transaction_failure(check_error=True)
+
+    def test_transaction_timeout(self):
+        self.ovs.ovsdb.transaction.side_effect = (
+            ovsdb_exc.TimeoutException(commands=[], timeout=1))
+        with ovs_lib.OVSDBBatch(self.ovs) as batch:
+            set_tag1 = batch.set_db_attribute('Port', 'tap1', 'tag', 1)
+            set_tag2 = batch.set_db_attribute('Port', 'tap2', 'tag', 2)
+        # the operations are not executed one by one
+        self.assertEqual(1, self.ovs.ovsdb.transaction.call_count)
+        self.assertIsInstance(set_tag1.exception(),
+                              ovsdb_exc.TimeoutException)
+        self.assertIsInstance(set_tag2.exception(),
+                              ovsdb_exc.TimeoutException)
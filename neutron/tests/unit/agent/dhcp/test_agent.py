@@ -1122,6 +1122,68 @@ class TestDhcpAgentEventHandler(base.BaseTestCase):
         self.call_driver.assert_has_calls(
             [mock.call.call_driver('disable', fake_network)])
 
+    def _get_other_port(self):
+        port = dhcp.DictModel(copy.deepcopy(fake_port2))
+        port['id'] = '12345678-1234-aaaa-123456789001'
+        return port
+
+    def test_ports_update_end(self):
+        other_port = self._get_other_port()
+        self.cache.get_network_by_id.return_value = fake_network
+        self.cache.get_port_by_id.return_value = fake_port2
+        self.dhcp.ports_update_end(None, {'ports': [other_port, fake_port2]})
+        self.cache.get_network_by_id.assert_called_once_with(fake_network.id)
+        self.cache.put_port.assert_has_calls(
+            [mock.call(other_port), mock.call(fake_port2)])
+        self.call_driver.assert_called_once_with('reload_allocations',
+                                                 fake_network)
+        self.assertEqual({other_port.id, fake_port2.id},
+                         self.dhcp.dhcp_ready_ports)
+
+    def test_ports_update_end_change_ip_on_dhcp_agents_port(self):
+        self.cache.get_network_by_id.return_value = fake_network
+        self.cache.get_port_by_id.return_value = fake_port1
+        agent_port = copy.deepcopy(fake_port1)
+        agent_port['device_id'] = utils.get_dhcp_agent_device_id(
+            agent_port['network_id'], self.dhcp.conf.host)
+        agent_port['fixed_ips'][0]['ip_address'] = '172.9.9.99'
+        self.dhcp.ports_update_end(None, {'ports': [fake_port2, agent_port]})
+        self.call_driver.assert_called_once_with('restart', fake_network)
+
+    def test_ports_update_end_unknown_network(self):
+        self.cache.get_network_by_id.return_value = None
+        self.dhcp.ports_update_end(None, {'ports': [fake_port1]})
+        self.assertFalse(self.cache.put_port.called)
+        self.assertFalse(self.call_driver.called)
+
+    def test_ports_delete_end(self):
+        other_port = self._get_other_port()
+        self.cache.get_network_by_id.return_value = fake_network
+        self.cache.get_port_by_id.side_effect = lambda port_id: {
+            other_port.id: other_port, fake_port2.id: fake_port2}.get(port_id)
+        self.dhcp.ports_delete_end(
+            None, {'port_ids': [other_port.id, fake_port2.id, 'unknown']})
+        self.cache.deleted_ports.add.assert_has_calls(
+            [mock.call(other_port.id), mock.call(fake_port2.id),
+             mock.call('unknown')])
+        self.cache.remove_port.assert_has_calls(
+            [mock.call(other_port), mock.call(fake_port2)])
+        self.call_driver.assert_called_once_with('reload_allocations',
+                                                 fake_network)
+
+    def test_ports_delete_end_agents_port(self):
+        agent_port = dhcp.DictModel(copy.deepcopy(fake_port1))
+        agent_port['device_id'] = utils.get_dhcp_agent_device_id(
+            agent_port.network_id, self.dhcp.conf.host)
+        self.cache.get_network_by_id.return_value = fake_network
+        self.cache.get_port_by_id.side_effect = lambda port_id: {
+            agent_port.id: agent_port, fake_port2.id: fake_port2}.get(port_id)
+        self.dhcp.ports_delete_end(
+            None, {'port_ids': [fake_port2.id, agent_port.id]})
+        self.call_driver.assert_called_once_with('disable', fake_network)
+        self.schedule_resync.assert_called_once_with(mock.ANY,
+                                                     fake_network.id)
+
 
 class TestDhcpPluginApiProxy(base.BaseTestCase):
     def _test_dhcp_api(self, method, **kwargs):
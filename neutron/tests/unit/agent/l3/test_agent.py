@@ -34,6 +34,7 @@ from testtools import matchers
 from neutron.agent.l3 import agent as l3_agent
 from neutron.agent.l3 import dvr_edge_router as dvr_router
 from neutron.agent.l3 import dvr_snat_ns
+from neutron.agent.l3 import ha_router
 from neutron.agent.l3 import legacy_router
 from neutron.agent.l3 import link_local_allocator as lla
 from neutron.agent.l3 import namespace_manager
@@ -333,6 +334,35 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
             agent._report_state()
             self.assertFalse(agent.fullsync)
 
+    def test_report_state_keepalived_reloads(self):
+        with mock.patch.object(agent_rpc.PluginReportStateAPI,
+                               'report_state'):
+            agent = l3_agent.L3NATAgentWithStateReport(host=HOSTNAME,
+                                                       conf=self.conf)
+            router = l3_test_common.prepare_router_data()
+            ri = ha_router.HaRouter(mock.Mock(), agent, router['id'],
+                                    router, **self.ri_kwargs)
+            ri.keepalived_manager = mock.Mock(reload_count=2,
+                                              suppressed_reload_count=5)
+            agent.router_info[router['id']] = ri
+            agent._report_state()
+            configurations = agent.agent_state['configurations']
+            self.assertEqual(2, configurations['keepalived_reloads'])
+            self.assertEqual(5,
+                             configurations['keepalived_suppressed_reloads'])
+
+    def test_report_state_router_queue_depth(self):
+        with mock.patch.object(agent_rpc.PluginReportStateAPI,
+                               'report_state'):
+            agent = l3_agent.L3NATAgentWithStateReport(host=HOSTNAME,
+                                                       conf=self.conf)
+            update = router_processing_queue.RouterUpdate(
+                _uuid(), router_processing_queue.PRIORITY_RPC)
+            agent._queue.add(update)
+            agent._report_state()
+            self.assertEqual(
+                1, agent.agent_state['configurations']['router_queue_depth'])
+
     def test_periodic_sync_routers_task_call_clean_stale_namespaces(self):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
         self.plugin_api.get_routers.return_value = []
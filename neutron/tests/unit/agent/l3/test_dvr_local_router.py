@@ -493,8 +493,9 @@ class TestDvrRouterOperations(base.BaseTestCase):
                                '_process_arp_cache_for_internal_port') as parp:
             ri._set_subnet_arp_info(subnet_id)
         self.assertEqual(1, parp.call_count)
-        self.mock_ip_dev.neigh.add.assert_called_once_with(
-            '1.2.3.4', '00:11:22:33:44:55')
+        self.mock_ip_dev.neigh.add_entries.assert_called_once_with(
+            [('1.2.3.4', '00:11:22:33:44:55')])
+        self.assertFalse(self.mock_ip_dev.neigh.add.called)
 
         # Test negative case
         router['distributed'] = False
@@ -573,6 +574,38 @@ class TestDvrRouterOperations(base.BaseTestCase):
         ri._process_arp_cache_for_internal_port(subnet_id)
         self.assertEqual(0, len(ri._pending_arp_set))
 
+    def test__update_arp_entries_calls_arp_cache_with_no_device(self):
+        ri, subnet_id = self._setup_test_for_arp_entry_cache()
+        entries = [('1.7.23.11', '00:11:22:33:44:55'),
+                   ('1.7.23.12', '00:11:22:33:44:56')]
+        with mock.patch.object(l3_agent.ip_lib, 'IPDevice') as rtrdev:
+            rtrdev.return_value.exists.return_value = False
+            state = ri._update_arp_entries(entries, subnet_id)
+        self.assertFalse(state)
+        self.assertFalse(rtrdev.return_value.neigh.add_entries.called)
+        self.assertEqual(
+            set(dvr_router.Arp_entry(ip=ip, mac=mac, subnet_id=subnet_id,
+                                     operation='add')
+                for ip, mac in entries),
+            ri._pending_arp_set)
+
+    def test__process_arp_cache_for_internal_port_bulk(self):
+        ri, subnet_id = self._setup_test_for_arp_entry_cache()
+        ri._cache_arp_entry('1.7.23.11', '00:11:22:33:44:55',
+                            subnet_id, 'add')
+        ri._cache_arp_entry('1.7.23.12', '00:11:22:33:44:56',
+                            subnet_id, 'add')
+        ri._cache_arp_entry('1.7.23.13', '00:11:22:33:44:57',
+                            'other_subnet_id', 'add')
+        ri._process_arp_cache_for_internal_port(subnet_id)
+        entries = self.mock_ip_dev.neigh.add_entries.call_args[0][0]
+        self.assertEqual(
+            [('1.7.23.11', '00:11:22:33:44:55'),
+             ('1.7.23.12', '00:11:22:33:44:56')], sorted(entries))
+        self.assertEqual(1, self.mock_ip_dev.neigh.add_entries.call_count)
+        self.assertFalse(self.mock_ip_dev.neigh.add.called)
+        self.assertEqual(1, len(ri._pending_arp_set))
+
     def test__delete_arp_cache_for_internal_port(self):
         ri, subnet_id = self._setup_test_for_arp_entry_cache()
         ri._cache_arp_entry('1.7.23.11', '00:11:22:33:44:55',
@@ -0,0 +1,103 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+
+from neutron_lib import constants as lib_constants
+
+from neutron.agent.l3 import router_diff
+from neutron.tests import base
+
+
+def _router(**kwargs):
+    router = {'id': 'router-id',
+              'gw_port': {'id': 'gw', 'fixed_ips': []},
+              'routes': [],
+              lib_constants.INTERFACE_KEY: [
+                  {'id': 'p1', 'fixed_ips': [{'ip_address': '10.0.0.1'}]},
+                  {'id': 'p2', 'fixed_ips': [{'ip_address': '10.0.1.1'}]}],
+              lib_constants.FLOATINGIP_KEY: [
+                  {'id': 'f1', 'floating_ip_address': '172.24.4.10',
+                   'fixed_ip_address': '10.0.0.10'}]}
+    router.update(kwargs)
+    return router
+
+
+class TestRouterDiff(base.BaseTestCase):
+
+    def test_no_changes(self):
+        router = _router()
+        diff = router_diff.RouterDiff(router, copy.deepcopy(router))
+        self.assertTrue(diff.is_empty)
+        self.assertFalse(diff.requires_full_processing)
+
+    def test_floating_ip_changes(self):
+        old = _router()
+        new = copy.deepcopy(old)
+        new[lib_constants.FLOATINGIP_KEY][0]['fixed_ip_address'] = '10.0.0.11'
+        new[lib_constants.FLOATINGIP_KEY].append(
+            {'id': 'f2', 'floating_ip_address': '172.24.4.11',
+             'fixed_ip_address': '10.0.0.12'})
+        diff = router_diff.RouterDiff(old, new)
+        self.assertEqual({'f2'}, diff.floating_ips_added)
+        self.assertEqual({'f1'}, diff.floating_ips_updated)
+        self.assertEqual(set(), diff.floating_ips_removed)
+        self.assertTrue(diff.floating_ips_changed)
+        self.assertFalse(diff.requires_full_processing)
+        self.assertFalse(diff.is_empty)
+
+    def test_floating_ips_removed(self):
+        old = _router()
+        new = _router(**{lib_constants.FLOATINGIP_KEY: []})
+        diff = router_diff.RouterDiff(old, new)
+        self.assertEqual({'f1'}, diff.floating_ips_removed)
+        self.assertFalse(diff.requires_full_processing)
+
+    def test_internal_port_changes(self):
+        old = _router()
+        new = copy.deepcopy(old)
+        del new[lib_constants.INTERFACE_KEY][0]
+        new[lib_constants.INTERFACE_KEY][0]['fixed_ips'] = []
+        new[lib_constants.INTERFACE_KEY].append({'id': 'p3', 'fixed_ips': []})
+        diff = router_diff.RouterDiff(old, new)
+        self.assertEqual({'p3'}, diff.ports_added)
+        self.assertEqual({'p1'}, diff.ports_removed)
+        self.assertEqual({'p2'}, diff.ports_updated)
+        self.assertTrue(diff.requires_full_processing)
+
+    def test_gateway_changes(self):
+        old = _router()
+        diff = router_diff.RouterDiff(old, _router(gw_port=None))
+        self.assertTrue(diff.gateway_changed)
+        self.assertTrue(diff.requires_full_processing)
+
+    def test_enable_snat_default(self):
+        old = _router()
+        diff = router_diff.RouterDiff(old, _router(enable_snat=True))
+        self.assertTrue(diff.is_empty)
+        diff = router_diff.RouterDiff(old, _router(enable_snat=False))
+        self.assertTrue(diff.gateway_changed)
+
+    def test_routes_changed(self):
+        old = _router()
+        new = _router(routes=[{'destination': '8.8.8.0/24',
+                               'nexthop': '10.0.0.100'}])
+        diff = router_diff.RouterDiff(old, new)
+        self.assertTrue(diff.routes_changed)
+        self.assertFalse(diff.requires_full_processing)
+        self.assertFalse(diff.is_empty)
+
+    def test_untracked_key_changed(self):
+        old = _router()
+        diff = router_diff.RouterDiff(old, _router(distributed=True))
+        self.assertEqual({'distributed'}, diff.other_keys_changed)
+        self.assertTrue(diff.requires_full_processing)
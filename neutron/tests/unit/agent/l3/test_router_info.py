@@ -207,6 +207,84 @@ class TestRouterInfo(base.BaseTestCase):
             p_i_p.assert_called_once_with()
             p_e_o_d.assert_called_once_with()
 
+    def _prepare_router_for_process(self):
+        router = {'id': _uuid(),
+                  'gw_port': None,
+                  'routes': [],
+                  lib_constants.INTERFACE_KEY: [],
+                  lib_constants.FLOATINGIP_KEY: []}
+        ri = router_info.RouterInfo(mock.Mock(), router['id'], router,
+                                    **self.ri_kwargs)
+        for handler in ('_process_internal_ports', 'process_external',
+                        'process_address_scope', 'routes_updated',
+                        'process_floating_ip_address_scope_rules'):
+            setattr(ri, handler, mock.Mock())
+        return ri
+
+    def test_process_unchanged_router(self):
+        ri = self._prepare_router_for_process()
+        ri.process()
+        ri.process_external.assert_called_once_with()
+
+        ri.process()
+        ri._process_internal_ports.assert_called_once_with()
+        ri.process_external.assert_called_once_with()
+        ri.routes_updated.assert_called_once_with([], [])
+
+    def test_process_floating_ip_change_only(self):
+        ri = self._prepare_router_for_process()
+        ri.process()
+        ri.process_address_scope.reset_mock()
+        ri.process_external.reset_mock()
+        ri.routes_updated.reset_mock()
+
+        ri.router[lib_constants.FLOATINGIP_KEY].append(
+            {'id': _uuid(), 'floating_ip_address': '172.24.4.10',
+             'fixed_ip_address': '10.0.0.10'})
+        ri.process()
+        ri.process_floating_ip_address_scope_rules.assert_called_once_with()
+        ri.process_external.assert_called_once_with()
+        self.assertFalse(ri.process_address_scope.called)
+        self.assertFalse(ri.routes_updated.called)
+        ri._process_internal_ports.assert_called_once_with()
+        self.assertEqual({'172.24.4.10': '10.0.0.10'}, ri.fip_map)
+
+    def test_process_routes_change_only(self):
+        ri = self._prepare_router_for_process()
+        ri.process()
+        ri.process_external.reset_mock()
+        ri.routes_updated.reset_mock()
+
+        new_routes = [{'destination': '8.8.8.0/24', 'nexthop': '10.0.0.100'}]
+        ri.router['routes'] = new_routes
+        ri.process()
+        ri.routes_updated.assert_called_once_with([], new_routes)
+        self.assertEqual(new_routes, ri.routes)
+        self.assertFalse(ri.process_external.called)
+
+    def test_process_internal_port_change_processes_all(self):
+        ri = self._prepare_router_for_process()
+        ri.process()
+        ri.router[lib_constants.INTERFACE_KEY].append(
+            {'id': _uuid(), 'fixed_ips': [], 'admin_state_up': True})
+        ri.process()
+        self.assertEqual(2, ri._process_internal_ports.call_count)
+        self.assertEqual(2, ri.process_external.call_count)
+        self.assertEqual(2, ri.process_address_scope.call_count)
+
+    def test_process_failure_forces_full_processing(self):
+        ri = self._prepare_router_for_process()
+        ri.process()
+        ri.router['routes'] = [{'destination': '8.8.8.0/24',
+                                'nexthop': '10.0.0.100'}]
+        ri.routes_updated.side_effect = RuntimeError
+        self.assertRaises(RuntimeError, ri.process)
+        self.assertIsNone(ri._processed_router)
+
+        ri.routes_updated.side_effect = None
+        ri.process()
+        self.assertEqual(2, ri._process_internal_ports.call_count)
+
 
 class BasicRouterTestCaseFramework(base.BaseTestCase):
     def _create_router(self, router=None, **kwargs):
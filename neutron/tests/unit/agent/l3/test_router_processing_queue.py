@@ -101,3 +101,18 @@ class TestExclusiveRouterProcessor(base.BaseTestCase):
             raise Exception("Only the master should process a router")
 
         self.assertEqual(2, len([i for i in master.updates()]))
+
+
+
+class TestRouterProcessingQueue(base.BaseTestCase):
+
+    def test_get_queue_depth(self):
+        queue = l3_queue.RouterProcessingQueue()
+        router_id = _uuid()
+        for i in range(3):
+            queue.add(l3_queue.RouterUpdate(router_id, 0))
+        self.assertEqual(3, queue.get_queue_depth())
+
+        processed = [u for rp, u in queue.each_update_to_next_router()]
+        self.assertEqual(1, len(processed))
+        self.assertEqual(2, queue.get_queue_depth())
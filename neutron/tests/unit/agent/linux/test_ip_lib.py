@@ -1646,6 +1646,62 @@ class TestIpNeighCommand(TestIPCmdBase):
         with testtools.ExpectedException(expected_exception.__class__):
             self.neigh_cmd.add('192.168.45.100', 'cc:dd:ee:ff:ab:cd')
 
+    @mock.patch.object(pyroute2, 'NetNS')
+    def test_add_entries(self, mock_netns):
+        mock_netns_instance = mock_netns.return_value
+        mock_netns_enter = mock_netns_instance.__enter__.return_value
+        mock_netns_enter.link_lookup.return_value = [1]
+        permanent = ndmsg.states['permanent']
+        dump = {
+            2: [{'state': permanent,
+                 'attrs': [('NDA_DST', '192.168.45.100'),
+                           ('NDA_LLADDR', 'cc:dd:ee:ff:ab:cd')]},
+                {'state': permanent,
+                 'attrs': [('NDA_DST', '192.168.45.101'),
+                           ('NDA_LLADDR', 'cc:dd:ee:ff:ab:00')]},
+                {'state': ndmsg.states['reachable'],
+                 'attrs': [('NDA_DST', '192.168.45.102'),
+                           ('NDA_LLADDR', 'cc:dd:ee:ff:ab:cf')]}],
+            10: []}
+
+        def _neigh(command, **kwargs):
+            if command == 'dump':
+                return dump[kwargs['family']]
+
+        mock_netns_enter.neigh.side_effect = _neigh
+        written = self.neigh_cmd.add_entries(
+            [('192.168.45.100', 'CC:DD:EE:FF:AB:CD'),
+             ('192.168.45.101', 'cc:dd:ee:ff:ab:ce'),
+             ('192.168.45.102', 'cc:dd:ee:ff:ab:cf'),
+             ('2001:db8::1', 'cc:dd:ee:ff:ab:d0')])
+        self.assertEqual(3, written)
+        mock_netns_enter.link_lookup.assert_called_once_with(ifname='tap0')
+        replaced = [c for c in mock_netns_enter.neigh.call_args_list
+                    if c[0][0] == 'replace']
+        self.assertEqual(
+            [mock.call('replace', ifindex=1, dst='192.168.45.101',
+                       lladdr='cc:dd:ee:ff:ab:ce', family=2,
+                       state=permanent),
+             mock.call('replace', ifindex=1, dst='192.168.45.102',
+                       lladdr='cc:dd:ee:ff:ab:cf', family=2,
+                       state=permanent),
+             mock.call('replace', ifindex=1, dst='2001:db8::1',
+                       lladdr='cc:dd:ee:ff:ab:d0', family=10,
+                       state=permanent)],
+            replaced)
+
+    @mock.patch.object(pyroute2, 'NetNS')
+    def test_add_entries_empty(self, mock_netns):
+        self.assertEqual(0, self.neigh_cmd.add_entries([]))
+        self.assertFalse(mock_netns.called)
+
+    @mock.patch.object(pyroute2, 'NetNS')
+    def test_add_entries_nonexistent_namespace(self, mock_netns):
+        mock_netns.side_effect = OSError(errno.ENOENT, None)
+        with testtools.ExpectedException(ip_lib.NetworkNamespaceNotFound):
+            self.neigh_cmd.add_entries(
+                [('192.168.45.100', 'cc:dd:ee:ff:ab:cd')])
+
     @mock.patch.object(pyroute2, 'NetNS')
     def test_delete_entry(self, mock_netns):
         mock_netns_instance = mock_netns.return_value
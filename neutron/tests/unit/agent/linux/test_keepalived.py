@@ -351,6 +351,74 @@ vrrp_instance VR_1 {
         self.assertEqual(expected, '\n'.join(instance.build_config()))
 
 
+class KeepalivedManagerTestCase(base.BaseTestCase,
+                                KeepalivedConfBaseMixin):
+
+    def setUp(self):
+        super(KeepalivedManagerTestCase, self).setUp()
+        self.config = self._get_config()
+        self.manager = keepalived.KeepalivedManager(
+            'router1', self.config, mock.Mock(),
+            conf_path=self.get_new_temp_dir().path)
+        self.process = mock.Mock(active=False)
+        mock.patch.object(self.manager, 'get_process',
+                          return_value=self.process).start()
+        mock.patch.object(self.manager, '_get_vrrp_process').start()
+
+    def test_spawn(self):
+        self.manager.spawn()
+        self.process.enable.assert_called_once_with(reload_cfg=True)
+        self.assertEqual(self.config.get_config_str(),
+                         self.manager.get_conf_on_disk())
+        self.assertEqual(0, self.manager.reload_count)
+
+    def test_spawn_unchanged_config_not_reloaded(self):
+        self.manager.spawn()
+        self.process.active = True
+        self.manager.spawn()
+        self.process.enable.assert_called_once_with(reload_cfg=True)
+        self.assertEqual(1, self.manager.suppressed_reload_count)
+        self.assertEqual(0, self.manager.reload_count)
+
+    def test_spawn_changed_config_reloaded(self):
+        self.manager.spawn()
+        self.process.active = True
+        self.config.get_instance(1).add_vip('192.168.222.1/32', 'eth11', None)
+        self.manager.spawn()
+        self.assertEqual(2, self.process.enable.call_count)
+        self.assertEqual(1, self.manager.reload_count)
+        self.assertEqual(self.config.get_config_str(),
+                         self.manager.get_conf_on_disk())
+
+    def test_spawn_after_agent_restart_uses_config_on_disk(self):
+        self.manager.spawn()
+        self.process.active = True
+        self.process.enable.reset_mock()
+        self.process.default_cmd_callback = None
+        process_monitor = mock.Mock()
+        manager = keepalived.KeepalivedManager(
+            'router1', self._get_config(), process_monitor,
+            conf_path=self.manager.conf_path)
+        mock.patch.object(manager, 'get_process',
+                          return_value=self.process).start()
+        mock.patch.object(manager, '_get_vrrp_process').start()
+        manager.spawn()
+        self.assertFalse(self.process.enable.called)
+        self.assertEqual(1, manager.suppressed_reload_count)
+        # the running keepalived is monitored and can be respawned
+        self.assertIsNotNone(self.process.default_cmd_callback)
+        process_monitor.register.assert_called_once_with(
+            uuid='router1', service_name=keepalived.KEEPALIVED_SERVICE_NAME,
+            monitored_process=self.process)
+
+    def test_spawn_after_disable(self):
+        self.manager.spawn()
+        self.manager.disable()
+        self.process.active = False
+        self.manager.spawn()
+        self.assertEqual(2, self.process.enable.call_count)
+
+
 class KeepalivedVipAddressTestCase(base.BaseTestCase):
     def test_vip_with_scope(self):
         vip = keepalived.KeepalivedVipAddress('fe80::3e97:eff:fe26:3bfa/64',
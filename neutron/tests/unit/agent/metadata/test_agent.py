@@ -235,6 +235,33 @@ class _TestMetadataProxyHandlerCacheMixin(object):
     def test_get_ports_no_id(self):
         self.assertRaises(TypeError, self.handler._get_ports, 'remote_address')
 
+    def test_get_ports_port_index(self):
+        self.fake_conf_fixture.config(enable_port_index=True)
+        expected = ['port1']
+        networks = ('network1', 'network2')
+        with mock.patch.object(agent.port_index,
+                               'MetadataPortIndex') as index_cls,\
+                mock.patch.object(self.handler,
+                                  '_get_ports_for_remote_address'
+                                  ) as mock_get_ip_addr:
+            index = index_cls.return_value
+            index.get_router_networks.return_value = networks
+            index.get_ports.return_value = expected
+            ports = self.handler._get_ports('remote_address',
+                                            router_id='router-id')
+            self.assertEqual(expected, ports)
+            ports = self.handler._get_ports('remote_address',
+                                            network_id='network1')
+            self.assertEqual(expected, ports)
+            index_cls.assert_called_once_with()
+            index.start.assert_called_once_with()
+            index.get_router_networks.assert_called_once_with('router-id')
+            index.get_ports.assert_has_calls([
+                mock.call('remote_address', networks),
+                mock.call('remote_address', ('network1', ))])
+            self.assertFalse(mock_get_ip_addr.called)
+            self.assertFalse(self.handler.plugin_rpc.get_ports.called)
+
     def _get_instance_and_tenant_id_helper(self, headers, list_ports_retval,
                                            networks=None, router_id=None):
         remote_address = '192.168.1.1'
@@ -410,6 +437,18 @@ class _TestMetadataProxyHandlerCacheMixin(object):
         self.assertIsInstance(self._proxy_request_test_helper(500),
                               webob.exc.HTTPInternalServerError)
 
+    def test_proxy_request_reuses_http_client(self):
+        req = mock.Mock(path_info='/the_path', query_string='',
+                        headers={'X-Forwarded-For': '8.8.8.8'},
+                        method='GET', body='body')
+        with mock.patch('httplib2.Http') as mock_http:
+            resp = mock.MagicMock(status=200)
+            mock_http.return_value.request.return_value = (resp, 'content')
+            self.handler._proxy_request('the_id', 'tenant_id', req)
+            self.handler._proxy_request('the_id', 'tenant_id', req)
+        self.assertEqual(1, mock_http.call_count)
+        self.assertEqual(2, mock_http.return_value.request.call_count)
+
     def test_proxy_request_other_code(self):
         with testtools.ExpectedException(Exception):
             self._proxy_request_test_helper(302)
@@ -459,6 +498,7 @@ class TestUnixDomainMetadataProxy(base.BaseTestCase):
         self.cfg.CONF.metadata_proxy_socket = '/the/path'
         self.cfg.CONF.metadata_workers = 0
         self.cfg.CONF.metadata_backlog = 128
+        self.cfg.CONF.metadata_wsgi_pool_size = 2048
         self.cfg.CONF.metadata_proxy_socket_mode = meta_conf.USER_MODE
 
     @mock.patch.object(fileutils, 'ensure_tree')
@@ -505,7 +545,7 @@ class TestUnixDomainMetadataProxy(base.BaseTestCase):
 
         ensure_dir.assert_called_once_with('/the', mode=0o755)
         server.assert_has_calls([
-            mock.call('neutron-metadata-agent'),
+            mock.call('neutron-metadata-agent', num_threads=2048),
             mock.call().start(handler.return_value,
                               '/the/path', workers=0,
                               backlog=128, mode=0o644),
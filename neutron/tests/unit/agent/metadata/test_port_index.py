@@ -0,0 +1,125 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import netaddr
+from neutron_lib import constants as n_const
+from neutron_lib import context
+from oslo_utils import uuidutils
+
+from neutron.agent.metadata import port_index
+from neutron.agent import resource_cache
+from neutron.api.rpc.callbacks import resources
+from neutron.objects import ports
+from neutron.tests import base
+
+NET_1 = uuidutils.generate_uuid()
+NET_2 = uuidutils.generate_uuid()
+NET_3 = uuidutils.generate_uuid()
+ROUTER_1 = uuidutils.generate_uuid()
+INSTANCE = uuidutils.generate_uuid()
+
+
+def _port(network_id, ip_address, device_id=INSTANCE,
+          device_owner='compute:nova', revision_number=1, port_id=None):
+    port_id = port_id or uuidutils.generate_uuid()
+    return ports.Port(
+        id=port_id, network_id=network_id, project_id='project-id',
+        device_id=device_id, device_owner=device_owner,
+        revision_number=revision_number,
+        fixed_ips=[ports.IPAllocation(
+            port_id=port_id, network_id=network_id,
+            subnet_id=uuidutils.generate_uuid(),
+            ip_address=netaddr.IPAddress(ip_address))])
+
+
+class MetadataPortIndexTestCase(base.BaseTestCase):
+
+    def setUp(self):
+        super(MetadataPortIndexTestCase, self).setUp()
+        self.ctx = context.get_admin_context()
+        self.rcache = resource_cache.RemoteResourceCache([resources.PORT])
+        self.puller = mock.patch.object(self.rcache, '_puller').start()
+        self.puller.bulk_pull.return_value = []
+        self.index = port_index.MetadataPortIndex(self.rcache)
+
+    def test_get_ports_pulls_network_once(self):
+        port = _port(NET_1, '10.0.0.5')
+        self.puller.bulk_pull.return_value = [port]
+        expected = [{'id': port.id, 'network_id': NET_1,
+                     'device_id': INSTANCE,
+                     'device_owner': 'compute:nova',
+                     'tenant_id': 'project-id'}]
+        self.assertEqual(expected, self.index.get_ports('10.0.0.5',
+                                                        (NET_1, )))
+        self.assertEqual(expected, self.index.get_ports('10.0.0.5',
+                                                        (NET_1, )))
+        self.assertEqual([], self.index.get_ports('10.0.0.6', (NET_1, )))
+        self.puller.bulk_pull.assert_called_once_with(
+            mock.ANY, resources.PORT,
+            filter_kwargs={'network_id': (NET_1, )})
+
+    def test_get_ports_normalizes_address(self):
+        port = _port(NET_1, '2001:db8::5')
+        self.puller.bulk_pull.return_value = [port]
+        ports = self.index.get_ports('2001:0db8:0::5', (NET_1, ))
+        self.assertEqual([port.id], [p['id'] for p in ports])
+
+    def test_get_ports_after_push_notifications(self):
+        self.assertEqual([], self.index.get_ports('10.0.0.5', (NET_1, )))
+        port = _port(NET_1, '10.0.0.5')
+        self.rcache.record_resource_update(self.ctx, resources.PORT, port)
+        ports = self.index.get_ports('10.0.0.5', (NET_1, ))
+        self.assertEqual([port.id], [p['id'] for p in ports])
+
+        # the port moves to another address
+        updated = _port(NET_1, '10.0.0.6', port_id=port.id,
+                        revision_number=2)
+        self.rcache.record_resource_update(self.ctx, resources.PORT, updated)
+        self.assertEqual([], self.index.get_ports('10.0.0.5', (NET_1, )))
+        ports = self.index.get_ports('10.0.0.6', (NET_1, ))
+        self.assertEqual([port.id], [p['id'] for p in ports])
+
+        self.rcache.record_resource_delete(self.ctx, resources.PORT, port.id)
+        self.assertEqual([], self.index.get_ports('10.0.0.6', (NET_1, )))
+        self.assertEqual(1, self.puller.bulk_pull.call_count)
+
+    def test_get_router_networks(self):
+        self.puller.bulk_pull.return_value = [
+            _port(NET_1, '10.0.0.1', device_id=ROUTER_1,
+                  device_owner=n_const.DEVICE_OWNER_ROUTER_INTF),
+            _port(NET_2, '10.0.1.1', device_id=ROUTER_1,
+                  device_owner=n_const.DEVICE_OWNER_DVR_INTERFACE)]
+        self.assertEqual(
+            {NET_1, NET_2},
+            set(self.index.get_router_networks(ROUTER_1)))
+        self.assertEqual(
+            {NET_1, NET_2},
+            set(self.index.get_router_networks(ROUTER_1)))
+        self.assertEqual(1, self.puller.bulk_pull.call_count)
+
+        port = _port(NET_3, '10.0.2.1', device_id=ROUTER_1,
+                     device_owner=n_const.DEVICE_OWNER_ROUTER_INTF)
+        self.rcache.record_resource_update(self.ctx, resources.PORT, port)
+        self.assertEqual(
+            {NET_1, NET_2, NET_3},
+            set(self.index.get_router_networks(ROUTER_1)))
+        self.rcache.record_resource_delete(self.ctx, resources.PORT, port.id)
+        self.assertEqual(
+            {NET_1, NET_2},
+            set(self.index.get_router_networks(ROUTER_1)))
+
+    def test_ignores_notifications_from_other_caches(self):
+        other_cache = resource_cache.RemoteResourceCache([resources.PORT])
+        other_cache.record_resource_update(self.ctx, resources.PORT,
+                                           _port(NET_1, '10.0.0.5'))
+        self.assertEqual([], self.index.get_ports('10.0.0.5', (NET_1, )))
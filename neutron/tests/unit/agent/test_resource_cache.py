@@ -93,6 +93,61 @@ class RemoteResourceCacheTestCase(base.BaseTestCase):
                               self.rcache.match_resources_with_func('goose',
                                                                     has_large))
 
+    def test_get_resources_indexed(self):
+        self.rcache = resource_cache.RemoteResourceCache(
+            ['goose'], indexed_fields={'goose': ('size', 'tags')})
+        self._pullmock = mock.patch.object(self.rcache, '_puller').start()
+        geese = [OVOLikeThing(3, size='large', tags=['a', 'b']),
+                 OVOLikeThing(5, size='medium', tags=['b']),
+                 OVOLikeThing(4, size='large', tags=[]),
+                 OVOLikeThing(6, size='small', tags=['a'])]
+        for goose in geese:
+            self.rcache.record_resource_update(self.ctx, 'goose', goose)
+
+        def get_ids(filters):
+            return set(g.id for g in
+                       self.rcache.get_resources('goose', filters))
+
+        with mock.patch.object(self.rcache,
+                               'match_resources_with_func') as scan:
+            self.assertEqual({3, 4}, get_ids({'size': ('large', )}))
+            self.assertEqual({3, 6}, get_ids({'tags': ('a', )}))
+            self.assertEqual({3, 5, 6}, get_ids({'tags': ('a', 'b')}))
+            self.assertEqual({3}, get_ids({'size': ('large', ),
+                                           'tags': ('a', )}))
+            self.assertEqual(set(), get_ids({'size': ('huge', )}))
+            self.assertFalse(scan.called)
+
+        # the index follows updates and deletes
+        self.rcache.record_resource_update(
+            self.ctx, 'goose',
+            OVOLikeThing(3, size='small', tags=['b'], revision_number=11))
+        self.assertEqual({4}, get_ids({'size': ('large', )}))
+        self.assertEqual({3, 6}, get_ids({'size': ('small', )}))
+        self.assertEqual({6}, get_ids({'tags': ('a', )}))
+        self.rcache.record_resource_delete(self.ctx, 'goose', 6)
+        self.assertEqual({3}, get_ids({'size': ('small', )}))
+        self.assertEqual(set(), get_ids({'tags': ('a', )}))
+        self.assertNotIn('a', self.rcache._indexes['goose']['tags'])
+
+    def test_get_resources_indexed_after_flood(self):
+        self.rcache = resource_cache.RemoteResourceCache(
+            ['goose'], indexed_fields={'goose': ('size', )})
+        self._pullmock = mock.patch.object(self.rcache, '_puller').start()
+        self._pullmock.bulk_pull.return_value = [
+            OVOLikeThing(3, size='large'), OVOLikeThing(5, size='medium')]
+        self.assertEqual(
+            [3], [g.id for g in self.rcache.get_resources(
+                'goose', {'size': ('large', )})])
+
+    def test_get_resources_not_indexed_scans(self):
+        self.rcache.record_resource_update(self.ctx, 'goose',
+                                           OVOLikeThing(3, size='large'))
+        with mock.patch.object(self.rcache, 'match_resources_with_func',
+                               return_value=[]) as scan:
+            self.rcache.get_resources('goose', {'size': ('large', )})
+        self.assertTrue(scan.called)
+
     def test__is_stale(self):
         goose = OVOLikeThing(3, size='large')
         self.rcache.record_resource_update(self.ctx, 'goose', goose)
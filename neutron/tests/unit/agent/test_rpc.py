@@ -16,9 +16,12 @@
 import datetime
 
 import mock
+from oslo_config import cfg
 from oslo_context import context as oslo_context
 
 from neutron.agent import rpc
+from neutron.common import rpc as n_rpc
+from neutron.conf.agent import common as agent_config
 from neutron.tests import base
 
 
@@ -111,6 +114,32 @@ class AgentPluginReportState(base.BaseTestCase):
                 self.assertEqual(expected_time_str,
                                  mock_cast.call_args[1]['time'])
 
+    def _test_plugin_report_state_rpc_stats(self, report_rpc_stats):
+        agent_config.register_agent_state_opts_helper(cfg.CONF)
+        cfg.CONF.set_override('report_rpc_stats', report_rpc_stats, 'AGENT')
+        reportStateAPI = rpc.PluginReportStateAPI('test')
+        agent_state = {'agent': 'test', 'configurations': {}}
+        stats = {'report_state': {'calls': 1}}
+        with mock.patch.object(reportStateAPI.client, 'cast'), \
+                mock.patch.object(reportStateAPI.client, 'prepare'
+                                  ) as mock_prepare, \
+                mock.patch.object(n_rpc, 'get_method_stats',
+                                  return_value=stats):
+            mock_prepare.return_value = reportStateAPI.client
+            ctxt = oslo_context.RequestContext(user='fake_user',
+                                               tenant='fake_project')
+            reportStateAPI.report_state(ctxt, agent_state)
+        return agent_state['configurations']
+
+    def test_plugin_report_state_rpc_stats(self):
+        configurations = self._test_plugin_report_state_rpc_stats(True)
+        self.assertEqual({'report_state': {'calls': 1}},
+                         configurations['rpc_stats'])
+
+    def test_plugin_report_state_no_rpc_stats(self):
+        configurations = self._test_plugin_report_state_rpc_stats(False)
+        self.assertNotIn('rpc_stats', configurations)
+
 
 class AgentRPCMethods(base.BaseTestCase):
 
@@ -19,10 +19,13 @@ import mock
 from neutron_lib.callbacks import events
 from neutron_lib.callbacks import registry
 from neutron_lib.callbacks import resources
+from neutron_lib import context
 from neutron_lib.plugins import directory
 from oslo_utils import timeutils
 
 from neutron.api.rpc.agentnotifiers import dhcp_rpc_agent_api
+from neutron.api.rpc.agentnotifiers import utils as ag_utils
+from neutron.common import constants as n_const
 from neutron.common import utils
 from neutron.db.agentschedulers_db import cfg
 from neutron.db.models import agent as agent_model
@@ -211,6 +214,83 @@ class TestDhcpAgentNotifyAPI(base.BaseTestCase):
                 port={'id': 'foo_port_id', 'network_id': 'foo_network_id'}),
             expected_scheduling=0, expected_casts=1)
 
+    def _get_agent(self, host, batched):
+        agent = agent_model.Agent(host=host, topic='dhcp_agent')
+        agent.configurations = {n_const.BATCHED_PORT_NOTIFICATIONS: batched}
+        return agent
+
+    def _test__notify_agents_batched(self, agents, notifications):
+        self.notifier.plugin.get_configuration_dict.side_effect = (
+            lambda agent: agent.configurations)
+        ctx = context.get_admin_context()
+        with mock.patch.object(self.notifier, '_schedule_network') as f, \
+                mock.patch.object(self.notifier, '_get_enabled_agents',
+                                  return_value=agents), \
+                mock.patch.object(self.notifier, '_cast_batch') as cast_batch:
+            f.side_effect = lambda ctx, network, agents: agents
+            with ag_utils.batch_notifications(ctx):
+                for method, payload in notifications:
+                    self.notifier._notify_agents(ctx, method, payload,
+                                                 'foo_network_id')
+                self.assertFalse(self.mock_cast.called)
+                self.assertFalse(cast_batch.called)
+            # the hosting agents are looked up and the network scheduled once
+            self.assertEqual(1, f.call_count)
+            self.assertEqual(
+                1, self.notifier.plugin.get_network.call_count)
+            return cast_batch
+
+    def test__notify_agents_batched(self):
+        port_1 = {'id': 'port_1', 'network_id': 'foo_network_id'}
+        port_2 = {'id': 'port_2', 'network_id': 'foo_network_id'}
+        cast_batch = self._test__notify_agents_batched(
+            [self._get_agent('host-a', True)],
+            [('port_create_end', {'port': port_1}),
+             ('port_update_end', {'port': port_2}),
+             ('port_delete_end', {'port_id': 'port_1'}),
+             ('port_delete_end', {'port_id': 'port_2'}),
+             ('port_create_end', {'port': port_1})])
+        cast_batch.assert_has_calls([
+            mock.call(mock.ANY, 'ports_update_end',
+                      {'ports': [port_1, port_2]}, 'host-a', 'dhcp_agent'),
+            mock.call(mock.ANY, 'ports_delete_end',
+                      {'port_ids': ['port_1', 'port_2']}, 'host-a',
+                      'dhcp_agent')])
+        self.assertEqual(2, cast_batch.call_count)
+        # a single notification is sent as is
+        self.mock_cast.assert_called_once_with(
+            mock.ANY, 'port_create_end', {'port': port_1}, 'host-a',
+            'dhcp_agent')
+
+    def test__notify_agents_batched_agent_not_supporting_batches(self):
+        port_1 = {'id': 'port_1', 'network_id': 'foo_network_id'}
+        port_2 = {'id': 'port_2', 'network_id': 'foo_network_id'}
+        cast_batch = self._test__notify_agents_batched(
+            [self._get_agent('host-a', False)],
+            [('port_create_end', {'port': port_1}),
+             ('port_create_end', {'port': port_2})])
+        self.assertFalse(cast_batch.called)
+        self.mock_cast.assert_has_calls([
+            mock.call(mock.ANY, 'port_create_end', {'port': port_1},
+                      'host-a', 'dhcp_agent'),
+            mock.call(mock.ANY, 'port_create_end', {'port': port_2},
+                      'host-a', 'dhcp_agent')])
+
+    def test__send_dhcp_notification_bulk_is_batched(self):
+        self.notifier.uses_native_notifications[resources.PORT]['create'] = (
+            False)
+        ports = [{'id': 'port_%d' % i, 'network_id': 'foo_network_id'}
+                 for i in range(3)]
+        with mock.patch.object(self.notifier, '_notify_agents') as notify:
+            notify.side_effect = lambda ctx, *args: self.assertIsNotNone(
+                ag_utils.get_batch(ctx))
+            self.notifier._send_dhcp_notification(
+                resources.PORT, events.BEFORE_RESPONSE, mock.ANY,
+                context=context.get_admin_context(),
+                data={'ports': ports}, method_name='port.create.end',
+                collection='ports', action='create_port')
+        self.assertEqual(3, notify.call_count)
+
     def test__fanout_message(self):
         self.notifier._fanout_message(mock.ANY, mock.ANY, mock.ANY)
         self.assertEqual(1, self.mock_fanout.call_count)
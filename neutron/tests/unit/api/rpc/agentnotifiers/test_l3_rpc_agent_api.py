@@ -14,8 +14,12 @@
 # limitations under the License.
 
 import mock
+from neutron_lib import context
+from neutron_lib.plugins import directory
 
 from neutron.api.rpc.agentnotifiers import l3_rpc_agent_api
+from neutron.api.rpc.agentnotifiers import utils as ag_utils
+from neutron.common import utils
 from neutron.tests import base
 
 
@@ -45,3 +49,36 @@ class TestL3AgentNotifyAPI(base.BaseTestCase):
 
     def test_del_arp_entry(self):
         self._test_arp_update('del_arp_entry')
+
+    def test_routers_updated_batched(self):
+        ctx = context.get_admin_context()
+        l3_plugin = mock.Mock()
+        l3_plugin.get_hosts_to_notify.side_effect = lambda ctx, router_id: {
+            'router_1': ['host-a', 'host-b'],
+            'router_2': ['host-a']}[router_id]
+        with mock.patch.object(directory, 'get_plugin',
+                               return_value=l3_plugin), \
+                mock.patch.object(utils, 'is_extension_supported',
+                                  return_value=True):
+            with ag_utils.batch_notifications(ctx):
+                self.l3_notifier.routers_updated(ctx, ['router_1'])
+                self.l3_notifier.routers_updated(ctx, ['router_2'])
+                self.l3_notifier.routers_updated(ctx, ['router_1'])
+                self.l3_notifier.routers_updated_on_host(
+                    ctx, ['router_3'], 'host-a')
+                self.assertFalse(self.rpc_client_mock.prepare.called)
+
+        l3_plugin.schedule_routers.assert_called_once_with(mock.ANY, mock.ANY)
+        self.assertEqual({'router_1', 'router_2'},
+                         set(l3_plugin.schedule_routers.call_args[0][1]))
+        self.assertEqual(2, l3_plugin.get_hosts_to_notify.call_count)
+        self.rpc_client_mock.prepare.assert_has_calls([
+            mock.call(topic='l3_agent', server='host-a', version='1.1'),
+            mock.call(topic='l3_agent', server='host-b', version='1.1')],
+            any_order=True)
+        cctxt = self.rpc_client_mock.prepare.return_value
+        self.assertEqual(2, cctxt.cast.call_count)
+        cctxt.cast.assert_has_calls([
+            mock.call(ctx, 'routers_updated',
+                      routers=['router_3', 'router_1', 'router_2']),
+            mock.call(ctx, 'routers_updated', routers=['router_1'])])
@@ -0,0 +1,67 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+from neutron_lib import context
+
+from neutron.api.rpc.agentnotifiers import utils
+from neutron.tests import base
+
+
+class TestBatchNotifications(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestBatchNotifications, self).setUp()
+        self.ctx = context.Context('user', 'project')
+        self.notifier = object()
+        self.state = mock.Mock()
+
+    def _get_state(self, ctx):
+        return utils.get_batch(ctx).get_state(self.notifier,
+                                              lambda: self.state)
+
+    def test_no_batch(self):
+        self.assertIsNone(utils.get_batch(self.ctx))
+
+    def test_batch_is_flushed_once(self):
+        with utils.batch_notifications(self.ctx):
+            self._get_state(self.ctx)
+            with utils.batch_notifications(self.ctx):
+                # nested batches and elevated contexts share the batch
+                self.assertIs(self.state, self._get_state(self.ctx))
+                self.assertIs(self.state,
+                              self._get_state(self.ctx.elevated()))
+            self.assertFalse(self.state.flush.called)
+        self.state.flush.assert_called_once_with(self.ctx)
+        self.assertIsNone(utils.get_batch(self.ctx))
+
+    def test_batch_is_flushed_on_error(self):
+        def _raise():
+            with utils.batch_notifications(self.ctx):
+                self._get_state(self.ctx)
+                raise ValueError()
+
+        self.assertRaises(ValueError, _raise)
+        self.state.flush.assert_called_once_with(self.ctx)
+
+    def test_closed_batch_is_not_used(self):
+        with utils.batch_notifications(self.ctx):
+            elevated = self.ctx.elevated()
+        self.assertIsNone(utils.get_batch(elevated))
+
+    def test_flush_error_is_logged(self):
+        self.state.flush.side_effect = Exception()
+        with mock.patch.object(utils.LOG, 'exception') as log:
+            with utils.batch_notifications(self.ctx):
+                self._get_state(self.ctx)
+        self.assertTrue(log.called)
@@ -15,6 +15,7 @@ import mock
 from neutron.api.rpc.callbacks import exceptions
 from neutron.api.rpc.callbacks import resources
 from neutron.api.rpc.callbacks import version_manager
+from neutron.api.rpc.callbacks import wire_format
 from neutron.db import agents_db
 from neutron.tests import base
 
@@ -96,6 +97,29 @@ class ResourceConsumerTrackerTest(base.BaseTestCase):
         cv._recalculate_versions.assert_called_once_with()
 
 
+    def test_supports_wire_format(self):
+        cv = version_manager.ResourceConsumerTracker()
+        compact = wire_format.COMPACT
+        self.assertFalse(cv.supports_wire_format(TEST_RESOURCE_TYPE,
+                                                 TEST_VERSION_A, compact))
+
+        cv.set_versions(CONSUMER_1, {TEST_RESOURCE_TYPE: TEST_VERSION_A,
+                                     wire_format.WIRE_FORMAT_KEY: compact})
+        self.assertTrue(cv.supports_wire_format(TEST_RESOURCE_TYPE,
+                                                TEST_VERSION_A, compact))
+
+        # a consumer of another version doesn't matter
+        cv.set_versions(CONSUMER_2, {TEST_RESOURCE_TYPE: TEST_VERSION_B})
+        self.assertTrue(cv.supports_wire_format(TEST_RESOURCE_TYPE,
+                                                TEST_VERSION_A, compact))
+        self.assertFalse(cv.supports_wire_format(TEST_RESOURCE_TYPE,
+                                                 TEST_VERSION_B, compact))
+
+        cv.set_versions(CONSUMER_2, {TEST_RESOURCE_TYPE: TEST_VERSION_A})
+        self.assertFalse(cv.supports_wire_format(TEST_RESOURCE_TYPE,
+                                                 TEST_VERSION_A, compact))
+
+
 class CachedResourceConsumerTrackerTest(base.BaseTestCase):
 
     def setUp(self):
@@ -0,0 +1,127 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from oslo_config import cfg
+from oslo_utils import uuidutils
+from oslo_versionedobjects import fields as obj_fields
+from oslo_versionedobjects import fixture
+
+from neutron.api.rpc.callbacks import wire_format
+from neutron.conf.agent import common as agent_config
+from neutron.objects import base as objects_base
+from neutron.objects import common_types
+from neutron.tests import base
+
+
+class BaseFakeObject(objects_base.NeutronObject):
+    @classmethod
+    def get_objects(cls, context, **kwargs):
+        return list()
+
+
+class FakeChild(BaseFakeObject):
+    VERSION = '1.0'
+
+    fields = {
+        'name': obj_fields.StringField(),
+    }
+
+
+class FakeParent(BaseFakeObject):
+    VERSION = '1.3'
+
+    fields = {
+        'id': common_types.UUIDField(),
+        'profile': common_types.DictOfMiscValuesField(),
+        'children': obj_fields.ListOfObjectsField('FakeChild'),
+    }
+
+
+def _parent(children=('a', 'b'), profile=None):
+    parent = FakeParent(id=uuidutils.generate_uuid(),
+                        profile=profile or {},
+                        children=[FakeChild(name=name) for name in children])
+    parent.obj_reset_changes(recursive=True)
+    return parent.obj_to_primitive()
+
+
+class WireFormatTestCase(base.BaseTestCase):
+
+    def setUp(self):
+        super(WireFormatTestCase, self).setUp()
+        obj_registry = self.useFixture(
+            fixture.VersionedObjectRegistryFixture())
+        obj_registry.register(FakeChild)
+        obj_registry.register(FakeParent)
+
+    def test_round_trip(self):
+        primitives = [_parent(), _parent(children=('c', )), _parent(())]
+        payload = wire_format.encode(primitives)
+        self.assertEqual(wire_format.COMPACT, payload['format'])
+        self.assertEqual(primitives, wire_format.decode(payload))
+        objs = [FakeParent.clean_obj_from_primitive(primitive)
+                for primitive in wire_format.decode(payload)]
+        self.assertEqual(['c'], [child.name for child in objs[1].children])
+
+    def test_class_metadata_stored_once(self):
+        payload = wire_format.encode([_parent(), _parent()])
+        self.assertEqual(['FakeChild', 'FakeParent'],
+                         sorted(cls[0] for cls in payload['classes']))
+
+    def test_nested_objects_are_deduplicated(self):
+        payload = wire_format.encode([_parent(), _parent(),
+                                      _parent(children=('b', 'c'))])
+        # children a, b and c, and the three parents
+        self.assertEqual(6, len(payload['objects']))
+
+    def test_plain_dict_with_marker_keys(self):
+        profile = {'$ref': 0, '$dict': {'$ref': 1}, 'other': [{'$ref': 2}]}
+        primitives = [_parent(profile=profile)]
+        self.assertEqual(primitives,
+                         wire_format.decode(wire_format.encode(primitives)))
+
+    def test_large_payload_is_compressed(self):
+        primitives = [_parent() for _ in range(3)]
+        with mock.patch.object(wire_format, 'COMPRESSION_THRESHOLD', 0):
+            payload = wire_format.encode(primitives)
+        self.assertEqual({'format', 'zlib'}, set(payload))
+        self.assertEqual(primitives, wire_format.decode(payload))
+
+    def test_decode_unknown_format(self):
+        self.assertRaises(wire_format.InvalidWireFormat,
+                          wire_format.decode, {'format': 'unknown'})
+
+
+class AdvertisedVersionsTestCase(base.BaseTestCase):
+
+    def setUp(self):
+        super(AdvertisedVersionsTestCase, self).setUp()
+        agent_config.register_agent_state_opts_helper(cfg.CONF)
+        self.versions = {'Port': '1.1'}
+
+    def test_compact_format_disabled(self):
+        self.assertFalse(wire_format.compact_format_enabled())
+        self.assertEqual(self.versions,
+                         wire_format.get_advertised_versions(self.versions))
+
+    def test_compact_format_enabled(self):
+        cfg.CONF.set_override('rpc_compact_wire_format', True, 'AGENT')
+        self.assertTrue(wire_format.compact_format_enabled())
+        self.assertEqual(
+            {'Port': '1.1', wire_format.WIRE_FORMAT_KEY: wire_format.COMPACT},
+            wire_format.get_advertised_versions(self.versions))
+        self.assertNotIn(wire_format.WIRE_FORMAT_KEY, self.versions)
+
+    def test_compact_format_option_not_registered(self):
+        conf = cfg.ConfigOpts()
+        self.assertFalse(wire_format.compact_format_enabled(conf))
@@ -325,9 +325,7 @@ class TestDhcpRpcCallback(base.BaseTestCase):
         context = mock.Mock()
         port_ids = range(10)
         with mock.patch.object(provisioning_blocks,
-                               'provisioning_complete') as pc:
+                               'provisioning_complete_many') as pc:
             self.callbacks.dhcp_ready_on_ports(context, port_ids)
-        calls = [mock.call(context, port_id, resources.PORT,
-                           provisioning_blocks.DHCP_ENTITY)
-                 for port_id in port_ids]
-        pc.assert_has_calls(calls)
+        pc.assert_called_once_with(context, port_ids, resources.PORT,
+                                   provisioning_blocks.DHCP_ENTITY)
@@ -22,6 +22,7 @@ import testtools
 
 from neutron.api.rpc.callbacks import resources
 from neutron.api.rpc.callbacks import version_manager
+from neutron.api.rpc.callbacks import wire_format
 from neutron.api.rpc.handlers import resources_rpc
 from neutron.common import topics
 from neutron.objects import base as objects_base
@@ -168,6 +169,25 @@ class ResourcesPullRpcApiTestCase(ResourcesRpcBaseTestCase):
             version=TEST_VERSION, filter_kwargs=filter_kwargs)
         self.assertEqual(expected_objs, result)
 
+    def test_bulk_pull_compact_format(self):
+        self.obj_registry.register(FakeResource)
+        expected_objs = [_create_test_resource(self.context),
+                         _create_test_resource(self.context)]
+        self.cctxt_mock.call.return_value = wire_format.encode(
+            [e.obj_to_primitive() for e in expected_objs])
+
+        with mock.patch.object(wire_format, 'compact_format_enabled',
+                               return_value=True):
+            result = self.rpc.bulk_pull(self.context,
+                                        FakeResource.obj_name())
+
+        self.rpc.client.prepare.assert_called_once_with(version='1.2')
+        self.cctxt_mock.call.assert_called_once_with(
+            self.context, 'bulk_pull', resource_type='FakeResource',
+            version=TEST_VERSION, filter_kwargs=None,
+            wire_format=wire_format.COMPACT)
+        self.assertEqual(expected_objs, result)
+
     def test_pull_resource_not_found(self):
         resource_dict = _create_test_dict()
         resource_id = resource_dict['id']
@@ -238,6 +258,21 @@ class ResourcesPullRpcCallbackTestCase(ResourcesRpcBaseTestCase):
                 version=TEST_VERSION, filter_kwargs={'id': r1.id})
             self.assertEqual([r1.obj_to_primitive()], objs)
 
+    def test_bulk_pull_compact_format(self):
+        with mock.patch.object(FakeResource, 'get_objects',
+                               return_value=[self.resource_obj]):
+            payload = self.callbacks.bulk_pull(
+                self.context, resource_type=FakeResource.obj_name(),
+                version=TEST_VERSION, wire_format=wire_format.COMPACT)
+        self.assertEqual([self.resource_obj.obj_to_primitive()],
+                         wire_format.decode(payload))
+
+    def test_bulk_pull_unknown_format(self):
+        self.assertRaises(wire_format.InvalidWireFormat,
+                          self.callbacks.bulk_pull, self.context,
+                          resource_type=FakeResource.obj_name(),
+                          version=TEST_VERSION, wire_format='unknown')
+
     @mock.patch.object(FakeResource, 'obj_to_primitive')
     def test_pull_backports_to_older_version(self, to_prim_mock):
         with mock.patch.object(resources_rpc.prod_registry, 'pull',
@@ -259,6 +294,9 @@ class ResourcesPushRpcApiTestCase(ResourcesRpcBaseTestCase):
         self.cctxt_mock = self.rpc.client.prepare.return_value
         mock.patch.object(version_manager, 'get_resource_versions',
                          return_value=set([TEST_VERSION])).start()
+        self.supports_wire_format = mock.patch.object(
+            version_manager, 'supports_wire_format',
+            return_value=False).start()
 
     def test__prepare_object_fanout_context(self):
         expected_topic = topics.RESOURCE_TOPIC_PATTERN % {
@@ -301,6 +339,23 @@ class ResourcesPushRpcApiTestCase(ResourcesRpcBaseTestCase):
             event_type=TEST_EVENT)
 
 
+    def test_push_compact_format(self):
+        self.supports_wire_format.return_value = True
+        self.rpc.push(
+            self.context, self.resource_objs, TEST_EVENT)
+
+        self.supports_wire_format.assert_called_once_with(
+            FakeResource.obj_name(), TEST_VERSION, wire_format.COMPACT)
+        self.rpc.client.prepare.assert_called_once_with(
+            fanout=True, topic=mock.ANY, version='1.2')
+        self.cctxt_mock.cast.assert_called_once_with(
+            self.context, 'push',
+            compact_resources=wire_format.encode(
+                [resource.obj_to_primitive()
+                 for resource in self.resource_objs]),
+            event_type=TEST_EVENT)
+
+
 class ResourcesPushRpcCallbackTestCase(ResourcesRpcBaseTestCase):
     """Tests the agent-side of the RPC interface."""
 
@@ -319,3 +374,16 @@ class ResourcesPushRpcCallbackTestCase(ResourcesRpcBaseTestCase):
                                               self.resource_objs[0].obj_name(),
                                               self.resource_objs,
                                               TEST_EVENT)
+
+    @mock.patch.object(resources_rpc.cons_registry, 'push')
+    def test_push_compact_format(self, reg_push_mock):
+        self.obj_registry.register(FakeResource)
+        self.callbacks.push(self.context,
+                            compact_resources=wire_format.encode(
+                                [resource.obj_to_primitive()
+                                 for resource in self.resource_objs]),
+                            event_type=TEST_EVENT)
+        reg_push_mock.assert_called_once_with(self.context,
+                                              self.resource_objs[0].obj_name(),
+                                              self.resource_objs,
+                                              TEST_EVENT)
@@ -453,6 +453,124 @@ class TimeoutTestCase(base.DietTestCase):
         rpc._ContextWrapper.set_max_timeout(10)
         self.assertEqual(10, rpc._ContextWrapper.get_max_timeout())
 
+    def _succeed_calls(self, method, durations, start=1000):
+        rpc.TRANSPORT._send.side_effect = None
+        times = []
+        for duration in durations:
+            times.extend([start, start + duration])
+            start += duration
+        with mock.patch.object(rpc.time, 'time', side_effect=times):
+            for i in range(len(durations)):
+                self.client.call(self.call_context, method)
+
+    def test_method_stats(self):
+        self._succeed_calls('method_1', [0.05, 0.2, 90])
+        rpc.TRANSPORT._send.side_effect = messaging.MessagingTimeout
+        with testtools.ExpectedException(messaging.MessagingTimeout):
+            self.client.call(self.call_context, 'method_1')
+        rpc.TRANSPORT._send.side_effect = ValueError
+        with testtools.ExpectedException(ValueError):
+            self.client.call(self.call_context, 'method_1')
+        stats = rpc.get_method_stats()['method_1']
+        self.assertEqual(5, stats['calls'])
+        self.assertEqual(1, stats['timeouts'])
+        self.assertEqual(1, stats['errors'])
+        self.assertEqual(90, stats['p99'])
+        # the fastest call and the ValueError
+        self.assertEqual(2, stats['histogram']['le_0.1'])
+        self.assertEqual(1, stats['histogram']['le_0.5'])
+        # the timeout of 10 seconds
+        self.assertEqual(1, stats['histogram']['le_10'])
+        self.assertEqual(1, stats['histogram']['gt_60'])
+
+    def _time_out_call(self, method, now):
+        rpc.TRANSPORT._send.side_effect = messaging.MessagingTimeout
+        with mock.patch.object(rpc.time, 'time', return_value=now):
+            with testtools.ExpectedException(messaging.MessagingTimeout):
+                self.client.call(self.call_context, method)
+
+    def test_method_timeout_follows_p99(self):
+        rpc.TRANSPORT.conf.rpc_response_timeout = 10
+        rpc._ContextWrapper._METHOD_TIMEOUTS['method_1'] = 80
+        quiet_period = rpc.TIMEOUT_QUIET_PERIOD
+        # fast calls halve a timeout increased after timeouts once per
+        # quiet period
+        self._succeed_calls('method_1', [0.1] * rpc.MIN_LATENCY_SAMPLES,
+                            start=quiet_period)
+        self.assertEqual(40, rpc._ContextWrapper._METHOD_TIMEOUTS['method_1'])
+        self._succeed_calls('method_1', [0.1] * rpc.MIN_LATENCY_SAMPLES,
+                            start=quiet_period + 10)
+        self.assertEqual(40, rpc._ContextWrapper._METHOD_TIMEOUTS['method_1'])
+        for i in range(1, 4):
+            self._succeed_calls('method_1', [0.1],
+                                start=quiet_period * (2 * i + 1))
+        # down to the configured timeout, not below
+        self.assertEqual(10, rpc._ContextWrapper._METHOD_TIMEOUTS['method_1'])
+        # slow calls increase it at once before the calls time out
+        self._succeed_calls('method_1', [6] * rpc.MIN_LATENCY_SAMPLES,
+                            start=quiet_period * 12)
+        self.assertEqual(19, rpc._ContextWrapper._METHOD_TIMEOUTS['method_1'])
+        # but not beyond the ceiling
+        self._succeed_calls('method_1', [60] * rpc.MIN_LATENCY_SAMPLES)
+        self.assertEqual(100,
+                         rpc._ContextWrapper._METHOD_TIMEOUTS['method_1'])
+
+    def test_method_timeout_kept_after_timeout(self):
+        rpc.TRANSPORT.conf.rpc_response_timeout = 10
+        self._succeed_calls('method_1', [0.1] * rpc.LATENCY_SAMPLES,
+                            start=rpc.TIMEOUT_QUIET_PERIOD)
+        self.assertEqual(10, rpc._ContextWrapper._METHOD_TIMEOUTS['method_1'])
+        self._time_out_call('method_1', 2000)
+        self.assertEqual(20, rpc._ContextWrapper._METHOD_TIMEOUTS['method_1'])
+        # a fast call right after the timeout does not undo the backoff
+        self._succeed_calls('method_1', [0.1], start=2010)
+        self.assertEqual(20, rpc._ContextWrapper._METHOD_TIMEOUTS['method_1'])
+        self._time_out_call('method_1', 2020)
+        self.assertEqual(40, rpc._ContextWrapper._METHOD_TIMEOUTS['method_1'])
+        # the quiet period restarts with each timeout
+        self._succeed_calls(
+            'method_1', [0.1], start=2000 + rpc.TIMEOUT_QUIET_PERIOD)
+        self.assertEqual(40, rpc._ContextWrapper._METHOD_TIMEOUTS['method_1'])
+        self._succeed_calls(
+            'method_1', [0.1], start=2020 + rpc.TIMEOUT_QUIET_PERIOD)
+        self.assertEqual(20, rpc._ContextWrapper._METHOD_TIMEOUTS['method_1'])
+
+    def test_circuit_breaker_disabled_by_default(self):
+        for i in range(10):
+            with testtools.ExpectedException(messaging.MessagingTimeout):
+                self.client.call(self.call_context, 'method_1')
+        self.assertEqual(10, rpc.TRANSPORT._send.call_count)
+
+    def test_circuit_breaker(self):
+        CONF.set_override('rpc_circuit_breaker_threshold', 2)
+        rpc._ContextWrapper._METHOD_TIMEOUTS['method_1'] = 1
+        with mock.patch.object(rpc.time, 'time', return_value=1000):
+            for i in range(2):
+                with testtools.ExpectedException(messaging.MessagingTimeout):
+                    self.client.call(self.call_context, 'method_1')
+            # the circuit is open for the duration of the timeout
+            with testtools.ExpectedException(rpc.CircuitOpen):
+                self.client.call(self.call_context, 'method_1')
+            # other methods are not affected
+            with testtools.ExpectedException(messaging.MessagingTimeout):
+                self.client.call(self.call_context, 'method_2')
+        self.assertEqual(3, rpc.TRANSPORT._send.call_count)
+
+        # once the circuit is half-open, a failed call opens it again
+        with mock.patch.object(rpc.time, 'time', return_value=1005):
+            with testtools.ExpectedException(messaging.MessagingTimeout):
+                self.client.call(self.call_context, 'method_1')
+            with testtools.ExpectedException(rpc.CircuitOpen):
+                self.client.call(self.call_context, 'method_1')
+        self.assertEqual(4, rpc.TRANSPORT._send.call_count)
+
+        # and a successful one closes it
+        rpc.TRANSPORT._send.side_effect = None
+        with mock.patch.object(rpc.time, 'time', return_value=1100):
+            self.client.call(self.call_context, 'method_1')
+            self.client.call(self.call_context, 'method_1')
+        self.assertEqual(6, rpc.TRANSPORT._send.call_count)
+
 
 class TestConnection(base.DietTestCase):
     def setUp(self):
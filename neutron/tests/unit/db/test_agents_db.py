@@ -23,12 +23,16 @@ from neutron_lib import context
 from neutron_lib import exceptions as n_exc
 from oslo_config import cfg
 from oslo_db import exception as exc
+from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 import testscenarios
 
+from neutron.common import constants as n_const
 from neutron.db import agents_db
 from neutron.db import db_base_plugin_v2 as base_plugin
 from neutron.db.models import agent as agent_model
+from neutron.extensions import availability_zone as az_ext
+from neutron.notifiers import batch_notifier
 from neutron.tests.unit import testlib_api
 
 # the below code is required for the following reason
@@ -176,6 +180,102 @@ class TestAgentsDbMixin(TestAgentsDbBase):
         agent = self.plugin.get_agents(self.context)[0]
         self.assertFalse(agent['admin_state_up'])
 
+    def _register_agent_and_advance_time(self, seconds=10):
+        state = dict(self.agent_status)
+        state.pop('resource_versions')
+        self.plugin.create_or_update_agent(self.context, state)
+        now = timeutils.utcnow()
+        timeutils.set_time_override(now + datetime.timedelta(
+            seconds=seconds))
+        self.addCleanup(timeutils.clear_time_override)
+        return state
+
+    def _get_agent_db(self):
+        return self.plugin._get_agent_by_type_and_host(
+            context.get_admin_context(), self.agent_status['agent_type'],
+            self.agent_status['host'])
+
+    def test_update_agent_heartbeat(self):
+        state = self._register_agent_and_advance_time()
+        with mock.patch.object(self.plugin,
+                               '_get_agent_by_type_and_host') as get_agent:
+            self.assertEqual(
+                n_const.AGENT_ALIVE,
+                self.plugin.update_agent_heartbeat(self.context, state))
+            self.assertFalse(get_agent.called)
+        self.assertEqual(timeutils.utcnow(),
+                         self._get_agent_db().heartbeat_timestamp)
+
+    def test_update_agent_heartbeat_state_changed(self):
+        state = self._register_agent_and_advance_time()
+        state['configurations'] = {'devices': 1}
+        self.assertIsNone(
+            self.plugin.update_agent_heartbeat(self.context, state))
+
+    def test_update_agent_heartbeat_start_flag(self):
+        state = self._register_agent_and_advance_time()
+        state['start_flag'] = True
+        self.assertIsNone(
+            self.plugin.update_agent_heartbeat(self.context, state))
+
+    def test_update_agent_heartbeat_unknown_agent(self):
+        state = dict(self.agent_status)
+        state.pop('resource_versions')
+        self.assertIsNone(
+            self.plugin.update_agent_heartbeat(self.context, state))
+
+    def test_update_agent_heartbeat_dead_agent(self):
+        state = self._register_agent_and_advance_time(
+            seconds=cfg.CONF.agent_down_time + 1)
+        self.assertIsNone(
+            self.plugin.update_agent_heartbeat(self.context, state))
+
+    def test_update_agent_heartbeat_state_changed_by_other_server(self):
+        state = self._register_agent_and_advance_time()
+        FakePlugin().create_or_update_agent(
+            self.context, dict(state, configurations={'devices': 1}))
+        self.assertIsNone(
+            self.plugin.update_agent_heartbeat(self.context, state))
+
+    def test_update_agent_heartbeat_deleted_agent(self):
+        state = self._register_agent_and_advance_time()
+        FakePlugin().delete_agent(self.context, self._get_agent_db().id)
+        self.assertIsNone(
+            self.plugin.update_agent_heartbeat(self.context, state))
+
+    def test_update_agent_heartbeat_batched(self):
+        cfg.CONF.set_override('agent_heartbeat_batch_interval', 5)
+        state = self._register_agent_and_advance_time()
+        agent_id = self._get_agent_db().id
+        with mock.patch.object(batch_notifier.BatchNotifier,
+                               'queue_event') as queue_event:
+            self.assertEqual(
+                n_const.AGENT_ALIVE,
+                self.plugin.update_agent_heartbeat(self.context, state))
+        queue_event.assert_called_once_with(
+            {'id': agent_id, 'timestamp': timeutils.utcnow()})
+        # the heartbeat is not written yet but the agent is seen alive
+        self.assertNotEqual(timeutils.utcnow(),
+                            self._get_agent_db().heartbeat_timestamp)
+        self.assertEqual(
+            timeutils.utcnow(),
+            self.plugin.get_agent(self.context,
+                                  agent_id)['heartbeat_timestamp'])
+
+        self.plugin._write_heartbeats(queue_event.call_args[0])
+        self.assertEqual(timeutils.utcnow(),
+                         self._get_agent_db().heartbeat_timestamp)
+
+    def test_write_heartbeats_deleted_agent(self):
+        cfg.CONF.set_override('agent_heartbeat_batch_interval', 5)
+        self._register_agent_and_advance_time()
+        agent_id = self._get_agent_db().id
+        self.plugin.delete_agent(self.context, agent_id)
+        self.plugin._get_agent_heartbeats()['foo'] = {'id': agent_id}
+        self.plugin._write_heartbeats(
+            [{'id': agent_id, 'timestamp': timeutils.utcnow()}])
+        self.assertEqual({}, self.plugin._get_agent_heartbeats())
+
     def test_agent_health_check(self):
         agents = [{'agent_type': "DHCP Agent",
                    'heartbeat_timestamp': '2015-05-06 22:40:40.432295',
@@ -293,6 +393,143 @@ class TestAgentsDbGetAgents(TestAgentsDbBase):
                     self.assertEqual(alive, agent['alive'])
 
 
+
+class TestAgentsCache(TestAgentsDbBase):
+
+    def setUp(self):
+        super(TestAgentsCache, self).setUp()
+        cfg.CONF.set_override('agent_cache_ttl', 60)
+        agents_db.AGENTS_CACHE.invalidate()
+        self.addCleanup(agents_db.AGENTS_CACHE.invalidate)
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        self.agent_status = dict(AGENT_STATUS)
+        self.agent_status.pop('resource_versions')
+
+    def _get_hosts(self, agents):
+        return sorted(agent['host'] for agent in agents)
+
+    def test_get_agents_db(self):
+        self._create_and_save_agents(['host-1', 'host-2'],
+                                     constants.AGENT_TYPE_L3)
+        self._create_and_save_agents(['host-1'], constants.AGENT_TYPE_DHCP)
+        self.assertEqual(['host-1', 'host-2'], self._get_hosts(
+            self.plugin.get_agents_db(
+                self.context,
+                filters={'agent_type': [constants.AGENT_TYPE_L3]})))
+        with mock.patch.object(self.context.session, 'query') as query:
+            agents = self.plugin.get_agents_db(
+                self.context, filters={'host': ['host-1'],
+                                       'admin_state_up': [True]})
+            self.assertEqual(
+                [constants.AGENT_TYPE_DHCP, constants.AGENT_TYPE_L3],
+                sorted(agent.agent_type for agent in agents))
+            self.assertEqual([], self.plugin.get_agents_db(
+                self.context, filters={'host': ['host-1'],
+                                       'admin_state_up': [False]}))
+            self.assertEqual(['host-2'], self._get_hosts(
+                self.plugin.get_agents(
+                    self.context, filters={'host': ['host-2'],
+                                           'alive': ['true']})))
+        self.assertFalse(query.called)
+
+    def test_get_agents_db_unsupported_filters(self):
+        self._create_and_save_agents(['host-1'], constants.AGENT_TYPE_L3)
+        with mock.patch.object(agents_db.AGENTS_CACHE,
+                               'get_agents') as get_agents:
+            self.assertEqual(['host-1'], self._get_hosts(
+                self.plugin.get_agents_db(
+                    self.context, filters={'binary': ['foo-agent']})))
+        self.assertFalse(get_agents.called)
+
+    def test_cache_disabled(self):
+        cfg.CONF.set_override('agent_cache_ttl', 0)
+        self._create_and_save_agents(['host-1'], constants.AGENT_TYPE_L3)
+        with mock.patch.object(agents_db.AGENTS_CACHE,
+                               'get_agents') as get_agents:
+            self.assertEqual(['host-1'], self._get_hosts(
+                self.plugin.get_agents_db(self.context)))
+        self.assertFalse(get_agents.called)
+
+    def test_cache_reloaded_after_ttl(self):
+        self._create_and_save_agents(['host-1'], constants.AGENT_TYPE_L3)
+        self.plugin.get_agents_db(self.context)
+        # an agent created by another server
+        self._create_and_save_agents(['host-2'], constants.AGENT_TYPE_L3)
+        self.assertEqual(['host-1'], self._get_hosts(
+            self.plugin.get_agents_db(self.context)))
+        timeutils.advance_time_seconds(61)
+        self.assertEqual(['host-1', 'host-2'], self._get_hosts(
+            self.plugin.get_agents_db(self.context)))
+
+    def test_cache_updated_by_agent_changes(self):
+        self.plugin.get_agents_db(self.context)
+        self.plugin.create_or_update_agent(self.context, self.agent_status)
+        agents = self.plugin.get_agents_db(self.context)
+        self.assertEqual([self.agent_status['host']], self._get_hosts(agents))
+
+        self.plugin.update_agent(self.context, agents[0].id,
+                                 {'agent': {'admin_state_up': False}})
+        self.assertEqual([self.agent_status['host']], self._get_hosts(
+            self.plugin.get_agents_db(
+                self.context, filters={'admin_state_up': [False]})))
+
+        self.plugin.delete_agent(self.context, agents[0].id)
+        self.assertEqual([], self.plugin.get_agents_db(self.context))
+
+    def test_cache_updated_by_heartbeats(self):
+        self.plugin.create_or_update_agent(self.context, self.agent_status)
+        agent_id = self.plugin.get_agents_db(self.context)[0].id
+        timeutils.advance_time_seconds(10)
+        self.plugin.update_agent_heartbeat(self.context, self.agent_status)
+        with mock.patch.object(self.context.session, 'query') as query:
+            agent = self.plugin.get_agents_db(
+                self.context, filters={'id': [agent_id]})[0]
+        self.assertFalse(query.called)
+        self.assertEqual(timeutils.utcnow(), agent.heartbeat_timestamp)
+
+    def test_list_availability_zones(self):
+        agents = self._get_agents(['host-1', 'host-2'],
+                                  constants.AGENT_TYPE_DHCP)
+        agents[0].availability_zone = 'zone-1'
+        agents[1].availability_zone = 'zone-2'
+        agents[1].admin_state_up = False
+        self._save_agents(agents)
+        expected = {('zone-1', 'network'): True,
+                    ('zone-2', 'network'): False}
+        self.assertEqual(expected,
+                         self.plugin._list_availability_zones(self.context))
+        with mock.patch.object(self.context.session, 'query') as query:
+            self.assertEqual(
+                expected, self.plugin._list_availability_zones(self.context))
+            self.plugin.validate_availability_zones(
+                self.context, 'network', ['zone-1', 'zone-2'])
+            self.assertRaises(
+                az_ext.AvailabilityZoneNotFound,
+                self.plugin.validate_availability_zones,
+                self.context, 'router', ['zone-1'])
+        self.assertFalse(query.called)
+
+    def test_get_configuration_dict_parsed_once(self):
+        self.plugin.create_or_update_agent(
+            self.context, dict(self.agent_status,
+                               configurations={'devices': 1}))
+        agent = self.plugin.get_agents_db(self.context)[0]
+        with mock.patch.object(agents_db.jsonutils, 'loads',
+                               side_effect=jsonutils.loads) as loads:
+            self.assertEqual({'devices': 1},
+                             self.plugin.get_configuration_dict(agent))
+            self.assertEqual({'devices': 1},
+                             self.plugin.get_configuration_dict(agent))
+        self.assertEqual(1, loads.call_count)
+        # the configurations reported later are parsed again
+        self.plugin.create_or_update_agent(
+            self.context, dict(self.agent_status,
+                               configurations={'devices': 2}))
+        agent = self.plugin.get_agents_db(self.context)[0]
+        self.assertEqual({'devices': 2},
+                         self.plugin.get_configuration_dict(agent))
+
 class TestAgentExtRpcCallback(TestAgentsDbBase):
 
     def setUp(self):
@@ -338,6 +575,17 @@ class TestAgentExtRpcCallback(TestAgentsDbBase):
         self.assertFalse(self.update_versions.called)
         self.assertFalse(report_agent_resource_versions.called)
 
+    def test_further_state_reports_only_update_heartbeat(self):
+        self.test_create_or_update_agent_updates_version_manager()
+        second_agent_state = copy.deepcopy(self.agent_state)
+        second_agent_state['agent_state'].pop('resource_versions')
+        with mock.patch.object(self.plugin,
+                               'create_or_update_agent') as create_or_update:
+            status = self.callback.report_state(
+                self.context, agent_state=second_agent_state, time=TEST_TIME)
+        self.assertEqual(n_const.AGENT_ALIVE, status)
+        self.assertFalse(create_or_update.called)
+
     def test_version_updates_on_agent_revival(self):
         self.test_create_or_update_agent_updates_version_manager()
         second_agent_state = copy.deepcopy(self.agent_state)
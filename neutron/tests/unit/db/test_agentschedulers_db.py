@@ -16,6 +16,7 @@
 import datetime
 
 import mock
+from neutron_lib.api.definitions import portbindings
 from neutron_lib import constants
 from neutron_lib import context
 from neutron_lib.plugins import constants as plugin_constants
@@ -695,7 +696,7 @@ class OvsAgentSchedulerTestCase(OvsAgentSchedulerTestCaseBase):
 
             plugin = directory.get_plugin(plugin_constants.L3)
             mock.patch.object(
-                plugin, 'reschedule_router',
+                plugin, 'reschedule_routers',
                 side_effect=[
                     db_exc.DBError(), oslo_messaging.RemoteError(),
                     l3agentscheduler.RouterReschedulingFailed(router_id='f',
@@ -718,7 +719,7 @@ class OvsAgentSchedulerTestCase(OvsAgentSchedulerTestCaseBase):
             # check that no exception is raised
             plugin.reschedule_routers_from_down_agents()
 
-    def test_router_rescheduler_iterates_after_reschedule_failure(self):
+    def test_router_rescheduler_reschedules_routers_at_once(self):
         plugin = directory.get_plugin(plugin_constants.L3)
         l3_rpc_cb = l3_rpc.L3RpcCallback()
         self._register_agent_states()
@@ -727,16 +728,101 @@ class OvsAgentSchedulerTestCase(OvsAgentSchedulerTestCaseBase):
             l3_rpc_cb.get_router_ids(self.adminContext, host=L3_HOSTA)
 
             rs_mock = mock.patch.object(
-                plugin, 'reschedule_router',
+                plugin, 'reschedule_routers',
                 side_effect=l3agentscheduler.RouterReschedulingFailed(
                     router_id='f', agent_id='f'),
             ).start()
             self._take_down_agent_and_run_reschedule(L3_HOSTA)
-            # make sure both had a reschedule attempt even though first failed
+            rs_mock.assert_called_once_with(mock.ANY, mock.ANY)
+            self.assertEqual({r1['router']['id'], r2['router']['id']},
+                             set(rs_mock.call_args[0][1]))
+
+    def test_router_rescheduler_iterates_after_reschedule_failure(self):
+        plugin = directory.get_plugin(plugin_constants.L3)
+        l3_rpc_cb = l3_rpc.L3RpcCallback()
+        self._register_agent_states()
+        with self.router() as r1, self.router() as r2:
+            # schedule the routers to host A
+            l3_rpc_cb.get_router_ids(self.adminContext, host=L3_HOSTA)
+
+            mock.patch.object(plugin, 'reschedule_routers',
+                              side_effect=db_exc.DBError()).start()
+            rs_mock = mock.patch.object(
+                plugin, 'reschedule_router',
+                side_effect=[
+                    l3agentscheduler.RouterReschedulingFailed(
+                        router_id='f', agent_id='f'),
+                    None]).start()
+            self._take_down_agent_and_run_reschedule(L3_HOSTA)
+            # make sure both had a reschedule attempt even though the bulk
+            # reschedule and the first router failed
             rs_mock.assert_has_calls([mock.call(mock.ANY, r1['router']['id']),
                                       mock.call(mock.ANY, r2['router']['id'])],
                                      any_order=True)
 
+    def test_router_rescheduler_reschedules_routers_in_batches(self):
+        cfg.CONF.set_override('agent_reschedule_batch_size', 1)
+        plugin = directory.get_plugin(plugin_constants.L3)
+        l3_rpc_cb = l3_rpc.L3RpcCallback()
+        self._register_agent_states()
+        with self.router() as r1, self.router() as r2, self.router() as r3:
+            # schedule the routers to host A
+            l3_rpc_cb.get_router_ids(self.adminContext, host=L3_HOSTA)
+
+            rs_mock = mock.patch.object(
+                plugin, 'reschedule_routers',
+                side_effect=[
+                    l3agentscheduler.RouterReschedulingFailed(
+                        router_id='f', agent_id='f'),
+                    ValueError('this raises'),
+                    None]).start()
+            self._take_down_agent_and_run_reschedule(L3_HOSTA)
+            # make sure every batch had a reschedule attempt even though the
+            # first ones failed
+            self.assertEqual(3, rs_mock.call_count)
+            self.assertEqual(
+                {r1['router']['id'], r2['router']['id'], r3['router']['id']},
+                set(call[0][1][0] for call in rs_mock.call_args_list))
+
+    def test_router_rescheduler_reschedules_gateway_routers_first(self):
+        plugin = directory.get_plugin(plugin_constants.L3)
+        l3_rpc_cb = l3_rpc.L3RpcCallback()
+        self._register_agent_states()
+        with self.subnet() as s:
+            net_id = s['subnet']['network_id']
+            self._set_net_external(net_id)
+            with self.router() as r1,\
+                    self.router(external_gateway_info={
+                        'network_id': net_id}) as r2:
+                # schedule the routers to host A
+                l3_rpc_cb.get_router_ids(self.adminContext, host=L3_HOSTA)
+
+                rs_mock = mock.patch.object(plugin,
+                                            'reschedule_routers').start()
+                self._take_down_agent_and_run_reschedule(L3_HOSTA)
+                rs_mock.assert_called_once_with(
+                    mock.ANY, [r2['router']['id'], r1['router']['id']])
+
+    def test_routers_reschedule_from_dead_agent_notifies_once(self):
+        plugin = directory.get_plugin(plugin_constants.L3)
+        l3_rpc_cb = l3_rpc.L3RpcCallback()
+        self._register_agent_states()
+        l3_notifier = plugin.agent_notifiers[constants.AGENT_TYPE_L3]
+        with self.router() as r1, self.router() as r2, \
+                mock.patch.object(l3_notifier,
+                                  'router_added_to_agent') as added:
+            # schedule the routers to host A
+            l3_rpc_cb.get_router_ids(self.adminContext, host=L3_HOSTA)
+            self._take_down_agent_and_run_reschedule(L3_HOSTA)
+
+            added.assert_called_once_with(mock.ANY, mock.ANY, L3_HOSTB)
+            self.assertEqual({r1['router']['id'], r2['router']['id']},
+                             set(added.call_args[0][1]))
+            ret_b = l3_rpc_cb.get_router_ids(self.adminContext,
+                                             host=L3_HOSTB)
+            self.assertEqual({r1['router']['id'], r2['router']['id']},
+                             set(ret_b))
+
     def test_router_is_not_rescheduled_from_alive_agent(self):
         with self.router():
             l3_rpc_cb = l3_rpc.L3RpcCallback()
@@ -745,7 +831,8 @@ class OvsAgentSchedulerTestCase(OvsAgentSchedulerTestCaseBase):
             # schedule the router to host A
             l3_rpc_cb.get_router_ids(self.adminContext, host=L3_HOSTA)
             with mock.patch('neutron.db.l3_agentschedulers_db.'
-                            'L3AgentSchedulerDbMixin.reschedule_router') as rr:
+                            'L3AgentSchedulerDbMixin.'
+                            'reschedule_routers') as rr:
                 # take down some unrelated agent and run reschedule check
                 self._take_down_agent_and_run_reschedule(DHCP_HOSTC)
                 self.assertFalse(rr.called)
@@ -756,7 +843,7 @@ class OvsAgentSchedulerTestCase(OvsAgentSchedulerTestCaseBase):
         agent = helpers.register_l3_agent(host=L3_HOSTA)
         with self.router(),\
                 self.router(),\
-                mock.patch.object(plugin, 'reschedule_router') as rs_mock,\
+                mock.patch.object(plugin, 'reschedule_routers') as rs_mock,\
                 mock.patch.object(plugin, '_get_agent') as get_agent_mock:
 
             # schedule the routers to the agent
@@ -985,23 +1072,36 @@ class OvsAgentSchedulerTestCase(OvsAgentSchedulerTestCaseBase):
         l3_rpc_cb = l3_rpc.L3RpcCallback()
         dvr_agents = self._register_dvr_agents()
 
-        with self.router() as r1, \
-                mock.patch.object(self.l3plugin, 'get_subnet_ids_on_router',
-                                  return_value=['fake_subnet_id']), \
-                mock.patch.object(self.l3plugin,
-                                  '_check_dvr_serviceable_ports_on_host',
-                                  return_value=True):
+        with self.subnet() as s, self.router() as r1:
+            self._router_interface_action('add', r1['router']['id'],
+                                          s['subnet']['id'], None)
             for l3_agent in dvr_agents:
                 host = l3_agent['host']
+                self._make_port(self.fmt, s['subnet']['network_id'],
+                                device_owner=DEVICE_OWNER_COMPUTE,
+                                arg_list=(portbindings.HOST_ID,),
+                                **{portbindings.HOST_ID: host})
                 ret_a = l3_rpc_cb.sync_routers(self.adminContext, host=host,
                                                router_ids=[r1['router']['id']])
                 router_ids = [r['id'] for r in ret_a]
                 # Return router to agent if there is dvr service port in agent.
                 self.assertIn(r1['router']['id'], router_ids)
-                host_routers = self._list_routers_hosted_by_l3_agent(
-                    l3_agent['id'])
-                # No router will be auto scheduled.
-                self.assertEqual(0, len(host_routers['routers']))
+
+    def test_sync_dvr_router_no_dvr_serviceable_ports_on_host(self):
+        l3_rpc_cb = l3_rpc.L3RpcCallback()
+        dvr_snat_agent, dvr_agent = self._register_dvr_agents()
+
+        with self.subnet() as s, self.router() as r1:
+            self._router_interface_action('add', r1['router']['id'],
+                                          s['subnet']['id'], None)
+            self._make_port(self.fmt, s['subnet']['network_id'],
+                            device_owner=DEVICE_OWNER_COMPUTE,
+                            arg_list=(portbindings.HOST_ID,),
+                            **{portbindings.HOST_ID: dvr_snat_agent['host']})
+            ret_a = l3_rpc_cb.sync_routers(self.adminContext,
+                                           host=dvr_agent['host'],
+                                           router_ids=[r1['router']['id']])
+            self.assertEqual([], ret_a)
 
     def test_router_without_l3_agents(self):
         with self.subnet() as s:
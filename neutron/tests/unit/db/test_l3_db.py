@@ -55,22 +55,38 @@ class TestL3_NAT_dbonly_mixin(base.BaseTestCase):
         self.assertFalse(get_p.called)
 
     def test__get_subnets_by_network(self):
-        """Basic test that the right query is called"""
+        """Basic test that the right queries are called"""
         context = mock.MagicMock()
+        row = mock.Mock()
+        row._asdict.return_value = {
+            'id': mock.sentinel.subnet_id,
+            'network_id': mock.sentinel.network_id,
+            'address_scope_id': mock.sentinel.address_scope_id}
         query = context.session.query().outerjoin().filter()
-        query.__iter__.return_value = [(mock.sentinel.subnet_db,
-                                        mock.sentinel.address_scope_id)]
-
-        with mock.patch.object(directory, 'get_plugin') as get_p:
-            get_p()._make_subnet_dict.return_value = {
-                'network_id': mock.sentinel.network_id}
-            subnets = self.db._get_subnets_by_network_list(
-                context, [mock.sentinel.network_id])
+        query.__iter__.return_value = [row]
+        dns_query = context.session.query().filter().order_by()
+        dns_query.__iter__.return_value = [
+            (mock.sentinel.subnet_id, mock.sentinel.dns_1),
+            (mock.sentinel.subnet_id, mock.sentinel.dns_2)]
+
+        subnets = self.db._get_subnets_by_network_list(
+            context, [mock.sentinel.network_id])
         self.assertEqual({
             mock.sentinel.network_id: [{
+                'id': mock.sentinel.subnet_id,
                 'address_scope_id': mock.sentinel.address_scope_id,
+                'dns_nameservers': [mock.sentinel.dns_1,
+                                    mock.sentinel.dns_2],
                 'network_id': mock.sentinel.network_id}]}, subnets)
 
+    def test__get_subnets_by_network_no_subnet(self):
+        context = mock.MagicMock()
+        context.session.query().outerjoin().filter().__iter__.return_value = []
+        subnets = self.db._get_subnets_by_network_list(
+            context, [mock.sentinel.network_id])
+        self.assertEqual({mock.sentinel.network_id: []}, subnets)
+        self.assertFalse(context.session.query().filter().order_by.called)
+
     def test__populate_ports_for_subnets_none(self):
         """Basic test that the method runs correctly with no ports"""
         ports = []
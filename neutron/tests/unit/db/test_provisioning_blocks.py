@@ -18,6 +18,7 @@ from neutron_lib.callbacks import resources
 from neutron_lib import context as n_ctx
 import testtools
 
+from neutron.api.rpc.agentnotifiers import utils as ag_utils
 from neutron.db import api as db_api
 from neutron.db import models_v2
 from neutron.db import provisioning_blocks as pb
@@ -145,3 +146,48 @@ class TestStatusBarriers(testlib_api.SqlTestCase):
         pb.add_provisioning_component(self.ctx, net.id, 'NETWORK', 'ent')
         pb.provisioning_complete(self.ctx, net.id, 'NETWORK', 'ent')
         self.assertTrue(provisioned.called)
+
+    def test_provisioning_complete_many(self):
+        port2 = self._make_port()
+        port3 = self._make_port()
+        for port in (self.port, port2, port3):
+            pb.add_provisioning_component(self.ctx, port.id, resources.PORT,
+                                          'entity1')
+        pb.add_provisioning_component(self.ctx, port2.id, resources.PORT,
+                                      'entity2')
+        completed = pb.provisioning_complete_many(
+            self.ctx, [self.port.id, port2.id, 'someid'], resources.PORT,
+            'entity1')
+        self.assertEqual([self.port.id], completed)
+        self.provisioned.assert_called_once_with(
+            resources.PORT, pb.PROVISIONING_COMPLETE, mock.ANY,
+            context=self.ctx, object_id=self.port.id)
+        self.assertTrue(pb.is_object_blocked(self.ctx, port2.id,
+                                             resources.PORT))
+        self.assertTrue(pb.is_object_blocked(self.ctx, port3.id,
+                                             resources.PORT))
+
+    def test_provisioning_complete_many_without_objects(self):
+        self.assertEqual([], pb.provisioning_complete_many(
+            self.ctx, ['someid'], resources.PORT, 'entity'))
+        self.assertEqual([], pb.provisioning_complete_many(
+            self.ctx, [], resources.PORT, 'entity'))
+        self.assertFalse(self.provisioned.called)
+
+    def test_provisioning_complete_many_batches_agent_notifications(self):
+        batches = []
+        self.provisioned.side_effect = lambda *args, **kwargs: (
+            batches.append(ag_utils.get_batch(kwargs['context'])))
+        port2 = self._make_port()
+        pb.provisioning_complete_many(self.ctx, [self.port.id, port2.id],
+                                      resources.PORT, 'entity')
+        self.assertEqual(2, len(batches))
+        self.assertIsNotNone(batches[0])
+        self.assertIs(batches[0], batches[1])
+        self.assertIsNone(ag_utils.get_batch(self.ctx))
+
+    def test_provisioning_complete_many_in_transaction(self):
+        with db_api.context_manager.writer.using(self.ctx):
+            self.assertRaises(RuntimeError, pb.provisioning_complete_many,
+                              self.ctx, [self.port.id], resources.PORT,
+                              'entity')
@@ -40,6 +40,7 @@ from neutron.api.rpc.agentnotifiers import l3_rpc_agent_api
 from neutron.api.rpc.handlers import l3_rpc
 from neutron.api.v2 import attributes
 from neutron.db import _resource_extend as resource_extend
+from neutron.db import api as db_api
 from neutron.db import common_db_mixin
 from neutron.db import db_base_plugin_v2
 from neutron.db import dns_db
@@ -3532,6 +3533,47 @@ class L3AgentDbTestCaseBase(L3NatTestCaseMixin):
                     r['router']['id'],
                     s['subnet']['network_id'])
 
+    def test_l3_agent_routers_query_queries_constant(self):
+        admin_ctx = context.get_admin_context()
+        router_ids = []
+        statements = []
+
+        def router_maker(ext_net_id):
+            router = self._make_router(self.fmt, _uuid(),
+                                       external_gateway_info={
+                                           'network_id': ext_net_id})
+            router_id = router['router']['id']
+            network = self._make_network(self.fmt, 'net', True)
+            subnet = self._make_subnet(
+                self.fmt, network, '10.0.%d.1' % len(router_ids),
+                '10.0.%d.0/24' % len(router_ids),
+                dns_nameservers=['192.0.2.53'])
+            self._router_interface_action(
+                'add', router_id, subnet['subnet']['id'], None)
+            router_ids.append(router_id)
+
+        def sync_data_queries():
+            del statements[:]
+            routers = self.plugin.get_sync_data(admin_ctx, router_ids)
+            self.assertEqual(len(router_ids), len(routers))
+            return list(statements)
+
+        engine = db_api.context_manager.writer.get_engine()
+        db_api.sqla_listen(engine, 'after_execute',
+                           lambda conn, clause, *args, **kwargs:
+                           statements.append(str(clause)))
+        with self.subnet(cidr='172.16.0.0/24') as ext:
+            ext_net_id = ext['subnet']['network_id']
+            self._set_net_external(ext_net_id)
+            router_maker(ext_net_id)
+            before_queries = sync_data_queries()
+            # the number of queries doesn't depend on the number of routers
+            for i in range(3):
+                router_maker(ext_net_id)
+            after_queries = sync_data_queries()
+        self.assertEqual(len(before_queries), len(after_queries),
+                         '\n'.join(after_queries))
+
     def test_l3_agent_routers_query_floatingips(self):
         with self.floatingip_with_assoc() as fip:
             routers = self.plugin.get_sync_data(
@@ -13,7 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+
 import eventlet
+import fixtures
 import mock
 
 from neutron.notifiers import batch_notifier
@@ -61,3 +64,175 @@ class TestBatchNotifier(base.BaseTestCase):
                 # wait for coroutines to finish
                 eventlet.sleep(0.1)
             self.assertTrue(send_events.called)
+
+    def test_queue_event_spawns_one_waiting_thread(self):
+        for i in range(3):
+            self.notifier.queue_event(mock.Mock())
+        self.assertEqual(3, len(self.notifier.pending_events))
+        self.assertEqual(1, self.spawn_n.call_count)
+
+
+def _event_key(event):
+    return event['port']
+
+
+class TestCoalescingBatchNotifier(base.BaseTestCase):
+    def setUp(self):
+        super(TestCoalescingBatchNotifier, self).setUp()
+        self.callback = mock.Mock()
+        mock.patch('eventlet.spawn_n').start()
+        mock.patch('eventlet.sleep').start()
+
+    def _get_notifier(self, **kwargs):
+        return batch_notifier.BatchNotifier(0.1, self.callback,
+                                            key_func=_event_key, **kwargs)
+
+    def test_queue_event_coalesces(self):
+        notifier = self._get_notifier()
+        notifier.queue_event({'port': 'a', 'status': 'DOWN'})
+        notifier.queue_event({'port': 'b', 'status': 'DOWN'})
+        notifier.queue_event({'port': 'a', 'status': 'ACTIVE'})
+        self.assertEqual([{'port': 'b', 'status': 'DOWN'},
+                          {'port': 'a', 'status': 'ACTIVE'}],
+                         notifier.pending_events)
+
+    def test_queue_event_max_pending(self):
+        notifier = self._get_notifier(max_pending=2)
+        for port in ('a', 'b', 'c'):
+            notifier.queue_event({'port': port})
+        self.assertEqual([{'port': 'b'}, {'port': 'c'}],
+                         notifier.pending_events)
+
+    def test_notify_max_batch_size(self):
+        notifier = self._get_notifier(max_batch_size=2)
+        for port in ('a', 'b', 'c'):
+            notifier.queue_event({'port': port})
+        notifier._notify()
+        self.callback.assert_called_once_with([{'port': 'a'},
+                                               {'port': 'b'}])
+        self.assertEqual([{'port': 'c'}], notifier.pending_events)
+
+    def _notify(self, notifier, duration):
+        with mock.patch.object(batch_notifier.time, 'time',
+                               side_effect=[0, duration]):
+            notifier._notify()
+
+    def test_batch_size_adapts_to_response_time(self):
+        notifier = self._get_notifier(max_batch_size=8)
+        notifier.queue_event({'port': 'a'})
+        self._notify(notifier, 1)
+        self.assertEqual(4, notifier.batch_size)
+        notifier.queue_event({'port': 'b'})
+        self._notify(notifier, 1)
+        self.assertEqual(2, notifier.batch_size)
+        notifier.queue_event({'port': 'c'})
+        self._notify(notifier, 0.01)
+        self.assertEqual(4, notifier.batch_size)
+
+    def test_notify_failure_drops_events(self):
+        notifier = self._get_notifier()
+        notifier.queue_event({'port': 'a'})
+        self.callback.side_effect = Exception()
+        notifier._notify()
+        self.assertEqual([], notifier.pending_events)
+        self.assertEqual(0, notifier._failures)
+
+    def test_notify_failure_requeues_events(self):
+        notifier = self._get_notifier(retry_exceptions=(IOError,))
+        notifier.queue_event({'port': 'a', 'status': 'DOWN'})
+        notifier.queue_event({'port': 'b', 'status': 'DOWN'})
+
+        def send(events):
+            # a newer event is queued while the batch is being sent
+            notifier.queue_event({'port': 'b', 'status': 'ACTIVE'})
+            raise IOError()
+
+        self.callback.side_effect = send
+        notifier._notify()
+        self.assertEqual([{'port': 'a', 'status': 'DOWN'},
+                          {'port': 'b', 'status': 'ACTIVE'}],
+                         notifier.pending_events)
+        self.assertEqual(1, notifier._failures)
+
+        self.callback.side_effect = None
+        notifier._notify()
+        self.assertEqual(0, notifier._failures)
+        self.assertEqual([], notifier.pending_events)
+
+    def test_notify_failure_drops_events_after_max_attempts(self):
+        notifier = self._get_notifier(retry_exceptions=(IOError,),
+                                      max_attempts=2)
+        notifier.queue_event({'port': 'a'})
+        self.callback.side_effect = IOError()
+        notifier._notify()
+        self.assertEqual([{'port': 'a'}], notifier.pending_events)
+        # a later event is still sent its own number of times
+        notifier.queue_event({'port': 'b'})
+        notifier._notify()
+        self.assertEqual([{'port': 'b'}], notifier.pending_events)
+        self.assertEqual(2, notifier._failures)
+        notifier._notify()
+        self.assertEqual([], notifier.pending_events)
+        self.assertEqual(0, notifier._failures)
+        self.assertEqual({}, notifier._attempts)
+
+
+class TestSpooledBatchNotifier(base.BaseTestCase):
+    def setUp(self):
+        super(TestSpooledBatchNotifier, self).setUp()
+        self.callback = mock.Mock()
+        mock.patch('eventlet.spawn_n').start()
+        self.spool_file = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'events')
+        self.notifier = batch_notifier.BatchNotifier(
+            0.1, self.callback, key_func=_event_key,
+            spool_file=self.spool_file, retry_exceptions=(IOError,))
+        self.spool_path = '%s.%d' % (self.spool_file, os.getpid())
+
+    def _read_spool(self, path):
+        return batch_notifier._read_spool(path)
+
+    def test_events_are_spooled_until_sent(self):
+        self.notifier.queue_event({'port': 'a'})
+        self.notifier.queue_event({'port': 'b'})
+        self.assertEqual([{'port': 'a'}, {'port': 'b'}],
+                         self._read_spool(self.spool_path))
+        self.notifier._notify()
+        self.assertFalse(os.path.exists(self.spool_path))
+
+    def test_failed_events_stay_spooled(self):
+        self.notifier.queue_event({'port': 'a'})
+        self.callback.side_effect = IOError()
+        self.notifier._notify()
+        self.assertEqual([{'port': 'a'}], self._read_spool(self.spool_path))
+
+    def test_dropped_events_are_unspooled(self):
+        self.notifier.queue_event({'port': 'a'})
+        self.callback.side_effect = ValueError()
+        self.notifier._notify()
+        self.assertFalse(os.path.exists(self.spool_path))
+
+    def test_events_of_dead_process_are_recovered(self):
+        dead_path = '%s.%d' % (self.spool_file, 123456)
+        with open(dead_path, 'w') as spool:
+            spool.write('{"port": "a", "status": "DOWN"}\n'
+                        '{"port": "a", "status": "ACTIVE"}\n'
+                        '{"port": "b"')
+        with mock.patch.object(batch_notifier, '_process_exists',
+                               return_value=False):
+            self.notifier.queue_event({'port': 'c'})
+        self.assertEqual([{'port': 'a', 'status': 'ACTIVE'}, {'port': 'c'}],
+                         self.notifier.pending_events)
+        self.assertFalse(os.path.exists(dead_path))
+        self.assertEqual(self.notifier.pending_events,
+                         self._read_spool(self.spool_path))
+
+    def test_events_of_live_process_are_not_recovered(self):
+        live_path = '%s.%d' % (self.spool_file, 123456)
+        with open(live_path, 'w') as spool:
+            spool.write('{"port": "a"}\n')
+        with mock.patch.object(batch_notifier, '_process_exists',
+                               return_value=True):
+            self.notifier.queue_event({'port': 'c'})
+        self.assertEqual([{'port': 'c'}], self.notifier.pending_events)
+        self.assertTrue(os.path.exists(live_path))
@@ -14,6 +14,7 @@
 #    under the License.
 
 
+from keystoneauth1 import exceptions as ks_exceptions
 import mock
 from neutron_lib import constants as n_const
 from neutron_lib import exceptions as n_exc
@@ -259,6 +260,26 @@ class TestNovaNotify(base.BaseTestCase):
             nclient_create.side_effect = Exception
             self.nova_notifier.send_events([])
 
+    def test_nova_send_events_connection_error_raises(self):
+        with mock.patch.object(
+            self.nova_notifier.nclient.server_external_events,
+                'create') as nclient_create:
+            nclient_create.side_effect = ks_exceptions.ConnectFailure
+            self.assertRaises(ks_exceptions.ConnectFailure,
+                              self.nova_notifier.send_events, [])
+
+    def test_queued_events_are_coalesced(self):
+        device_id = '32102d7b-1cf4-404d-b50a-97aae1f55f87'
+        port_id = 'bee50827-bcee-4cc8-91c1-a27b0ce54222'
+        events = [{'server_uuid': device_id, 'name': nova.VIF_PLUGGED,
+                   'status': status, 'tag': port_id}
+                  for status in ('failed', 'completed')]
+        with mock.patch('eventlet.spawn_n'):
+            for event in events:
+                self.nova_notifier.batch_notifier.queue_event(event)
+        self.assertEqual(events[1:],
+                         self.nova_notifier.batch_notifier.pending_events)
+
     def test_nova_send_events_returns_non_200(self):
         device_id = '32102d7b-1cf4-404d-b50a-97aae1f55f87'
         with mock.patch.object(
@@ -17,7 +17,9 @@ from neutron_lib import context
 from neutron_lib import exceptions as n_exc
 
 from neutron.db import _model_query as model_query
+from neutron.db.models import securitygroup as sg_models
 from neutron.db import models_v2
+from neutron.db import standard_attr
 from neutron.objects import base
 from neutron.objects.db import api
 from neutron.tests import base as test_base
@@ -112,6 +114,57 @@ class CRUDScenarioTestCase(testlib_api.SqlTestCase):
         # but delete_objects does not not
         api.delete_objects(self.ctxt, self.model, id=obj.id)
 
+    def test_create_objects(self):
+        objs = api.create_objects(
+            self.ctxt, self.model,
+            [{'name': 'foo%d' % i} for i in range(5)])
+
+        self.assertEqual(['foo%d' % i for i in range(5)],
+                         [obj.name for obj in objs])
+        self.assertEqual(5, api.count(self.ctxt, self.model))
+        for obj in objs:
+            self.assertEqual(0, obj.revision_number)
+            self.assertEqual(obj, api.get_object(self.ctxt, self.model,
+                                                 id=obj.id))
+
+    def test_update_objects_bumps_revision_numbers(self):
+        for i in range(3):
+            api.create_object(
+                self.ctxt, self.model,
+                {'name': 'foo%d' % i, 'description': 'bar'})
+        other = api.create_object(self.ctxt, self.model, {'name': 'other'})
+        revision_number = other.revision_number
+
+        self.assertEqual(3, api.update_objects(
+            self.ctxt, self.model, {'name': 'baz'}, description='bar'))
+
+        objs = api.get_objects(self.ctxt, self.model, description='bar')
+        self.assertEqual({'baz'}, {obj.name for obj in objs})
+        self.assertEqual({revision_number + 1},
+                         {obj.revision_number for obj in objs})
+        other = api.get_object(self.ctxt, self.model, id=other.id)
+        self.assertEqual(revision_number, other.revision_number)
+
+    def test_delete_objects_in_bulk_removes_standard_attributes(self):
+        self.assertTrue(api.can_delete_in_bulk(self.model))
+        for i in range(3):
+            api.create_object(self.ctxt, self.model, {'name': 'foo%d' % i})
+        api.create_object(self.ctxt, self.model, {'name': 'bar'})
+
+        with mock.patch.object(self.ctxt.session, 'delete') as delete_mock:
+            self.assertEqual(3, api.delete_objects(
+                self.ctxt, self.model, name=['foo%d' % i for i in range(3)]))
+        self.assertFalse(delete_mock.called)
+        self.assertEqual(['bar'], [obj.name for obj in
+                                   api.get_objects(self.ctxt, self.model)])
+        self.assertEqual(1, self.ctxt.session.query(
+            standard_attr.StandardAttribute).count())
+
+    def test_can_delete_in_bulk(self):
+        # the revision of the security group is bumped by the ORM
+        self.assertFalse(api.can_delete_in_bulk(sg_models.SecurityGroupRule))
+        self.assertTrue(api.can_delete_in_bulk(models_v2.IPAllocationPool))
+
     def test_delete_objects_removes_all_matching_objects(self):
         # create some objects with identical description
         for i in range(10):
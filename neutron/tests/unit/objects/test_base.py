@@ -1591,6 +1591,34 @@ class BaseDbObjectTestCase(_BaseObjectTestCase,
                                           **obj._get_composite_keys())
         self.assertIsNone(new)
 
+    def test_create_objects(self):
+        objs_data = [
+            remove_timestamps_from_fields(
+                get_non_synthetic_fields(self._test_class, fields),
+                self._test_class.fields)
+            for fields in self.obj_fields]
+        objs = self._test_class.create_objects(self.context, objs_data)
+
+        self.assertEqual(len(self.obj_fields), len(objs))
+        for obj in objs:
+            new = self._test_class.get_object(self.context,
+                                              **obj._get_composite_keys())
+            self.assertEqual(obj, new)
+
+    def test_create_objects_single_flush(self):
+        if 'create' in self._test_class._custom_db_methods:
+            self.skipTest('%r creates objects one by one' % self._test_class)
+        objs_data = [
+            remove_timestamps_from_fields(
+                get_non_synthetic_fields(self._test_class, fields),
+                self._test_class.fields)
+            for fields in self.obj_fields]
+        with mock.patch.object(obj_db_api, 'create_object') as create_mock:
+            self._test_class.create_objects(self.context, objs_data)
+        self.assertFalse(create_mock.called)
+        self.assertEqual(len(self.obj_fields),
+                         self._test_class.count(self.context))
+
     def test_update_non_existent_object_raises_not_found(self):
         obj = self._make_object(self.obj_fields[0])
         obj.obj_reset_changes()
@@ -1651,6 +1679,58 @@ class BaseDbObjectTestCase(_BaseObjectTestCase,
                                           **obj._get_composite_keys())
         self.assertEqual(2, mock_commit.call_count)
 
+    def test_get_object_cached(self):
+        obj = self._make_object(self.obj_fields[0])
+        obj.create()
+        keys = obj._get_composite_keys()
+        with base.object_cache(self.context), \
+                mock.patch.object(obj_db_api, 'get_object',
+                                  side_effect=obj_db_api.get_object) as get:
+            first = self._test_class.get_object(self.context, **keys)
+            second = self._test_class.get_object(self.context, **keys)
+            self.assertEqual(1, len(
+                [call for call in get.call_args_list
+                 if call[0][1] is self._test_class.db_model]))
+            self.assertEqual(first, second)
+            self.assertIsNot(first, second)
+
+            second.delete()
+            self.assertIsNone(
+                self._test_class.get_object(self.context, **keys))
+        self.assertIsNone(base.get_object_cache(self.context))
+
+    def test_get_objects_cached(self):
+        obj = self._make_object(self.obj_fields[0])
+        obj.create()
+        keys = obj._get_composite_keys()
+        with base.object_cache(self.context), \
+                mock.patch.object(obj_db_api, 'get_objects',
+                                  side_effect=obj_db_api.get_objects) as get:
+            objs = self._test_class.get_objects(self.context)
+            self.assertEqual(objs, self._test_class.get_objects(self.context))
+            # listed objects are cached under their primary keys
+            self.assertEqual(
+                obj, self._test_class.get_object(self.context, **keys))
+            self.assertEqual(1, len(
+                [call for call in get.call_args_list
+                 if call[0][1] is self._test_class.db_model]))
+
+            self._make_object(self.obj_fields[1]).create()
+            self.assertEqual(
+                len(objs) + 1,
+                len(self._test_class.get_objects(self.context)))
+
+    def test_get_objects_cache_invalidated_by_flush(self):
+        self._make_object(self.obj_fields[0]).create()
+        with base.object_cache(self.context), \
+                mock.patch.object(base, '_invalidate_object_cache'):
+            objs = self._test_class.get_objects(self.context)
+            # the write is only seen through the flush of the session
+            self._make_object(self.obj_fields[1]).create()
+            self.assertEqual(
+                len(objs) + 1,
+                len(self._test_class.get_objects(self.context)))
+
     def test_get_objects_supports_extra_filtername(self):
         self.filtered_args = None
 
@@ -1972,3 +2052,28 @@ class OperationOnStringAndJsonTestCase(test_base.BaseTestCase):
                 res = base.NeutronDbObject.filter_to_json_str(field_val,
                                                               default_val)
                 self.assertEqual(default_val, res)
+
+
+class ObjectCacheTestCase(test_base.BaseTestCase):
+    def test_elevated_context_shares_cache(self):
+        ctx = context.Context('fake_user', 'fake_project')
+        with base.object_cache(ctx) as cache:
+            self.assertIs(cache, base.get_object_cache(ctx.elevated()))
+
+    def test_get_key_per_context_scope(self):
+        ctx = context.Context('fake_user', 'fake_project')
+        other_ctx = context.Context('fake_user', 'other_project')
+        filters = {'id': 'fake_id'}
+        key = base.ObjectCache.get_key(ctx, 'one', filters)
+        self.assertEqual(
+            key, base.ObjectCache.get_key(ctx, 'one', dict(filters)))
+        self.assertNotEqual(
+            key, base.ObjectCache.get_key(ctx.elevated(), 'one', filters))
+        self.assertNotEqual(
+            key, base.ObjectCache.get_key(other_ctx, 'one', filters))
+
+    def test_cache_inactive_out_of_context(self):
+        ctx = context.Context('fake_user', 'fake_project')
+        with base.object_cache(ctx) as cache:
+            self.assertIn(cache, base._get_active_object_caches())
+        self.assertNotIn(cache, base._get_active_object_caches())
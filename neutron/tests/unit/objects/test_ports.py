@@ -326,10 +326,6 @@ class PortDbObjectTestCase(obj_test_base.BaseDbObjectTestCase,
             self.context, policy_id=old_policy_id)
         self.assertEqual(0, len(qos_binding_obj))
 
-    def test_get_objects_queries_constant(self):
-        self.skipTest(
-            'Port object loads segment info without relationships')
-
     def test_v1_1_to_v1_0_drops_data_plane_status(self):
         port_new = self._create_test_port()
         port_v1_0 = port_new.obj_to_primitive(target_version='1.0')
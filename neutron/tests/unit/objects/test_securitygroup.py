@@ -88,15 +88,6 @@ class SecurityGroupDbObjTestCase(test_base.BaseDbObjectTestCase,
         self.assertIsNotNone(listed_obj)
         self.assertEqual(sg_obj, listed_obj)
 
-    def test_get_objects_queries_constant(self):
-        # TODO(electrocucaracha) SecurityGroup is using SecurityGroupRule
-        # object to reload rules, which costs extra SQL query each time
-        # is_default field is loaded as part of get_object(s). SecurityGroup
-        # has defined relationship for SecurityGroupRules, so it should be
-        # possible to reuse side loaded values fo this. To be reworked in
-        # follow-up patch.
-        pass
-
 
 class DefaultSecurityGroupIfaceObjTestCase(test_base.BaseObjectIfaceTestCase):
 
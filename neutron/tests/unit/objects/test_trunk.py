@@ -71,6 +71,24 @@ class SubPortDbObjectTestCase(test_base.BaseDbObjectTestCase,
         sub_port = self._make_object(obj)
         self.assertRaises(t_exc.TrunkNotFound, sub_port.create)
 
+    def test_create_objects_trunk_not_found(self):
+        objs_data = [dict(fields) for fields in self.obj_fields]
+        objs_data[-1]['trunk_id'] = uuidutils.generate_uuid()
+
+        self.assertRaises(t_exc.TrunkNotFound,
+                          self._test_class.create_objects,
+                          self.context, objs_data)
+        self.assertEqual([], self._test_class.get_objects(self.context))
+
+    def test_create_objects_duplicates(self):
+        objs_data = [dict(fields) for fields in self.obj_fields]
+        self._make_object(objs_data[0]).create()
+
+        self.assertRaises(t_exc.DuplicateSubPort,
+                          self._test_class.create_objects,
+                          self.context, objs_data)
+        self.assertEqual(1, self._test_class.count(self.context))
+
 
 class TrunkObjectTestCase(test_base.BaseObjectIfaceTestCase):
 
@@ -27,9 +27,11 @@ from neutron.plugins.ml2.drivers import type_tunnel
 
 TUNNEL_IP_ONE = "10.10.10.10"
 TUNNEL_IP_TWO = "10.10.10.20"
+TUNNEL_IP_THREE = "10.10.10.30"
 TUNNEL_IPV6_ONE = "2001:db8:1::10"
 HOST_ONE = 'fake_host_one'
 HOST_TWO = 'fake_host_two'
+HOST_THREE = 'fake_host_three'
 TUN_MIN = 100
 TUN_MAX = 109
 TUNNEL_RANGES = [(TUN_MIN, TUN_MAX)]
@@ -393,6 +395,24 @@ class TunnelRpcCallbackTestMixin(object):
                   'host': HOST_TWO}
         self._test_tunnel_sync(kwargs, False)
 
+    def test_tunnel_sync_with_sync_token(self):
+        self.driver.add_endpoint(TUNNEL_IP_TWO, HOST_TWO)
+        kwargs = {'tunnel_ip': TUNNEL_IP_ONE, 'tunnel_type': self.TYPE,
+                  'host': HOST_ONE}
+        with mock.patch.object(self.notifier, 'tunnel_update'):
+            details = self.callbacks.tunnel_sync('fake_context', **kwargs)
+            self.assertEqual(2, len(details['tunnels']))
+            # the endpoints didn't change since the agent got them
+            kwargs['sync_token'] = details['sync_token']
+            details = self.callbacks.tunnel_sync('fake_context', **kwargs)
+            self.assertEqual([], details['tunnels'])
+            self.assertEqual(kwargs['sync_token'], details['sync_token'])
+            # a new endpoint changes the token, all the endpoints are sent
+            self.driver.add_endpoint(TUNNEL_IP_THREE, HOST_THREE)
+            details = self.callbacks.tunnel_sync('fake_context', **kwargs)
+            self.assertEqual(3, len(details['tunnels']))
+            self.assertNotEqual(kwargs['sync_token'], details['sync_token'])
+
     def test_tunnel_sync_called_without_tunnel_ip(self):
         kwargs = {'tunnel_type': self.TYPE, 'host': None}
         self._test_tunnel_sync_raises(kwargs)
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
 from neutron_lib.api.definitions import portbindings
 from neutron_lib import constants
 from neutron_lib import context
@@ -171,6 +172,19 @@ class TestL2PopulationDBTestCase(testlib_api.SqlTestCase):
         _, agent = fdb_network_ports[0]
         self.assertEqual(constants.AGENT_TYPE_OVS, agent.agent_type)
 
+    def test_get_nondistributed_active_network_ports_parses_agents_once(self):
+        for i in range(3):
+            self._setup_port_binding(dvr=False)
+        helpers.register_l3_agent()
+        helpers.register_ovs_agent()
+        with mock.patch.object(l2pop_db, 'get_agent_ip',
+                               wraps=l2pop_db.get_agent_ip) as get_agent_ip:
+            fdb_network_ports = (
+                l2pop_db.get_nondistributed_active_network_ports(
+                    self.ctx.session, TEST_NETWORK_ID))
+        self.assertEqual(3, len(fdb_network_ports))
+        self.assertEqual(2, get_agent_ip.call_count)
+
     def test_get_nondistributed_active_network_ports_no_candidate(self):
         self._setup_port_binding(dvr=False)
         # Register a bunch of non-L2 agents on the same host
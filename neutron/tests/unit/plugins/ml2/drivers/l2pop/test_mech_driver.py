@@ -23,6 +23,7 @@ from neutron_lib import context
 from neutron_lib import exceptions
 from neutron_lib.plugins import constants as plugin_constants
 from neutron_lib.plugins import directory
+from oslo_config import cfg
 from oslo_serialization import jsonutils
 import testtools
 
@@ -1186,9 +1187,17 @@ class TestL2PopulationMechDriver(base.BaseTestCase):
         agent.host = HOST
         network_ports = ((None, agent),)
         with mock.patch.object(l2pop_db, 'get_agent_ip',
-                               return_value=agent_ip):
+                               return_value=agent_ip),\
+                mock.patch.object(l2pop_db,
+                                  'get_nondistributed_active_network_ports',
+                                  return_value=[]),\
+                mock.patch.object(l2pop_db,
+                                  'get_distributed_active_network_ports',
+                                  return_value=network_ports):
+            fdb_index = mech_driver._get_network_fdb_index(mock.Mock(),
+                                                           'network_id')
             excluded_host = HOST + '-EXCLUDE' if exclude_host else HOST
-            return mech_driver._get_tunnels(network_ports, excluded_host)
+            return mech_driver._get_tunnels(fdb_index, excluded_host)
 
     def test_get_tunnels(self):
         tunnels = self._test_get_tunnels('20.0.0.1')
@@ -1202,6 +1211,71 @@ class TestL2PopulationMechDriver(base.BaseTestCase):
         tunnels = self._test_get_tunnels(None, exclude_host=False)
         self.assertEqual(0, len(tunnels))
 
+    def test_get_network_fdb_index(self):
+        mech_driver = l2pop_mech_driver.L2populationMechanismDriver()
+        bindings = [mock.Mock(port={'id': i}) for i in range(3)]
+        agent_1, agent_2, agent_3 = mock.Mock(), mock.Mock(), mock.Mock()
+        agent_1.host = HOST + '1'
+        agent_2.host = HOST + '2'
+        agent_3.host = HOST + '3'
+        agent_ips = {agent_1: '20.0.0.1', agent_2: '20.0.0.2',
+                     agent_3: '20.0.0.1'}
+        with mock.patch.object(l2pop_db, 'get_agent_ip',
+                               side_effect=agent_ips.get) as get_agent_ip,\
+                mock.patch.object(
+                    l2pop_db, 'get_nondistributed_active_network_ports',
+                    return_value=[(bindings[0], agent_1),
+                                  (bindings[1], agent_1),
+                                  (bindings[2], agent_2)]),\
+                mock.patch.object(l2pop_db,
+                                  'get_distributed_active_network_ports',
+                                  return_value=[(None, agent_2),
+                                                (None, agent_3)]):
+            fdb_index = mech_driver._get_network_fdb_index(mock.Mock(),
+                                                           'network_id')
+        self.assertEqual(
+            {'20.0.0.1': {'hosts': {HOST + '1', HOST + '3'},
+                          'ports': [{'id': 0}, {'id': 1}]},
+             '20.0.0.2': {'hosts': {HOST + '2'}, 'ports': [{'id': 2}]}},
+            fdb_index)
+        # the configurations of each agent are parsed once
+        self.assertEqual(3, get_agent_ip.call_count)
+
+    def _test_is_full_fdb_needed(self, mech_driver, agent, network_id,
+                                 agent_active_ports, uptime=0):
+        with mock.patch.object(l2pop_db, 'get_agent_uptime',
+                               return_value=uptime):
+            return mech_driver._is_full_fdb_needed(agent, network_id,
+                                                   agent_active_ports)
+
+    def test_is_full_fdb_needed(self):
+        mech_driver = l2pop_mech_driver.L2populationMechanismDriver()
+        agent = mock.Mock(host=HOST, started_at=1)
+        boot_time = cfg.CONF.l2pop.agent_boot_time
+        self.assertTrue(self._test_is_full_fdb_needed(
+            mech_driver, agent, 'net-1', 1, uptime=boot_time))
+        self.assertFalse(self._test_is_full_fdb_needed(
+            mech_driver, agent, 'net-1', 2, uptime=boot_time))
+
+    def test_is_full_fdb_needed_once_per_network_while_booting(self):
+        mech_driver = l2pop_mech_driver.L2populationMechanismDriver()
+        agent = mock.Mock(host=HOST, started_at=1)
+        self.assertTrue(self._test_is_full_fdb_needed(
+            mech_driver, agent, 'net-1', 5))
+        self.assertFalse(self._test_is_full_fdb_needed(
+            mech_driver, agent, 'net-1', 6))
+        self.assertTrue(self._test_is_full_fdb_needed(
+            mech_driver, agent, 'net-2', 5))
+        # the agent restarted
+        agent.started_at = 2
+        self.assertTrue(self._test_is_full_fdb_needed(
+            mech_driver, agent, 'net-1', 6))
+        # the agent booted
+        self.assertFalse(self._test_is_full_fdb_needed(
+            mech_driver, agent, 'net-1', 7,
+            uptime=cfg.CONF.l2pop.agent_boot_time))
+        self.assertEqual({}, mech_driver._booting_agents)
+
     def _test_create_agent_fdb(self, fdb_network_ports, agent_ips):
         mech_driver = l2pop_mech_driver.L2populationMechanismDriver()
         tunnel_network_ports, tunnel_agent = (
@@ -0,0 +1,232 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import itertools
+
+import mock
+from oslo_utils import importutils
+
+from neutron.agent.common import ovs_lib
+from neutron.tests.unit.plugins.ml2.drivers.openvswitch.agent \
+    import ovs_test_base
+
+
+call = mock.call  # short hand
+
+_OFSWITCH_MODULE = ('neutron.plugins.ml2.drivers.openvswitch.agent.'
+                    'openflow.native.ofswitch')
+
+
+class FlowModBatchTestCase(ovs_test_base.OVSRyuTestBase):
+    def setUp(self):
+        super(FlowModBatchTestCase, self).setUp()
+        self.ofswitch = importutils.import_module(_OFSWITCH_MODULE)
+        mock.patch.object(self.ofswitch, '_BUNDLE_IDS',
+                          itertools.count(42)).start()
+        self.ofp = importutils.import_module('ryu.ofproto.ofproto_v1_3')
+        self.ofpp = importutils.import_module(
+            'ryu.ofproto.ofproto_v1_3_parser')
+        self.br = self.br_tun_cls('br-tun')
+        self.stamp = self.br.default_cookie
+        self.dp = mock.Mock()
+        self.dp.send_msg.return_value = True
+        xids = itertools.count(1)
+        self.dp.set_xid.side_effect = lambda msg: next(xids)
+        mock.patch.object(self.br, '_get_dp', autospec=True,
+                          return_value=(self.dp, self.ofp,
+                                        self.ofpp)).start()
+        self.mock = mock.Mock()
+        self.mock.attach_mock(
+            mock.patch.object(self.br, '_send_msg').start(), '_send_msg')
+        self.mock.attach_mock(self.dp.send_msg, 'send_msg')
+
+    def _drop(self, in_port):
+        return self.ofpp.OFPFlowMod(self.dp,
+                                    cookie=self.stamp,
+                                    instructions=[],
+                                    match=self.ofpp.OFPMatch(in_port=in_port),
+                                    priority=2,
+                                    table_id=0)
+
+    def _delete(self, in_port):
+        return self.ofpp.OFPFlowMod(self.dp,
+                                    command=self.ofp.OFPFC_DELETE,
+                                    cookie=self.stamp,
+                                    cookie_mask=ovs_lib.UINT64_BITMASK,
+                                    match=self.ofpp.OFPMatch(in_port=in_port),
+                                    out_group=self.ofp.OFPG_ANY,
+                                    out_port=self.ofp.OFPP_ANY,
+                                    priority=0,
+                                    table_id=self.ofp.OFPTT_ALL)
+
+    def _drop_ports(self, in_ports, bundle=False):
+        with self.br.deferred(bundle=bundle) as deferred_br:
+            for in_port in in_ports:
+                deferred_br.drop_port(in_port=in_port)
+
+    def test_deferred(self):
+        with self.br.deferred() as deferred_br:
+            deferred_br.drop_port(in_port=1)
+            deferred_br.uninstall_flows(in_port=2)
+            deferred_br.drop_port(in_port=3)
+            self.assertEqual([], self.mock.mock_calls)
+        expected = [
+            call.send_msg(self._drop(1)),
+            call.send_msg(self._delete(2)),
+            call.send_msg(self._drop(3)),
+            call._send_msg(self.ofpp.OFPBarrierRequest(self.dp)),
+        ]
+        self.assertEqual(expected, self.mock.mock_calls)
+
+    def test_deferred_wrapped_bridge_not_deferred(self):
+        with self.br.deferred() as deferred_br:
+            deferred_br.drop_port(in_port=1)
+            self.br.drop_port(in_port=2)
+        expected = [
+            call._send_msg(self._drop(2)),
+            call.send_msg(self._drop(1)),
+            call._send_msg(self.ofpp.OFPBarrierRequest(self.dp)),
+        ]
+        self.assertEqual(expected, self.mock.mock_calls)
+
+    def test_deferred_nothing_to_send(self):
+        with self.br.deferred():
+            pass
+        self.assertEqual([], self.mock.mock_calls)
+
+    def test_deferred_nested(self):
+        with self.br.deferred() as deferred_br:
+            deferred_br.drop_port(in_port=1)
+            with deferred_br.deferred() as nested_br:
+                self.assertIs(deferred_br, nested_br)
+                nested_br.drop_port(in_port=2)
+            self.assertEqual([], self.mock.mock_calls)
+        expected = [
+            call.send_msg(self._drop(1)),
+            call.send_msg(self._drop(2)),
+            call._send_msg(self.ofpp.OFPBarrierRequest(self.dp)),
+        ]
+        self.assertEqual(expected, self.mock.mock_calls)
+
+    def test_deferred_exception_discards(self):
+        def drop_ports_and_fail():
+            with self.br.deferred() as deferred_br:
+                deferred_br.drop_port(in_port=1)
+                raise ValueError()
+
+        self.assertRaises(ValueError, drop_ports_and_fail)
+        self.assertEqual([], self.mock.mock_calls)
+
+    def test_deferred_send_failure(self):
+        self.dp.send_msg.side_effect = [True, False]
+        self.assertRaises(RuntimeError, self._drop_ports, [1, 2, 3])
+        # the barrier is not sent
+        expected = [
+            call.send_msg(self._drop(1)),
+            call.send_msg(self._drop(2)),
+        ]
+        self.assertEqual(expected, self.mock.mock_calls)
+
+    def _reply_error(self, xid, call_count=None):
+        def send_msg(msg):
+            if self.dp.send_msg.call_count == (call_count or xid):
+                self.ofswitch.handle_error_msg(
+                    mock.Mock(datapath=self.dp, xid=xid))
+            return True
+        self.dp.send_msg.side_effect = send_msg
+
+    def test_deferred_flow_mod_error(self):
+        self._reply_error(2)
+        self.assertRaises(RuntimeError, self._drop_ports, [1, 2, 3])
+        # the barrier is waited for before raising
+        expected = [
+            call.send_msg(self._drop(1)),
+            call.send_msg(self._drop(2)),
+            call.send_msg(self._drop(3)),
+            call._send_msg(self.ofpp.OFPBarrierRequest(self.dp)),
+        ]
+        self.assertEqual(expected, self.mock.mock_calls)
+        self.assertEqual({}, self.ofswitch._PENDING_FLOW_MODS)
+
+    def test_deferred_other_error_ignored(self):
+        # an error replied to a message not sent by send_flow_mods
+        self._reply_error(42, call_count=1)
+        self._drop_ports([1])
+        self.assertEqual({}, self.ofswitch._PENDING_FLOW_MODS)
+
+    def _bundle_ctrl(self, type_):
+        return self.ofpp.ONFBundleCtrlMsg(
+            self.dp, 42, type_,
+            self.ofp.ONF_BF_ATOMIC | self.ofp.ONF_BF_ORDERED, [])
+
+    def _bundle_add(self, msg):
+        return self.ofpp.ONFBundleAddMsg(
+            self.dp, 42, self.ofp.ONF_BF_ATOMIC | self.ofp.ONF_BF_ORDERED,
+            msg, [])
+
+    def test_deferred_bundle(self):
+        self.br._send_msg.side_effect = [
+            mock.Mock(type=self.ofp.ONF_BCT_OPEN_REPLY),
+            mock.Mock(type=self.ofp.ONF_BCT_COMMIT_REPLY),
+        ]
+        with self.br.deferred(bundle=True) as deferred_br:
+            deferred_br.drop_port(in_port=1)
+            deferred_br.uninstall_flows(in_port=2)
+        reply_cls = self.ofpp.ONFBundleCtrlMsg
+        expected = [
+            call._send_msg(self._bundle_ctrl(self.ofp.ONF_BCT_OPEN_REQUEST),
+                           reply_cls=reply_cls),
+            call.send_msg(self._bundle_add(self._drop(1))),
+            call.send_msg(self._bundle_add(self._delete(2))),
+            call._send_msg(self._bundle_ctrl(self.ofp.ONF_BCT_COMMIT_REQUEST),
+                           reply_cls=reply_cls),
+        ]
+        self.assertEqual(expected, self.mock.mock_calls)
+
+    def test_deferred_bundle_commit_failure(self):
+        self.br._send_msg.side_effect = [
+            mock.Mock(type=self.ofp.ONF_BCT_OPEN_REPLY),
+            RuntimeError(),
+        ]
+        self.assertRaises(RuntimeError, self._drop_ports, [1], bundle=True)
+
+    def test_deferred_bundle_send_failure_discards(self):
+        self.br._send_msg.side_effect = [
+            mock.Mock(type=self.ofp.ONF_BCT_OPEN_REPLY),
+            mock.Mock(type=self.ofp.ONF_BCT_DISCARD_REPLY),
+        ]
+        self.dp.send_msg.return_value = False
+        self.assertRaises(RuntimeError, self._drop_ports, [1], bundle=True)
+        reply_cls = self.ofpp.ONFBundleCtrlMsg
+        expected = [
+            call._send_msg(self._bundle_ctrl(self.ofp.ONF_BCT_OPEN_REQUEST),
+                           reply_cls=reply_cls),
+            call.send_msg(self._bundle_add(self._drop(1))),
+            call._send_msg(
+                self._bundle_ctrl(self.ofp.ONF_BCT_DISCARD_REQUEST),
+                reply_cls=reply_cls),
+        ]
+        self.assertEqual(expected, self.mock.mock_calls)
+
+    def test_deferred_bundle_unexpected_reply(self):
+        self.br._send_msg.return_value = mock.Mock(
+            type=self.ofp.ONF_BCT_CLOSE_REPLY)
+        self.assertRaises(RuntimeError, self._drop_ports, [1], bundle=True)
+        self.dp.send_msg.assert_not_called()
+
+    def test_cleanup_flows(self):
+        flows = [mock.Mock(cookie=cookie) for cookie in (1, 2, 2)]
+        with mock.patch.object(self.br, 'dump_flows', return_value=flows):
+            self.br.cleanup_flows()
+        self.assertEqual(2, self.dp.send_msg.call_count)
+        self.br._send_msg.assert_called_once_with(
+            self.ofpp.OFPBarrierRequest(self.dp))
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import sys
 import time
 
@@ -344,20 +345,21 @@ class TestOvsNeutronAgent(object):
 
     def _test_port_dead(self, cur_tag=None):
         port = mock.Mock()
+        port.port_name = 'tap1'
         port.ofport = 1
         with mock.patch.object(self.agent, 'int_br') as int_br:
-            int_br.db_get_val.return_value = cur_tag
+            int_br.get_ports_attributes.return_value = [
+                {'name': 'tap1', 'tag': cur_tag}]
             self.agent.port_dead(port)
+        batch = int_br.ovsdb_batch.return_value.__enter__.return_value
         if cur_tag is None or cur_tag == constants.DEAD_VLAN_TAG:
-            self.assertFalse(int_br.set_db_attribute.called)
+            self.assertFalse(int_br.ovsdb_batch.called)
             self.assertFalse(int_br.drop_port.called)
         else:
-            int_br.assert_has_calls([
-                mock.call.set_db_attribute("Port", mock.ANY, "tag",
-                                           constants.DEAD_VLAN_TAG,
-                                           log_errors=True),
-                mock.call.drop_port(in_port=port.ofport),
-            ])
+            int_br.ovsdb_batch.assert_called_once_with(log_errors=True)
+            batch.set_db_attribute.assert_called_once_with(
+                "Port", "tap1", "tag", constants.DEAD_VLAN_TAG)
+            int_br.drop_port.assert_called_once_with(in_port=port.ofport)
 
     def test_port_dead(self):
         self._test_port_dead()
@@ -368,6 +370,31 @@ class TestOvsNeutronAgent(object):
     def test_port_dead_with_valid_tag(self):
         self._test_port_dead(cur_tag=1)
 
+    def test_ports_dead(self):
+        ports = []
+        for i, tag in enumerate([1, constants.DEAD_VLAN_TAG, [], 2]):
+            port = mock.Mock(port_name='tap%d' % i, ofport=i + 1)
+            ports.append(port)
+        with mock.patch.object(self.agent, 'int_br') as int_br:
+            int_br.get_ports_attributes.return_value = [
+                {'name': 'tap%d' % i, 'tag': tag} for i, tag in
+                enumerate([1, constants.DEAD_VLAN_TAG, [], 2])]
+            self.agent.ports_dead(ports, log_errors=False)
+        int_br.get_ports_attributes.assert_called_once_with(
+            "Port", columns=["name", "tag"],
+            ports=['tap0', 'tap1', 'tap2', 'tap3'], if_exists=True,
+            check_error=False, log_errors=False)
+        # the dead ports are tagged in a single transaction
+        int_br.ovsdb_batch.assert_called_once_with(log_errors=False)
+        batch = int_br.ovsdb_batch.return_value.__enter__.return_value
+        batch.set_db_attribute.assert_has_calls([
+            mock.call("Port", "tap0", "tag", constants.DEAD_VLAN_TAG),
+            mock.call("Port", "tap3", "tag", constants.DEAD_VLAN_TAG)])
+        self.assertEqual(2, batch.set_db_attribute.call_count)
+        int_br.drop_port.assert_has_calls([
+            mock.call(in_port=1), mock.call(in_port=4)])
+        self.assertEqual(2, int_br.drop_port.call_count)
+
     def mock_scan_ports(self, vif_port_set=None, registered_ports=None,
                         updated_ports=None, port_tags_dict=None, sync=False):
         if port_tags_dict is None:  # Because empty dicts evaluate as False.
@@ -736,6 +763,14 @@ class TestOvsNeutronAgent(object):
             update_devices.assert_called_once_with(mock.ANY, devices_up,
                                                    devices_down,
                                                    mock.ANY, mock.ANY)
+        # the tags of all the ports are set in a single transaction
+        int_br.ovsdb_batch.assert_called_once_with()
+        batch = int_br.ovsdb_batch.return_value.__enter__.return_value
+        lvm = self.agent.vlan_manager.get('net1')
+        batch.set_db_attribute.assert_has_calls([
+            mock.call("Port", "tap1", "tag", lvm.vlan),
+            mock.call("Port", "tap2", "tag", lvm.vlan)], any_order=True)
+        self.assertFalse(int_br.set_db_attribute.called)
 
     def _test_arp_spoofing(self, enable_prevent_arp_spoofing):
         self.agent.prevent_arp_spoofing = enable_prevent_arp_spoofing
@@ -804,13 +839,13 @@ class TestOvsNeutronAgent(object):
         port = mock.Mock()
         port.ofport = -1
         self.assertFalse(self._mock_treat_devices_added_updated(
-            mock.MagicMock(), port, 'port_dead'))
+            mock.MagicMock(), port, 'ports_dead'))
 
     def test_treat_devices_added_updated_marks_unknown_port_as_dead(self):
         port = mock.Mock()
         port.ofport = 1
         self.assertTrue(self._mock_treat_devices_added_updated(
-            mock.MagicMock(), port, 'port_dead'))
+            mock.MagicMock(), port, 'ports_dead'))
 
     def test_treat_devices_added_does_not_process_missing_port(self):
         with mock.patch.object(
@@ -1114,7 +1149,7 @@ class TestOvsNeutronAgent(object):
         self.agent._update_port_network(TEST_PORT_ID1, TEST_NETWORK_ID1)
         self.agent.port_delete(context=None, port_id=TEST_PORT_ID1)
         self.agent.sg_agent = mock.Mock()
-        self.agent.int_br = mock.Mock()
+        self.agent.int_br = mock.MagicMock()
         self.agent.process_deleted_ports(port_info={})
         self.assertEqual(set(), self.agent.network_ports[TEST_NETWORK_ID1])
 
@@ -1158,23 +1193,44 @@ class TestOvsNeutronAgent(object):
         with mock.patch.object(self.agent, 'int_br') as int_br:
             int_br.get_vif_by_port_id.return_value = vif.port_name
             int_br.get_vif_port_by_id.return_value = vif
+            int_br.get_ports_attributes.return_value = [
+                {'name': vif.port_name, 'tag': 1}]
             self.agent.port_delete("unused_context",
                                    port_id='id')
             self.agent.process_deleted_ports(port_info={})
             # the main things we care about are that it gets put in the
             # dead vlan and gets blocked
-            int_br.set_db_attribute.assert_any_call(
-                'Port', vif.port_name, 'tag', constants.DEAD_VLAN_TAG,
-                log_errors=False)
+            int_br.ovsdb_batch.assert_called_once_with(log_errors=False)
+            batch = int_br.ovsdb_batch.return_value.__enter__.return_value
+            batch.set_db_attribute.assert_any_call(
+                'Port', vif.port_name, 'tag', constants.DEAD_VLAN_TAG)
             int_br.drop_port.assert_called_once_with(in_port=vif.ofport)
 
+    def test_process_deleted_ports_port_deleted_meanwhile(self):
+        self.agent.port_delete("unused_context", port_id='id1')
+
+        def get_vif_port_by_id(port_id):
+            if port_id == 'id1':
+                # port_delete received while the deleted ports are processed
+                self.agent.port_delete("unused_context", port_id='id2')
+
+        self.agent.sg_agent = mock.Mock()
+        with mock.patch.object(self.agent, 'int_br') as int_br,\
+                mock.patch.object(self.agent, 'port_unbound') as unbound:
+            int_br.get_vif_port_by_id.side_effect = get_vif_port_by_id
+            self.agent.process_deleted_ports(port_info={})
+        self.assertEqual(set(), self.agent.deleted_ports)
+        unbound.assert_has_calls([mock.call('id1'), mock.call('id2')])
+        self.agent.sg_agent.remove_devices_filter.assert_called_once_with(
+            ['id1', 'id2'])
+
     def test_port_delete_removed_port(self):
         with mock.patch.object(self.agent, 'int_br') as int_br:
             self.agent.port_delete("unused_context",
                                    port_id='id')
             # if it was removed from the bridge, we shouldn't be processing it
             self.agent.process_deleted_ports(port_info={'removed': {'id', }})
-            self.assertFalse(int_br.set_db_attribute.called)
+            self.assertFalse(int_br.ovsdb_batch.called)
             self.assertFalse(int_br.drop_port.called)
 
     def _test_setup_physical_bridges(self, port_exists=False):
@@ -1545,10 +1601,10 @@ class TestOvsNeutronAgent(object):
                 mock.call.deferred().__enter__(),
                 deferred_br_call.delete_arp_responder('vlan2', FAKE_IP1),
                 deferred_br_call.delete_unicast_to_tun('vlan2', FAKE_MAC),
-                deferred_br_call.install_flood_to_tun('vlan2', 'seg2',
-                                                      set(['1'])),
                 deferred_br_call.delete_port('gre-02020202'),
                 deferred_br_call.cleanup_tunnel_port('2'),
+                deferred_br_call.install_flood_to_tun('vlan2', 'seg2',
+                                                      set(['1'])),
                 mock.call.deferred().__exit__(None, None, None),
             ]
             br_tun.assert_has_calls(expected_calls)
@@ -1570,7 +1626,81 @@ class TestOvsNeutronAgent(object):
             self.agent.fdb_add(None, fdb_entry)
             deferred_br = tun_br.deferred().__enter__()
             add_tun_fn.assert_called_with(
-                deferred_br, 'gre-0a0a0a0a', '10.10.10.10', 'gre')
+                mock.ANY, 'gre-0a0a0a0a', '10.10.10.10', 'gre')
+            self.assertIs(deferred_br, add_tun_fn.call_args[0][0].br)
+
+    def test_fdb_add_flows_single_transaction(self):
+        self._prepare_l2_pop_ofports()
+        fdb_entry = {'net1':
+                     {'network_type': 'gre',
+                      'segment_id': 'tun1',
+                      'ports':
+                      {'1.1.1.1': [n_const.FLOODING_ENTRY],
+                       '2.2.2.2':
+                       [l2pop_rpc.PortInfo(FAKE_MAC, FAKE_IP1),
+                        n_const.FLOODING_ENTRY]}},
+                     'net2':
+                     {'network_type': 'gre',
+                      'segment_id': 'tun2',
+                      'ports':
+                      {'1.1.1.1': [n_const.FLOODING_ENTRY],
+                       '2.2.2.2': [n_const.FLOODING_ENTRY]}}}
+        with mock.patch.object(self.agent, 'tun_br', autospec=True) as tun_br:
+            self.agent.fdb_add(None, fdb_entry)
+            tun_br.deferred.assert_called_once_with()
+            deferred_br = tun_br.deferred().__enter__()
+            # the flooding flow of each local vlan is written once
+            self.assertEqual(2, deferred_br.install_flood_to_tun.call_count)
+            deferred_br.install_flood_to_tun.assert_has_calls([
+                mock.call('vlan1', 'seg1', set(['1', '2'])),
+                mock.call('vlan2', 'seg2', set(['1', '2']))],
+                any_order=True)
+            deferred_br.install_unicast_to_tun.assert_called_once_with(
+                'vlan1', 'seg1', '2', FAKE_MAC)
+
+    def test_fdb_del_flows_single_transaction(self):
+        self._prepare_l2_pop_ofports()
+        fdb_entry = {'net1':
+                     {'network_type': 'gre',
+                      'segment_id': 'tun1',
+                      'ports': {'1.1.1.1': [n_const.FLOODING_ENTRY]}},
+                     'net2':
+                     {'network_type': 'gre',
+                      'segment_id': 'tun2',
+                      'ports':
+                      {'1.1.1.1': [n_const.FLOODING_ENTRY],
+                       '2.2.2.2': [n_const.FLOODING_ENTRY]}}}
+        with mock.patch.object(self.agent, 'tun_br', autospec=True) as tun_br:
+            self.agent.fdb_remove(None, fdb_entry)
+            tun_br.deferred.assert_called_once_with()
+            deferred_br = tun_br.deferred().__enter__()
+            self.assertFalse(deferred_br.install_flood_to_tun.called)
+            self.assertEqual(2, deferred_br.delete_flood_to_tun.call_count)
+            deferred_br.delete_flood_to_tun.assert_has_calls([
+                mock.call('vlan1'), mock.call('vlan2')], any_order=True)
+
+    def test_fdb_add_flows_dvr(self):
+        self._prepare_l2_pop_ofports()
+        self.agent.enable_distributed_routing = True
+        fdb_entry = {'net1':
+                     {'network_type': 'gre',
+                      'segment_id': 'tun1',
+                      'ports':
+                      {'2.2.2.2': [n_const.FLOODING_ENTRY]}},
+                     'net2':
+                     {'network_type': 'gre',
+                      'segment_id': 'tun2',
+                      'ports':
+                      {'1.1.1.1': [n_const.FLOODING_ENTRY],
+                       '2.2.2.2': [n_const.FLOODING_ENTRY]}}}
+        with mock.patch.object(self.agent, 'tun_br', autospec=True) as tun_br:
+            self.agent.fdb_add(None, fdb_entry)
+            self.assertFalse(tun_br.deferred.called)
+            self.assertEqual(2, tun_br.install_flood_to_tun.call_count)
+            tun_br.install_flood_to_tun.assert_has_calls([
+                mock.call('vlan1', 'seg1', set(['1', '2'])),
+                mock.call('vlan2', 'seg2', set(['1', '2']))],
+                any_order=True)
 
     def test_fdb_del_port(self):
         self._prepare_l2_pop_ofports()
@@ -1732,14 +1862,13 @@ class TestOvsNeutronAgent(object):
                                return_value=fake_tunnel_details),\
                 mock.patch.object(
                     self.agent,
-                    '_setup_tunnel_port') as _setup_tunnel_port_fn,\
+                    '_setup_tunnel_ports') as _setup_tunnel_ports_fn,\
                 mock.patch.object(self.agent,
                                   'cleanup_stale_flows') as cleanup:
             self.agent.tunnel_types = ['vxlan']
             self.agent.tunnel_sync()
-            expected_calls = [mock.call(self.agent.tun_br, 'vxlan-64651f0f',
-                                        '100.101.31.15', 'vxlan')]
-            _setup_tunnel_port_fn.assert_has_calls(expected_calls)
+            _setup_tunnel_ports_fn.assert_called_once_with(
+                self.agent.tun_br, ['100.101.31.15'], 'vxlan')
             self.assertEqual([], cleanup.mock_calls)
 
     def test_tunnel_sync_invalid_ip_address(self):
@@ -1748,17 +1877,21 @@ class TestOvsNeutronAgent(object):
         with mock.patch.object(self.agent.plugin_rpc,
                                'tunnel_sync',
                                return_value=fake_tunnel_details),\
+                mock.patch.object(self.agent.tun_br,
+                                  'add_tunnel_ports') as add_tunnel_ports_fn,\
                 mock.patch.object(
-                    self.agent,
-                    '_setup_tunnel_port') as _setup_tunnel_port_fn,\
+                    self.agent.tun_br, 'get_ports_ofport',
+                    return_value={'vxlan-64646464': 1}),\
                 mock.patch.object(self.agent,
                                   'cleanup_stale_flows') as cleanup:
             self.agent.tunnel_types = ['vxlan']
             self.agent.tunnel_sync()
-            _setup_tunnel_port_fn.assert_called_once_with(self.agent.tun_br,
-                                                          'vxlan-64646464',
-                                                          '100.100.100.100',
-                                                          'vxlan')
+            add_tunnel_ports_fn.assert_called_once_with(
+                {'vxlan-64646464': '100.100.100.100'}, self.agent.local_ip,
+                'vxlan', self.agent.vxlan_udp_port, self.agent.dont_fragment,
+                self.agent.tunnel_csum)
+            self.assertEqual({'100.100.100.100': 1},
+                             self.agent.tun_br_ofports['vxlan'])
             self.assertEqual([], cleanup.mock_calls)
 
     def test_tunnel_sync_setup_tunnel_flood_flow_once(self):
@@ -1769,20 +1902,83 @@ class TestOvsNeutronAgent(object):
                                return_value=fake_tunnel_details),\
                 mock.patch.object(
                     self.agent,
-                    '_setup_tunnel_port') as _setup_tunnel_port_fn,\
+                    '_setup_tunnel_ports') as _setup_tunnel_ports_fn,\
                 mock.patch.object(
                     self.agent,
                     '_setup_tunnel_flood_flow') as _setup_tunnel_flood_flow:
             self.agent.tunnel_types = ['vxlan']
             self.agent.tunnel_sync()
-            expected_calls = [mock.call(self.agent.tun_br, 'vxlan-c8c8c8c8',
-                                        '200.200.200.200', 'vxlan'),
-                              mock.call(self.agent.tun_br, 'vxlan-64646464',
-                                        '100.100.100.100', 'vxlan')]
-            _setup_tunnel_port_fn.assert_has_calls(expected_calls)
+            _setup_tunnel_ports_fn.assert_called_once_with(
+                self.agent.tun_br, ['200.200.200.200', '100.100.100.100'],
+                'vxlan')
             _setup_tunnel_flood_flow.assert_called_once_with(self.agent.tun_br,
                                                              'vxlan')
 
+    def test_tunnel_sync_skips_known_endpoints(self):
+        fake_tunnel_details = {'tunnels': [{'ip_address': '200.200.200.200'},
+                                           {'ip_address': '100.100.100.100'},
+                                           {'ip_address': '127.0.0.1'}],
+                               'sync_token': 'token'}
+        self.agent.tun_br_ofports['vxlan']['200.200.200.200'] = 1
+        with mock.patch.object(self.agent.plugin_rpc,
+                               'tunnel_sync',
+                               return_value=fake_tunnel_details) as sync_fn,\
+                mock.patch.object(
+                    self.agent,
+                    '_setup_tunnel_ports') as _setup_tunnel_ports_fn,\
+                mock.patch.object(self.agent, '_setup_tunnel_flood_flow'):
+            self.agent.tunnel_types = ['vxlan']
+            self.agent.tunnel_sync()
+            _setup_tunnel_ports_fn.assert_called_once_with(
+                self.agent.tun_br, ['100.100.100.100'], 'vxlan')
+            sync_fn.assert_called_once_with(
+                self.agent.context, self.agent.local_ip, 'vxlan',
+                self.agent.conf.host, sync_token=None)
+            self.assertEqual({'vxlan': 'token'},
+                             self.agent.tunnel_sync_tokens)
+            # The token is passed back to the server on the next sync
+            self.agent.tunnel_sync()
+            sync_fn.assert_called_with(
+                self.agent.context, self.agent.local_ip, 'vxlan',
+                self.agent.conf.host, sync_token='token')
+
+    def test_reset_tunnel_ofports_resets_sync_tokens(self):
+        self.agent.tunnel_sync_tokens = {'vxlan': 'token'}
+        self.agent._reset_tunnel_ofports()
+        self.assertEqual({}, self.agent.tunnel_sync_tokens)
+
+    def test_setup_tunnel_ports(self):
+        self.agent.local_ip = '10.0.0.1'
+        remote_ips = ['10.0.0.2', '10.0.0.3', '10.0.0.4', 'fe80::1']
+        ofports = {'vxlan-0a000002': 2, 'vxlan-0a000003': 3,
+                   'vxlan-0a000004': ovs_lib.INVALID_OFPORT}
+        with mock.patch.object(self.agent, 'tun_br', autospec=True) as tun_br,\
+                mock.patch.object(constants, 'TUNNEL_PORTS_BATCH_SIZE', 2),\
+                mock.patch.object(self.mod_agent.LOG, 'error') as log_error:
+            tun_br.get_ports_ofport.return_value = ofports
+            self.agent._setup_tunnel_ports(tun_br, remote_ips, 'vxlan')
+            # one OVSDB transaction per batch of ports, the IPv6 endpoint
+            # doesn't match the local IP version
+            tun_br.add_tunnel_ports.assert_has_calls([
+                mock.call({'vxlan-0a000002': '10.0.0.2',
+                           'vxlan-0a000003': '10.0.0.3'},
+                          '10.0.0.1', 'vxlan', self.agent.vxlan_udp_port,
+                          self.agent.dont_fragment, self.agent.tunnel_csum),
+                mock.call({'vxlan-0a000004': '10.0.0.4'},
+                          '10.0.0.1', 'vxlan', self.agent.vxlan_udp_port,
+                          self.agent.dont_fragment, self.agent.tunnel_csum)])
+            self.assertEqual(2, tun_br.add_tunnel_ports.call_count)
+            # the ofports are resolved at once
+            tun_br.get_ports_ofport.assert_called_once_with(
+                ['vxlan-0a000002', 'vxlan-0a000003', 'vxlan-0a000004'])
+            deferred_br = tun_br.deferred().__enter__()
+            deferred_br.setup_tunnel_port.assert_has_calls([
+                mock.call('vxlan', 2), mock.call('vxlan', 3)])
+            self.assertEqual(2, deferred_br.setup_tunnel_port.call_count)
+            self.assertEqual(2, log_error.call_count)
+        self.assertEqual({'10.0.0.2': 2, '10.0.0.3': 3},
+                         self.agent.tun_br_ofports['vxlan'])
+
     def test_tunnel_update(self):
         kwargs = {'tunnel_ip': '10.10.10.10',
                   'tunnel_type': 'gre'}
@@ -2138,6 +2334,47 @@ class TestOvsNeutronAgentOFCtl(TestOvsNeutronAgent,
             ]
             self.assertEqual(expected, del_flow.mock_calls)
 
+    def test_fdb_add_large_message(self):
+        # A l2pop message for many networks having ports on many hosts is
+        # sent to a fake ovs-ofctl, counting the commands and the flows
+        networks, hosts, ports = 20, 50, 5
+        self.agent.arp_responder_enabled = True
+        self.agent.tun_br_ofports[p_const.TYPE_VXLAN] = dict(
+            ('10.0.0.%d' % (h + 1), str(h + 1)) for h in range(hosts))
+        fdb_entries = {}
+        for n in range(networks):
+            net_id = 'net%d' % n
+            self.agent.vlan_manager.add(net_id, n + 1, p_const.TYPE_VXLAN,
+                                        None, n + 100)
+            fdb_entries[net_id] = {
+                'network_type': p_const.TYPE_VXLAN,
+                'segment_id': n + 100,
+                'ports': dict(
+                    ('10.0.0.%d' % (h + 1),
+                     [n_const.FLOODING_ENTRY] + [
+                         l2pop_rpc.PortInfo(
+                             'fa:16:3e:%02x:%02x:%02x' % (n, h, p),
+                             '192.168.%d.%d' % (h, p + 1))
+                         for p in range(ports)])
+                    for h in range(hosts))}
+        commands = collections.Counter()
+        flows = collections.Counter()
+
+        def run_ofctl(cmd, args, process_input=None):
+            commands[cmd] += 1
+            flows[cmd] += len(process_input.splitlines())
+
+        with mock.patch.object(self.agent.tun_br, 'run_ofctl',
+                               side_effect=run_ofctl):
+            self.agent.fdb_add(None, fdb_entries)
+        self.assertEqual({'add-flows': 1, 'mod-flows': 1}, commands)
+        # ARP responder and unicast flows for each port, a single flooding
+        # flow for each network
+        self.assertEqual(
+            {'add-flows': 2 * networks * hosts * ports,
+             'mod-flows': networks},
+            flows)
+
 
 class TestOvsNeutronAgentRyu(TestOvsNeutronAgent,
                              ovs_test_base.OVSRyuTestBase):
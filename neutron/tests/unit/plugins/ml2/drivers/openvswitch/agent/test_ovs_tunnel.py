@@ -504,19 +504,23 @@ class TunnelTest(object):
 
     def test_port_dead(self):
         self.mock_int_bridge_expected += [
-            mock.call.db_get_val('Port', VIF_PORT.port_name, 'tag',
-                                 log_errors=True),
-            mock.call.set_db_attribute(
+            mock.call.get_ports_attributes(
+                'Port', columns=['name', 'tag'], ports=[VIF_PORT.port_name],
+                if_exists=True, check_error=False, log_errors=True),
+            mock.call.ovsdb_batch(log_errors=True),
+            mock.call.ovsdb_batch().__enter__(),
+            mock.call.ovsdb_batch().__enter__().set_db_attribute(
                 'Port', VIF_PORT.port_name,
-                'tag', constants.DEAD_VLAN_TAG,
-                log_errors=True),
+                'tag', constants.DEAD_VLAN_TAG),
+            mock.call.ovsdb_batch().__exit__(None, None, None),
             mock.call.drop_port(in_port=VIF_PORT.ofport),
         ]
 
         a = self._build_agent()
         a.available_local_vlans = set([LV_ID])
         a.vlan_manager.add(NET_UUID, *self.LVM_DATA)
-        self.ovs_bridges[self.INT_BRIDGE].db_get_val.return_value = mock.Mock()
+        self.ovs_bridges[self.INT_BRIDGE].get_ports_attributes.return_value = [
+            {'name': VIF_PORT.port_name, 'tag': LV_ID}]
         a.port_dead(VIF_PORT)
         self._verify_mock_calls()
 
@@ -12,13 +12,16 @@
 # under the License.
 
 import mock
+from neutron_lib.callbacks import events
 from neutron_lib import context
 from neutron_lib.plugins import directory
 
+from neutron.api.rpc.callbacks import events as rpc_events
 from neutron.objects import network
 from neutron.objects import securitygroup
 from neutron.objects import subnet
 from neutron.plugins.ml2 import ovo_rpc
+from neutron.tests import base
 from neutron.tests.unit.plugins.ml2 import test_plugin
 
 
@@ -29,7 +32,8 @@ class OVOServerRpcInterfaceTestCase(test_plugin.Ml2PluginV2TestCase):
         self.plugin = directory.get_plugin()
         self.ctx = context.get_admin_context()
         self.received = []
-        receive = lambda s, ctx, obs, evt: self.received.append((obs[0], evt))
+        receive = lambda s, ctx, obs, evt: self.received.extend(
+            (obj, evt) for obj in obs)
         mock.patch('neutron.api.rpc.handlers.resources_rpc.'
                    'ResourcesPushRpcApi.push', new=receive).start()
         # base case blocks the handler
@@ -99,3 +103,58 @@ class OVOServerRpcInterfaceTestCase(test_plugin.Ml2PluginV2TestCase):
                                               'description': 'desc',
                                               'name': 'test'}})
             self.assertEqual([], self.received)
+
+
+class ObjectChangeHandlerTestCase(base.BaseTestCase):
+
+    def setUp(self):
+        super(ObjectChangeHandlerTestCase, self).setUp()
+        mock.patch.object(ovo_rpc, 'db_api').start()
+        mock.patch.object(ovo_rpc, 'BATCH_WINDOW', 0).start()
+        self.obj_class = mock.Mock(side_effect=lambda id: mock.Mock(id=id))
+        self.push_api = mock.Mock()
+        self.handler = ovo_rpc._ObjectChangeHandler(
+            'port', self.obj_class, self.push_api)
+
+    def _handle_event(self, port_id):
+        ctx = mock.Mock()
+        ctx.session.is_active = False
+        ctx.to_dict.return_value = context.get_admin_context().to_dict()
+        self.handler.handle_event('port', events.AFTER_UPDATE, None, ctx,
+                                  port_id=port_id)
+
+    def test_events_are_pushed_in_one_batch(self):
+        objs = [mock.Mock(id='p1'), mock.Mock(id='p2')]
+        self.obj_class.get_objects.return_value = objs
+        with mock.patch.object(self.handler._worker_pool, 'spawn',
+                               wraps=self.handler._worker_pool.spawn) as sp:
+            for port_id in ('p1', 'p2', 'p1', 'p3'):
+                self._handle_event(port_id)
+            self.handler.wait()
+        self.assertEqual(1, sp.call_count)
+        self.obj_class.get_objects.assert_called_once_with(
+            mock.ANY, _pager=None, id=['p1', 'p2', 'p3'])
+        self.assertEqual(2, self.push_api.push.call_count)
+        self.push_api.push.assert_any_call(mock.ANY, objs,
+                                           rpc_events.UPDATED)
+        deleted = self.push_api.push.call_args_list[1][0]
+        self.assertEqual(['p3'], [obj.id for obj in deleted[1]])
+        self.assertEqual(rpc_events.DELETED, deleted[2])
+
+    def test_events_after_dispatch_are_pushed_again(self):
+        self.obj_class.get_objects.return_value = [mock.Mock(id='p1')]
+        self._handle_event('p1')
+        self.handler.wait()
+        self._handle_event('p1')
+        self.handler.wait()
+        self.assertEqual(2, self.obj_class.get_objects.call_count)
+        self.assertEqual(2, self.push_api.push.call_count)
+
+    def test_large_batches_are_split(self):
+        self.obj_class.get_objects.return_value = []
+        with mock.patch.object(ovo_rpc, 'MAX_BATCH_SIZE', 2):
+            for port_id in ('p1', 'p2', 'p3'):
+                self._handle_event(port_id)
+            self.handler.wait()
+        self.assertEqual(2, self.obj_class.get_objects.call_count)
+        self.assertEqual(2, self.push_api.push.call_count)
@@ -31,6 +31,7 @@ from sqlalchemy.orm import exc
 from neutron.agent import rpc as agent_rpc
 from neutron.common import topics
 from neutron.db import provisioning_blocks
+from neutron.objects import base as obj_base
 from neutron.plugins.ml2.drivers import type_tunnel
 from neutron.plugins.ml2 import managers
 from neutron.plugins.ml2 import rpc as plugin_rpc
@@ -167,12 +168,13 @@ class RpcCallbacksTestCase(base.BaseTestCase):
     def _test_get_devices_list(self, callback, side_effect, expected):
         devices = [1, 2, 3, 4, 5]
         kwargs = {'host': 'fake_host', 'agent_id': 'fake_agent_id'}
+        context = mock.Mock()
         with mock.patch.object(self.callbacks, '_get_device_details',
                                side_effect=side_effect) as f:
-            res = callback('fake_context', devices=devices, **kwargs)
+            res = callback(context, devices=devices, **kwargs)
             self.assertEqual(expected, res)
             self.assertEqual(len(devices), f.call_count)
-            calls = [mock.call('fake_context', device=i,
+            calls = [mock.call(context, device=i,
                                port_context=mock.ANY, **kwargs)
                      for i in devices]
             f.assert_has_calls(calls)
@@ -185,7 +187,7 @@ class RpcCallbacksTestCase(base.BaseTestCase):
 
     def test_get_devices_details_list_with_empty_devices(self):
         with mock.patch.object(self.callbacks, 'get_device_details') as f:
-            res = self.callbacks.get_devices_details_list('fake_context')
+            res = self.callbacks.get_devices_details_list(mock.Mock())
             self.assertFalse(f.called)
             self.assertEqual([], res)
 
@@ -207,10 +209,24 @@ class RpcCallbacksTestCase(base.BaseTestCase):
     def test_get_devices_details_list_and_failed_devices_empty_dev(self):
         with mock.patch.object(self.callbacks, 'get_device_details') as f:
             res = self.callbacks.get_devices_details_list_and_failed_devices(
-                'fake_context')
+                mock.Mock())
             self.assertFalse(f.called)
             self.assertEqual({'devices': [], 'failed_devices': []}, res)
 
+    def test_get_devices_details_list_and_failed_devices_object_cache(self):
+        context = mock.Mock()
+
+        def get_bound_ports_contexts(*args):
+            self.assertIsNotNone(obj_base.get_object_cache(context))
+            return {}
+
+        self.plugin.get_bound_ports_contexts.side_effect = (
+            get_bound_ports_contexts)
+        self.callbacks.get_devices_details_list_and_failed_devices(
+            context, devices=['fake_device'])
+        self.assertTrue(self.plugin.get_bound_ports_contexts.called)
+        self.assertIsNone(obj_base.get_object_cache(context))
+
     def _test_update_device_not_bound_to_host(self, func):
         self.plugin.port_bound_to_host.return_value = False
         self.callbacks.notify_l2pop_port_wiring = mock.Mock()
@@ -427,6 +443,16 @@ class RpcApiTestCase(base.BaseTestCase):
                            host='fake_host',
                            version='1.4')
 
+    def test_tunnel_sync_with_sync_token(self):
+        rpcapi = agent_rpc.PluginApi(topics.PLUGIN)
+        self._test_rpc_api(rpcapi, None,
+                           'tunnel_sync', rpc_method='call',
+                           tunnel_ip='fake_tunnel_ip',
+                           tunnel_type=None,
+                           host='fake_host',
+                           sync_token='fake_token',
+                           version='1.6')
+
     def test_update_device_up(self):
         rpcapi = agent_rpc.PluginApi(topics.PLUGIN)
         self._test_rpc_api(rpcapi, None,
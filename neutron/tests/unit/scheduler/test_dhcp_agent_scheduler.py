@@ -22,6 +22,7 @@ from oslo_config import cfg
 from oslo_utils import importutils
 import testscenarios
 
+from neutron.db import agents_db
 from neutron.db import agentschedulers_db as sched_db
 from neutron.db import common_db_mixin
 from neutron.db import models_v2
@@ -430,6 +431,32 @@ class TestNetworksFailover(TestDhcpSchedulerBaseTestCase,
             notifier.network_added_to_agent.assert_called_with(
                 mock.ANY, self.network_id, agents[1].host)
 
+    def test_reschedule_networks_not_served_first(self):
+        agents = self._create_and_set_agents_down(['host-a', 'host-b'], 1)
+        self._save_networks(["foo-network-2"])
+        self._test_schedule_bind_network(agents, self.network_id)
+        self._test_schedule_bind_network([agents[0]], "foo-network-2")
+        with mock.patch.object(
+                self, '_reschedule_network_from_down_agents') as rn:
+            self.remove_networks_from_down_agents()
+        self.assertEqual(
+            [mock.call(mock.ANY, "foo-network-2", [agents[0].id], mock.ANY),
+             mock.call(mock.ANY, self.network_id, [agents[0].id], mock.ANY)],
+            rn.call_args_list)
+
+    def test_reschedule_networks_in_batches(self):
+        cfg.CONF.set_override('agent_reschedule_batch_size', 1)
+        agents = self._create_and_set_agents_down(['host-a', 'host-b'], 1)
+        self._save_networks(["foo-network-2"])
+        self._test_schedule_bind_network([agents[0]], self.network_id)
+        self._test_schedule_bind_network([agents[0]], "foo-network-2")
+        with mock.patch.object(
+                self, '_reschedule_network_from_down_agents',
+                side_effect=[Exception(), None]) as rn:
+            # just make sure that no exception is raised
+            self.remove_networks_from_down_agents()
+        self.assertEqual(2, rn.call_count)
+
     def _test_failed_rescheduling(self, rn_side_effect=None):
         agents = self._create_and_set_agents_down(['host-a', 'host-b'], 1)
         self._test_schedule_bind_network([agents[0]], self.network_id)
@@ -562,6 +589,26 @@ class DHCPAgentWeightSchedulerTestCase(test_plugin.Ml2PluginV2TestCase):
                                                               [net_id])
         self.assertEqual(2, len(agents))
 
+    def test_scheduler_with_agents_cache(self):
+        cfg.CONF.set_override('agent_cache_ttl', 60)
+        cfg.CONF.set_override('dhcp_agents_per_network', 2)
+        agents_db.AGENTS_CACHE.invalidate()
+        self.addCleanup(agents_db.AGENTS_CACHE.invalidate)
+        net_id = self._create_network()
+        helpers.register_dhcp_agent(HOST_C)
+        self.plugin.network_scheduler.schedule(self.plugin, self.ctx,
+                                               {'id': net_id})
+        helpers.register_dhcp_agent(HOST_D)
+        # the cached copy of the agent hosting the network is not a
+        # candidate anymore
+        agents_dict = (self.plugin.network_scheduler.resource_filter.
+                       _get_network_hostable_dhcp_agents(
+                           self.plugin, self.ctx, {'id': net_id}))
+        self.assertEqual([HOST_C], [agent.host for agent in
+                                    agents_dict['hosted_agents']])
+        self.assertEqual([HOST_D], [agent.host for agent in
+                                    agents_dict['hostable_agents']])
+
     def test_scheduler_no_active_agents(self):
         net_id = self._create_network()
         self.plugin.network_scheduler.schedule(self.plugin, self.ctx,
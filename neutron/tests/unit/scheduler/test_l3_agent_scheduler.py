@@ -24,6 +24,7 @@ from neutron_lib import context as n_context
 from neutron_lib.plugins import constants as plugin_constants
 from neutron_lib.plugins import directory
 from oslo_config import cfg
+from oslo_db import exception as db_exc
 from oslo_utils import importutils
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
@@ -31,6 +32,7 @@ from sqlalchemy import orm
 import testscenarios
 import testtools
 
+from neutron.db import agents_db
 from neutron.db import db_base_plugin_v2 as db_v2
 from neutron.db import l3_db
 from neutron.db import l3_dvr_ha_scheduler_db
@@ -1517,6 +1519,10 @@ class L3_HA_scheduler_db_mixinTestCase(L3HATestCaseMixin):
 
         self.assertEqual(agent_ids, [record['id'] for record in result])
 
+        result = self.plugin.get_l3_agents_num_routers(self.adminContext,
+                                                       agent_ids)
+        self.assertEqual(dict(zip(agent_ids, range(4))), result)
+
 
 class L3AgentSchedulerDbMixinTestCase(L3HATestCaseMixin):
 
@@ -1529,7 +1535,8 @@ class L3AgentSchedulerDbMixinTestCase(L3HATestCaseMixin):
         agents = self._setup_ha_router()[1]
         self.assertEqual(2, len(agents))
         self._set_l3_agent_dead(self.agent_id1)
-        with mock.patch.object(self.plugin, 'reschedule_router') as reschedule:
+        with mock.patch.object(self.plugin,
+                               'reschedule_routers') as reschedule:
             self.plugin.reschedule_routers_from_down_agents()
             self.assertFalse(reschedule.called)
 
@@ -1810,6 +1817,61 @@ class L3HALeastRoutersSchedulerTestCase(L3HATestCaseMixin):
         self.assertIn(self.agent_id3, agent_ids)
         self.assertIn(self.agent_id4, agent_ids)
 
+    def _get_routers_per_host(self, router_ids):
+        agents = self.plugin.get_l3_agents_hosting_routers(
+            self.adminContext, router_ids)
+        return collections.Counter(agent['host'] for agent in agents)
+
+    def test_schedule_routers_spreads_routers(self):
+        router_ids = [self._create_ha_router(ha=False)['id']
+                      for i in range(8)]
+        create_objects = rb_obj.RouterL3AgentBinding.create_objects
+        with mock.patch.object(rb_obj.RouterL3AgentBinding, 'create_objects',
+                               side_effect=create_objects) as create:
+            scheduled = self.plugin.schedule_routers(self.adminContext,
+                                                     router_ids)
+        self.assertEqual(1, create.call_count)
+        self.assertEqual(4, len(scheduled))
+        self.assertEqual(
+            set(router_ids),
+            set(r_id for r_ids in scheduled.values() for r_id in r_ids))
+        self.assertEqual([2] * 4,
+                         list(self._get_routers_per_host(router_ids).values()))
+
+    def test_schedule_routers_skips_scheduled_routers(self):
+        r1 = self._create_ha_router(ha=False)
+        r2 = self._create_ha_router(ha=False)
+        self.plugin.schedule_router(self.adminContext, r1['id'])
+        scheduled = self.plugin.schedule_routers(self.adminContext,
+                                                 [r1['id'], r2['id']])
+        self.assertEqual([[r2['id']]], list(scheduled.values()))
+        self.assertEqual(2, sum(
+            self._get_routers_per_host([r1['id'], r2['id']]).values()))
+
+    def test_schedule_routers_ha(self):
+        cfg.CONF.set_override('max_l3_agents_per_router', 2)
+        with mock.patch.object(self.plugin, 'schedule_router'):
+            router_ids = [self._create_ha_router()['id'] for i in range(2)]
+        self.plugin.schedule_routers(self.adminContext, router_ids)
+        for router_id in router_ids:
+            self.assertEqual(2, len(self.plugin.get_l3_agents_hosting_routers(
+                self.adminContext, [router_id])))
+        self.assertEqual([1] * 4,
+                         list(self._get_routers_per_host(router_ids).values()))
+
+    def test_schedule_routers_bulk_bind_failure(self):
+        r1 = self._create_ha_router(ha=False)
+        r2 = self._create_ha_router(ha=False)
+        with mock.patch.object(rb_obj.RouterL3AgentBinding, 'create_objects',
+                               side_effect=db_exc.DBReferenceError(
+                                   'table', 'constraint', 'key',
+                                   'key_table')):
+            scheduled = self.plugin.schedule_routers(self.adminContext,
+                                                     [r1['id'], r2['id']])
+        self.assertEqual(2, len(scheduled))
+        self.assertEqual(2, sum(
+            self._get_routers_per_host([r1['id'], r2['id']]).values()))
+
 
 class TestGetL3AgentsWithAgentModeFilter(testlib_api.SqlTestCase,
                                          L3SchedulerBaseMixin):
@@ -1885,6 +1947,28 @@ class TestGetL3AgentsWithAgentModeFilter(testlib_api.SqlTestCase,
         self.assertEqual(self.expected_agent_modes, returned_agent_modes)
 
 
+
+class TestGetL3AgentsWithAgentModeFilterFromCache(
+        TestGetL3AgentsWithAgentModeFilter):
+
+    def setUp(self):
+        super(TestGetL3AgentsWithAgentModeFilterFromCache, self).setUp()
+        cfg.CONF.set_override('agent_cache_ttl', 60)
+        agents_db.AGENTS_CACHE.invalidate()
+        self.addCleanup(agents_db.AGENTS_CACHE.invalidate)
+
+    def test_get_l3_agents(self):
+        cache = agents_db.AGENTS_CACHE
+        with mock.patch.object(cache, 'get_agents',
+                               wraps=cache.get_agents) as get_agents:
+            l3_agents = self.plugin.get_l3_agents(
+                self.adminContext, filters={'agent_modes': self.agent_modes})
+        self.assertTrue(get_agents.called)
+        # the cached agents are not ordered
+        self.assertEqual(sorted(self.expected_agent_modes),
+                         sorted(self._get_agent_mode(agent)
+                                for agent in l3_agents))
+
 class L3AgentAZLeastRoutersSchedulerTestCase(L3HATestCaseMixin):
 
     def setUp(self):
@@ -1970,6 +2054,28 @@ class L3AgentAZLeastRoutersSchedulerTestCase(L3HATestCaseMixin):
         self.assertEqual(2, host_num['az1-host1'])
         self.assertEqual(2, host_num['az1-host2'])
 
+    def test_az_scheduler_schedule_routers(self):
+        router_ids = [self._create_ha_router(ha=False, az_hints=['az1'])['id']
+                      for i in range(4)]
+        self.plugin.schedule_routers(self.adminContext, router_ids)
+        agents = self.plugin.get_l3_agents_hosting_routers(
+            self.adminContext, router_ids)
+        host_num = collections.Counter(agent['host'] for agent in agents)
+        self.assertEqual({'az1-host1': 2, 'az1-host2': 2}, host_num)
+
+    def test_az_scheduler_ha_schedule_routers(self):
+        cfg.CONF.set_override('max_l3_agents_per_router', 2)
+        with mock.patch.object(self.plugin, 'schedule_router'):
+            router_ids = [
+                self._create_ha_router(az_hints=['az1', 'az3'])['id']
+                for i in range(2)]
+        self.plugin.schedule_routers(self.adminContext, router_ids)
+        for router_id in router_ids:
+            agents = self.plugin.get_l3_agents_hosting_routers(
+                self.adminContext, [router_id])
+            self.assertEqual(set(['az1', 'az3']),
+                             set(a['availability_zone'] for a in agents))
+
     def test_az_scheduler_ha_az_hints(self):
         cfg.CONF.set_override('max_l3_agents_per_router', 2)
         r1 = self._create_ha_router(az_hints=['az1', 'az3'])
@@ -71,11 +71,10 @@ class OvsTrunkSkeletonTest(base.BaseTestCase):
 
         self.skeleton.handle_subports(mock.Mock(), 'SUBPORTS',
                                       self.subports, events.CREATED)
-        expected_calls = [
-            mock.call(subport.trunk_id, subport.port_id, mock.ANY,
-                      subport.segmentation_id)
-            for subport in self.subports]
-        self.trunk_manager.add_sub_port.assert_has_calls(expected_calls)
+        self.trunk_manager.add_sub_ports.assert_called_once_with(
+            self.trunk_id,
+            [(subport.port_id, mock.ANY, subport.segmentation_id)
+             for subport in self.subports])
 
     @mock.patch('neutron.agent.common.ovs_lib.OVSBridge')
     def test_handle_subports_deleted(self, br):
@@ -197,7 +197,7 @@ class TestOVSDBHandler(base.BaseTestCase):
             trunk_rpc = self.ovsdb_handler.trunk_rpc
             trunk_rpc.update_subport_bindings.return_value = (
                 self.subport_bindings)
-            self.trunk_manager.add_sub_port.side_effect = (
+            self.trunk_manager.add_sub_ports.side_effect = (
                 trunk_manager.TrunkManagerError(error='error'))
 
             status = self.ovsdb_handler.wire_subports_for_trunk(
@@ -205,6 +205,37 @@ class TestOVSDBHandler(base.BaseTestCase):
             self.assertTrue(f.call_count)
             self.assertEqual(constants.DEGRADED_STATUS, status)
 
+    @mock.patch('neutron.agent.common.ovs_lib.OVSBridge')
+    def test_wire_subports_for_trunk_subport_failure(self, br):
+        self.fake_subports.append(
+            trunk_obj.SubPort(
+                id=uuidutils.generate_uuid(),
+                port_id=uuidutils.generate_uuid(),
+                segmentation_id=2))
+        self.subport_bindings = {
+            'trunk_id': [
+                {'id': subport.port_id,
+                 'mac_address': 'mac'} for subport in self.fake_subports]}
+        failed_port_id = self.fake_subports[0].port_id
+        with mock.patch.object(
+                self.ovsdb_handler, '_update_trunk_metadata') as f:
+            trunk_rpc = self.ovsdb_handler.trunk_rpc
+            trunk_rpc.update_subport_bindings.return_value = (
+                self.subport_bindings)
+            self.trunk_manager.add_sub_ports.return_value = {
+                failed_port_id: trunk_manager.TrunkManagerError(
+                    error='error')}
+
+            status = self.ovsdb_handler.wire_subports_for_trunk(
+                None, 'trunk_id', self.fake_subports)
+        self.trunk_manager.add_sub_ports.assert_called_once_with(
+            'trunk_id',
+            [(subport.port_id, 'mac', subport.segmentation_id)
+             for subport in self.fake_subports])
+        f.assert_called_once_with(
+            None, None, 'trunk_id', [self.fake_subports[1].port_id])
+        self.assertEqual(constants.DEGRADED_STATUS, status)
+
     @mock.patch('neutron.agent.common.ovs_lib.OVSBridge')
     def test_wire_subports_for_trunk_ovsdb_failure(self, br):
         self.ovsdb_handler.trunk_rpc.update_subport_bindings.return_value = (
@@ -50,6 +50,30 @@ class TrunkManagerTestCase(base.BaseTestCase):
         with self._resource_fails(trunk_manager.SubPort, 'plug'):
             self.trunk_manager.add_sub_port(None, None, None, None)
 
+    def test_add_sub_ports_bridge_exists_fails(self):
+        trunk_manager.TrunkBridge.return_value.exists.side_effect = (
+            RuntimeError)
+        with testtools.ExpectedException(trunk_manager.TrunkManagerError):
+            self.trunk_manager.add_sub_ports(
+                'trunk_id', [('port_id', 'mac', 1)])
+
+    def test_add_sub_ports_single_transaction(self):
+        bridge = trunk_manager.TrunkBridge.return_value
+        batch = bridge.ovsdb_batch.return_value.__enter__.return_value
+        failed, plugged = mock.Mock(), mock.Mock()
+        failed.exception.return_value = RuntimeError('error')
+        plugged.exception.return_value = None
+        batch.add.side_effect = [failed, plugged]
+        with mock.patch.object(trunk_manager.SubPort, 'get_plug_commands',
+                               return_value=['cmd1', 'cmd2']):
+            errors = self.trunk_manager.add_sub_ports(
+                'trunk_id', [('port1', 'mac1', 1), ('port2', 'mac2', 2)])
+        bridge.ovsdb_batch.assert_called_once_with()
+        batch.add.assert_has_calls([mock.call('cmd1', 'cmd2')] * 2)
+        self.assertEqual(['port1'], list(errors))
+        self.assertIsInstance(errors['port1'],
+                              trunk_manager.TrunkManagerError)
+
     def test_remove_sub_port_unplug_fails(self):
         with self._resource_fails(trunk_manager.SubPort, 'unplug'):
             self.trunk_manager.remove_sub_port(None, None)